@@ -714,6 +714,7 @@ class FixedAssetAdmin(admin.ModelAdmin):
                     "useful_life_months",
                     "depreciation_method",
                     "depreciation_rate",
+                    "estimated_total_units",
                 ]
             },
         ),
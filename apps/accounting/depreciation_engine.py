@@ -0,0 +1,352 @@
+"""
+Batched fixed asset depreciation.
+
+A tenant's monthly depreciation is one run instead of a loop over assets:
+- The period's eligible assets are loaded with one query, already recorded
+  assets flagged in the same query
+- Amounts are calculated column-wise by a pure calculator over the asset
+  parameters (straight-line, declining balance, units of production)
+- Schedule rows are written with bulk_create and assets with batched
+  ``UPDATE ... FROM (VALUES ...)`` statements
+- The period is posted as a single journal entry with one debit/credit
+  pair of transactions per (expense account, accumulated depreciation
+  account) pair
+
+A DepreciationRun row keyed on (tenant, period) is written in the same
+transaction, so rerunning a period (a retried task, a second worker) does
+nothing. The amounts match FixedAsset.calculate_monthly_depreciation().
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from django_ledger.models import AccountModel, JournalEntryModel, LedgerModel, TransactionModel
+
+from apps.core.audit_models import AuditLog
+
+from .fixed_asset_models import DepreciationRun, DepreciationSchedule, FixedAsset
+from .models import JewelryEntity
+from .posting_outbox import Line, build_transactions, format_je_number, reserve_je_numbers
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT / UPDATE statement when writing schedules and assets
+DEFAULT_BATCH_SIZE = 2000
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+
+class AssetColumns(NamedTuple):
+    """Depreciation parameters of many assets, one sequence per parameter."""
+
+    method: Sequence[str]
+    acquisition_cost: Sequence[Decimal]
+    salvage_value: Sequence[Decimal]
+    useful_life_months: Sequence[int]
+    accumulated_depreciation: Sequence[Decimal]
+    current_book_value: Sequence[Decimal]
+    depreciation_rate: Sequence[Optional[Decimal]]
+    estimated_total_units: Sequence[Optional[Decimal]]
+    units_produced: Sequence[Optional[Decimal]]
+
+
+def _straight_line(cost, salvage, life, accumulated, book, rate, total_units, units):
+    if life == 0:
+        return ZERO
+    depreciable = cost - salvage
+    amount = depreciable / Decimal(str(life))
+    # Don't depreciate below salvage value
+    if accumulated + amount > depreciable:
+        amount = depreciable - accumulated
+    return amount.quantize(CENT)
+
+
+def _declining_balance(cost, salvage, life, accumulated, book, rate, total_units, units):
+    if not rate or life == 0:
+        return ZERO
+    monthly_rate = rate / Decimal("100.00") / Decimal("12.00")
+    amount = book * monthly_rate
+    # Don't depreciate below salvage value
+    if book - amount < salvage:
+        amount = book - salvage
+    return amount.quantize(CENT)
+
+
+def _units_of_production(cost, salvage, life, accumulated, book, rate, total_units, units):
+    if not total_units or not units:
+        return ZERO
+    depreciable = cost - salvage
+    amount = depreciable / total_units * units
+    # Don't depreciate below salvage value
+    if accumulated + amount > depreciable:
+        amount = depreciable - accumulated
+    return amount.quantize(CENT)
+
+
+METHODS = {
+    "STRAIGHT_LINE": _straight_line,
+    "DECLINING_BALANCE": _declining_balance,
+    "UNITS_OF_PRODUCTION": _units_of_production,
+}
+
+
+def calculate_depreciation(assets: AssetColumns) -> List[Decimal]:
+    """
+    Calculate one period's depreciation for many assets.
+
+    Pure: no database access. Fully depreciated assets and unknown methods
+    get 0.00; assets without units produced in the period (units of
+    production) get 0.00.
+
+    Returns:
+        list: The depreciation amount of each asset, in input order
+    """
+    amounts = []
+    for method, cost, salvage, life, accumulated, *rest in zip(*assets):
+        if accumulated >= cost - salvage:
+            amounts.append(ZERO)
+            continue
+        calculate = METHODS.get(method)
+        amounts.append(calculate(cost, salvage, life, accumulated, *rest) if calculate else ZERO)
+    return amounts
+
+
+def _eligible_assets(tenant, period_date: date) -> List[tuple]:
+    """The tenant's active assets, flagged when the period is already recorded."""
+    recorded = DepreciationSchedule.objects.filter(
+        fixed_asset=OuterRef("pk"), period_date=period_date
+    )
+    return list(
+        FixedAsset.objects.filter(tenant=tenant, status="ACTIVE")
+        .annotate(recorded=Exists(recorded))
+        .order_by("asset_number")
+        .values_list(
+            "id",
+            "asset_number",
+            "depreciation_method",
+            "acquisition_cost",
+            "salvage_value",
+            "useful_life_months",
+            "accumulated_depreciation",
+            "current_book_value",
+            "depreciation_rate",
+            "estimated_total_units",
+            "depreciation_expense_account",
+            "accumulated_depreciation_account",
+            "recorded",
+        )
+    )
+
+
+def _update_assets(assets: List[tuple], period_date: date, now) -> None:
+    """
+    Write (id, accumulated, book value, status) for many assets in one statement.
+
+    ``bulk_update`` builds a CASE expression per column that PostgreSQL
+    evaluates row by row, which is quadratic in the batch size.
+    """
+    values = ", ".join(["(%s::uuid, %s::numeric, %s::numeric, %s)"] * len(assets))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {FixedAsset._meta.db_table} AS a "
+            "SET accumulated_depreciation = v.accumulated, current_book_value = v.book_value, "
+            "last_depreciation_date = %s, status = v.status, updated_at = %s "
+            f"FROM (VALUES {values}) AS v (id, accumulated, book_value, status) "
+            "WHERE a.id = v.id",
+            [period_date, now] + [value for asset in assets for value in asset],
+        )
+
+
+def _post_journal_entry(ledger, entity, period_date: date, pairs: Dict, accounts: Dict):
+    """Create the period's consolidated journal entry and its transactions."""
+    lines = []
+    for (expense_account, accumulated_account), amount in sorted(pairs.items()):
+        lines.append(Line(expense_account, "debit", amount, "Depreciation expense"))
+        lines.append(Line(accumulated_account, "credit", amount, "Accumulated depreciation"))
+
+    journal_entry = JournalEntryModel(
+        ledger=ledger,
+        description=f"Depreciation - {period_date.strftime('%B %Y')}",
+        timestamp=timezone.localtime(),
+        posted=True,
+    )
+    transactions = build_transactions(journal_entry, lines, accounts)
+
+    fiscal_year = entity.get_fy_for_date(journal_entry.timestamp)
+    journal_entry.je_number = format_je_number(
+        fiscal_year, reserve_je_numbers(entity, fiscal_year, 1)
+    )
+    JournalEntryModel.objects.bulk_create([journal_entry])
+    TransactionModel.objects.bulk_create(transactions)
+    return journal_entry
+
+
+def run_depreciation(  # noqa: C901
+    tenant, period_date: date, user, units_produced: Optional[Dict] = None
+) -> Dict:
+    """
+    Depreciate all of a tenant's active assets for a period.
+
+    Args:
+        tenant: Tenant to process
+        period_date: Date of the depreciation period (typically month-end)
+        user: User running the depreciation
+        units_produced: Units produced in the period per asset id, for
+            units of production assets
+
+    Returns:
+        Dict with summary of the run and the uuid of its journal entry
+    """
+    units_produced = units_produced or {}
+    batch_size = getattr(settings, "ACCOUNTING_DEPRECIATION_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+    results = {
+        "period_date": period_date,
+        "total_assets": 0,
+        "processed": 0,
+        "skipped": 0,
+        "already_recorded": 0,
+        "errors": 0,
+        "total_depreciation": ZERO,
+        "journal_entry": None,
+        "details": [],
+    }
+
+    with transaction.atomic():
+        run, created = DepreciationRun.objects.select_for_update().get_or_create(
+            tenant=tenant, period_date=period_date, defaults={"created_by": user}
+        )
+        if not created:
+            logger.warning(f"Depreciation already run for {tenant.company_name} on {period_date}")
+            results["already_recorded"] = run.asset_count
+            results["journal_entry"] = run.journal_entry_id
+            return results
+
+        rows = _eligible_assets(tenant, period_date)
+        results["total_assets"] = len(rows)
+
+        pending = [row for row in rows if not row[-1]]
+        results["already_recorded"] = len(rows) - len(pending)
+
+        # Columns method .. estimated_total_units, then the period's units
+        columns = list(zip(*(row[2:10] for row in pending))) or [()] * 8
+        amounts = calculate_depreciation(
+            AssetColumns(*columns, [units_produced.get(row[0]) for row in pending])
+        )
+
+        jewelry_entity = (
+            JewelryEntity.objects.select_related("ledger_entity").filter(tenant=tenant).first()
+        )
+        entity = jewelry_entity.ledger_entity if jewelry_entity else None
+        ledger = LedgerModel.objects.filter(entity=entity).first() if entity else None
+        accounts = {}
+        if ledger:
+            accounts = {
+                account.code: account
+                for account in AccountModel.objects.filter(
+                    coa_model__entity=entity, active=True
+                ).select_related("coa_model")
+            }
+        else:
+            logger.error(f"No ledger found for {tenant.company_name}, posting no journal entry")
+
+        depreciated = []
+        pairs = defaultdict(Decimal)
+        for row, amount in zip(pending, amounts):
+            if amount == ZERO:
+                results["skipped"] += 1
+                continue
+            if ledger:
+                missing = [
+                    code
+                    for code in row[10:12]
+                    if code not in accounts or not accounts[code].can_transact()
+                ]
+                if missing:
+                    results["errors"] += 1
+                    results["details"].append(
+                        {
+                            "asset_number": row[1],
+                            "status": "error",
+                            "error": f"Account {', '.join(missing)} not found or inactive",
+                        }
+                    )
+                    continue
+                pairs[(row[10], row[11])] += amount
+            depreciated.append((row, amount))
+
+        journal_entry = None
+        if pairs:
+            journal_entry = _post_journal_entry(ledger, entity, period_date, pairs, accounts)
+
+        now = timezone.now()
+        schedules = []
+        assets = []
+        for row, amount in depreciated:
+            asset_id, cost, salvage, accumulated = row[0], row[3], row[4], row[6] + amount
+            schedules.append(
+                DepreciationSchedule(
+                    tenant=tenant,
+                    fixed_asset_id=asset_id,
+                    period_date=period_date,
+                    period_month=period_date.month,
+                    period_year=period_date.year,
+                    depreciation_amount=amount,
+                    accumulated_depreciation=accumulated,
+                    book_value=cost - accumulated,
+                    journal_entry=journal_entry,
+                    created_by=user,
+                )
+            )
+            assets.append(
+                (
+                    asset_id,
+                    accumulated,
+                    cost - accumulated,
+                    "FULLY_DEPRECIATED" if accumulated >= cost - salvage else "ACTIVE",
+                )
+            )
+            results["total_depreciation"] += amount
+
+        DepreciationSchedule.objects.bulk_create(schedules, batch_size=batch_size)
+        for start in range(0, len(assets), batch_size):
+            _update_assets(assets[start : start + batch_size], period_date, now)
+
+        results["processed"] = len(depreciated)
+        results["journal_entry"] = journal_entry.uuid if journal_entry else None
+        run.asset_count = len(depreciated)
+        run.total_depreciation = results["total_depreciation"]
+        run.journal_entry = journal_entry
+        run.save(update_fields=["asset_count", "total_depreciation", "journal_entry"])
+
+        # Audit logging (Requirement 5.7)
+        AuditLog.objects.create(
+            tenant=tenant,
+            user=user,
+            category="ACCOUNTING",
+            action="BATCH_PROCESS",
+            severity="INFO",
+            description=(
+                f"Monthly depreciation run for {period_date.strftime('%B %Y')} - "
+                f"Processed: {results['processed']}, "
+                f"Skipped: {results['skipped']}, "
+                f"Already Recorded: {results['already_recorded']}, "
+                f"Errors: {results['errors']}, "
+                f"Total Depreciation: ${results['total_depreciation']}"
+            ),
+        )
+
+    logger.info(
+        f"Monthly depreciation run completed for {tenant.company_name} - "
+        f"Period: {period_date}, Processed: {results['processed']}"
+    )
+    return results
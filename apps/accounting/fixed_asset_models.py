@@ -159,6 +159,14 @@ class FixedAsset(models.Model):
         validators=[MinValueValidator(Decimal("0.01"))],
         help_text="Depreciation rate for declining balance method (e.g., 200 for double declining)",
     )
+    estimated_total_units = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(Decimal("0.01"))],
+        help_text="Total units the asset is expected to produce (units of production method)",
+    )
 
     # Current Status
     status = models.CharField(
@@ -627,6 +635,67 @@ class DepreciationSchedule(models.Model):
         super().save(*args, **kwargs)
 
 
+class DepreciationRun(models.Model):
+    """
+    A tenant's depreciation run for one period.
+
+    Written in the same transaction as the run's schedules and its single
+    consolidated journal entry, so a period is depreciated at most once per
+    tenant however many times the run is started.
+    """
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name="depreciation_runs",
+        help_text="Tenant whose assets were depreciated",
+    )
+    period_date = models.DateField(
+        help_text="Date of the depreciation period (typically month-end)",
+    )
+    journal_entry = models.ForeignKey(
+        JournalEntryModel,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="depreciation_runs",
+        help_text="Consolidated journal entry for the period",
+    )
+    asset_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of assets depreciated",
+    )
+    total_depreciation = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Total depreciation posted",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name="depreciation_runs",
+        help_text="User who ran the depreciation",
+    )
+
+    objects = TenantManager()
+
+    class Meta:
+        db_table = "accounting_depreciation_runs"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "period_date"], name="unique_depreciation_run_period"
+            ),
+        ]
+        ordering = ["-period_date"]
+        verbose_name = "Depreciation Run"
+        verbose_name_plural = "Depreciation Runs"
+
+    def __str__(self):
+        return f"{self.tenant_id} - {self.period_date} - {self.total_depreciation}"
+
+
 class AssetDisposal(models.Model):
     """
     Asset disposal tracking.
@@ -0,0 +1,98 @@
+# Generated by Django 4.2.26 on 2026-10-19 01:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_ledger", "0016_remove_accountmodel_django_ledg_coa_mod_e19964_idx_and_more"),
+        ("core", "0030_partition_audit_logs"),
+        ("accounting", "0009_add_fixed_asset_models"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingPosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "source_type",
+                    models.CharField(
+                        choices=[
+                            ("SALE", "Sale"),
+                            ("PURCHASE_ORDER", "Purchase Order"),
+                            ("PAYMENT", "Payment"),
+                            ("EXPENSE", "Expense"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "source_id",
+                    models.UUIDField(help_text="Primary key of the sale, PO, payment or expense"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("POSTED", "Posted"),
+                            ("SKIPPED", "Skipped"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("posted_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "journal_entry",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Journal entry created for this posting",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="django_ledger.journalentrymodel",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_postings",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Pending Posting",
+                "verbose_name_plural": "Pending Postings",
+                "db_table": "accounting_pending_postings",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "PENDING")),
+                        fields=["tenant", "id"],
+                        name="pending_posting_queue_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="pendingposting",
+            constraint=models.UniqueConstraint(
+                fields=("tenant", "source_type", "source_id"), name="unique_pending_posting_source"
+            ),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.2.26 on 2026-10-19 03:53
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0030_partition_audit_logs"),
+        ("django_ledger", "0016_remove_accountmodel_django_ledg_coa_mod_e19964_idx_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("accounting", "0010_pending_postings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fixedasset",
+            name="estimated_total_units",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                help_text="Total units the asset is expected to produce (units of production method)",
+                max_digits=14,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(Decimal("0.01"))],
+            ),
+        ),
+        migrations.CreateModel(
+            name="DepreciationRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "period_date",
+                    models.DateField(
+                        help_text="Date of the depreciation period (typically month-end)"
+                    ),
+                ),
+                (
+                    "asset_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Number of assets depreciated"
+                    ),
+                ),
+                (
+                    "total_depreciation",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Total depreciation posted",
+                        max_digits=14,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        help_text="User who ran the depreciation",
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="depreciation_runs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "journal_entry",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Consolidated journal entry for the period",
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="depreciation_runs",
+                        to="django_ledger.journalentrymodel",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        help_text="Tenant whose assets were depreciated",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="depreciation_runs",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Depreciation Run",
+                "verbose_name_plural": "Depreciation Runs",
+                "db_table": "accounting_depreciation_runs",
+                "ordering": ["-period_date"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="depreciationrun",
+            constraint=models.UniqueConstraint(
+                fields=("tenant", "period_date"), name="unique_depreciation_run_period"
+            ),
+        ),
+    ]
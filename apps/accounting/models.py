@@ -19,11 +19,19 @@ from .bank_models import BankAccount  # noqa: F401
 from .bill_models import Bill, BillLine, BillPayment  # noqa: F401
 
 # Import fixed asset models for Django to recognize them
-from .fixed_asset_models import AssetDisposal, DepreciationSchedule, FixedAsset  # noqa: F401
+from .fixed_asset_models import (  # noqa: F401
+    AssetDisposal,
+    DepreciationRun,
+    DepreciationSchedule,
+    FixedAsset,
+)
 
 # Import invoice models for Django to recognize them
 from .invoice_models import CreditMemo, Invoice, InvoiceLine, InvoicePayment  # noqa: F401
 
+# Import posting outbox models for Django to recognize them
+from .posting_models import PendingPosting  # noqa: F401
+
 # Import transaction models for Django to recognize them
 from .transaction_models import Expense, Payment, PurchaseOrder  # noqa: F401
 
@@ -0,0 +1,86 @@
+"""
+Posting outbox for automatic journal entries.
+
+Business transactions (sales, purchase orders, payments, expenses) no longer
+post to the ledger inside the request. Their signals write one compact
+PendingPosting row in the same transaction, and a Celery worker drains the
+outbox in batches per tenant (see posting_outbox.py).
+"""
+
+from django.db import models
+
+from django_ledger.models import JournalEntryModel
+
+from apps.core.models import Tenant
+
+
+class PendingPosting(models.Model):
+    """
+    A business transaction waiting to be posted to the ledger.
+
+    There is at most one posting per source, so repeated saves of a sale and
+    duplicate task deliveries never post the same transaction twice.
+    """
+
+    SALE = "SALE"
+    PURCHASE_ORDER = "PURCHASE_ORDER"
+    PAYMENT = "PAYMENT"
+    EXPENSE = "EXPENSE"
+
+    SOURCE_TYPE_CHOICES = [
+        (SALE, "Sale"),
+        (PURCHASE_ORDER, "Purchase Order"),
+        (PAYMENT, "Payment"),
+        (EXPENSE, "Expense"),
+    ]
+
+    PENDING = "PENDING"
+    POSTED = "POSTED"
+    SKIPPED = "SKIPPED"
+    FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (POSTED, "Posted"),
+        (SKIPPED, "Skipped"),
+        (FAILED, "Failed"),
+    ]
+
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name="pending_postings")
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPE_CHOICES)
+    source_id = models.UUIDField(help_text="Primary key of the sale, PO, payment or expense")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    journal_entry = models.ForeignKey(
+        JournalEntryModel,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="Journal entry created for this posting",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    posted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "accounting_pending_postings"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "source_type", "source_id"],
+                name="unique_pending_posting_source",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["tenant", "id"],
+                name="pending_posting_queue_idx",
+                condition=models.Q(status="PENDING"),
+            ),
+        ]
+        ordering = ["id"]
+        verbose_name = "Pending Posting"
+        verbose_name_plural = "Pending Postings"
+
+    def __str__(self):
+        return f"{self.get_source_type_display()} {self.source_id} ({self.status})"
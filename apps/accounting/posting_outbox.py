@@ -0,0 +1,508 @@
+"""
+Deferred, batched posting of automatic journal entries.
+
+Signals only enqueue a PendingPosting (one insert in the request's
+transaction). The outbox is drained per tenant in batches:
+- The configuration, ledger and account map are loaded once per batch
+- Sources are fetched with one query per source type, sale items prefetched
+- Journal entry numbers are reserved as a block with one state update
+- Journal entries and transactions are written with bulk_create
+- Postings are claimed with SELECT ... FOR UPDATE SKIP LOCKED and marked in
+  the same transaction as their journal entry, so a duplicate task delivery
+  finds nothing left to post
+
+The resulting entries match AccountingService.create_*_journal_entry().
+With ACCOUNTING_POSTING_SYNC enabled (tests, local development) each
+posting is drained as soon as it is enqueued.
+"""
+
+import logging
+from collections import Counter as OutcomeCounter
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from django_ledger.io.roles import ASSET_CA_CASH
+from django_ledger.models import (
+    AccountModel,
+    EntityStateModel,
+    JournalEntryModel,
+    LedgerModel,
+    TransactionModel,
+)
+from django_ledger.settings import (
+    DJANGO_LEDGER_DOCUMENT_NUMBER_PADDING,
+    DJANGO_LEDGER_JE_NUMBER_NO_UNIT_PREFIX,
+    DJANGO_LEDGER_JE_NUMBER_PREFIX,
+)
+from prometheus_client import Counter, Gauge
+
+from apps.core.tenant_context import tenant_context
+from apps.sales.models import Sale
+
+from .models import AccountingConfiguration, JewelryEntity
+from .posting_models import PendingPosting
+from .services import AccountingService
+from .transaction_models import Expense, Payment, PurchaseOrder
+
+logger = logging.getLogger(__name__)
+
+# Postings claimed per transaction
+DEFAULT_BATCH_SIZE = 500
+
+# Accounts Payable, as used by AccountingService
+PAYABLE_ACCOUNT_CODE = "2001"
+
+POSTINGS = Counter(
+    "accounting_postings_total",
+    "Outbox postings processed by outcome",
+    ["outcome"],
+)
+OUTBOX_PENDING = Gauge(
+    "accounting_posting_outbox_pending",
+    "Postings waiting in the outbox when last drained",
+)
+OUTBOX_LAG = Gauge(
+    "accounting_posting_outbox_lag_seconds",
+    "Age of the oldest posting waiting in the outbox when last drained",
+)
+
+
+class Line(NamedTuple):
+    """One transaction of a journal entry, by account code."""
+
+    account_code: str
+    tx_type: str
+    amount: Decimal
+    description: str
+
+
+class PostingError(Exception):
+    """A posting that cannot be turned into a valid journal entry."""
+
+
+def sale_entry(sale, config: AccountingConfiguration) -> Tuple[str, List[Line]]:
+    """Revenue and COGS lines for a completed sale."""
+    number = sale.sale_number
+    lines = []
+
+    payment_method = sale.payment_method.upper()
+    if payment_method == "CASH":
+        lines.append(
+            Line(
+                config.default_cash_account,
+                "debit",
+                sale.total,
+                f"Cash received for sale #{number}",
+            )
+        )
+    elif payment_method == "CARD":
+        lines.append(
+            Line(
+                config.default_card_account, "debit", sale.total, f"Card payment for sale #{number}"
+            )
+        )
+    elif payment_method == "STORE_CREDIT":
+        # Store credit uses the cash account as a placeholder, as in AccountingService
+        lines.append(
+            Line(
+                config.default_cash_account,
+                "debit",
+                sale.total,
+                f"Store credit used for sale #{number}",
+            )
+        )
+
+    if sale.subtotal > 0:
+        lines.append(
+            Line(
+                config.default_sales_account,
+                "credit",
+                sale.subtotal,
+                f"Sales revenue for sale #{number}",
+            )
+        )
+    if sale.tax > 0:
+        lines.append(
+            Line(
+                config.default_tax_account,
+                "credit",
+                sale.tax,
+                f"Sales tax collected for sale #{number}",
+            )
+        )
+
+    total_cogs = sum(
+        (item.inventory_item.cost_price * item.quantity for item in sale.items.all()),
+        Decimal("0.00"),
+    )
+    if total_cogs > 0:
+        lines.append(
+            Line(
+                config.default_cogs_account,
+                "debit",
+                total_cogs,
+                f"Cost of goods sold for sale #{number}",
+            )
+        )
+        lines.append(
+            Line(
+                config.default_inventory_account,
+                "credit",
+                total_cogs,
+                f"Inventory reduction for sale #{number}",
+            )
+        )
+
+    return f"Sale #{number}", lines
+
+
+def purchase_order_entry(purchase_order, config: AccountingConfiguration) -> Tuple[str, List[Line]]:
+    """Inventory and accounts payable lines for a completed purchase order."""
+    number = purchase_order.po_number
+    amount = purchase_order.total_amount
+    return f"Purchase Order #{number}", [
+        Line(
+            config.default_inventory_account,
+            "debit",
+            amount,
+            f"Inventory purchase - PO #{number}",
+        ),
+        Line(PAYABLE_ACCOUNT_CODE, "credit", amount, f"Amount owed to supplier - PO #{number}"),
+    ]
+
+
+def payment_entry(payment, config: AccountingConfiguration) -> Tuple[str, List[Line]]:
+    """Accounts payable and cash lines for a supplier payment."""
+    supplier = payment.supplier_name
+    if payment.payment_method.upper() == "CASH":
+        account_description = "Cash payment"
+    else:
+        account_description = f"{payment.payment_method} payment"
+    return f"Payment #{payment.payment_number}", [
+        Line(
+            PAYABLE_ACCOUNT_CODE,
+            "debit",
+            payment.amount,
+            f"Payment to supplier - {supplier}",
+        ),
+        Line(
+            config.default_cash_account,
+            "credit",
+            payment.amount,
+            f"{account_description} to {supplier}",
+        ),
+    ]
+
+
+def expense_entry(expense, config: AccountingConfiguration) -> Tuple[str, List[Line]]:
+    """Expense and cash lines for a business expense."""
+    if expense.payment_method.upper() == "CASH":
+        account_description = "Cash expense"
+    else:
+        account_description = f"{expense.payment_method} expense"
+    return f"Expense: {expense.description}", [
+        Line(
+            AccountingService._get_expense_account_code(expense.category),
+            "debit",
+            expense.amount,
+            f"{expense.category}: {expense.description}",
+        ),
+        Line(
+            config.default_cash_account,
+            "credit",
+            expense.amount,
+            f"{account_description}: {expense.description}",
+        ),
+    ]
+
+
+# Source type -> (model, queryset options, journal entry builder)
+SOURCES = {
+    PendingPosting.SALE: (Sale, ("items__inventory_item",), sale_entry),
+    PendingPosting.PURCHASE_ORDER: (PurchaseOrder, (), purchase_order_entry),
+    PendingPosting.PAYMENT: (Payment, (), payment_entry),
+    PendingPosting.EXPENSE: (Expense, (), expense_entry),
+}
+
+
+def enqueue_posting(source_type: str, instance) -> None:
+    """
+    Add a business transaction to the outbox.
+
+    Enqueueing is a single insert that does nothing if the source is already
+    queued or posted.
+    """
+    PendingPosting.objects.bulk_create(
+        [
+            PendingPosting(
+                tenant_id=instance.tenant_id, source_type=source_type, source_id=instance.pk
+            )
+        ],
+        ignore_conflicts=True,
+    )
+    if getattr(settings, "ACCOUNTING_POSTING_SYNC", False):
+        post_pending(instance.tenant_id, source=(source_type, instance.pk))
+
+
+def _fetch_sources(postings: List[PendingPosting]) -> Dict[Tuple[str, UUID], object]:
+    """Load the source of every posting with one query per source type."""
+    ids_by_type = defaultdict(list)
+    for posting in postings:
+        ids_by_type[posting.source_type].append(posting.source_id)
+
+    sources = {}
+    for source_type, ids in ids_by_type.items():
+        model, prefetch, _ = SOURCES[source_type]
+        for instance in model.objects.filter(pk__in=ids).prefetch_related(*prefetch):
+            sources[(source_type, instance.pk)] = instance
+    return sources
+
+
+def build_transactions(
+    journal_entry: JournalEntryModel, lines: List[Line], accounts: Dict[str, AccountModel]
+) -> List[TransactionModel]:
+    """
+    Turn lines into transactions, with the checks JournalEntryModel.save()
+    and the TransactionModel pre_save hook would make.
+    """
+    transactions = []
+    balances = {"debit": Decimal("0.00"), "credit": Decimal("0.00")}
+    for line in lines:
+        account = accounts.get(line.account_code)
+        if account is None:
+            raise PostingError(f"Account {line.account_code} not found")
+        if not account.can_transact():
+            raise PostingError(f"Account {line.account_code} cannot transact")
+        balances[line.tx_type] += line.amount
+        transactions.append(
+            TransactionModel(
+                journal_entry=journal_entry,
+                account=account,
+                tx_type=line.tx_type,
+                amount=line.amount,
+                description=line.description[:100],
+            )
+        )
+    if balances["debit"] != balances["credit"]:
+        raise PostingError("Transaction balances are not valid")
+
+    roles = {transaction.account.role for transaction in transactions}
+    if ASSET_CA_CASH in roles:
+        try:
+            journal_entry.activity = JournalEntryModel.get_activity_from_roles(
+                role_set=roles - {ASSET_CA_CASH}
+            )
+        except ValidationError as e:
+            raise PostingError(e.message)
+    return transactions
+
+
+def reserve_je_numbers(entity, fiscal_year: int, count: int) -> int:
+    """
+    Reserve `count` consecutive journal entry numbers for a fiscal year.
+
+    Uses the same EntityStateModel sequence as JournalEntryModel, locked
+    once for the whole block.
+
+    Returns:
+        int: The first reserved sequence number
+    """
+    state = (
+        EntityStateModel.objects.select_for_update()
+        .filter(
+            entity_model_id=entity.uuid,
+            entity_unit_id=None,
+            fiscal_year=fiscal_year,
+            key=EntityStateModel.KEY_JOURNAL_ENTRY,
+        )
+        .first()
+    )
+    if state is None:
+        EntityStateModel.objects.create(
+            entity_model_id=entity.uuid,
+            entity_unit_id=None,
+            fiscal_year=fiscal_year,
+            key=EntityStateModel.KEY_JOURNAL_ENTRY,
+            sequence=count,
+        )
+        return 1
+    first = state.sequence + 1
+    state.sequence += count
+    state.save(update_fields=["sequence"])
+    return first
+
+
+def format_je_number(fiscal_year: int, sequence: int) -> str:
+    padded = str(sequence).zfill(DJANGO_LEDGER_DOCUMENT_NUMBER_PADDING)
+    return (
+        f"{DJANGO_LEDGER_JE_NUMBER_PREFIX}-{fiscal_year}-"
+        f"{DJANGO_LEDGER_JE_NUMBER_NO_UNIT_PREFIX}-{padded}"
+    )
+
+
+def _mark(posting: PendingPosting, status: str, error: str = "") -> None:
+    posting.status = status
+    posting.attempts += 1
+    posting.last_error = error
+    if status == PendingPosting.POSTED:
+        posting.posted_at = timezone.now()
+
+
+def post_pending(  # noqa: C901
+    tenant_id: UUID,
+    source: Optional[Tuple[str, UUID]] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Post one batch of a tenant's pending postings.
+
+    Must run with the tenant's RLS context set (sources are tenant data).
+
+    Args:
+        tenant_id: Tenant whose outbox is drained
+        source: Only post this (source_type, source_id)
+        batch_size: Most postings claimed; ACCOUNTING_POSTING_BATCH_SIZE by default
+
+    Returns:
+        dict: Number of postings per outcome ("posted", "skipped", "failed")
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, "ACCOUNTING_POSTING_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+    outcomes = OutcomeCounter()
+    with transaction.atomic():
+        queryset = PendingPosting.objects.filter(tenant_id=tenant_id, status=PendingPosting.PENDING)
+        if source is not None:
+            queryset = queryset.filter(source_type=source[0], source_id=source[1])
+        postings = list(queryset.select_for_update(skip_locked=True).order_by("id")[:batch_size])
+        if not postings:
+            return {}
+
+        config = AccountingConfiguration.objects.filter(tenant_id=tenant_id).first()
+        jewelry_entity = (
+            JewelryEntity.objects.select_related("ledger_entity")
+            .filter(tenant_id=tenant_id)
+            .first()
+        )
+        entity = jewelry_entity.ledger_entity if jewelry_entity else None
+        ledger = LedgerModel.objects.filter(entity=entity).first() if entity else None
+
+        skip_reason = None
+        if config is None:
+            skip_reason = "No accounting configuration"
+        elif not config.use_automatic_journal_entries:
+            skip_reason = "Automatic journal entries disabled"
+        elif ledger is None:
+            skip_reason = "No accounting entity or ledger"
+
+        if skip_reason:
+            for posting in postings:
+                _mark(posting, PendingPosting.SKIPPED, skip_reason)
+        else:
+            accounts = {
+                account.code: account
+                for account in AccountModel.objects.filter(coa_model__entity=entity).select_related(
+                    "coa_model"
+                )
+            }
+            sources = _fetch_sources(postings)
+
+            entries = []
+            for posting in postings:
+                instance = sources.get((posting.source_type, posting.source_id))
+                if instance is None:
+                    _mark(posting, PendingPosting.SKIPPED, "Source no longer exists")
+                    continue
+                description, lines = SOURCES[posting.source_type][2](instance, config)
+                journal_entry = JournalEntryModel(
+                    ledger=ledger,
+                    description=description[:70],
+                    timestamp=timezone.localtime(posting.created_at),
+                    posted=True,
+                )
+                try:
+                    transactions = build_transactions(journal_entry, lines, accounts)
+                except PostingError as e:
+                    logger.error(
+                        f"Failed to post {posting.source_type} {posting.source_id}: {str(e)}"
+                    )
+                    _mark(posting, PendingPosting.FAILED, str(e))
+                    continue
+                entries.append((posting, journal_entry, transactions))
+
+            by_fiscal_year = defaultdict(list)
+            for _, journal_entry, _ in entries:
+                by_fiscal_year[entity.get_fy_for_date(journal_entry.timestamp)].append(
+                    journal_entry
+                )
+            for fiscal_year, journal_entries in sorted(by_fiscal_year.items()):
+                first = reserve_je_numbers(entity, fiscal_year, len(journal_entries))
+                for offset, journal_entry in enumerate(journal_entries):
+                    journal_entry.je_number = format_je_number(fiscal_year, first + offset)
+
+            JournalEntryModel.objects.bulk_create([entry[1] for entry in entries])
+            TransactionModel.objects.bulk_create(
+                [transaction for entry in entries for transaction in entry[2]]
+            )
+            for posting, journal_entry, _ in entries:
+                posting.journal_entry = journal_entry
+                _mark(posting, PendingPosting.POSTED)
+
+        PendingPosting.objects.bulk_update(
+            postings, ["status", "attempts", "last_error", "journal_entry", "posted_at"]
+        )
+
+    for posting in postings:
+        outcomes[posting.status.lower()] += 1
+    for outcome, count in outcomes.items():
+        POSTINGS.labels(outcome=outcome).inc(count)
+    return dict(outcomes)
+
+
+def update_outbox_metrics() -> Dict:
+    """Set the outbox backlog and lag gauges."""
+    stats = PendingPosting.objects.filter(status=PendingPosting.PENDING).aggregate(
+        pending=Count("id"), oldest=Min("created_at")
+    )
+    lag = (timezone.now() - stats["oldest"]).total_seconds() if stats["oldest"] else 0
+    OUTBOX_PENDING.set(stats["pending"])
+    OUTBOX_LAG.set(lag)
+    return {"pending": stats["pending"], "lag_seconds": lag}
+
+
+def drain_outbox(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Post every pending posting, tenant by tenant, in batches.
+
+    Returns:
+        dict: Number of postings per outcome across all tenants
+    """
+    if batch_size is None:
+        batch_size = getattr(settings, "ACCOUNTING_POSTING_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+    tenant_ids = list(
+        PendingPosting.objects.filter(status=PendingPosting.PENDING)
+        .order_by()
+        .values_list("tenant_id", flat=True)
+        .distinct()
+    )
+    totals = OutcomeCounter()
+    for tenant_id in tenant_ids:
+        with tenant_context(tenant_id):
+            while True:
+                outcomes = post_pending(tenant_id, batch_size=batch_size)
+                totals.update(outcomes)
+                # Fewer than a full batch: drained, or the rest is locked elsewhere
+                if sum(outcomes.values()) < batch_size:
+                    break
+
+    update_outbox_metrics()
+    return dict(totals)
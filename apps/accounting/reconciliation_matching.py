@@ -0,0 +1,275 @@
+"""
+Set-based matching of bank transactions to ledger transactions.
+
+Matching one bank transaction at a time costs a ledger query per statement
+line. This engine matches a whole statement at once:
+1. Loads every candidate ledger transaction for the statement's date range
+   (and the bank account's GL account, when set) with one query
+2. Indexes them by (amount in cents, direction) with a sorted date list, so
+   the candidates for a bank line are found with a binary search
+3. Scores every candidate pair in a single pass
+4. Resolves conflicts globally, best score first, so a journal entry is
+   never matched to two bank transactions
+
+Confidence uses the rules of the original matcher: 0.5 for an exact amount,
++0.3 for the same date and +0.2 when one description contains the other.
+Ties are broken by date distance, reference and description token overlap,
+then ids, so results are deterministic.
+
+Requirements: 4.3
+"""
+
+import bisect
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django_ledger.models import TransactionModel
+
+# Matching defaults
+DATE_WINDOW_DAYS = 3
+AUTO_MATCH_CONFIDENCE = 0.9
+MAX_SUGGESTIONS = 5
+BULK_BATCH_SIZE = 2000
+
+# Ledger direction of money entering / leaving the bank account
+BANK_TO_LEDGER_DIRECTION = {"CREDIT": "debit", "DEBIT": "credit"}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def to_cents(amount) -> int:
+    """Convert a money amount to integer cents."""
+    return int((Decimal(amount) * 100).quantize(Decimal("1")))
+
+
+def tokenize(text: str) -> Set[str]:
+    """Get the keywords of a description (words longer than 3 characters)."""
+    return {token for token in _TOKEN_RE.findall((text or "").lower()) if len(token) > 3}
+
+
+@dataclass
+class LedgerLine:
+    """A candidate ledger transaction, prepared for matching."""
+
+    transaction: TransactionModel
+    date: date
+    description: str
+    tokens: Set[str] = field(default_factory=set)
+
+    @property
+    def sort_key(self):
+        return (self.date, str(self.transaction.pk))
+
+
+class LedgerIndex:
+    """Ledger lines indexed by (amount in cents, direction) and date."""
+
+    def __init__(self, lines: Iterable[LedgerLine], directional: bool):
+        self.directional = directional
+        buckets: Dict[Tuple[int, Optional[str]], List[LedgerLine]] = {}
+        for line in lines:
+            direction = line.transaction.tx_type if directional else None
+            buckets.setdefault((to_cents(line.transaction.amount), direction), []).append(line)
+
+        self._lines = {}
+        self._dates = {}
+        for key, bucket in buckets.items():
+            bucket.sort(key=lambda line: line.sort_key)
+            self._lines[key] = bucket
+            self._dates[key] = [line.date for line in bucket]
+
+    def candidates(self, amount, transaction_type: str, start: date, end: date) -> List[LedgerLine]:
+        """Get the lines with this amount and direction dated within [start, end]."""
+        direction = BANK_TO_LEDGER_DIRECTION.get(transaction_type) if self.directional else None
+        key = (to_cents(amount), direction)
+        dates = self._dates.get(key)
+        if not dates:
+            return []
+        return self._lines[key][bisect.bisect_left(dates, start) : bisect.bisect_right(dates, end)]
+
+
+def load_ledger_lines(
+    tenant_id, start: date, end: date, gl_account_id=None, posted_only: bool = False
+) -> List[LedgerLine]:
+    """
+    Load every candidate ledger transaction for a date range with one query.
+
+    Args:
+        tenant_id: Tenant whose ledger is searched
+        start: First transaction date (the matching window is added)
+        end: Last transaction date (the matching window is added)
+        gl_account_id: Optional GL account the bank account posts to
+        posted_only: Only consider posted journal entries
+
+    Returns:
+        list: LedgerLine for every candidate ledger transaction
+    """
+    queryset = TransactionModel.objects.filter(
+        journal_entry__ledger__entity__jewelry_entity__tenant_id=tenant_id,
+        journal_entry__timestamp__date__gte=start - timedelta(days=DATE_WINDOW_DAYS),
+        journal_entry__timestamp__date__lte=end + timedelta(days=DATE_WINDOW_DAYS),
+    ).select_related("journal_entry", "account")
+    if gl_account_id is not None:
+        queryset = queryset.filter(account_id=gl_account_id)
+    if posted_only:
+        queryset = queryset.filter(journal_entry__posted=True)
+
+    return [
+        LedgerLine(
+            transaction=ledger_txn,
+            date=ledger_txn.journal_entry.timestamp.date(),
+            description=(ledger_txn.description or "").lower(),
+            tokens=tokenize(ledger_txn.description)
+            | tokenize(ledger_txn.journal_entry.description),
+        )
+        for ledger_txn in queryset
+    ]
+
+
+def score_match(bank_txn, line: LedgerLine) -> dict:
+    """
+    Score a bank transaction against a ledger line with the same amount.
+
+    Returns:
+        dict: Suggestion with journal_entry, transaction, confidence, reason and
+        the tie-break details (date_distance, token_overlap)
+    """
+    confidence = 0.5  # Base confidence for amount match
+
+    # Increase confidence for exact date match
+    date_distance = abs((line.date - bank_txn.transaction_date).days)
+    if date_distance == 0:
+        confidence += 0.3
+
+    # Increase confidence for description similarity
+    bank_description = (bank_txn.description or "").lower()
+    if bank_description in line.description or line.description in bank_description:
+        confidence += 0.2
+
+    bank_tokens = tokenize(bank_txn.description) | tokenize(bank_txn.reference_number)
+    token_overlap = len(bank_tokens & line.tokens)
+
+    return {
+        "journal_entry": line.transaction.journal_entry,
+        "transaction": line.transaction,
+        "confidence": min(confidence, 1.0),
+        "reason": f"Amount match: {bank_txn.amount}, Date: {line.date}",
+        "date_distance": date_distance,
+        "token_overlap": token_overlap,
+    }
+
+
+def _rank_key(match: dict):
+    return (
+        -match["confidence"],
+        match["date_distance"],
+        -match["token_overlap"],
+        str(match["transaction"].pk),
+    )
+
+
+class ReconciliationMatcher:
+    """
+    Match many bank transactions of one bank account against its ledger.
+
+    Example:
+        >>> matcher = ReconciliationMatcher(bank_account)
+        >>> suggestions = matcher.suggest(bank_transactions)
+        >>> matches = matcher.resolve(suggestions, bank_transactions)
+    """
+
+    def __init__(self, bank_account, posted_only: bool = False):
+        self.bank_account = bank_account
+        self.posted_only = posted_only
+
+    def suggest(self, bank_transactions: Sequence) -> Dict:
+        """
+        Get the best ledger matches for each bank transaction.
+
+        Args:
+            bank_transactions: BankTransaction instances (unsaved is fine)
+
+        Returns:
+            dict: Maps each bank transaction's position in the sequence to its
+            suggestions, highest confidence first (at most MAX_SUGGESTIONS)
+        """
+        if not bank_transactions:
+            return {}
+
+        dates = [bank_txn.transaction_date for bank_txn in bank_transactions]
+        gl_account_id = self.bank_account.gl_account_id
+        index = LedgerIndex(
+            load_ledger_lines(
+                self.bank_account.tenant_id,
+                min(dates),
+                max(dates),
+                gl_account_id=gl_account_id,
+                posted_only=self.posted_only,
+            ),
+            directional=gl_account_id is not None,
+        )
+
+        window = timedelta(days=DATE_WINDOW_DAYS)
+        suggestions = {}
+        for position, bank_txn in enumerate(bank_transactions):
+            candidates = index.candidates(
+                bank_txn.amount,
+                bank_txn.transaction_type,
+                bank_txn.transaction_date - window,
+                bank_txn.transaction_date + window,
+            )
+            if candidates:
+                matches = sorted(
+                    (score_match(bank_txn, line) for line in candidates), key=_rank_key
+                )
+                suggestions[position] = matches[:MAX_SUGGESTIONS]
+        return suggestions
+
+    @staticmethod
+    def resolve(
+        suggestions: Dict,
+        bank_transactions: Sequence,
+        accept: Callable[[dict], bool] = lambda match: match["confidence"] > AUTO_MATCH_CONFIDENCE,
+        exclude_entries: Iterable = (),
+    ) -> Dict:
+        """
+        Assign journal entries to bank transactions without reusing any.
+
+        Every acceptable (bank transaction, suggestion) pair is considered
+        best-first; a pair is taken when neither side has been assigned yet.
+
+        Args:
+            suggestions: Result of suggest()
+            bank_transactions: The sequence passed to suggest()
+            accept: Whether a suggestion is good enough to match automatically
+            exclude_entries: Journal entry ids already matched elsewhere
+
+        Returns:
+            dict: Maps bank transaction positions to the chosen suggestion
+        """
+        pairs = [
+            (position, match)
+            for position, matches in suggestions.items()
+            for match in matches
+            if accept(match)
+        ]
+        pairs.sort(
+            key=lambda pair: (
+                _rank_key(pair[1]),
+                bank_transactions[pair[0]].transaction_date,
+                pair[0],
+            )
+        )
+
+        assigned = {}
+        used_entries = set(exclude_entries)
+        for position, match in pairs:
+            entry_id = match["journal_entry"].pk
+            if position in assigned or entry_id in used_entries:
+                continue
+            assigned[position] = match
+            used_entries.add(entry_id)
+        return assigned
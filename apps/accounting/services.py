@@ -2908,48 +2908,94 @@ class BankReconciliationService:
         """
         Automatically match bank transactions with journal entries.
 
+        All unreconciled transactions are matched at once against the ledger
+        (see reconciliation_matching), so the number of queries does not grow
+        with the size of the statement. A journal entry is never matched to
+        two bank transactions.
+
         Args:
             reconciliation: BankReconciliation instance
 
         Returns:
-            dict: Statistics about matching (matched_count, suggestions)
+            dict: Statistics about matching (matched_count, matches, suggestions)
         """
+        from django.utils import timezone
+
         from .bank_models import BankTransaction
+        from .reconciliation_matching import BULK_BATCH_SIZE, ReconciliationMatcher
 
         try:
-            matched_count = 0
-            suggestions = []
+            bank_account = reconciliation.bank_account
 
             # Get unreconciled transactions for this reconciliation
-            unreconciled = BankTransaction.objects.filter(
-                bank_account=reconciliation.bank_account,
+            unreconciled_qs = BankTransaction.objects.filter(
+                bank_account=bank_account,
                 is_reconciled=False,
                 transaction_date__lte=reconciliation.reconciliation_date,
             )
+            unreconciled = list(unreconciled_qs.order_by("transaction_date", "id"))
 
-            for txn in unreconciled:
-                # Try to find matching journal entries
-                matches = BankReconciliationService.suggest_matches(txn)
+            # Journal entries already matched by other bank transactions stay taken
+            matched_elsewhere = (
+                BankTransaction.objects.filter(
+                    tenant_id=bank_account.tenant_id, matched_journal_entry__isnull=False
+                )
+                .exclude(pk__in=unreconciled_qs.values("pk"))
+                .values_list("matched_journal_entry_id", flat=True)
+            )
 
-                if matches:
-                    # If we have a high-confidence match (score > 0.9), auto-match
-                    best_match = matches[0]
-                    if best_match["confidence"] > 0.9:
-                        txn.match_journal_entry(best_match["journal_entry"])
-                        matched_count += 1
-                    else:
-                        # Add to suggestions for manual review
-                        suggestions.append({"transaction": txn, "matches": matches})
+            matcher = ReconciliationMatcher(bank_account)
+            candidates = matcher.suggest(unreconciled)
+            # Auto-match high-confidence matches (score > 0.9)
+            assigned = matcher.resolve(candidates, unreconciled, exclude_entries=matched_elsewhere)
+            taken = {match["journal_entry"].pk for match in assigned.values()}
+
+            now = timezone.now()
+            matched = []
+            suggestions = []
+            for position, txn in enumerate(unreconciled):
+                if position in assigned:
+                    match = assigned[position]
+                    txn.matched_journal_entry = match["journal_entry"]
+                    txn.updated_at = now
+                    matched.append(
+                        {
+                            "transaction": txn,
+                            "journal_entry": match["journal_entry"],
+                            "confidence": match["confidence"],
+                        }
+                    )
+                elif position in candidates:
+                    # Add to suggestions for manual review
+                    matches = [
+                        match
+                        for match in candidates[position]
+                        if match["journal_entry"].pk not in taken
+                    ]
+                    if matches:
+                        suggestions.append(
+                            {
+                                "transaction": txn,
+                                "matches": matches,
+                                "confidence": matches[0]["confidence"],
+                            }
+                        )
+
+            BankTransaction.objects.bulk_update(
+                [item["transaction"] for item in matched],
+                ["matched_journal_entry", "updated_at"],
+                batch_size=BULK_BATCH_SIZE,
+            )
 
             logger.info(
-                f"Auto-matched {matched_count} transactions for reconciliation {reconciliation.id}"
+                f"Auto-matched {len(matched)} transactions for reconciliation {reconciliation.id}"
             )
 
-            return {"matched_count": matched_count, "suggestions": suggestions}
+            return {"matched_count": len(matched), "matches": matched, "suggestions": suggestions}
 
         except Exception as e:
             logger.error(f"Failed to auto-match transactions: {str(e)}")
-            return {"matched_count": 0, "suggestions": []}
+            return {"matched_count": 0, "matches": [], "suggestions": []}
 
     @staticmethod
     def suggest_matches(transaction):
@@ -2960,57 +3006,12 @@ class BankReconciliationService:
             transaction: BankTransaction instance
 
         Returns:
-            list: List of potential matches with confidence scores
+            list: Up to 5 potential matches, highest confidence first
         """
-        from datetime import timedelta
+        from .reconciliation_matching import ReconciliationMatcher
 
         try:
-            matches = []
-
-            # Search for journal entries within ±3 days of transaction date
-            date_range_start = transaction.transaction_date - timedelta(days=3)
-            date_range_end = transaction.transaction_date + timedelta(days=3)
-
-            # Get journal entries from django-ledger
-            # Note: This is a simplified version - in production, you'd want to
-            # search through TransactionModel entries that match the amount
-            from django_ledger.models import TransactionModel
-
-            # Find transactions with matching amount
-            potential_matches = TransactionModel.objects.filter(
-                journal_entry__ledger__entity__jewelryentity__tenant=transaction.tenant,
-                journal_entry__timestamp__date__gte=date_range_start,
-                journal_entry__timestamp__date__lte=date_range_end,
-                amount=transaction.amount,
-            ).select_related("journal_entry", "account")
-
-            for je_txn in potential_matches:
-                confidence = 0.5  # Base confidence for amount match
-
-                # Increase confidence for exact date match
-                if je_txn.journal_entry.timestamp.date() == transaction.transaction_date:
-                    confidence += 0.3
-
-                # Increase confidence for description similarity
-                if (
-                    transaction.description.lower() in je_txn.description.lower()
-                    or je_txn.description.lower() in transaction.description.lower()
-                ):
-                    confidence += 0.2
-
-                matches.append(
-                    {
-                        "journal_entry": je_txn.journal_entry,
-                        "transaction": je_txn,
-                        "confidence": min(confidence, 1.0),
-                        "reason": f"Amount match: {transaction.amount}, Date: {je_txn.journal_entry.timestamp.date()}",
-                    }
-                )
-
-            # Sort by confidence (highest first)
-            matches.sort(key=lambda x: x["confidence"], reverse=True)
-
-            return matches[:5]  # Return top 5 matches
+            return ReconciliationMatcher(transaction.bank_account).suggest([transaction]).get(0, [])
 
         except Exception as e:
             logger.error(f"Failed to suggest matches: {str(e)}")
@@ -3417,6 +3418,10 @@ class BankStatementImportService:
         from apps.core.audit_models import AuditLog
 
         from .bank_models import BankTransaction
+        from .reconciliation_matching import BULK_BATCH_SIZE
+
+        description_max_length = BankTransaction._meta.get_field("description").max_length
+        reference_max_length = BankTransaction._meta.get_field("reference_number").max_length
 
         logger.info(
             f"Starting bank statement import {statement_import.id} for {statement_import.bank_account.account_name}"
@@ -3441,44 +3446,67 @@ class BankStatementImportService:
             error_count = 0
 
             with transaction.atomic():
+                bank_account = statement_import.bank_account
+
+                # Check for duplicates with one query over the statement's date range
+                existing_keys = set()
+                if transactions:
+                    dates = [txn_data["date"] for txn_data in transactions]
+                    existing_keys = {
+                        BankStatementImportService._dedupe_key(*row)
+                        for row in BankTransaction.objects.filter(
+                            tenant_id=statement_import.tenant_id,
+                            bank_account=bank_account,
+                            transaction_date__gte=min(dates),
+                            transaction_date__lte=max(dates),
+                        ).values_list(
+                            "transaction_date", "amount", "reference_number", "description"
+                        )
+                    }
+
+                new_transactions = []
                 for txn_data in transactions:
-                    try:
-                        # Check for duplicates
-                        existing = BankTransaction.objects.filter(
-                            tenant=statement_import.tenant,
-                            bank_account=statement_import.bank_account,
-                            transaction_date=txn_data["date"],
-                            amount=txn_data["amount"],
-                            description=txn_data["description"],
-                        ).first()
+                    reference = txn_data.get("reference", "")
+                    key = BankStatementImportService._dedupe_key(
+                        txn_data["date"], txn_data["amount"], reference, txn_data["description"]
+                    )
+                    if key in existing_keys:
+                        duplicate_count += 1
+                        continue
 
-                        if existing:
-                            duplicate_count += 1
-                            continue
+                    if (
+                        len(txn_data["description"]) > description_max_length
+                        or len(reference) > reference_max_length
+                    ):
+                        logger.error(
+                            f"Error importing transaction: description or reference too long "
+                            f"({txn_data['date']}, {txn_data['amount']})"
+                        )
+                        error_count += 1
+                        continue
 
-                        # Create bank transaction
-                        bank_txn = BankTransaction.objects.create(
-                            tenant=statement_import.tenant,
-                            bank_account=statement_import.bank_account,
+                    existing_keys.add(key)
+                    new_transactions.append(
+                        BankTransaction(
+                            tenant_id=statement_import.tenant_id,
+                            bank_account=bank_account,
                             transaction_date=txn_data["date"],
                             description=txn_data["description"],
                             amount=txn_data["amount"],
                             transaction_type=txn_data["type"],
-                            reference_number=txn_data.get("reference", ""),
+                            reference_number=reference,
                             statement_import=statement_import,
                             created_by=user,
                         )
+                    )
 
-                        imported_count += 1
-
-                        # Try to auto-match with journal entries
-                        if BankStatementImportService._auto_match_transaction(bank_txn):
-                            matched_count += 1
+                # Try to auto-match with posted journal entries before inserting
+                matched_count = BankStatementImportService._auto_match_transactions(
+                    bank_account, new_transactions
+                )
 
-                    except Exception as e:
-                        logger.error(f"Error importing transaction: {str(e)}")
-                        error_count += 1
-                        continue
+                BankTransaction.objects.bulk_create(new_transactions, batch_size=BULK_BATCH_SIZE)
+                imported_count = len(new_transactions)
 
                 # Update import statistics
                 statement_import.transactions_imported = imported_count
@@ -3489,13 +3517,19 @@ class BankStatementImportService:
 
                 # Log audit trail
                 AuditLog.objects.create(
-                    tenant=statement_import.tenant,
+                    tenant_id=statement_import.tenant_id,
                     user=user,
-                    category="ACCOUNTING",
-                    action="BANK_STATEMENT_IMPORTED",
-                    severity="INFO",
-                    description=f"Imported bank statement for {statement_import.bank_account.account_name}",
-                    after_value=f"imported={imported_count}, matched={matched_count}, duplicates={duplicate_count}, errors={error_count}",
+                    category=AuditLog.CATEGORY_DATA,
+                    action=AuditLog.ACTION_CREATE,
+                    severity=AuditLog.SEVERITY_INFO,
+                    description=f"Imported bank statement for {bank_account.account_name}",
+                    object_id=str(statement_import.id),
+                    new_values={
+                        "imported": imported_count,
+                        "matched": matched_count,
+                        "duplicates": duplicate_count,
+                        "errors": error_count,
+                    },
                 )
 
                 logger.info(
@@ -3754,77 +3788,62 @@ class BankStatementImportService:
         return transactions
 
     @staticmethod
-    def _auto_match_transaction(bank_transaction):
+    def _dedupe_key(transaction_date, amount, reference, description):
+        """
+        Get the key identifying a statement line for duplicate detection.
+
+        Lines are identified by date, amount and reference; lines without a
+        reference fall back to their description.
+        """
+        from .reconciliation_matching import to_cents
+
+        return (transaction_date, to_cents(amount), reference.strip() or description.strip())
+
+    @staticmethod
+    def _auto_match_transactions(bank_account, bank_transactions):
         """
-        Attempt to automatically match a bank transaction with a journal entry.
+        Automatically match new bank transactions with posted journal entries.
 
         Matching criteria:
         1. Date within +/- 3 days
-        2. Amount matches exactly
-        3. Description contains keywords
+        2. Amount matches a ledger transaction exactly
+        3. Description or reference shares keywords with the journal entry
+
+        A journal entry already matched to a bank transaction is not reused.
 
         Args:
-            bank_transaction: BankTransaction instance
+            bank_account: BankAccount the transactions belong to
+            bank_transactions: Unsaved BankTransaction instances
 
         Returns:
-            bool: True if matched, False otherwise
+            int: Number of matched transactions
         """
-        from datetime import timedelta
-
-        from django_ledger.models import JournalEntryModel, TransactionModel
+        from .bank_models import BankTransaction
+        from .reconciliation_matching import ReconciliationMatcher
 
         try:
-            # Get tenant's entity
-            jewelry_entity = JewelryEntity.objects.get(tenant=bank_transaction.tenant)
-            entity = jewelry_entity.ledger_entity
-
-            # Search for matching journal entries
-            start_date = bank_transaction.transaction_date - timedelta(days=3)
-            end_date = bank_transaction.transaction_date + timedelta(days=3)
-
-            # Get journal entries in date range
-            journal_entries = JournalEntryModel.objects.filter(
-                ledger__entity=entity,
-                timestamp__date__gte=start_date,
-                timestamp__date__lte=end_date,
-                posted=True,
+            matcher = ReconciliationMatcher(bank_account, posted_only=True)
+            suggestions = matcher.suggest(bank_transactions)
+            if not suggestions:
+                return 0
+
+            matched_elsewhere = BankTransaction.objects.filter(
+                tenant_id=bank_account.tenant_id, matched_journal_entry__isnull=False
+            ).values_list("matched_journal_entry_id", flat=True)
+            assigned = matcher.resolve(
+                suggestions,
+                bank_transactions,
+                accept=lambda match: match["token_overlap"] > 0,
+                exclude_entries=matched_elsewhere,
             )
 
-            # Try to find matching entry
-            for je in journal_entries:
-                # Get transactions for this journal entry
-                je_transactions = TransactionModel.objects.filter(journal_entry=je)
-
-                # Calculate total amount
-                total_amount = sum(abs(txn.amount) for txn in je_transactions)
-
-                # Check if amount matches
-                if abs(total_amount - bank_transaction.amount) < Decimal("0.01"):
-                    # Check if description has any matching keywords
-                    description_lower = bank_transaction.description.lower()
-                    je_description_lower = je.description.lower()
-
-                    # Extract keywords (words longer than 3 characters)
-                    bank_keywords = set(word for word in description_lower.split() if len(word) > 3)
-                    je_keywords = set(
-                        word for word in je_description_lower.split() if len(word) > 3
-                    )
-
-                    # Check for keyword overlap
-                    if bank_keywords & je_keywords:
-                        # Match found!
-                        bank_transaction.match_journal_entry(je)
-                        logger.info(
-                            f"Auto-matched bank transaction {bank_transaction.id} "
-                            f"with journal entry {je.id}"
-                        )
-                        return True
-
-            return False
+            for position, match in assigned.items():
+                bank_transactions[position].matched_journal_entry = match["journal_entry"]
+            return len(assigned)
 
         except Exception as e:
-            logger.error(f"Error auto-matching transaction: {str(e)}")
-            return False
+            logger.error(f"Error auto-matching transactions: {str(e)}")
+            return 0
 
 
 class FixedAssetService:
@@ -4105,136 +4124,33 @@ class FixedAssetService:
             return None
 
     @staticmethod
-    def run_monthly_depreciation(tenant: Tenant, period_date: date, user: User) -> Dict:
+    def run_monthly_depreciation(
+        tenant: Tenant, period_date: date, user: User, units_produced: Optional[Dict] = None
+    ) -> Dict:
         """
         Run depreciation for all active assets for a specific period.
 
-        Processes all active fixed assets for the tenant and records
-        depreciation for the specified period.
+        Processes all active fixed assets for the tenant in one batched run
+        (see depreciation_engine.py): schedules and asset updates are written
+        in bulk and the period is posted as one consolidated journal entry.
+        Running a period again for the same tenant does nothing.
 
         Args:
             tenant: Tenant to process
             period_date: Date of the depreciation period (typically month-end)
             user: User running the depreciation
+            units_produced: Units produced in the period per asset id, for
+                units of production assets
 
         Returns:
             Dict with summary of depreciation run
 
         Requirements: 5.2, 5.3, 5.7, 5.8
         """
-        from apps.core.audit_models import AuditLog
-
-        from .fixed_asset_models import FixedAsset
+        from .depreciation_engine import run_depreciation
 
         try:
-            # Get all active fixed assets for tenant
-            active_assets = FixedAsset.objects.filter(tenant=tenant, status="ACTIVE")
-
-            results = {
-                "period_date": period_date,
-                "total_assets": active_assets.count(),
-                "processed": 0,
-                "skipped": 0,
-                "already_recorded": 0,
-                "errors": 0,
-                "total_depreciation": Decimal("0.00"),
-                "details": [],
-            }
-
-            for asset in active_assets:
-                try:
-                    # Record depreciation for this asset
-                    depreciation_result = FixedAssetService.record_depreciation(
-                        asset, period_date, user, create_journal_entry=True
-                    )
-
-                    if depreciation_result:
-                        if depreciation_result.get("schedule"):
-                            # Check if it was already recorded
-                            calc_data = FixedAssetService.calculate_depreciation(
-                                asset, period_date, user
-                            )
-                            if calc_data and calc_data.get("already_recorded"):
-                                results["already_recorded"] += 1
-                                results["details"].append(
-                                    {
-                                        "asset_number": asset.asset_number,
-                                        "asset_name": asset.asset_name,
-                                        "status": "already_recorded",
-                                        "amount": depreciation_result["depreciation_amount"],
-                                    }
-                                )
-                            else:
-                                results["processed"] += 1
-                                results["total_depreciation"] += depreciation_result[
-                                    "depreciation_amount"
-                                ]
-                                results["details"].append(
-                                    {
-                                        "asset_number": asset.asset_number,
-                                        "asset_name": asset.asset_name,
-                                        "status": "success",
-                                        "amount": depreciation_result["depreciation_amount"],
-                                    }
-                                )
-                        else:
-                            results["skipped"] += 1
-                            results["details"].append(
-                                {
-                                    "asset_number": asset.asset_number,
-                                    "asset_name": asset.asset_name,
-                                    "status": "skipped",
-                                    "reason": "No depreciation needed",
-                                }
-                            )
-                    else:
-                        results["skipped"] += 1
-                        results["details"].append(
-                            {
-                                "asset_number": asset.asset_number,
-                                "asset_name": asset.asset_name,
-                                "status": "skipped",
-                                "reason": "No depreciation calculated",
-                            }
-                        )
-
-                except Exception as e:
-                    results["errors"] += 1
-                    results["details"].append(
-                        {
-                            "asset_number": asset.asset_number,
-                            "asset_name": asset.asset_name,
-                            "status": "error",
-                            "error": str(e),
-                        }
-                    )
-                    logger.error(
-                        f"Error processing depreciation for asset {asset.asset_number}: {str(e)}"
-                    )
-
-            # Audit logging (Requirement 5.7)
-            AuditLog.objects.create(
-                tenant=tenant,
-                user=user,
-                category="ACCOUNTING",
-                action="BATCH_PROCESS",
-                severity="INFO",
-                description=(
-                    f"Monthly depreciation run for {period_date.strftime('%B %Y')} - "
-                    f"Processed: {results['processed']}, "
-                    f"Skipped: {results['skipped']}, "
-                    f"Already Recorded: {results['already_recorded']}, "
-                    f"Errors: {results['errors']}, "
-                    f"Total Depreciation: ${results['total_depreciation']}"
-                ),
-            )
-
-            logger.info(
-                f"Monthly depreciation run completed for {tenant.company_name} - "
-                f"Period: {period_date}, Processed: {results['processed']}"
-            )
-
-            return results
+            return run_depreciation(tenant, period_date, user, units_produced)
 
         except Exception as e:
             logger.error(
@@ -6,12 +6,12 @@ including monthly depreciation runs.
 """
 
 import logging
-from datetime import date, datetime
+from calendar import monthrange
+from datetime import date, datetime, timedelta
 
 from django.contrib.auth import get_user_model
-from django.db import transaction
 
-from celery import shared_task
+from celery import group, shared_task
 
 from apps.core.audit_models import AuditLog
 from apps.core.models import Tenant
@@ -20,166 +20,91 @@ logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
+def _get_system_user():
+    """Get or create the system user for automated tasks."""
+    system_user = User.objects.filter(username="system", role=User.PLATFORM_ADMIN).first()
+
+    if not system_user:
+        logger.warning("System user not found. Creating automated task user.")
+        system_user = User.objects.create_user(
+            username="system",
+            email="system@automated.local",
+            role=User.PLATFORM_ADMIN,
+            is_staff=True,
+            is_active=True,
+        )
+    return system_user
+
+
+def _previous_period_date() -> date:
+    """The last day of the previous month when run on the 1st, otherwise yesterday."""
+    today = date.today()
+    if today.day == 1:
+        # If running on the 1st, use the last day of previous month
+        if today.month == 1:
+            year = today.year - 1
+            month = 12
+        else:
+            year = today.year
+            month = today.month - 1
+        return date(year, month, monthrange(year, month)[1])
+    # Otherwise use yesterday
+    return today - timedelta(days=1)
+
+
 @shared_task(
     name="apps.accounting.tasks.run_monthly_depreciation_all_tenants",
     bind=True,
     max_retries=3,
     default_retry_delay=300,  # 5 minutes
 )
-def run_monthly_depreciation_all_tenants(self, period_date_str: str = None):  # noqa: C901
+def run_monthly_depreciation_all_tenants(self, period_date_str: str = None):
     """
     Run monthly depreciation for all active tenants.
 
-    This task is scheduled to run on the first day of each month and processes
-    depreciation for all active fixed assets across all tenants.
+    This task is scheduled to run on the first day of each month. It fans
+    out one run_monthly_depreciation_single_tenant task per active tenant as
+    a Celery group, so tenants are depreciated in parallel by the accounting
+    workers. Each tenant's run is idempotent per period, so a retried
+    fan-out never depreciates a tenant twice.
 
     Args:
         period_date_str: Optional date string in YYYY-MM-DD format.
                         If not provided, uses the last day of previous month.
 
     Returns:
-        Dict with summary of depreciation run across all tenants
+        Dict with the period, the number of tenants and the group id
 
     Requirements: 5.3, 5.8
     """
-    from apps.accounting.services import FixedAssetService
-
     try:
-        # Determine the period date
         if period_date_str:
             period_date = datetime.strptime(period_date_str, "%Y-%m-%d").date()
         else:
-            # Use the last day of the previous month
-            today = date.today()
-            if today.day == 1:
-                # If running on the 1st, use the last day of previous month
-                from calendar import monthrange
-
-                if today.month == 1:
-                    year = today.year - 1
-                    month = 12
-                else:
-                    year = today.year
-                    month = today.month - 1
-                last_day = monthrange(year, month)[1]
-                period_date = date(year, month, last_day)
-            else:
-                # Otherwise use yesterday
-                from datetime import timedelta
-
-                period_date = today - timedelta(days=1)
+            period_date = _previous_period_date()
 
         logger.info(f"Starting monthly depreciation run for period: {period_date}")
 
-        # Get all active tenants
-        active_tenants = Tenant.objects.filter(status=Tenant.ACTIVE)
-
-        overall_results = {
-            "period_date": period_date.isoformat(),
-            "total_tenants": active_tenants.count(),
-            "tenants_processed": 0,
-            "tenants_failed": 0,
-            "total_assets_processed": 0,
-            "total_depreciation_amount": 0,
-            "tenant_details": [],
-        }
+        tenant_ids = list(Tenant.objects.filter(status=Tenant.ACTIVE).values_list("id", flat=True))
+        system_user = _get_system_user()
 
-        # Get or create a system user for automated tasks
-        system_user = User.objects.filter(username="system", role=User.PLATFORM_ADMIN).first()
-
-        if not system_user:
-            logger.warning("System user not found. Creating automated task user.")
-            system_user = User.objects.create_user(
-                username="system",
-                email="system@automated.local",
-                role=User.PLATFORM_ADMIN,
-                is_staff=True,
-                is_active=True,
+        result = group(
+            run_monthly_depreciation_single_tenant.s(
+                str(tenant_id), period_date.isoformat(), system_user.id
             )
+            for tenant_id in tenant_ids
+        ).apply_async()
 
-        # Process each tenant
-        for tenant in active_tenants:
-            try:
-                logger.info(f"Processing depreciation for tenant: {tenant.company_name}")
-
-                # Run depreciation for this tenant
-                with transaction.atomic():
-                    tenant_result = FixedAssetService.run_monthly_depreciation(
-                        tenant=tenant, period_date=period_date, user=system_user
-                    )
-
-                overall_results["tenants_processed"] += 1
-                overall_results["total_assets_processed"] += tenant_result.get("processed", 0)
-                overall_results["total_depreciation_amount"] += float(
-                    tenant_result.get("total_depreciation", 0)
-                )
-
-                overall_results["tenant_details"].append(
-                    {
-                        "tenant_id": str(tenant.id),
-                        "tenant_name": tenant.company_name,
-                        "status": "success",
-                        "assets_processed": tenant_result.get("processed", 0),
-                        "assets_skipped": tenant_result.get("skipped", 0),
-                        "already_recorded": tenant_result.get("already_recorded", 0),
-                        "errors": tenant_result.get("errors", 0),
-                        "total_depreciation": float(tenant_result.get("total_depreciation", 0)),
-                    }
-                )
-
-                logger.info(
-                    f"Successfully processed depreciation for {tenant.company_name} - "
-                    f"Processed: {tenant_result.get('processed', 0)}, "
-                    f"Amount: ${tenant_result.get('total_depreciation', 0)}"
-                )
-
-            except Exception as tenant_error:
-                overall_results["tenants_failed"] += 1
-                overall_results["tenant_details"].append(
-                    {
-                        "tenant_id": str(tenant.id),
-                        "tenant_name": tenant.company_name,
-                        "status": "error",
-                        "error": str(tenant_error),
-                    }
-                )
-
-                logger.error(
-                    f"Failed to process depreciation for tenant "
-                    f"{tenant.company_name}: {str(tenant_error)}",
-                    exc_info=True,
-                )
-
-                # Log to audit trail for this tenant
-                try:
-                    AuditLog.objects.create(
-                        tenant=tenant,
-                        user=system_user,
-                        category="ACCOUNTING",
-                        action="BATCH_PROCESS_ERROR",
-                        severity="ERROR",
-                        description=(
-                            f"Failed to run monthly depreciation for "
-                            f"{period_date.strftime('%B %Y')}: {str(tenant_error)}"
-                        ),
-                    )
-                except Exception as audit_error:
-                    logger.error(
-                        f"Failed to create audit log for tenant {tenant.company_name}: "
-                        f"{str(audit_error)}"
-                    )
-
-        # Log overall summary
         logger.info(
-            f"Monthly depreciation run completed - "
-            f"Period: {period_date}, "
-            f"Tenants Processed: {overall_results['tenants_processed']}, "
-            f"Tenants Failed: {overall_results['tenants_failed']}, "
-            f"Total Assets: {overall_results['total_assets_processed']}, "
-            f"Total Depreciation: ${overall_results['total_depreciation_amount']:.2f}"
+            f"Monthly depreciation dispatched - Period: {period_date}, "
+            f"Tenants: {len(tenant_ids)}"
         )
 
-        return overall_results
+        return {
+            "period_date": period_date.isoformat(),
+            "total_tenants": len(tenant_ids),
+            "group_id": result.id,
+        }
 
     except Exception as e:
         logger.error(f"Critical error in monthly depreciation task: {str(e)}", exc_info=True)
@@ -211,8 +136,8 @@ def run_monthly_depreciation_single_tenant(
     """
     Run monthly depreciation for a single tenant.
 
-    This task can be called manually or triggered by specific events
-    to run depreciation for a single tenant.
+    Called by the monthly fan-out, or manually to run depreciation for a
+    single tenant. Running a period that was already run does nothing.
 
     Args:
         tenant_id: UUID of the tenant
@@ -234,29 +159,16 @@ def run_monthly_depreciation_single_tenant(
         period_date = datetime.strptime(period_date_str, "%Y-%m-%d").date()
 
         # Get user
-        if user_id:
-            user = User.objects.get(id=user_id)
-        else:
-            user = User.objects.filter(username="system", role=User.PLATFORM_ADMIN).first()
-
-            if not user:
-                user = User.objects.create_user(
-                    username="system",
-                    email="system@automated.local",
-                    role=User.PLATFORM_ADMIN,
-                    is_staff=True,
-                    is_active=True,
-                )
+        user = User.objects.get(id=user_id) if user_id else _get_system_user()
 
         logger.info(
             f"Running depreciation for tenant {tenant.company_name} " f"for period {period_date}"
         )
 
         # Run depreciation
-        with transaction.atomic():
-            result = FixedAssetService.run_monthly_depreciation(
-                tenant=tenant, period_date=period_date, user=user
-            )
+        result = FixedAssetService.run_monthly_depreciation(
+            tenant=tenant, period_date=period_date, user=user
+        )
 
         logger.info(
             f"Depreciation completed for {tenant.company_name} - "
@@ -279,9 +191,57 @@ def run_monthly_depreciation_single_tenant(
             raise self.retry(exc=e)
         except self.MaxRetriesExceededError:
             logger.error(f"Max retries exceeded for tenant {tenant_id} depreciation task")
+
+            # Log to audit trail for this tenant
+            try:
+                AuditLog.objects.create(
+                    tenant_id=tenant_id,
+                    category="ACCOUNTING",
+                    action="BATCH_PROCESS_ERROR",
+                    severity="ERROR",
+                    description=(
+                        f"Failed to run monthly depreciation for {period_date_str}: {str(e)}"
+                    ),
+                )
+            except Exception as audit_error:
+                logger.error(
+                    f"Failed to create audit log for tenant {tenant_id}: {str(audit_error)}"
+                )
+
             return {
                 "status": "failed",
                 "error": str(e),
                 "tenant_id": tenant_id,
                 "period_date": period_date_str,
             }
+
+
+@shared_task(
+    name="apps.accounting.tasks.post_pending_journal_entries",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=30,
+)
+def post_pending_journal_entries(self):
+    """
+    Drain the posting outbox.
+
+    Posts the journal entries queued by the accounting signals, tenant by
+    tenant in batches, and updates the outbox lag metrics. Postings are
+    marked in the same transaction as their journal entries, so overlapping
+    or duplicate runs never post twice.
+
+    Returns:
+        Dict with the number of postings per outcome
+    """
+    from apps.accounting.posting_outbox import drain_outbox
+
+    try:
+        result = drain_outbox()
+    except Exception as e:
+        logger.error(f"Error draining posting outbox: {str(e)}", exc_info=True)
+        raise self.retry(exc=e)
+
+    if result:
+        logger.info(f"Posting outbox drained: {result}")
+    return result
@@ -0,0 +1,378 @@
+"""
+Tests for the set-based bank reconciliation matcher.
+
+Synthetic statements of up to 10k lines are matched against a fixture ledger
+and checked for a constant number of queries, deterministic results and
+agreement with the original one-transaction-at-a-time matcher.
+
+Requirements: 4.3
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_ledger.models import AccountModel, JournalEntryModel, TransactionModel
+
+from apps.accounting.bank_models import (
+    BankAccount,
+    BankReconciliation,
+    BankStatementImport,
+    BankTransaction,
+)
+from apps.accounting.models import AccountingConfiguration
+from apps.accounting.services import (
+    AccountingService,
+    BankReconciliationService,
+    BankStatementImportService,
+)
+from apps.core.models import Tenant, User
+from apps.core.tenant_context import bypass_rls, tenant_context
+
+START_DATE = date(2025, 1, 1)
+LEDGER_ENTRIES = 120
+SYNTHETIC_LINES = 10000
+
+
+def legacy_suggest_matches(transaction):
+    """
+    The original per-transaction matcher (with its tenant lookup corrected),
+    kept here as the reference the set-based matcher must agree with.
+    """
+    matches = []
+    potential_matches = TransactionModel.objects.filter(
+        journal_entry__ledger__entity__jewelry_entity__tenant=transaction.tenant,
+        journal_entry__timestamp__date__gte=transaction.transaction_date - timedelta(days=3),
+        journal_entry__timestamp__date__lte=transaction.transaction_date + timedelta(days=3),
+        amount=transaction.amount,
+    ).select_related("journal_entry", "account")
+
+    for je_txn in potential_matches:
+        confidence = 0.5
+        if je_txn.journal_entry.timestamp.date() == transaction.transaction_date:
+            confidence += 0.3
+        if (
+            transaction.description.lower() in je_txn.description.lower()
+            or je_txn.description.lower() in transaction.description.lower()
+        ):
+            confidence += 0.2
+        matches.append(
+            {
+                "journal_entry": je_txn.journal_entry,
+                "transaction": je_txn,
+                "confidence": min(confidence, 1.0),
+            }
+        )
+
+    matches.sort(key=lambda x: x["confidence"], reverse=True)
+    return matches[:5]
+
+
+class BankReconciliationMatchingTest(TestCase):
+    """Test the set-based matcher against a fixture ledger."""
+
+    def setUp(self):
+        """Set up a tenant, its ledger and a bank account."""
+        with bypass_rls():
+            self.tenant = Tenant.objects.create(
+                company_name="Matching Jewelry Shop", slug="matching-jewelry-shop", status="ACTIVE"
+            )
+            self.user = User.objects.create_user(
+                username="matchinguser",
+                password="testpass123",
+                tenant=self.tenant,
+                role="TENANT_OWNER",
+            )
+
+        self.context = tenant_context(self.tenant.id)
+        self.context.__enter__()
+        self.addCleanup(self.context.__exit__, None, None, None)
+
+        jewelry_entity = AccountingService.setup_tenant_accounting(self.tenant, self.user)
+        self.entity = jewelry_entity.ledger_entity
+        self.ledger = self.entity.ledgermodel_set.first()
+        config = AccountingConfiguration.objects.get(tenant=self.tenant)
+        self.cash_account = AccountModel.objects.get(
+            coa_model__entity=self.entity, code=config.default_cash_account
+        )
+        self.offset_account = (
+            AccountModel.objects.filter(coa_model__entity=self.entity)
+            .exclude(pk=self.cash_account.pk)
+            .order_by("code")
+            .first()
+        )
+
+        self.bank_account = BankAccount.objects.create(
+            tenant=self.tenant,
+            account_name="Main Checking",
+            account_number="000111222",
+            bank_name="Test Bank",
+            account_type="CHECKING",
+            opening_balance=Decimal("0.00"),
+            current_balance=Decimal("0.00"),
+            created_by=self.user,
+        )
+
+        # Fixture ledger: one posted deposit or payment per entry, each with its own
+        # amount. Bulk-created, as the matcher only reads entries and lines.
+        self.entries = JournalEntryModel.objects.bulk_create(
+            [
+                JournalEntryModel(
+                    ledger=self.ledger,
+                    je_number=f"JE-MATCH-{index:04d}",
+                    timestamp=timezone.make_aware(
+                        datetime.combine(START_DATE + timedelta(days=index // 4), time(12))
+                    ),
+                    description=self._ledger_description(index),
+                    posted=True,
+                )
+                for index in range(LEDGER_ENTRIES)
+            ]
+        )
+        lines = []
+        for index, journal_entry in enumerate(self.entries):
+            deposit = index % 2 == 0
+            for account, tx_type in (
+                (self.cash_account, "debit" if deposit else "credit"),
+                (self.offset_account, "credit" if deposit else "debit"),
+            ):
+                lines.append(
+                    TransactionModel(
+                        journal_entry=journal_entry,
+                        account=account,
+                        amount=self._ledger_amount(index),
+                        tx_type=tx_type,
+                        description=self._ledger_description(index),
+                    )
+                )
+        TransactionModel.objects.bulk_create(lines)
+
+    def _ledger_amount(self, index):
+        return Decimal("100.00") + Decimal(index) + Decimal("0.25")
+
+    def _ledger_description(self, index):
+        if index % 2 == 0:
+            return f"Customer deposit {index:04d} invoice"
+        return f"Supplier payment {index:04d}"
+
+    def _statement(self, size):
+        """
+        Build a synthetic statement: every fourth line matches a ledger entry
+        (on its date or a day or two off), the rest match nothing.
+        """
+        lines = []
+        for index in range(size):
+            entry_index = index // 4
+            if index % 4 == 0 and entry_index < LEDGER_ENTRIES:
+                offset = entry_index % 3
+                lines.append(
+                    BankTransaction(
+                        tenant=self.tenant,
+                        bank_account=self.bank_account,
+                        transaction_date=START_DATE + timedelta(days=entry_index // 4 + offset),
+                        description=(
+                            f"Customer deposit {entry_index:04d}"
+                            if entry_index % 2 == 0
+                            else f"Supplier payment {entry_index:04d}"
+                        ),
+                        amount=self._ledger_amount(entry_index),
+                        transaction_type="CREDIT" if entry_index % 2 == 0 else "DEBIT",
+                        created_by=self.user,
+                    )
+                )
+            else:
+                lines.append(
+                    BankTransaction(
+                        tenant=self.tenant,
+                        bank_account=self.bank_account,
+                        transaction_date=START_DATE + timedelta(days=index % 60),
+                        description=f"Card purchase {index}",
+                        amount=Decimal("5000.00") + Decimal(index),
+                        transaction_type="DEBIT",
+                        reference_number=f"REF{index}",
+                        created_by=self.user,
+                    )
+                )
+        BankTransaction.objects.bulk_create(lines)
+        return lines
+
+    def _reconciliation(self):
+        return BankReconciliation.objects.create(
+            tenant=self.tenant,
+            bank_account=self.bank_account,
+            reconciliation_date=START_DATE + timedelta(days=90),
+            statement_beginning_balance=Decimal("0.00"),
+            statement_ending_balance=Decimal("0.00"),
+            book_beginning_balance=Decimal("0.00"),
+            book_ending_balance=Decimal("0.00"),
+            created_by=self.user,
+        )
+
+    def _count_queries(self, function, *args):
+        with CaptureQueriesContext(connection) as context:
+            result = function(*args)
+        queries = [q["sql"] for q in context.captured_queries if not q["sql"].startswith("EXPLAIN")]
+        return result, queries
+
+    def test_suggestions_equal_original_matcher(self):
+        """On conflict-free fixtures both matchers suggest the same entries."""
+        statement = self._statement(LEDGER_ENTRIES * 4)
+
+        for bank_txn in statement[::2]:
+            expected = legacy_suggest_matches(bank_txn)
+            actual = BankReconciliationService.suggest_matches(bank_txn)
+            self.assertEqual(
+                sorted((str(m["transaction"].pk), m["confidence"]) for m in actual),
+                sorted((str(m["transaction"].pk), m["confidence"]) for m in expected),
+            )
+
+    def test_auto_match_equals_original_matcher(self):
+        statement = self._statement(LEDGER_ENTRIES * 4)
+        expected = {}
+        for bank_txn in statement:
+            matches = legacy_suggest_matches(bank_txn)
+            if matches and matches[0]["confidence"] > 0.9:
+                expected[bank_txn.pk] = matches[0]["journal_entry"].pk
+
+        result = BankReconciliationService.auto_match_transactions(self._reconciliation())
+
+        actual = dict(
+            BankTransaction.objects.filter(matched_journal_entry__isnull=False).values_list(
+                "pk", "matched_journal_entry_id"
+            )
+        )
+        self.assertTrue(expected)
+        self.assertEqual(actual, expected)
+        self.assertEqual(result["matched_count"], len(expected))
+        self.assertTrue(all(match["confidence"] > 0.9 for match in result["matches"]))
+        for suggestion in result["suggestions"]:
+            self.assertEqual(suggestion["confidence"], suggestion["matches"][0]["confidence"])
+
+    def test_auto_match_query_count_is_constant(self):
+        """Matching 10k lines takes as many queries as matching a few hundred."""
+        self._statement(LEDGER_ENTRIES * 4)
+        small_result, small_queries = self._count_queries(
+            BankReconciliationService.auto_match_transactions, self._reconciliation()
+        )
+        BankTransaction.objects.all().delete()
+
+        self._statement(SYNTHETIC_LINES)
+        large_result, large_queries = self._count_queries(
+            BankReconciliationService.auto_match_transactions, self._reconciliation()
+        )
+
+        self.assertEqual(large_result["matched_count"], small_result["matched_count"])
+        self.assertEqual(len(large_queries), len(small_queries))
+        # Transactions, ledger lines, entries matched elsewhere, one update
+        # (plus the tenant manager's tenant lookups)
+        self.assertLessEqual(len(large_queries), 8)
+
+    def test_auto_match_is_deterministic(self):
+        """Competing bank lines always resolve to the same single match."""
+        self._statement(SYNTHETIC_LINES)
+        # Two identical bank lines compete for the same journal entry
+        for _ in range(2):
+            BankTransaction.objects.create(
+                tenant=self.tenant,
+                bank_account=self.bank_account,
+                transaction_date=START_DATE,
+                description="Customer deposit 0000",
+                amount=self._ledger_amount(0),
+                transaction_type="CREDIT",
+                created_by=self.user,
+            )
+
+        runs = []
+        for _ in range(2):
+            BankTransaction.objects.update(matched_journal_entry=None)
+            BankReconciliationService.auto_match_transactions(self._reconciliation())
+            runs.append(
+                sorted(
+                    BankTransaction.objects.filter(matched_journal_entry__isnull=False).values_list(
+                        "pk", "matched_journal_entry_id"
+                    )
+                )
+            )
+
+        self.assertEqual(runs[0], runs[1])
+        matched_entries = [entry_id for _, entry_id in runs[0]]
+        self.assertEqual(len(matched_entries), len(set(matched_entries)))
+
+    def test_gl_account_restricts_candidates_by_direction(self):
+        """With a GL account only cash lines in the bank's direction are candidates."""
+        self.bank_account.gl_account = self.cash_account
+        self.bank_account.save()
+        deposit = self._statement(1)[0]
+
+        matches = BankReconciliationService.suggest_matches(deposit)
+
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0]["transaction"].account_id, self.cash_account.pk)
+        self.assertEqual(matches[0]["transaction"].tx_type, "debit")
+        self.assertEqual(matches[0]["journal_entry"].pk, self.entries[0].pk)
+
+    def _import(self, statement_lines):
+        rows = ["Date,Description,Amount,Type,Reference"]
+        for line in statement_lines:
+            rows.append(
+                f"{line.transaction_date:%Y-%m-%d},{line.description},{line.amount},"
+                f"{line.transaction_type},{line.reference_number}"
+            )
+        statement_import = BankStatementImport.objects.create(
+            tenant=self.tenant,
+            bank_account=self.bank_account,
+            file_name="statement.csv",
+            file_format="CSV",
+            file=SimpleUploadedFile("statement.csv", "\n".join(rows).encode("utf-8")),
+            imported_by=self.user,
+        )
+        self.addCleanup(statement_import.file.delete, save=False)
+        return self._count_queries(
+            BankStatementImportService.import_statement, statement_import, self.user
+        )
+
+    def _synthetic_lines(self, size):
+        lines = self._statement(size)
+        BankTransaction.objects.all().delete()
+        return lines
+
+    def test_import_query_count_is_constant(self):
+        small_result, small_queries = self._import(self._synthetic_lines(LEDGER_ENTRIES * 4))
+        BankTransaction.objects.all().delete()
+        large_result, large_queries = self._import(self._synthetic_lines(SYNTHETIC_LINES))
+
+        self.assertEqual(small_result["imported"], LEDGER_ENTRIES * 4)
+        self.assertEqual(large_result["imported"], SYNTHETIC_LINES)
+        self.assertEqual(large_result["matched"], small_result["matched"])
+
+        def without_inserts(queries):
+            return [
+                sql
+                for sql in queries
+                if not sql.startswith('INSERT INTO "accounting_bank_transactions"')
+            ]
+
+        # Only the batched inserts grow with the statement
+        self.assertEqual(len(without_inserts(large_queries)), len(without_inserts(small_queries)))
+        self.assertEqual(len(large_queries) - len(without_inserts(large_queries)), 5)
+
+    def test_import_detects_duplicates_and_matches(self):
+        lines = self._synthetic_lines(LEDGER_ENTRIES * 4)
+        result, _ = self._import(lines)
+
+        # Every ledger entry shares keywords with exactly one bank line
+        self.assertEqual(result["imported"], LEDGER_ENTRIES * 4)
+        self.assertEqual(result["matched"], LEDGER_ENTRIES)
+        matched = BankTransaction.objects.filter(matched_journal_entry__isnull=False)
+        self.assertEqual(matched.values("matched_journal_entry").distinct().count(), LEDGER_ENTRIES)
+
+        # Importing the same statement again only finds duplicates
+        result, _ = self._import(lines)
+        self.assertEqual(result["imported"], 0)
+        self.assertEqual(result["matched"], 0)
+        self.assertEqual(result["duplicates"], LEDGER_ENTRIES * 4)
@@ -0,0 +1,353 @@
+"""
+Tests for the batched depreciation engine.
+
+Checks that batched runs produce exactly the schedules and balances of the
+per-asset path across methods and edge cases, that rerunning a period is a
+no-op, that a period is posted as one consolidated journal entry, and that
+a 50k-asset run costs a bounded number of queries.
+"""
+
+import math
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from django_ledger.models import AccountModel, JournalEntryModel, TransactionModel
+
+from apps.accounting.depreciation_engine import (
+    AssetColumns,
+    calculate_depreciation,
+    run_depreciation,
+)
+from apps.accounting.fixed_asset_models import DepreciationRun, DepreciationSchedule, FixedAsset
+from apps.accounting.services import AccountingService, FixedAssetService
+from apps.core.models import Tenant, User
+from apps.core.tenant_context import bypass_rls, tenant_context
+
+# (method, cost, salvage, useful life, accumulated, rate)
+ASSET_SPECS = [
+    ("STRAIGHT_LINE", "5000.00", "500.00", 60, "0.00", None),
+    ("STRAIGHT_LINE", "1000.00", "0.00", 7, "0.00", None),  # Rounded monthly amounts
+    ("STRAIGHT_LINE", "5000.00", "500.00", 60, "4450.00", None),  # Partial last month
+    ("STRAIGHT_LINE", "5000.00", "500.00", 60, "4500.00", None),  # Fully depreciated
+    ("STRAIGHT_LINE", "800.00", "0.00", 0, "0.00", None),  # No useful life
+    ("DECLINING_BALANCE", "12000.00", "2000.00", 60, "0.00", "200.00"),
+    ("DECLINING_BALANCE", "3333.33", "1000.00", 36, "2200.00", "150.00"),  # Salvage floor
+    ("DECLINING_BALANCE", "4000.00", "400.00", 48, "0.00", None),  # No rate
+    ("UNITS_OF_PRODUCTION", "9000.00", "1000.00", 60, "0.00", None),
+]
+
+PERIODS = [date(2025, month, 28) for month in range(1, 13)] + [date(2026, 1, 31)]
+
+
+def month_end(year, month):
+    return date(year + month // 12, month % 12 + 1, 1) - date.resolution
+
+
+class DepreciationFixtureMixin:
+    """A tenant with accounting set up, plus asset helpers."""
+
+    def create_fixture(self, slug):
+        with bypass_rls():
+            tenant = Tenant.objects.create(
+                company_name=f"Depreciation Shop {slug}", slug=slug, status=Tenant.ACTIVE
+            )
+            user = User.objects.create_user(
+                username=f"{slug}-owner",
+                password="testpass123",
+                tenant=tenant,
+                role=User.TENANT_OWNER,
+            )
+        with tenant_context(tenant.id):
+            jewelry_entity = AccountingService.setup_tenant_accounting(tenant, user)
+        coa = jewelry_entity.ledger_entity.chartofaccountmodel_set.first()
+        for code, name in [("1390", "Accumulated Depreciation"), ("1391", "Accum. Depr. Tools")]:
+            AccountModel.add_root(
+                coa_model=coa,
+                code=code,
+                name=name,
+                role="asset_ppe_equip_accum_depr",
+                balance_type="credit",
+                active=True,
+            )
+        return tenant, user
+
+    def create_asset(self, tenant, user, number, spec, accumulated_account="1390", **kwargs):
+        method, cost, salvage, life, accumulated, rate = spec
+        asset = FixedAsset.objects.create(
+            tenant=tenant,
+            asset_name=f"Asset {number}",
+            asset_number=f"FA-{number:05d}",
+            acquisition_date=date(2024, 12, 1),
+            acquisition_cost=Decimal(cost),
+            salvage_value=Decimal(salvage),
+            useful_life_months=life,
+            depreciation_method=method,
+            depreciation_rate=Decimal(rate) if rate else None,
+            asset_account="1300",
+            accumulated_depreciation_account=accumulated_account,
+            depreciation_expense_account="5300",
+            created_by=user,
+            **kwargs,
+        )
+        if accumulated != "0.00":
+            asset.accumulated_depreciation = Decimal(accumulated)
+            asset.current_book_value = asset.acquisition_cost - asset.accumulated_depreciation
+            asset.save()
+        return asset
+
+
+class DepreciationCalculatorTest(TestCase):
+    """The pure calculator against FixedAsset.calculate_monthly_depreciation()."""
+
+    def test_matches_per_asset_calculation(self):
+        assets = []
+        for method, cost, salvage, life, accumulated, rate in ASSET_SPECS:
+            asset = FixedAsset(
+                acquisition_cost=Decimal(cost),
+                salvage_value=Decimal(salvage),
+                useful_life_months=life,
+                depreciation_method=method,
+                depreciation_rate=Decimal(rate) if rate else None,
+                accumulated_depreciation=Decimal(accumulated),
+                current_book_value=Decimal(cost) - Decimal(accumulated),
+                status="ACTIVE",
+            )
+            assets.append(asset)
+
+        columns = AssetColumns(
+            *zip(
+                *(
+                    (
+                        a.depreciation_method,
+                        a.acquisition_cost,
+                        a.salvage_value,
+                        a.useful_life_months,
+                        a.accumulated_depreciation,
+                        a.current_book_value,
+                        a.depreciation_rate,
+                        None,
+                        None,
+                    )
+                    for a in assets
+                )
+            )
+        )
+        assert calculate_depreciation(columns) == [
+            a.calculate_monthly_depreciation() for a in assets
+        ]
+
+    def test_units_of_production(self):
+        columns = AssetColumns(
+            method=["UNITS_OF_PRODUCTION"] * 3,
+            acquisition_cost=[Decimal("9000.00")] * 3,
+            salvage_value=[Decimal("1000.00")] * 3,
+            useful_life_months=[60] * 3,
+            accumulated_depreciation=[Decimal("0.00"), Decimal("7990.00"), Decimal("0.00")],
+            current_book_value=[Decimal("9000.00"), Decimal("1010.00"), Decimal("9000.00")],
+            depreciation_rate=[None] * 3,
+            estimated_total_units=[Decimal("3000")] * 3,
+            units_produced=[Decimal("125"), Decimal("125"), None],
+        )
+        # 8000 / 3000 units * 125 = 333.33; the second asset has 10.00 left
+        assert calculate_depreciation(columns) == [
+            Decimal("333.33"),
+            Decimal("10.00"),
+            Decimal("0.00"),
+        ]
+
+
+class DepreciationEngineTest(DepreciationFixtureMixin, TestCase):
+    """Batched runs against the per-asset path."""
+
+    def setUp(self):
+        self.tenant, self.user = self.create_fixture("depreciation-engine")
+
+    def test_parity_with_per_asset_path(self):
+        legacy_tenant, legacy_user = self.create_fixture("depreciation-legacy")
+        legacy = [
+            self.create_asset(legacy_tenant, legacy_user, i, spec)
+            for i, spec in enumerate(ASSET_SPECS)
+        ]
+        batched = [
+            self.create_asset(self.tenant, self.user, i, spec) for i, spec in enumerate(ASSET_SPECS)
+        ]
+
+        for period in PERIODS:
+            for asset in legacy:
+                FixedAssetService.record_depreciation(
+                    asset, period, legacy_user, create_journal_entry=False
+                )
+            run_depreciation(self.tenant, period, self.user)
+
+        def history(asset):
+            schedules = DepreciationSchedule.objects.filter(fixed_asset=asset).order_by(
+                "period_date"
+            )
+            asset = FixedAsset.objects.get(pk=asset.pk)
+            return (
+                [
+                    (s.period_date, s.depreciation_amount, s.accumulated_depreciation, s.book_value)
+                    for s in schedules
+                ],
+                asset.accumulated_depreciation,
+                asset.current_book_value,
+                asset.last_depreciation_date,
+                asset.status,
+            )
+
+        for legacy_asset, batched_asset in zip(legacy, batched):
+            assert history(batched_asset) == history(legacy_asset)
+
+        partial = FixedAsset.objects.get(pk=batched[2].pk)
+        assert partial.status == "FULLY_DEPRECIATED"
+        assert partial.depreciation_schedules.get().depreciation_amount == Decimal("50.00")
+        assert not batched[3].depreciation_schedules.exists()
+
+    def test_consolidated_journal_entry(self):
+        spec = ASSET_SPECS[0]
+        for i in range(4):
+            self.create_asset(self.tenant, self.user, i, spec)
+        for i in range(4, 6):
+            self.create_asset(self.tenant, self.user, i, spec, accumulated_account="1391")
+
+        result = run_depreciation(self.tenant, date(2025, 1, 31), self.user)
+
+        assert result["processed"] == 6
+        assert result["total_depreciation"] == Decimal("450.00")
+        journal_entry = JournalEntryModel.objects.get(uuid=result["journal_entry"])
+        assert journal_entry.description == "Depreciation - January 2025"
+        assert journal_entry.posted
+        lines = sorted(
+            TransactionModel.objects.filter(journal_entry=journal_entry).values_list(
+                "account__code", "tx_type", "amount"
+            )
+        )
+        assert lines == [
+            ("1390", "credit", Decimal("300.00")),
+            ("1391", "credit", Decimal("150.00")),
+            ("5300", "debit", Decimal("150.00")),
+            ("5300", "debit", Decimal("300.00")),
+        ]
+        assert set(
+            DepreciationSchedule.objects.filter(tenant=self.tenant).values_list(
+                "journal_entry", flat=True
+            )
+        ) == {journal_entry.uuid}
+
+    def test_rerun_is_idempotent(self):
+        assets = [self.create_asset(self.tenant, self.user, i, ASSET_SPECS[0]) for i in range(3)]
+        # One asset was already depreciated for the period on its own
+        FixedAssetService.record_depreciation(
+            assets[0], date(2025, 1, 31), self.user, create_journal_entry=False
+        )
+
+        first = run_depreciation(self.tenant, date(2025, 1, 31), self.user)
+        with self.assertNumQueries(4):  # savepoint, run lookup, release, user-less log
+            second = FixedAssetService.run_monthly_depreciation(
+                self.tenant, date(2025, 1, 31), self.user
+            )
+
+        assert (first["processed"], first["already_recorded"]) == (2, 1)
+        assert (second["processed"], second["already_recorded"]) == (0, 2)
+        assert second["journal_entry"] == first["journal_entry"]
+        assert DepreciationRun.objects.filter(tenant=self.tenant).count() == 1
+        assert DepreciationSchedule.objects.filter(tenant=self.tenant).count() == 3
+        for asset in assets:
+            asset.refresh_from_db()
+            assert asset.accumulated_depreciation == Decimal("75.00")
+
+    def test_missing_account_fails_only_that_asset(self):
+        self.create_asset(self.tenant, self.user, 1, ASSET_SPECS[0])
+        broken = self.create_asset(
+            self.tenant, self.user, 2, ASSET_SPECS[0], accumulated_account="9999"
+        )
+
+        result = run_depreciation(self.tenant, date(2025, 1, 31), self.user)
+
+        assert (result["processed"], result["errors"]) == (1, 1)
+        assert "9999" in result["details"][0]["error"]
+        broken.refresh_from_db()
+        assert broken.accumulated_depreciation == Decimal("0.00")
+
+    def test_units_of_production_run(self):
+        asset = self.create_asset(
+            self.tenant,
+            self.user,
+            1,
+            ASSET_SPECS[-1],
+            estimated_total_units=Decimal("4000"),
+        )
+
+        result = FixedAssetService.run_monthly_depreciation(
+            self.tenant, date(2025, 1, 31), self.user, units_produced={asset.pk: Decimal("50")}
+        )
+
+        assert result["processed"] == 1
+        assert result["total_depreciation"] == Decimal("100.00")
+
+
+@override_settings(ACCOUNTING_DEPRECIATION_BATCH_SIZE=5000)
+class DepreciationBenchmarkTest(DepreciationFixtureMixin, TestCase):
+    """A 50k-asset tenant against the per-asset path."""
+
+    assets = 50000
+
+    def setUp(self):
+        self.tenant, self.user = self.create_fixture("depreciation-benchmark")
+        methods = [
+            ("STRAIGHT_LINE", None),
+            ("DECLINING_BALANCE", Decimal("200.00")),
+        ]
+        FixedAsset.objects.bulk_create(
+            [
+                FixedAsset(
+                    tenant=self.tenant,
+                    asset_name=f"Display Case {i}",
+                    asset_number=f"FA-{i:06d}",
+                    acquisition_date=date(2024, 12, 1),
+                    acquisition_cost=Decimal("1000.00") + i % 500,
+                    salvage_value=Decimal("100.00"),
+                    current_book_value=Decimal("1000.00") + i % 500,
+                    useful_life_months=36 + i % 48,
+                    depreciation_method=methods[i % 2][0],
+                    depreciation_rate=methods[i % 2][1],
+                    asset_account="1300",
+                    accumulated_depreciation_account="1390",
+                    depreciation_expense_account="5300",
+                    created_by=self.user,
+                )
+                for i in range(self.assets)
+            ],
+            batch_size=5000,
+        )
+
+    def test_50k_assets(self):
+        sample = list(FixedAsset.objects.filter(tenant=self.tenant)[:200])
+        start = time.perf_counter()
+        for asset in sample:
+            FixedAssetService.record_depreciation(
+                asset, date(2024, 12, 31), self.user, create_journal_entry=False
+            )
+        per_asset_time = (time.perf_counter() - start) / len(sample)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            result = run_depreciation(self.tenant, date(2025, 1, 31), self.user)
+            batched_time = time.perf_counter() - start
+
+        batches = math.ceil(self.assets / 5000)
+        assert result["processed"] == self.assets
+        assert len(queries) <= 40 + 2 * batches
+        # The per-asset path would take this long for the whole tenant
+        assert batched_time * 10 < per_asset_time * self.assets
+        assert (
+            DepreciationSchedule.objects.filter(
+                tenant=self.tenant, period_date=date(2025, 1, 31)
+            ).count()
+            == self.assets
+        )
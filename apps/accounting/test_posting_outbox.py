@@ -0,0 +1,319 @@
+"""
+Tests for deferred, batched journal entry posting through the outbox.
+
+Checks that the outbox produces the same ledger as the synchronous
+AccountingService path over a day of sales, that duplicate enqueues and
+duplicate deliveries never double-post, and that completing a sale costs
+far fewer queries than posting in the request.
+"""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_ledger.models import JournalEntryModel, TransactionModel
+
+from apps.accounting.models import AccountingConfiguration
+from apps.accounting.posting_models import PendingPosting
+from apps.accounting.posting_outbox import drain_outbox, post_pending, update_outbox_metrics
+from apps.accounting.services import AccountingService
+from apps.accounting.transaction_models import Expense, Payment, PurchaseOrder
+from apps.core.audit_signals import log_model_save
+from apps.core.models import Branch, Tenant, User
+from apps.core.tenant_context import bypass_rls, tenant_context
+from apps.inventory.models import InventoryItem, ProductCategory
+from apps.sales.models import Sale, SaleItem, Terminal
+
+
+@contextmanager
+def synchronous_posting():
+    """
+    Post through AccountingService as the signals used to.
+
+    Audit logging is switched off: in tests it runs inside the transaction
+    and cannot serialize the F() expression django-ledger saves on its
+    journal entry sequence, which aborts every entry after the first.
+    """
+    post_save.disconnect(log_model_save)
+    try:
+        yield
+    finally:
+        post_save.connect(log_model_save)
+
+
+def ledger_lines(journal_entries):
+    """Comparable content of journal entries: description, posted flag and lines."""
+    result = []
+    for journal_entry in journal_entries:
+        lines = sorted(
+            (tx.account.code, tx.tx_type, tx.amount, tx.description)
+            for tx in TransactionModel.objects.filter(journal_entry=journal_entry).select_related(
+                "account"
+            )
+        )
+        result.append((journal_entry.description, journal_entry.posted, lines))
+    return sorted(result)
+
+
+def account_balances(journal_entries):
+    """Debit and credit totals per account code."""
+    balances = defaultdict(lambda: {"debit": Decimal("0.00"), "credit": Decimal("0.00")})
+    for tx in TransactionModel.objects.filter(journal_entry__in=journal_entries).select_related(
+        "account"
+    ):
+        balances[tx.account.code][tx.tx_type] += tx.amount
+    return dict(balances)
+
+
+@override_settings(ACCOUNTING_POSTING_SYNC=False)
+class PostingOutboxTest(TestCase):
+    """Test the posting outbox against the synchronous posting path."""
+
+    def setUp(self):
+        """Set up a tenant with accounting, a branch and stock."""
+        with bypass_rls():
+            self.tenant = Tenant.objects.create(
+                company_name="Outbox Jewelry Shop", slug="outbox-jewelry-shop", status="ACTIVE"
+            )
+            self.user = User.objects.create_user(
+                username="outboxuser",
+                password="testpass123",
+                tenant=self.tenant,
+                role="TENANT_OWNER",
+            )
+
+        with tenant_context(self.tenant.id):
+            self.jewelry_entity = AccountingService.setup_tenant_accounting(self.tenant, self.user)
+            self.ledger = self.jewelry_entity.ledger_entity.ledgermodel_set.first()
+            self.branch = Branch.objects.create(
+                tenant=self.tenant, name="Main Store", address="123 Main St"
+            )
+            self.terminal = Terminal.objects.create(
+                branch=self.branch, terminal_id="POS-01", is_active=True
+            )
+            category = ProductCategory.objects.create(tenant=self.tenant, name="Rings")
+            self.items = [
+                InventoryItem.objects.create(
+                    tenant=self.tenant,
+                    sku=f"RING-{i:03d}",
+                    name=f"Gold Ring {i}",
+                    category=category,
+                    karat=18,
+                    weight_grams=Decimal("5.5"),
+                    cost_price=Decimal("100.00") * (i + 1),
+                    selling_price=Decimal("180.00") * (i + 1),
+                    quantity=100,
+                    branch=self.branch,
+                )
+                for i in range(3)
+            ]
+
+    def create_sale(self, number, payment_method="CASH", status=Sale.COMPLETED, lines=1):
+        """Create a sale with its items, completed only once the items exist."""
+        subtotal = sum(item.selling_price for item in self.items[:lines])
+        tax = (subtotal * Decimal("0.08")).quantize(Decimal("0.01"))
+        sale = Sale.objects.create(
+            tenant=self.tenant,
+            sale_number=f"SALE-{number:04d}",
+            branch=self.branch,
+            terminal=self.terminal,
+            employee=self.user,
+            subtotal=subtotal,
+            tax=tax,
+            total=subtotal + tax,
+            payment_method=payment_method,
+            status=Sale.ON_HOLD,
+        )
+        for item in self.items[:lines]:
+            SaleItem.objects.create(
+                sale=sale,
+                inventory_item=item,
+                quantity=1,
+                unit_price=item.selling_price,
+                subtotal=item.selling_price,
+            )
+        if status == Sale.COMPLETED:
+            sale.status = Sale.COMPLETED
+            sale.save()
+        return sale
+
+    def create_day_of_sales(self):
+        """A day of checkouts: mixed payment methods and basket sizes."""
+        methods = ["CASH", "CARD", "STORE_CREDIT"]
+        return [self.create_sale(i, methods[i % 3], lines=i % 3 + 1) for i in range(24)]
+
+    def outbox_entries(self):
+        return JournalEntryModel.objects.filter(
+            uuid__in=PendingPosting.objects.filter(tenant=self.tenant).values("journal_entry")
+        )
+
+    def test_ledger_matches_synchronous_posting(self):
+        with tenant_context(self.tenant.id):
+            sales = self.create_day_of_sales()
+            purchase_order = PurchaseOrder.objects.create(
+                tenant=self.tenant,
+                po_number="PO-001",
+                supplier_name="Gold Supplier",
+                total_amount=Decimal("2500.00"),
+                status="COMPLETED",
+                created_by=self.user,
+            )
+            payment = Payment.objects.create(
+                tenant=self.tenant,
+                payment_number="PAY-001",
+                supplier_name="Gold Supplier",
+                amount=Decimal("1000.00"),
+                payment_method="BANK_TRANSFER",
+                created_by=self.user,
+            )
+            expense = Expense.objects.create(
+                tenant=self.tenant,
+                description="Monthly rent",
+                category="RENT",
+                amount=Decimal("1500.00"),
+                payment_method="CASH",
+                created_by=self.user,
+            )
+            assert not self.outbox_entries().exists()
+
+            result = drain_outbox()
+            assert result == {"posted": 27}
+
+            with synchronous_posting():
+                synchronous = [
+                    AccountingService.create_sale_journal_entry(sale, self.user) for sale in sales
+                ] + [
+                    AccountingService.create_purchase_journal_entry(purchase_order, self.user),
+                    AccountingService.create_payment_journal_entry(payment, self.user),
+                    AccountingService.create_expense_journal_entry(expense, self.user),
+                ]
+            synchronous = JournalEntryModel.objects.filter(
+                uuid__in=[journal_entry.uuid for journal_entry in synchronous]
+            )
+            deferred = self.outbox_entries()
+
+            assert deferred.count() == synchronous.count() == 27
+            assert ledger_lines(deferred) == ledger_lines(synchronous)
+            assert account_balances(deferred) == account_balances(synchronous)
+
+            je_numbers = list(JournalEntryModel.objects.values_list("je_number", flat=True))
+            assert len(set(je_numbers)) == len(je_numbers)
+            for journal_entry in deferred:
+                journal_entry.verify()
+
+    def test_duplicate_delivery_posts_once(self):
+        with tenant_context(self.tenant.id):
+            sale = self.create_sale(1)
+            # Re-saving a completed sale does not queue it again
+            sale.notes = "Gift wrapped"
+            sale.save()
+            assert PendingPosting.objects.filter(tenant=self.tenant).count() == 1
+
+            assert post_pending(self.tenant.id) == {"posted": 1}
+            # Redelivered task and a second worker run
+            assert post_pending(self.tenant.id) == {}
+            assert drain_outbox() == {}
+
+            sale.save()
+            assert drain_outbox() == {}
+
+            posting = PendingPosting.objects.get(tenant=self.tenant)
+            assert posting.status == PendingPosting.POSTED
+            assert posting.attempts == 1
+            assert posting.posted_at is not None
+            assert JournalEntryModel.objects.filter(ledger=self.ledger).count() == 1
+
+    def test_checkout_query_count(self):
+        with tenant_context(self.tenant.id):
+            plain_sale, outbox_sale, synchronous_sale = [
+                self.create_sale(i, status=Sale.ON_HOLD, lines=3) for i in range(3)
+            ]
+            for sale in [plain_sale, outbox_sale, synchronous_sale]:
+                sale.status = Sale.COMPLETED
+
+            # Completing a sale without any accounting work
+            with patch("apps.accounting.signals.enqueue_posting"):
+                with CaptureQueriesContext(connection) as plain_queries:
+                    plain_sale.save()
+
+            # The outbox adds a single insert to the checkout
+            with self.assertNumQueries(len(plain_queries) + 1):
+                outbox_sale.save()
+
+            with synchronous_posting(), patch("apps.accounting.signals.enqueue_posting"):
+                with CaptureQueriesContext(connection) as synchronous_queries:
+                    synchronous_sale.save()
+                    AccountingService.create_sale_journal_entry(synchronous_sale, self.user)
+            assert len(synchronous_queries) - len(plain_queries) > 20
+
+    def test_batch_query_count_independent_of_size(self):
+        with tenant_context(self.tenant.id):
+            self.create_sale(0)
+            post_pending(self.tenant.id)
+
+            for i in range(1, 6):
+                self.create_sale(i, lines=2)
+            with CaptureQueriesContext(connection) as small_batch:
+                assert post_pending(self.tenant.id) == {"posted": 5}
+
+            for i in range(6, 46):
+                self.create_sale(i, lines=2)
+            with CaptureQueriesContext(connection) as large_batch:
+                assert post_pending(self.tenant.id) == {"posted": 40}
+
+            assert len(large_batch) == len(small_batch)
+
+    def test_disabled_configuration_skips_postings(self):
+        with tenant_context(self.tenant.id):
+            AccountingConfiguration.objects.filter(tenant=self.tenant).update(
+                use_automatic_journal_entries=False
+            )
+            self.create_sale(1)
+
+            assert drain_outbox() == {"skipped": 1}
+            posting = PendingPosting.objects.get(tenant=self.tenant)
+            assert posting.status == PendingPosting.SKIPPED
+            assert not JournalEntryModel.objects.filter(ledger=self.ledger).exists()
+
+    def test_missing_account_fails_only_that_posting(self):
+        with tenant_context(self.tenant.id):
+            self.create_sale(1)
+            self.create_sale(2, payment_method="CARD")
+            AccountingConfiguration.objects.filter(tenant=self.tenant).update(
+                default_card_account="9999"
+            )
+
+            assert drain_outbox() == {"posted": 1, "failed": 1}
+            failed = PendingPosting.objects.get(status=PendingPosting.FAILED)
+            assert "9999" in failed.last_error
+            assert JournalEntryModel.objects.filter(ledger=self.ledger).count() == 1
+
+    def test_lag_metric(self):
+        with tenant_context(self.tenant.id):
+            self.create_sale(1)
+            PendingPosting.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+
+            metrics = update_outbox_metrics()
+            assert metrics["pending"] == 1
+            assert metrics["lag_seconds"] >= 300
+
+            drain_outbox()
+            assert update_outbox_metrics() == {"pending": 0, "lag_seconds": 0}
+
+    @override_settings(ACCOUNTING_POSTING_SYNC=True)
+    def test_synchronous_fallback_posts_immediately(self):
+        with tenant_context(self.tenant.id):
+            sale = self.create_sale(1, lines=2)
+
+            posting = PendingPosting.objects.get(source_id=sale.pk)
+            assert posting.status == PendingPosting.POSTED
+            assert posting.journal_entry.description == f"Sale #{sale.sale_number}"
+            assert posting.journal_entry.posted
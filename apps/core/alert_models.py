@@ -65,6 +65,19 @@ class AlertRule(models.Model):
         (NOT_EQUALS, "Not Equals"),
     ]
 
+    # Aggregations of the metric samples in the evaluation window
+    AVERAGE = "AVG"
+    P95 = "P95"
+    MAXIMUM = "MAX"
+    LATEST = "LAST"
+
+    AGGREGATION_CHOICES = [
+        (AVERAGE, "Average"),
+        (P95, "95th Percentile"),
+        (MAXIMUM, "Maximum"),
+        (LATEST, "Latest Sample"),
+    ]
+
     # Severity levels
     INFO = "INFO"
     WARNING = "WARNING"
@@ -114,6 +127,27 @@ class AlertRule(models.Model):
         help_text="Threshold value to trigger alert",
     )
 
+    aggregation = models.CharField(
+        max_length=10,
+        choices=AGGREGATION_CHOICES,
+        default=AVERAGE,
+        help_text="How the samples in the evaluation window are combined",
+    )
+
+    window_minutes = models.PositiveIntegerField(
+        default=5,
+        help_text="Length of the evaluation window (in minutes)",
+    )
+
+    clear_threshold = models.FloatField(
+        null=True,
+        blank=True,
+        help_text=(
+            "Value the metric must get back to before an active alert resolves "
+            "(defaults to the threshold less SYSTEM_METRICS_HYSTERESIS)"
+        ),
+    )
+
     severity = models.CharField(
         max_length=20,
         choices=SEVERITY_CHOICES,
@@ -391,7 +391,12 @@ class AlertService:
         Auto-resolve alerts when metrics return to normal.
 
         Should be run periodically to check if active alerts can be resolved.
+
+        Returns:
+            Number of resolved alerts
         """
-        # This would check current metrics and auto-resolve alerts
-        # For now, this is a placeholder for future implementation
-        pass
+        from apps.core.system_metrics import MetricsEvaluator
+
+        evaluator = MetricsEvaluator()
+        evaluator.run(trigger=False)
+        return evaluator.resolved
@@ -2,6 +2,7 @@
 Celery tasks for monitoring alerts.
 
 This module provides periodic tasks for:
+- Collecting cluster-wide system metrics
 - Checking system metrics against alert rules
 - Escalating unacknowledged alerts
 - Auto-resolving alerts
@@ -14,110 +15,60 @@ import logging
 from django.conf import settings
 from django.db import connection
 
-import psutil
 import redis
 from celery import shared_task
 from celery.app.control import Inspect
 
+from apps.core import system_metrics
 from apps.core.alert_models import AlertRule
 from apps.core.alert_service import AlertService
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(name="check_system_metrics")
-def check_system_metrics():  # noqa: C901
+@shared_task(name="collect_cluster_metrics")
+def collect_cluster_metrics():
     """
-    Check system metrics and trigger alerts if thresholds are exceeded.
+    Store a sample of the cluster-wide metrics (queue depths, database
+    connections, Redis memory) for the alert rules and the dashboard.
 
-    Requirement 7.5: Send alerts when system metrics exceed defined thresholds.
+    Host metrics are stored by the sampler thread of each worker.
 
-    This task should run every 5 minutes.
+    This task should run every 30 seconds.
     """
-    logger.info("Checking system metrics for alerts")
-
-    alerts_created = []
-
     try:
-        # Check CPU usage
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_alerts = AlertService.check_metric(AlertRule.CPU_USAGE, cpu_percent)
-        alerts_created.extend(cpu_alerts)
-
-        # Check memory usage
-        memory = psutil.virtual_memory()
-        memory_alerts = AlertService.check_metric(AlertRule.MEMORY_USAGE, memory.percent)
-        alerts_created.extend(memory_alerts)
-
-        # Check disk usage
-        disk = psutil.disk_usage("/")
-        disk_alerts = AlertService.check_metric(AlertRule.DISK_USAGE, disk.percent)
-        alerts_created.extend(disk_alerts)
-
-        # Check database connections
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT count(*) as total
-                    FROM pg_stat_activity
-                    WHERE datname = current_database()
-                """
-                )
-                total_connections = cursor.fetchone()[0]
-
-                cursor.execute("SHOW max_connections")
-                max_connections = int(cursor.fetchone()[0])
-
-                connection_percent = (
-                    (total_connections / max_connections * 100) if max_connections > 0 else 0
-                )
-
-                db_alerts = AlertService.check_metric(
-                    AlertRule.DATABASE_CONNECTIONS, connection_percent
-                )
-                alerts_created.extend(db_alerts)
-        except Exception as e:
-            logger.error(f"Error checking database connections: {str(e)}")
-
-        # Check Redis memory
-        try:
-            redis_client = redis.Redis.from_url(settings.CACHES["default"]["LOCATION"])
-            info = redis_client.info()
-
-            used_memory = info.get("used_memory", 0)
-            max_memory = info.get("maxmemory", 0)
+        return system_metrics.collect_cluster_metrics()
+    except Exception as e:
+        logger.error(f"Error in collect_cluster_metrics task: {str(e)}")
+        return {}
 
-            if max_memory > 0:
-                memory_percent = used_memory / max_memory * 100
-                redis_alerts = AlertService.check_metric(AlertRule.REDIS_MEMORY, memory_percent)
-                alerts_created.extend(redis_alerts)
-        except Exception as e:
-            logger.error(f"Error checking Redis memory: {str(e)}")
 
-        # Check Celery queue length
-        try:
-            from config.celery import app
+@shared_task(name="check_system_metrics")
+def check_system_metrics():
+    """
+    Check system metrics and trigger alerts if thresholds are exceeded.
 
-            inspect = Inspect(app=app)
-            reserved = inspect.reserved()
+    Requirement 7.5: Send alerts when system metrics exceed defined thresholds.
 
-            total_reserved = 0
-            if reserved:
-                for tasks in reserved.values():
-                    total_reserved += len(tasks)
+    Evaluates all enabled rules against the stored metrics of every host (see
+    apps.core.system_metrics) and resolves the alerts of rules back to normal.
 
-            celery_alerts = AlertService.check_metric(AlertRule.CELERY_QUEUE_LENGTH, total_reserved)
-            alerts_created.extend(celery_alerts)
-        except Exception as e:
-            logger.error(f"Error checking Celery queue: {str(e)}")
+    This task should run every 5 minutes.
+    """
+    logger.info("Checking system metrics for alerts")
 
-        logger.info(f"System metrics check complete. Created {len(alerts_created)} alerts.")
+    try:
+        evaluator = system_metrics.MetricsEvaluator()
+        alerts_created = evaluator.run()
+        logger.info(
+            f"System metrics check complete. Created {len(alerts_created)} alerts, "
+            f"resolved {evaluator.resolved}."
+        )
+        return len(alerts_created)
 
     except Exception as e:
         logger.error(f"Error in check_system_metrics task: {str(e)}")
-
-    return len(alerts_created)
+        return 0
 
 
 @shared_task(name="check_service_health")
@@ -208,10 +159,9 @@ def auto_resolve_alerts():
     logger.info("Checking for alerts that can be auto-resolved")
 
     try:
-        # This would check current metrics and auto-resolve alerts
-        # For now, this is a placeholder for future implementation
-        logger.info("Auto-resolve check complete.")
-        return 0
+        resolved_count = AlertService.auto_resolve_alerts()
+        logger.info(f"Auto-resolve check complete. Resolved {resolved_count} alerts.")
+        return resolved_count
 
     except Exception as e:
         logger.error(f"Error in auto_resolve_alerts task: {str(e)}")
@@ -20,3 +20,6 @@ class CoreConfig(AppConfig):
 
         # Import job signal handlers for performance tracking
         import apps.core.job_signals  # noqa: F401
+
+        # Start the system metrics sampler in Celery workers
+        import apps.core.system_metrics  # noqa: F401
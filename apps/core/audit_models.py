@@ -10,6 +10,8 @@ import uuid
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 
 
@@ -19,6 +21,9 @@ class AuditLog(models.Model):
 
     Tracks administrative actions, user activity, data modifications,
     and API requests per Requirement 8.
+
+    The table is partitioned by month on `timestamp` (see
+    apps/core/audit_partitions.py); its primary key is (id, timestamp).
     """
 
     # Action categories
@@ -306,6 +311,11 @@ class AuditLog(models.Model):
             models.Index(fields=["severity", "-timestamp"], name="auditlog_severity_time_idx"),
             models.Index(fields=["ip_address", "-timestamp"], name="auditlog_ip_time_idx"),
             models.Index(fields=["request_path", "-timestamp"], name="auditlog_path_time_idx"),
+            # Full-text search in the audit log explorer
+            GinIndex(
+                SearchVector("description", "request_path", config="simple"),
+                name="auditlog_search_idx",
+            ),
         ]
 
     def __str__(self):
@@ -538,6 +548,9 @@ class APIRequestLog(models.Model):
 
     Per Requirement 8.4 - Log all API requests with user, endpoint, parameters,
     and response status.
+
+    The table is partitioned by month on `timestamp` (see
+    apps/core/audit_partitions.py); its primary key is (id, timestamp).
     """
 
     id = models.UUIDField(
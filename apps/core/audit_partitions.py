@@ -0,0 +1,247 @@
+"""
+Monthly range partitions for the audit log tables.
+
+AuditLog and APIRequestLog are written on every mutating request, so both
+tables are partitioned by month on `timestamp`:
+- Retention detaches and drops whole partitions instead of deleting rows,
+  so it no longer bloats the table or triggers heavy vacuuming
+- Queries filtered on a time range only touch the matching partitions
+
+Partitions are created ahead of time by ensure_partitions() (a daily task
+and the manage_audit_partitions command). A DEFAULT partition catches rows
+that arrive before their month exists; create_partition() moves them into
+the new partition.
+
+Per Requirement 8 - Audit Logging
+"""
+
+import logging
+import re
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.audit_models import APIRequestLog, AuditLog
+
+logger = logging.getLogger(__name__)
+
+# Months of partitions kept ready ahead of the current month
+DEFAULT_MONTHS_AHEAD = 3
+
+PARTITIONED_MODELS = (AuditLog, APIRequestLog)
+PARTITION_COLUMN = "timestamp"
+
+_RANGE_BOUND = re.compile(r"FROM \((.+)\) TO \((.+)\)")
+
+
+class Partition(NamedTuple):
+    """One partition and its range; None bounds are MINVALUE/MAXVALUE."""
+
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    is_default: bool
+
+
+def month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the month containing `value`."""
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Move a month start forward (or back) by whole months."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partitioned(table: str) -> bool:
+    """Whether the table is a partitioned table."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [table],
+        )
+        return cursor.fetchone()[0]
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def list_partitions(table: str) -> List[Partition]:
+    """List the partitions of a table, oldest first, DEFAULT last."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _RANGE_BOUND.search(bound)
+        if match is None:
+            partitions.append(Partition(name, None, None, True))
+        else:
+            lower, upper = (_parse_bound(value) for value in match.groups())
+            partitions.append(Partition(name, lower, upper, False))
+
+    minimum = datetime.min.replace(tzinfo=dt_timezone.utc)
+    return sorted(partitions, key=lambda p: (p.is_default, p.lower or minimum))
+
+
+def _covered(partitions: List[Partition], lower: datetime, upper: datetime) -> bool:
+    """Whether any range partition overlaps [lower, upper)."""
+    for partition in partitions:
+        if partition.is_default:
+            continue
+        starts_before_end = partition.lower is None or partition.lower < upper
+        ends_after_start = partition.upper is None or partition.upper > lower
+        if starts_before_end and ends_after_start:
+            return True
+    return False
+
+
+def _check_deferred_constraints(cursor) -> None:
+    """
+    Run pending foreign key checks before altering partitions.
+
+    Tables with pending trigger events in the current transaction cannot be
+    detached or dropped; Django's foreign keys are deferred to commit.
+    """
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+
+def create_partition(table: str, month: datetime) -> Optional[str]:
+    """
+    Create the partition for one month unless its range is already covered.
+
+    Rows for the month that landed in the DEFAULT partition are moved into
+    the new partition.
+
+    Returns:
+        str: Name of the created partition, or None
+    """
+    lower = month_start(month)
+    upper = add_months(lower, 1)
+    partitions = list_partitions(table)
+    if _covered(partitions, lower, upper):
+        return None
+
+    name = partition_name(table, lower)
+    default = next((p.name for p in partitions if p.is_default), None)
+    quote = connection.ops.quote_name
+    column = quote(PARTITION_COLUMN)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        _check_deferred_constraints(cursor)
+        stray_rows = False
+        if default:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {quote(default)} "
+                f"WHERE {column} >= %s AND {column} < %s)",
+                [lower, upper],
+            )
+            stray_rows = cursor.fetchone()[0]
+        if stray_rows:
+            cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(default)}")
+
+        cursor.execute(
+            f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+
+        if stray_rows:
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {quote(default)} "
+                f"WHERE {column} >= %s AND {column} < %s RETURNING *) "
+                f"INSERT INTO {quote(table)} SELECT * FROM moved",
+                [lower, upper],
+            )
+            logger.info(f"Moved {cursor.rowcount} rows from {default} into {name}")
+            cursor.execute(f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(default)} DEFAULT")
+
+    logger.info(f"Created partition {name}")
+    return name
+
+
+def ensure_partitions(
+    months_ahead: Optional[int] = None, now: Optional[datetime] = None
+) -> Dict[str, List[str]]:
+    """
+    Create partitions from the current month through `months_ahead` months.
+
+    Returns:
+        dict: Table name -> names of the partitions created
+    """
+    if months_ahead is None:
+        months_ahead = getattr(settings, "AUDIT_LOG_PARTITION_MONTHS_AHEAD", DEFAULT_MONTHS_AHEAD)
+    current = month_start(now or timezone.now())
+
+    created = {}
+    for model in PARTITIONED_MODELS:
+        table = model._meta.db_table
+        if not is_partitioned(table):
+            continue
+        names = [create_partition(table, add_months(current, i)) for i in range(months_ahead + 1)]
+        created[table] = [name for name in names if name]
+    return created
+
+
+def drop_partitions_before(table: str, cutoff: datetime) -> Tuple[List[str], int]:
+    """
+    Detach and drop every partition whose range ends on or before `cutoff`.
+
+    Returns:
+        tuple: (names of the dropped partitions, rows they held)
+    """
+    quote = connection.ops.quote_name
+    dropped = []
+    rows = 0
+    for partition in list_partitions(table):
+        if partition.is_default or partition.upper is None or partition.upper > cutoff:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            _check_deferred_constraints(cursor)
+            cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(partition.name)}")
+            cursor.execute(f"SELECT count(*) FROM {quote(partition.name)}")
+            rows += cursor.fetchone()[0]
+            cursor.execute(f"DROP TABLE {quote(partition.name)}")
+        dropped.append(partition.name)
+        logger.info(f"Dropped partition {partition.name}")
+    return dropped, rows
+
+
+def apply_retention(model, cutoff: datetime) -> int:
+    """
+    Remove log rows older than `cutoff`.
+
+    Whole partitions before the cutoff are dropped; only the rows in the
+    partition straddling the cutoff (or in an unpartitioned table) are
+    deleted.
+
+    Returns:
+        int: Number of rows removed
+    """
+    table = model._meta.db_table
+    removed = 0
+    if is_partitioned(table):
+        _, removed = drop_partitions_before(table, cutoff)
+    removed += model.objects.filter(timestamp__lt=cutoff).delete()[0]
+    return removed
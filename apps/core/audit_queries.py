@@ -0,0 +1,328 @@
+"""
+Query helpers for the audit log explorer.
+
+The explorer has to stay fast on tables with tens of millions of rows:
+- Free-text search uses the `auditlog_search_idx` full-text index instead
+  of icontains scans
+- Pages are fetched by keyset on (timestamp, id), so page N costs the same
+  as page 1
+- Totals are estimated from the query plan once they are too large to
+  count exactly
+- Exports stream from a server-side cursor with no row cap
+
+Per Requirement 8.2 - Audit log explorer
+"""
+
+import csv
+import ipaddress
+import json
+import re
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from apps.core.audit_models import AuditLog
+from apps.reporting.streaming import Echo, _json_default
+
+# Estimates below this are replaced by an exact count
+DEFAULT_EXACT_COUNT_THRESHOLD = 10000
+
+# Rows fetched per round trip when exporting
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+
+# Most users matched by a search term
+MAX_SEARCH_USERS = 100
+
+SEARCH_VECTOR = SearchVector("description", "request_path", config="simple")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_SEARCH_TERM = re.compile(r"[\w@.\-/]+")
+
+
+def search_audit_logs(queryset: QuerySet, search_query: str) -> QuerySet:
+    """
+    Filter audit logs matching a free-text search.
+
+    Words match the description and request path by prefix through the
+    full-text index. A full IP address matches `ip_address`, and
+    usernames and emails containing the text match the user.
+    """
+    terms = [term for term in _SEARCH_TERM.findall(search_query) if term.strip(".-/")]
+    # Matching users are resolved first so every branch of the OR can use
+    # an index (a subquery would force a filter over every row)
+    user_ids = list(
+        get_user_model()
+        .objects.filter(Q(username__icontains=search_query) | Q(email__icontains=search_query))
+        .values_list("id", flat=True)[:MAX_SEARCH_USERS]
+    )
+    condition = Q(user_id__in=user_ids)
+    if terms:
+        tsquery = " & ".join(f"'{term}':*" for term in terms)
+        queryset = queryset.annotate(search=SEARCH_VECTOR)
+        condition |= Q(search=SearchQuery(tsquery, config="simple", search_type="raw"))
+    try:
+        condition |= Q(ip_address=str(ipaddress.ip_address(search_query)))
+    except ValueError:
+        pass
+    return queryset.filter(condition)
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def filter_audit_logs(queryset: QuerySet, params) -> QuerySet:  # noqa: C901
+    """
+    Apply the explorer's filters to an audit log queryset.
+
+    Supports filtering by:
+    - Search query (description, request path, user, IP)
+    - User, action, category, severity, tenant and IP address
+    - Date range and quick date filters
+
+    Args:
+        queryset: AuditLog queryset
+        params: Request GET parameters
+    """
+    search_query = params.get("q", "").strip()
+    if search_query:
+        queryset = search_audit_logs(queryset, search_query)
+
+    for param, field in [
+        ("user", "user_id"),
+        ("action", "action"),
+        ("category", "category"),
+        ("severity", "severity"),
+        ("tenant", "tenant_id"),
+        ("ip", "ip_address"),
+    ]:
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{field: value})
+
+    date_from = _parse_date(params.get("date_from"))
+    if date_from:
+        queryset = queryset.filter(timestamp__gte=date_from)
+
+    date_to = _parse_date(params.get("date_to"))
+    if date_to:
+        # Include the entire day
+        queryset = queryset.filter(timestamp__lte=date_to.replace(hour=23, minute=59, second=59))
+
+    quick_filter = params.get("quick_filter")
+    if quick_filter:
+        now = timezone.now()
+        if quick_filter == "today":
+            queryset = queryset.filter(timestamp__date=now.date())
+        elif quick_filter == "yesterday":
+            queryset = queryset.filter(timestamp__date=(now - timedelta(days=1)).date())
+        elif quick_filter == "last_7_days":
+            queryset = queryset.filter(timestamp__gte=now - timedelta(days=7))
+        elif quick_filter == "last_30_days":
+            queryset = queryset.filter(timestamp__gte=now - timedelta(days=30))
+        elif quick_filter == "last_90_days":
+            queryset = queryset.filter(timestamp__gte=now - timedelta(days=90))
+
+    return queryset
+
+
+def estimated_count(queryset: QuerySet) -> Tuple[int, bool]:
+    """
+    Count a queryset, estimating from the query plan when the count is large.
+
+    The planner's row estimate comes from pg_class statistics and costs no
+    scan. Below AUDIT_EXACT_COUNT_THRESHOLD rows an exact count is cheap,
+    so it is used instead.
+
+    Returns:
+        tuple: (count, whether the count is an estimate)
+    """
+    if connection.vendor != "postgresql":
+        return queryset.count(), False
+
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+    threshold = getattr(settings, "AUDIT_EXACT_COUNT_THRESHOLD", DEFAULT_EXACT_COUNT_THRESHOLD)
+    if estimate < threshold:
+        return queryset.count(), False
+    return estimate, True
+
+
+def estimated_counts_by(queryset: QuerySet, field: str, values: Iterable[str]) -> Dict[str, int]:
+    """Estimated count of rows for each value of a field."""
+    return {value: estimated_count(queryset.filter(**{field: value}))[0] for value in values}
+
+
+def encode_cursor(timestamp: datetime, pk) -> str:
+    """Opaque keyset cursor for a row: microseconds since the epoch and id."""
+    microseconds = (timestamp - _EPOCH) // timedelta(microseconds=1)
+    return f"{microseconds}.{pk}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, UUID]]:
+    """Decode a cursor from encode_cursor(); invalid cursors decode to None."""
+    if not cursor:
+        return None
+    try:
+        microseconds, pk = cursor.split(".", 1)
+        return _EPOCH + timedelta(microseconds=int(microseconds)), UUID(pk)
+    except ValueError:
+        return None
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, newest first."""
+
+    def __init__(self, object_list: List, has_next: bool, has_previous: bool):
+        self.object_list = object_list
+        self.has_next = has_next and bool(object_list)
+        self.has_previous = has_previous and bool(object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(last.timestamp, last.pk)
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        first = self.object_list[0]
+        return encode_cursor(first.timestamp, first.pk)
+
+
+def keyset_page(
+    queryset: QuerySet, page_size: int, after: Optional[str] = None, before: Optional[str] = None
+) -> KeysetPage:
+    """
+    Fetch the page after (older than) or before (newer than) a cursor.
+
+    The condition is written as `timestamp <= t AND (timestamp < t OR id < i)`
+    so the first term can be answered from the timestamp indexes.
+
+    Args:
+        queryset: Queryset of a model with `timestamp` and a UUID pk
+        page_size: Rows per page
+        after: Cursor of the last row on the previous page
+        before: Cursor of the first row on the next page
+    """
+    before_key = decode_cursor(before)
+    if before_key:
+        timestamp, pk = before_key
+        rows = list(
+            queryset.filter(timestamp__gte=timestamp)
+            .filter(Q(timestamp__gt=timestamp) | Q(pk__gt=pk))
+            .order_by("timestamp", "pk")[: page_size + 1]
+        )
+        has_previous = len(rows) > page_size
+        return KeysetPage(rows[:page_size][::-1], has_next=True, has_previous=has_previous)
+
+    after_key = decode_cursor(after)
+    if after_key:
+        timestamp, pk = after_key
+        queryset = queryset.filter(timestamp__lte=timestamp).filter(
+            Q(timestamp__lt=timestamp) | Q(pk__lt=pk)
+        )
+    rows = list(queryset.order_by("-timestamp", "-pk")[: page_size + 1])
+    return KeysetPage(
+        rows[:page_size], has_next=len(rows) > page_size, has_previous=after_key is not None
+    )
+
+
+EXPORT_COLUMNS = [
+    "Timestamp",
+    "Category",
+    "Action",
+    "Severity",
+    "User",
+    "Tenant",
+    "Description",
+    "IP Address",
+    "Request Method",
+    "Request Path",
+    "Response Status",
+    "Affected Object",
+]
+
+
+def iter_export_rows(queryset: QuerySet) -> Iterator[List]:
+    """
+    Yield export rows for audit logs, read through a server-side cursor.
+
+    Affected objects are prefetched per chunk rather than per row.
+    """
+    chunk_size = getattr(settings, "AUDIT_EXPORT_CHUNK_SIZE", DEFAULT_EXPORT_CHUNK_SIZE)
+    logs = (
+        queryset.select_related("user", "tenant", "content_type")
+        .prefetch_related("affected_object")
+        .iterator(chunk_size=chunk_size)
+    )
+    for log in logs:
+        yield [
+            log.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            log.get_category_display(),
+            log.get_action_display(),
+            log.get_severity_display(),
+            log.user.username if log.user else "System",
+            log.tenant.company_name if log.tenant else "Platform",
+            log.description,
+            log.ip_address or "",
+            log.request_method or "",
+            log.request_path or "",
+            log.response_status or "",
+            log.get_affected_object_display(),
+        ]
+
+
+def iter_export_csv(queryset: QuerySet) -> Iterator[str]:
+    """Yield CSV lines, header first."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in iter_export_rows(queryset):
+        yield writer.writerow(row)
+
+
+def iter_export_jsonl(queryset: QuerySet) -> Iterator[str]:
+    """Yield one JSON object per line."""
+    for row in iter_export_rows(queryset):
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json_default) + "\n"
+
+
+__all__ = [
+    "AuditLog",
+    "KeysetPage",
+    "estimated_count",
+    "estimated_counts_by",
+    "filter_audit_logs",
+    "iter_export_csv",
+    "iter_export_jsonl",
+    "keyset_page",
+    "search_audit_logs",
+]
@@ -0,0 +1,30 @@
+"""
+Celery tasks for audit log maintenance.
+
+Per Requirement 8 - Audit Logging
+- Keeps monthly audit log partitions created ahead of time
+"""
+
+import logging
+from typing import Dict, List
+
+from celery import shared_task
+
+from apps.core.audit_partitions import ensure_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="apps.core.audit_tasks.ensure_audit_log_partitions")
+def ensure_audit_log_partitions() -> Dict[str, List[str]]:
+    """
+    Create upcoming monthly partitions for the audit log tables.
+
+    Returns:
+        dict: Table name -> names of the partitions created
+    """
+    created = ensure_partitions()
+    for table, names in created.items():
+        if names:
+            logger.info(f"Created {len(names)} partitions for {table}: {', '.join(names)}")
+    return created
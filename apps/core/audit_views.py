@@ -5,17 +5,26 @@ This module provides comprehensive audit log viewing, searching, filtering,
 and export functionality per Requirement 8.2.
 """
 
-import csv
 from datetime import datetime, timedelta
 
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Count, Q
-from django.http import HttpResponse, JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.generic import DetailView, ListView, TemplateView
 
 from apps.core.audit_models import APIRequestLog, AuditLog, DataChangeLog, LoginAttempt
+from apps.core.audit_partitions import apply_retention
+from apps.core.audit_queries import (
+    estimated_count,
+    estimated_counts_by,
+    filter_audit_logs,
+    iter_export_csv,
+    iter_export_jsonl,
+    keyset_page,
+)
+from apps.core.db_routing import use_replica
 from apps.core.permissions import is_platform_admin
 
 
@@ -26,7 +35,35 @@ class PlatformAdminRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
         return is_platform_admin(self.request.user)
 
 
-class AuditLogExplorerView(PlatformAdminRequiredMixin, ListView):
+class KeysetPaginationMixin:
+    """
+    Paginate a ListView by keyset on (timestamp, id) instead of OFFSET.
+
+    Pages are addressed by `after`/`before` cursors, so deep pages cost the
+    same as the first. `filter_query` holds the current filters without the
+    cursor, for building pagination links.
+    """
+
+    def paginate_queryset(self, queryset, page_size):
+        page = keyset_page(
+            queryset,
+            page_size,
+            after=self.request.GET.get("after"),
+            before=self.request.GET.get("before"),
+        )
+        return None, page, page.object_list, page.has_next or page.has_previous
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filters = self.request.GET.copy()
+        for param in ("after", "before", "page"):
+            filters.pop(param, None)
+        context["filter_query"] = filters.urlencode()
+        return context
+
+
+@method_decorator(use_replica(), name="dispatch")
+class AuditLogExplorerView(PlatformAdminRequiredMixin, KeysetPaginationMixin, ListView):
     """
     Main audit log explorer with advanced search and filtering.
 
@@ -38,7 +75,7 @@ class AuditLogExplorerView(PlatformAdminRequiredMixin, ListView):
     context_object_name = "audit_logs"
     paginate_by = 50
 
-    def get_queryset(self):  # noqa: C901
+    def get_queryset(self):
         """
         Get filtered and searched audit logs.
 
@@ -50,90 +87,10 @@ class AuditLogExplorerView(PlatformAdminRequiredMixin, ListView):
         - IP address
         - Category
         - Severity
-        - Search query (description, user, IP)
+        - Search query (description, request path, user, IP)
         """
-        queryset = AuditLog.objects.select_related("user", "tenant", "content_type").order_by(
-            "-timestamp"
-        )
-
-        # Search query
-        search_query = self.request.GET.get("q", "").strip()
-        if search_query:
-            queryset = queryset.filter(
-                Q(description__icontains=search_query)
-                | Q(user__username__icontains=search_query)
-                | Q(user__email__icontains=search_query)
-                | Q(ip_address__icontains=search_query)
-                | Q(request_path__icontains=search_query)
-            )
-
-        # Filter by user
-        user_id = self.request.GET.get("user")
-        if user_id:
-            queryset = queryset.filter(user_id=user_id)
-
-        # Filter by action
-        action = self.request.GET.get("action")
-        if action:
-            queryset = queryset.filter(action=action)
-
-        # Filter by category
-        category = self.request.GET.get("category")
-        if category:
-            queryset = queryset.filter(category=category)
-
-        # Filter by severity
-        severity = self.request.GET.get("severity")
-        if severity:
-            queryset = queryset.filter(severity=severity)
-
-        # Filter by tenant
-        tenant_id = self.request.GET.get("tenant")
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
-
-        # Filter by IP address
-        ip_address = self.request.GET.get("ip")
-        if ip_address:
-            queryset = queryset.filter(ip_address=ip_address)
-
-        # Filter by date range
-        date_from = self.request.GET.get("date_from")
-        date_to = self.request.GET.get("date_to")
-
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, "%Y-%m-%d")
-                queryset = queryset.filter(timestamp__gte=date_from_obj)
-            except ValueError:
-                pass
-
-        if date_to:
-            try:
-                date_to_obj = datetime.strptime(date_to, "%Y-%m-%d")
-                # Include the entire day
-                date_to_obj = date_to_obj.replace(hour=23, minute=59, second=59)
-                queryset = queryset.filter(timestamp__lte=date_to_obj)
-            except ValueError:
-                pass
-
-        # Quick date filters
-        quick_filter = self.request.GET.get("quick_filter")
-        if quick_filter:
-            now = timezone.now()
-            if quick_filter == "today":
-                queryset = queryset.filter(timestamp__date=now.date())
-            elif quick_filter == "yesterday":
-                yesterday = now - timedelta(days=1)
-                queryset = queryset.filter(timestamp__date=yesterday.date())
-            elif quick_filter == "last_7_days":
-                queryset = queryset.filter(timestamp__gte=now - timedelta(days=7))
-            elif quick_filter == "last_30_days":
-                queryset = queryset.filter(timestamp__gte=now - timedelta(days=30))
-            elif quick_filter == "last_90_days":
-                queryset = queryset.filter(timestamp__gte=now - timedelta(days=90))
-
-        return queryset
+        queryset = AuditLog.objects.select_related("user", "tenant", "content_type")
+        return filter_audit_logs(queryset, self.request.GET)
 
     def get_context_data(self, **kwargs):
         """Add filter options and statistics to context."""
@@ -158,19 +115,20 @@ class AuditLogExplorerView(PlatformAdminRequiredMixin, ListView):
             "quick_filter": self.request.GET.get("quick_filter", ""),
         }
 
-        # Get statistics for current filter
+        # Get statistics for current filter; large totals are estimated
         queryset = self.get_queryset()
-        context["total_count"] = queryset.count()
-        context["category_counts"] = dict(
-            queryset.values("category").annotate(count=Count("id")).values_list("category", "count")
+        context["total_count"], context["count_is_estimate"] = estimated_count(queryset)
+        context["category_counts"] = estimated_counts_by(
+            queryset, "category", [value for value, _ in AuditLog.CATEGORY_CHOICES]
         )
-        context["severity_counts"] = dict(
-            queryset.values("severity").annotate(count=Count("id")).values_list("severity", "count")
+        context["severity_counts"] = estimated_counts_by(
+            queryset, "severity", [value for value, _ in AuditLog.SEVERITY_CHOICES]
         )
 
         return context
 
 
+@method_decorator(use_replica(), name="dispatch")
 class AuditLogDetailView(PlatformAdminRequiredMixin, DetailView):
     """
     Detailed view of a single audit log entry.
@@ -209,146 +167,34 @@ class AuditLogDetailView(PlatformAdminRequiredMixin, DetailView):
 
 class AuditLogExportView(PlatformAdminRequiredMixin, View):
     """
-    Export audit logs to CSV.
+    Export audit logs to CSV or JSON lines.
+
+    Rows are streamed from a server-side cursor, so exports are not capped.
 
     Per Requirement 8.2 - Create export to CSV functionality.
     """
 
     def get(self, request, *args, **kwargs):
-        """Export filtered audit logs to CSV."""
+        """Stream filtered audit logs as CSV (default) or JSON lines."""
         # Use the same filtering logic as the list view
-        queryset = self._get_filtered_queryset()
+        queryset = filter_audit_logs(AuditLog.objects.all(), request.GET).order_by("-timestamp")
 
-        # Limit export to prevent memory issues
-        max_export = 10000
-        if queryset.count() > max_export:
-            return JsonResponse(
-                {"error": f"Export limited to {max_export} records. Please refine your filters."},
-                status=400,
-            )
+        if request.GET.get("format") == "jsonl":
+            content_type, extension = "application/x-ndjson", "jsonl"
+            chunks = iter_export_jsonl(queryset)
+        else:
+            content_type, extension = "text/csv", "csv"
+            chunks = iter_export_csv(queryset)
 
-        # Create CSV response
-        response = HttpResponse(content_type="text/csv")
+        response = StreamingHttpResponse(chunks, content_type=content_type)
         response["Content-Disposition"] = (
-            f'attachment; filename="audit_logs_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+            f'attachment; filename="audit_logs_{timezone.now().strftime("%Y%m%d_%H%M%S")}'
+            f'.{extension}"'
         )
-
-        writer = csv.writer(response)
-
-        # Write header
-        writer.writerow(
-            [
-                "Timestamp",
-                "Category",
-                "Action",
-                "Severity",
-                "User",
-                "Tenant",
-                "Description",
-                "IP Address",
-                "Request Method",
-                "Request Path",
-                "Response Status",
-                "Affected Object",
-            ]
-        )
-
-        # Write data
-        for log in queryset.select_related("user", "tenant", "content_type"):
-            writer.writerow(
-                [
-                    log.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                    log.get_category_display(),
-                    log.get_action_display(),
-                    log.get_severity_display(),
-                    log.user.username if log.user else "System",
-                    log.tenant.company_name if log.tenant else "Platform",
-                    log.description,
-                    log.ip_address or "",
-                    log.request_method or "",
-                    log.request_path or "",
-                    log.response_status or "",
-                    log.get_affected_object_display(),
-                ]
-            )
-
         return response
 
-    def _get_filtered_queryset(self):  # noqa: C901
-        """Get filtered queryset using same logic as list view."""
-        queryset = AuditLog.objects.select_related("user", "tenant", "content_type").order_by(
-            "-timestamp"
-        )
-
-        # Apply all filters from request
-        search_query = self.request.GET.get("q", "").strip()
-        if search_query:
-            queryset = queryset.filter(
-                Q(description__icontains=search_query)
-                | Q(user__username__icontains=search_query)
-                | Q(user__email__icontains=search_query)
-                | Q(ip_address__icontains=search_query)
-            )
-
-        user_id = self.request.GET.get("user")
-        if user_id:
-            queryset = queryset.filter(user_id=user_id)
-
-        action = self.request.GET.get("action")
-        if action:
-            queryset = queryset.filter(action=action)
-
-        category = self.request.GET.get("category")
-        if category:
-            queryset = queryset.filter(category=category)
-
-        severity = self.request.GET.get("severity")
-        if severity:
-            queryset = queryset.filter(severity=severity)
-
-        tenant_id = self.request.GET.get("tenant")
-        if tenant_id:
-            queryset = queryset.filter(tenant_id=tenant_id)
-
-        ip_address = self.request.GET.get("ip")
-        if ip_address:
-            queryset = queryset.filter(ip_address=ip_address)
-
-        date_from = self.request.GET.get("date_from")
-        if date_from:
-            try:
-                date_from_obj = datetime.strptime(date_from, "%Y-%m-%d")
-                queryset = queryset.filter(timestamp__gte=date_from_obj)
-            except ValueError:
-                pass
-
-        date_to = self.request.GET.get("date_to")
-        if date_to:
-            try:
-                date_to_obj = datetime.strptime(date_to, "%Y-%m-%d")
-                date_to_obj = date_to_obj.replace(hour=23, minute=59, second=59)
-                queryset = queryset.filter(timestamp__lte=date_to_obj)
-            except ValueError:
-                pass
-
-        quick_filter = self.request.GET.get("quick_filter")
-        if quick_filter:
-            now = timezone.now()
-            if quick_filter == "today":
-                queryset = queryset.filter(timestamp__date=now.date())
-            elif quick_filter == "yesterday":
-                yesterday = now - timedelta(days=1)
-                queryset = queryset.filter(timestamp__date=yesterday.date())
-            elif quick_filter == "last_7_days":
-                queryset = queryset.filter(timestamp__gte=now - timedelta(days=7))
-            elif quick_filter == "last_30_days":
-                queryset = queryset.filter(timestamp__gte=now - timedelta(days=30))
-            elif quick_filter == "last_90_days":
-                queryset = queryset.filter(timestamp__gte=now - timedelta(days=90))
-
-        return queryset
-
 
+@method_decorator(use_replica(), name="dispatch")
 class LoginAttemptExplorerView(PlatformAdminRequiredMixin, ListView):
     """
     Explorer for login attempts with filtering.
@@ -436,6 +282,7 @@ class LoginAttemptExplorerView(PlatformAdminRequiredMixin, ListView):
         return context
 
 
+@method_decorator(use_replica(), name="dispatch")
 class DataChangeLogExplorerView(PlatformAdminRequiredMixin, ListView):
     """
     Explorer for data change logs with filtering.
@@ -515,7 +362,8 @@ class DataChangeLogExplorerView(PlatformAdminRequiredMixin, ListView):
         return context
 
 
-class APIRequestLogExplorerView(PlatformAdminRequiredMixin, ListView):
+@method_decorator(use_replica(), name="dispatch")
+class APIRequestLogExplorerView(PlatformAdminRequiredMixin, KeysetPaginationMixin, ListView):
     """
     Explorer for API request logs with filtering.
 
@@ -529,7 +377,7 @@ class APIRequestLogExplorerView(PlatformAdminRequiredMixin, ListView):
 
     def get_queryset(self):  # noqa: C901
         """Get filtered API requests."""
-        queryset = APIRequestLog.objects.select_related("user", "tenant").order_by("-timestamp")
+        queryset = APIRequestLog.objects.select_related("user", "tenant")
 
         # Filter by user
         user_id = self.request.GET.get("user")
@@ -541,10 +389,10 @@ class APIRequestLogExplorerView(PlatformAdminRequiredMixin, ListView):
         if method:
             queryset = queryset.filter(method=method)
 
-        # Filter by path
+        # Filter by path prefix (served by the path index)
         path = self.request.GET.get("path")
         if path:
-            queryset = queryset.filter(path__icontains=path)
+            queryset = queryset.filter(path__startswith=path)
 
         # Filter by status code
         status_code = self.request.GET.get("status_code")
@@ -610,8 +458,8 @@ class APIRequestLogExplorerView(PlatformAdminRequiredMixin, ListView):
         }
 
         queryset = self.get_queryset()
-        context["total_count"] = queryset.count()
-        context["error_count"] = queryset.filter(status_code__gte=400).count()
+        context["total_count"], context["count_is_estimate"] = estimated_count(queryset)
+        context["error_count"] = estimated_count(queryset.filter(status_code__gte=400))[0]
 
         return context
 
@@ -631,19 +479,21 @@ class AuditLogRetentionView(PlatformAdminRequiredMixin, TemplateView):
 
         now = timezone.now()
 
-        # Calculate counts by age
+        # Calculate counts by age; large counts are estimated
         context["stats"] = {
-            "total": AuditLog.objects.count(),
-            "last_30_days": AuditLog.objects.filter(
-                timestamp__gte=now - timedelta(days=30)
-            ).count(),
-            "last_90_days": AuditLog.objects.filter(
-                timestamp__gte=now - timedelta(days=90)
-            ).count(),
-            "last_year": AuditLog.objects.filter(timestamp__gte=now - timedelta(days=365)).count(),
-            "older_than_year": AuditLog.objects.filter(
-                timestamp__lt=now - timedelta(days=365)
-            ).count(),
+            "total": estimated_count(AuditLog.objects.all())[0],
+            "last_30_days": estimated_count(
+                AuditLog.objects.filter(timestamp__gte=now - timedelta(days=30))
+            )[0],
+            "last_90_days": estimated_count(
+                AuditLog.objects.filter(timestamp__gte=now - timedelta(days=90))
+            )[0],
+            "last_year": estimated_count(
+                AuditLog.objects.filter(timestamp__gte=now - timedelta(days=365))
+            )[0],
+            "older_than_year": estimated_count(
+                AuditLog.objects.filter(timestamp__lt=now - timedelta(days=365))
+            )[0],
         }
 
         # Login attempts
@@ -670,13 +520,13 @@ class AuditLogRetentionView(PlatformAdminRequiredMixin, TemplateView):
 
         # API requests
         context["api_stats"] = {
-            "total": APIRequestLog.objects.count(),
-            "last_30_days": APIRequestLog.objects.filter(
-                timestamp__gte=now - timedelta(days=30)
-            ).count(),
-            "last_90_days": APIRequestLog.objects.filter(
-                timestamp__gte=now - timedelta(days=90)
-            ).count(),
+            "total": estimated_count(APIRequestLog.objects.all())[0],
+            "last_30_days": estimated_count(
+                APIRequestLog.objects.filter(timestamp__gte=now - timedelta(days=30))
+            )[0],
+            "last_90_days": estimated_count(
+                APIRequestLog.objects.filter(timestamp__gte=now - timedelta(days=90))
+            )[0],
         }
 
         return context
@@ -711,11 +561,9 @@ class AuditLogRetentionExecuteView(PlatformAdminRequiredMixin, View):
 
         deleted_counts = {}
 
-        # Delete based on log type
+        # Delete based on log type; partitioned logs drop whole months
         if log_type in ["all", "audit_logs"]:
-            deleted_counts["audit_logs"] = AuditLog.objects.filter(
-                timestamp__lt=cutoff_date
-            ).delete()[0]
+            deleted_counts["audit_logs"] = apply_retention(AuditLog, cutoff_date)
 
         if log_type in ["all", "login_attempts"]:
             deleted_counts["login_attempts"] = LoginAttempt.objects.filter(
@@ -728,9 +576,7 @@ class AuditLogRetentionExecuteView(PlatformAdminRequiredMixin, View):
             ).delete()[0]
 
         if log_type in ["all", "api_requests"]:
-            deleted_counts["api_requests"] = APIRequestLog.objects.filter(
-                timestamp__lt=cutoff_date
-            ).delete()[0]
+            deleted_counts["api_requests"] = apply_retention(APIRequestLog, cutoff_date)
 
         # Log the retention execution
         from apps.core.audit import log_security_event
@@ -757,6 +603,7 @@ class AuditLogRetentionExecuteView(PlatformAdminRequiredMixin, View):
         )
 
 
+@method_decorator(use_replica(), name="dispatch")
 class AuditLogStatsAPIView(PlatformAdminRequiredMixin, View):
     """
     API endpoint for audit log statistics.
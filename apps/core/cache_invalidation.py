@@ -9,6 +9,33 @@ from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from apps.core.cache_utils import invalidate_tenant_cache
+from apps.core.feature_flag_evaluator import invalidate_flags
+from apps.core.tenant_resolver import invalidate_tenant
+from apps.sales.rollups import sales_rollups_refreshed
+
+# Tenant resolution cache invalidation
+
+
+@receiver(post_save, sender="core.Tenant")
+@receiver(post_delete, sender="core.Tenant")
+def invalidate_tenant_resolution_cache(sender, instance, **kwargs):
+    """Drop the cached tenant so status changes apply to the next request."""
+    invalidate_tenant(instance.id)
+
+
+# Feature flag snapshot invalidation
+
+
+@receiver(post_save, sender="waffle.Flag")
+@receiver(post_delete, sender="waffle.Flag")
+@receiver(post_save, sender="core.TenantFeatureFlag")
+@receiver(post_delete, sender="core.TenantFeatureFlag")
+@receiver(post_save, sender="core.EmergencyKillSwitch")
+@receiver(post_delete, sender="core.EmergencyKillSwitch")
+def invalidate_feature_flag_snapshot(sender, instance, **kwargs):
+    """Move flag evaluation on to a new snapshot when flags or overrides change."""
+    invalidate_flags()
+
 
 # Inventory cache invalidation
 
@@ -60,6 +87,14 @@ def invalidate_sales_cache(sender, instance, **kwargs):
             invalidate_tenant_cache(instance.tenant_id, prefix=f"customer:{instance.customer_id}")
 
 
+@receiver(sales_rollups_refreshed)
+def invalidate_sales_rollup_cache(sender, tenant_id, **kwargs):
+    """Invalidate dashboard sales figures once refreshed rollups are readable."""
+    invalidate_tenant_cache(tenant_id, prefix="today_sales", cache_alias="query")
+    invalidate_tenant_cache(tenant_id, prefix="sales_trend", cache_alias="query")
+    invalidate_tenant_cache(tenant_id, prefix="dashboard")
+
+
 # Customer cache invalidation
 
 
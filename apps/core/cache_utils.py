@@ -3,6 +3,9 @@ Cache utilities for the jewelry shop platform.
 
 This module provides decorators, utilities, and helper functions for caching
 query results, API responses, and template fragments with smart invalidation.
+The decorators and get_or_set_cache read through apps.core.read_through_cache,
+which computes each missing value once across workers, serves stale values
+while they are refreshed and caches None results.
 """
 
 import functools
@@ -15,6 +18,8 @@ from django.db.models import Model, QuerySet
 from django.http import HttpRequest
 from django.utils.encoding import force_bytes
 
+from .read_through_cache import clear_local_cache, get_or_compute
+
 
 def get_cache_key(prefix: str, *args, **kwargs) -> str:
     """
@@ -69,6 +74,8 @@ def cache_query_result(
     timeout: int = DEFAULT_TIMEOUT,
     cache_alias: str = "query",
     key_prefix: str = "query",
+    stale_timeout: Optional[int] = None,
+    local: bool = False,
 ):
     """
     Decorator to cache expensive query results.
@@ -82,6 +89,9 @@ def cache_query_result(
         timeout: Cache timeout in seconds
         cache_alias: Cache backend to use
         key_prefix: Prefix for cache key
+        stale_timeout: Seconds a stale result may be served while it is
+            refreshed (defaults to timeout)
+        local: Also keep results in the in-process L1 cache (hot keys)
 
     Returns:
         Decorated function
@@ -90,21 +100,15 @@ def cache_query_result(
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key
-            cache_key = get_cache_key(key_prefix, *args, **kwargs)
-
-            # Try to get from cache
-            cache = caches[cache_alias]
-            result = cache.get(cache_key)
-
-            if result is not None:
-                return result
-
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, timeout)
-
-            return result
+            return get_or_compute(
+                get_cache_key(key_prefix, *args, **kwargs),
+                lambda: func(*args, **kwargs),
+                timeout,
+                cache_alias,
+                stale_timeout=stale_timeout,
+                local=local,
+                prefix=key_prefix,
+            )
 
         return wrapper
 
@@ -115,6 +119,8 @@ def cache_tenant_query(
     timeout: int = DEFAULT_TIMEOUT,
     cache_alias: str = "query",
     key_prefix: str = "tenant_query",
+    stale_timeout: Optional[int] = None,
+    local: bool = False,
 ):
     """
     Decorator to cache tenant-specific query results.
@@ -130,6 +136,9 @@ def cache_tenant_query(
         timeout: Cache timeout in seconds
         cache_alias: Cache backend to use
         key_prefix: Prefix for cache key
+        stale_timeout: Seconds a stale result may be served while it is
+            refreshed (defaults to timeout)
+        local: Also keep results in the in-process L1 cache (hot keys)
 
     Returns:
         Decorated function
@@ -138,21 +147,15 @@ def cache_tenant_query(
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(tenant_id, *args, **kwargs):
-            # Generate tenant-specific cache key
-            cache_key = get_tenant_cache_key(tenant_id, key_prefix, *args, **kwargs)
-
-            # Try to get from cache
-            cache = caches[cache_alias]
-            result = cache.get(cache_key)
-
-            if result is not None:
-                return result
-
-            # Execute function and cache result
-            result = func(tenant_id, *args, **kwargs)
-            cache.set(cache_key, result, timeout)
-
-            return result
+            return get_or_compute(
+                get_tenant_cache_key(tenant_id, key_prefix, *args, **kwargs),
+                lambda: func(tenant_id, *args, **kwargs),
+                timeout,
+                cache_alias,
+                stale_timeout=stale_timeout,
+                local=local,
+                prefix=key_prefix,
+            )
 
         return wrapper
 
@@ -164,6 +167,7 @@ def cache_api_response(
     cache_alias: str = "api",
     key_prefix: str = "api",
     vary_on_user: bool = True,
+    stale_timeout: Optional[int] = None,
 ):
     """
     Decorator to cache API responses.
@@ -178,6 +182,8 @@ def cache_api_response(
         cache_alias: Cache backend to use
         key_prefix: Prefix for cache key
         vary_on_user: Include user ID in cache key
+        stale_timeout: Seconds a stale response may be served while it is
+            refreshed (defaults to timeout)
 
     Returns:
         Decorated function
@@ -202,21 +208,14 @@ def cache_api_response(
             if hasattr(request, "tenant") and request.tenant:
                 key_parts.append(f"tenant:{request.tenant.id}")
 
-            # Generate cache key
-            cache_key = get_cache_key(*key_parts)
-
-            # Try to get from cache
-            cache = caches[cache_alias]
-            result = cache.get(cache_key)
-
-            if result is not None:
-                return result
-
-            # Execute function and cache result
-            result = func(request, *args, **kwargs)
-            cache.set(cache_key, result, timeout)
-
-            return result
+            return get_or_compute(
+                get_cache_key(*key_parts),
+                lambda: func(request, *args, **kwargs),
+                timeout,
+                cache_alias,
+                stale_timeout=stale_timeout,
+                prefix=key_prefix,
+            )
 
         return wrapper
 
@@ -239,6 +238,7 @@ def invalidate_cache(
         cache_alias: Cache backend to use
     """
     cache = caches[cache_alias]
+    clear_local_cache()
 
     # django-redis supports delete_pattern
     if hasattr(cache, "delete_pattern"):
@@ -303,6 +303,8 @@ def get_or_set_cache(
     default_func: Callable,
     timeout: int = DEFAULT_TIMEOUT,
     cache_alias: str = "default",
+    stale_timeout: Optional[int] = None,
+    local: bool = False,
 ) -> Any:
     """
     Get value from cache or set it using the default function.
@@ -319,18 +321,16 @@ def get_or_set_cache(
         default_func: Function to call if cache miss
         timeout: Cache timeout in seconds
         cache_alias: Cache backend to use
+        stale_timeout: Seconds a stale value may be served while it is
+            refreshed (defaults to timeout)
+        local: Also keep the value in the in-process L1 cache (hot keys)
 
     Returns:
         Cached or computed value
     """
-    cache = caches[cache_alias]
-    result = cache.get(key)
-
-    if result is None:
-        result = default_func()
-        cache.set(key, result, timeout)
-
-    return result
+    return get_or_compute(
+        key, default_func, timeout, cache_alias, stale_timeout=stale_timeout, local=local
+    )
 
 
 class CacheManager:
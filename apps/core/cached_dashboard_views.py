@@ -6,7 +6,6 @@ using the cache utilities.
 """
 
 from datetime import timedelta
-from decimal import Decimal
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Count, F, Sum
@@ -19,37 +18,36 @@ from apps.core.cache_utils import (
     cache_tenant_query,
     get_cached_dashboard_data,
 )
+from apps.core.db_routing import use_replica
 from apps.core.mixins import TenantRequiredMixin
 from apps.crm.models import Customer
 from apps.inventory.models import InventoryItem
 from apps.repair.models import RepairOrder
 from apps.sales.models import Sale
+from apps.sales.rollups import get_daily_sales, get_monthly_sales, get_sales_totals
 
 # Example: Cached query functions
 
 
 @cache_tenant_query(timeout=300, key_prefix="today_sales")
+@use_replica()
 def get_today_sales_data(tenant_id):
     """
     Get today's sales data with caching.
 
     Cached for 5 minutes (300 seconds).
     Cache is automatically invalidated when sales are created/updated.
+    Totals come from the daily sales rollups.
     """
-    today = timezone.now().date()
-
-    today_sales = Sale.objects.filter(
-        tenant_id=tenant_id, created_at__date=today, status=Sale.COMPLETED
-    ).aggregate(total_amount=Sum("total"), total_count=Count("id"))
-
-    # Yesterday's sales for comparison
+    today = timezone.localdate(timezone=timezone.get_default_timezone())
     yesterday = today - timedelta(days=1)
-    yesterday_sales = Sale.objects.filter(
-        tenant_id=tenant_id, created_at__date=yesterday, status=Sale.COMPLETED
-    ).aggregate(total_amount=Sum("total"))
 
-    yesterday_amount = yesterday_sales["total_amount"] or Decimal("0.00")
-    today_amount = today_sales["total_amount"] or Decimal("0.00")
+    # Read from the daily rollups rather than scanning the day's sales
+    today_sales = get_sales_totals(tenant_id, today, today)
+    yesterday_sales = get_sales_totals(tenant_id, yesterday, yesterday)
+
+    yesterday_amount = yesterday_sales["total_amount"]
+    today_amount = today_sales["total_amount"]
 
     # Calculate percentage change
     if yesterday_amount > 0:
@@ -59,13 +57,14 @@ def get_today_sales_data(tenant_id):
 
     return {
         "amount": today_amount,
-        "count": today_sales["total_count"] or 0,
+        "count": today_sales["total_count"],
         "change_percent": round(change_percent, 1),
         "change_direction": "up" if change_percent >= 0 else "down",
     }
 
 
 @cache_tenant_query(timeout=600, key_prefix="inventory_value")
+@use_replica()
 def get_inventory_value_data(tenant_id):
     """
     Get inventory value data with caching.
@@ -93,6 +92,7 @@ def get_inventory_value_data(tenant_id):
 
 
 @cache_tenant_query(timeout=300, key_prefix="stock_alerts")
+@use_replica()
 def get_stock_alerts_data(tenant_id):
     """
     Get stock alerts data with caching.
@@ -115,6 +115,7 @@ def get_stock_alerts_data(tenant_id):
 
 
 @cache_tenant_query(timeout=300, key_prefix="pending_orders")
+@use_replica()
 def get_pending_orders_data(tenant_id):
     """
     Get pending orders data with caching.
@@ -140,14 +141,16 @@ def get_pending_orders_data(tenant_id):
 
 
 @cache_tenant_query(timeout=900, key_prefix="sales_trend")
+@use_replica()
 def get_sales_trend_data(tenant_id, period="7d"):
     """
     Get sales trend data with caching.
 
     Cached for 15 minutes (900 seconds).
-    Cache key includes the period parameter.
+    Cache key includes the period parameter. Reads the daily sales rollups,
+    so a miss costs O(days) regardless of sales volume.
     """
-    end_date = timezone.now().date()
+    end_date = timezone.localdate(timezone=timezone.get_default_timezone())
 
     if period == "7d":
         start_date = end_date - timedelta(days=7)
@@ -165,36 +168,10 @@ def get_sales_trend_data(tenant_id, period="7d"):
         start_date = end_date - timedelta(days=7)
         group_by = "date"
 
-    # Get sales data
+    # Get sales data from the daily rollups
     if group_by == "date":
-        sales_data = (
-            Sale.objects.filter(
-                tenant_id=tenant_id,
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date,
-                status=Sale.COMPLETED,
-            )
-            .extra(select={"date": "DATE(created_at)"})
-            .values("date")
-            .annotate(total_sales=Sum("total"), total_count=Count("id"))
-            .order_by("date")
-        )
-    else:  # group_by == 'month'
-        sales_data = (
-            Sale.objects.filter(
-                tenant_id=tenant_id,
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date,
-                status=Sale.COMPLETED,
-            )
-            .extra(select={"month": "DATE_TRUNC('month', created_at)"})
-            .values("month")
-            .annotate(total_sales=Sum("total"), total_count=Count("id"))
-            .order_by("month")
-        )
-
-    # Convert to list for JSON serialization
-    return list(sales_data)
+        return get_daily_sales(tenant_id, start_date, end_date)
+    return get_monthly_sales(tenant_id, start_date, end_date)
 
 
 class CachedTenantDashboardView(LoginRequiredMixin, TenantRequiredMixin, TemplateView):
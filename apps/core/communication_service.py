@@ -14,12 +14,22 @@ import logging
 from typing import Dict, List
 
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.html import strip_tags
 
 from apps.core.announcement_models import CommunicationLog, DirectMessage
 from apps.core.models import Tenant
+from apps.notifications.email_delivery import (
+    DEFAULT_CHUNK_SIZE,
+    build_message,
+    chunked,
+    deliver_messages,
+)
+
+User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
@@ -126,43 +136,12 @@ class CommunicationService:
             "total": len(tenants),
         }
 
-        for tenant in tenants:
-            # Create a direct message record for each tenant
-            direct_message = DirectMessage.objects.create(
-                tenant=tenant,
-                subject=subject,
-                message=message,
-                channels=["email"],
-                created_by=created_by,
-            )
-
-            # Send the email
-            success = CommunicationService._send_email(
-                tenant=tenant,
-                subject=subject,
-                message=message,
-            )
-
-            if success:
-                results["success"] += 1
-                direct_message.email_sent = True
-                direct_message.mark_as_sent()
-            else:
-                results["failed"] += 1
-                direct_message.status = DirectMessage.FAILED
-                direct_message.save()
-
-            # Log the communication
-            CommunicationService._log_communication(
-                communication_type=CommunicationLog.DIRECT_MESSAGE,
-                tenant=tenant,
-                subject=subject,
-                message=message,
-                channels_used=["email"],
-                delivery_status={"email": success},
-                sent_by=created_by,
-                direct_message=direct_message,
-            )
+        # Tenants are processed in chunks, each sent over one mail connection
+        chunk_size = getattr(settings, "EMAIL_BATCH_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+        for chunk in chunked(tenants, chunk_size):
+            sent = CommunicationService._send_bulk_email_chunk(chunk, subject, message, created_by)
+            results["success"] += sent
+            results["failed"] += len(chunk) - sent
 
         logger.info(
             f"Bulk email sent to {results['total']} tenants. "
@@ -171,6 +150,96 @@ class CommunicationService:
 
         return results
 
+    @staticmethod
+    def _send_bulk_email_chunk(
+        tenants: List[Tenant], subject: str, message: str, created_by=None
+    ) -> int:
+        """
+        Send a bulk email to a chunk of tenants with a fixed number of queries.
+
+        Direct messages and communication logs are written with bulk_create and
+        all emails share one connection.
+
+        Returns:
+            Number of tenants emailed successfully
+        """
+        # Same owner _send_email picks: the first TENANT_OWNER by primary key
+        owners = {}
+        for owner in User.objects.filter(tenant__in=tenants, role="TENANT_OWNER").order_by("pk"):
+            owners.setdefault(owner.tenant_id, owner)
+
+        direct_messages = DirectMessage.objects.bulk_create(
+            [
+                DirectMessage(
+                    tenant=tenant,
+                    subject=subject,
+                    message=message,
+                    channels=["email"],
+                    created_by=created_by,
+                )
+                for tenant in tenants
+            ]
+        )
+
+        emails = {}
+        for index, tenant in enumerate(tenants):
+            owner = owners.get(tenant.id)
+            if not owner or not owner.email:
+                logger.warning(f"No email found for tenant {tenant.company_name}")
+                continue
+            html_message = render_to_string(
+                "core/emails/direct_message.html",
+                {
+                    "tenant": tenant,
+                    "subject": subject,
+                    "message": message,
+                },
+            )
+            emails[index] = build_message(
+                subject,
+                html_message,
+                strip_tags(html_message),
+                settings.DEFAULT_FROM_EMAIL,
+                owner.email,
+            )
+
+        indexes = list(emails)
+        failures = deliver_messages([emails[index] for index in indexes])
+        delivered = {index for position, index in enumerate(indexes) if position not in failures}
+        for position, error in failures.items():
+            tenant = tenants[indexes[position]]
+            logger.error(f"Failed to send email to {tenant.company_name}: {error}")
+
+        now = timezone.now()
+        for index, direct_message in enumerate(direct_messages):
+            direct_message.email_sent = index in delivered
+            direct_message.status = (
+                DirectMessage.SENT if index in delivered else DirectMessage.FAILED
+            )
+            direct_message.sent_at = now if index in delivered else None
+            direct_message.updated_at = now
+        DirectMessage.objects.bulk_update(
+            direct_messages, ["email_sent", "status", "sent_at", "updated_at"]
+        )
+
+        CommunicationLog.objects.bulk_create(
+            [
+                CommunicationLog(
+                    communication_type=CommunicationLog.DIRECT_MESSAGE,
+                    tenant=tenant,
+                    subject=subject,
+                    message_preview=message[:500],
+                    channels_used=["email"],
+                    delivery_status={"email": index in delivered},
+                    sent_by=created_by,
+                    direct_message=direct_message,
+                )
+                for index, (tenant, direct_message) in enumerate(zip(tenants, direct_messages))
+            ]
+        )
+
+        return len(delivered)
+
     @staticmethod
     def _send_email(tenant: Tenant, subject: str, message: str) -> bool:
         """
@@ -276,22 +345,17 @@ class CommunicationService:
         """
         try:
             # Import here to avoid circular imports
-            from apps.notifications.models import Notification
+            from apps.notifications.services import notify_tenant_users
 
-            # Get all tenant users
-            tenant_users = tenant.users.all()
-
-            for user in tenant_users:
-                Notification.objects.create(
-                    user=user,
-                    title=subject,
-                    message=message,
-                    notification_type="SYSTEM",  # Use SYSTEM type which exists in the model
-                    is_read=False,
-                )
+            notifications = notify_tenant_users(
+                tenant,
+                title=subject,
+                message=message,
+                notification_type="SYSTEM",  # Use SYSTEM type which exists in the model
+            )
 
             logger.info(
-                f"In-app notifications created for {tenant.company_name} ({tenant_users.count()} users)"
+                f"In-app notifications created for {tenant.company_name} ({len(notifications)} users)"
             )
             return True
 
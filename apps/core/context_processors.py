@@ -5,6 +5,10 @@ Context processors add variables to the template context for all templates.
 Per Requirement 2 (Language) and Requirement 3 (Theme).
 """
 
+from django.utils.functional import SimpleLazyObject
+
+from apps.core.feature_flags import flags_for_tenant
+
 
 def user_preferences(request):
     """
@@ -31,11 +35,17 @@ def user_preferences(request):
 
 def waffle_flags(request):
     """
-    Add waffle feature flags to template context.
+    Add the tenant's feature flags to template context.
 
-    This makes feature flags available in all templates for conditional rendering.
+    `tenant_flags` maps flag name to whether it is active for the request
+    user's tenant. It is evaluated lazily, from the cached flag snapshot,
+    so templates that never use it cost nothing.
+
+    Per Requirement 30 - Feature Flag Management
     """
-    # Get all flags that are active for this request
-    # This is a placeholder - waffle provides its own context processor
-    # but we need this function to exist for the settings reference
-    return {}
+    user = getattr(request, "user", None)
+    tenant_id = getattr(user, "tenant_id", None)
+    if not tenant_id:
+        return {"tenant_flags": {}}
+
+    return {"tenant_flags": SimpleLazyObject(lambda: flags_for_tenant(tenant_id, request))}
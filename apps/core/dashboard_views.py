@@ -16,8 +16,10 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Avg, Count, F, Q, Sum
 from django.http import JsonResponse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView, View
 
+from apps.core.db_routing import use_replica
 from apps.core.mixins import TenantRequiredMixin
 from apps.crm.models import Customer
 from apps.inventory.models import InventoryItem
@@ -25,6 +27,7 @@ from apps.repair.models import RepairOrder
 from apps.sales.models import Sale
 
 
+@method_decorator(use_replica(), name="dispatch")
 class TenantDashboardView(LoginRequiredMixin, TenantRequiredMixin, TemplateView):
     """
     Main tenant dashboard with KPIs and overview widgets.
@@ -146,6 +149,7 @@ class TenantDashboardView(LoginRequiredMixin, TenantRequiredMixin, TemplateView)
         return context
 
 
+@method_decorator(use_replica(), name="dispatch")
 class SalesTrendChartView(LoginRequiredMixin, TenantRequiredMixin, View):
     """
     API endpoint for sales trend chart data.
@@ -263,6 +267,7 @@ class SalesTrendChartView(LoginRequiredMixin, TenantRequiredMixin, View):
         )
 
 
+@method_decorator(use_replica(), name="dispatch")
 class InventoryDrillDownView(LoginRequiredMixin, TenantRequiredMixin, View):
     """
     API endpoint for inventory drill-down data.
@@ -317,6 +322,7 @@ class InventoryDrillDownView(LoginRequiredMixin, TenantRequiredMixin, View):
         )
 
 
+@method_decorator(use_replica(), name="dispatch")
 class SalesDrillDownView(LoginRequiredMixin, TenantRequiredMixin, View):
     """
     API endpoint for sales drill-down data.
@@ -390,6 +396,7 @@ class SalesDrillDownView(LoginRequiredMixin, TenantRequiredMixin, View):
         )
 
 
+@method_decorator(use_replica(), name="dispatch")
 class DashboardStatsView(LoginRequiredMixin, TenantRequiredMixin, View):
     """
     API endpoint for real-time dashboard statistics.
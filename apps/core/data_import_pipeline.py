@@ -0,0 +1,469 @@
+"""
+Streaming, chunked pipeline for importing large data files.
+
+Importing a catalog row by row costs several queries per row and keeps the
+whole file in memory. This pipeline:
+- Streams the file (csv reader / openpyxl read-only mode) in chunks
+- Validates each chunk column by column, collecting per-row errors
+  instead of aborting the import
+- Resolves categories and the branch from dictionaries loaded once,
+  creating missing categories in bulk
+- Resolves existing SKUs with one IN query per chunk
+- Writes with bulk_create / bulk_update, or for large files with COPY into
+  a staging table followed by INSERT ... ON CONFLICT (tenant_id, sku)
+- Records the quantity change of every written item in the stock movement
+  ledger with one bulk insert per chunk
+
+Per Requirement 20 - Settings and Configuration (data import)
+"""
+
+import csv
+import io
+import math
+import os
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.text import slugify
+
+import openpyxl
+
+from apps.core.models import Tenant
+
+# Default pipeline settings
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_COPY_THRESHOLD = 5 * 1024 * 1024  # Files of 5 MB or more are written with COPY
+MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = "inventory_import_staging"
+INT_MIN, INT_MAX = -(2**31), 2**31 - 1
+
+
+def get_chunk_size() -> int:
+    """Get the number of rows validated and committed together."""
+    return getattr(settings, "DATA_IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def should_use_copy(file_path: str) -> bool:
+    """Whether a file is large enough to be written through a COPY staging table."""
+    threshold = getattr(settings, "DATA_IMPORT_COPY_THRESHOLD", DEFAULT_COPY_THRESHOLD)
+    return connection.vendor == "postgresql" and os.path.getsize(file_path) >= threshold
+
+
+class ImportFileReader:
+    """
+    Stream the rows of a CSV or Excel import file.
+
+    Rows are yielded as dicts of stripped strings keyed by header, exactly
+    as the import service has always parsed them, but without reading the
+    whole file into memory.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        _, self.ext = os.path.splitext(file_path.lower())
+        if self.ext not in (".csv", ".xlsx", ".xls"):
+            raise ValueError(f"Unsupported file format: {self.ext}")
+
+    def __iter__(self) -> Iterator[Dict]:
+        if self.ext == ".csv":
+            return self._iter_csv()
+        return self._iter_excel()
+
+    def chunks(self, size: int, skip: int = 0) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Yield (index of the first row, rows) chunks, skipping the first rows.
+
+        Args:
+            size: Rows per chunk
+            skip: Number of data rows to skip (already imported)
+        """
+        chunk = []
+        start = skip
+        for index, row in enumerate(self):
+            if index < skip:
+                continue
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield start, chunk
+                start += len(chunk)
+                chunk = []
+        if chunk:
+            yield start, chunk
+
+    def headers(self) -> List[str]:
+        """Get the header row."""
+        if self.ext == ".csv":
+            with open(self.file_path, "r", encoding="utf-8") as csvfile:
+                reader = csv.reader(csvfile, delimiter=self._sniff_delimiter(csvfile))
+                return [header.strip() for header in next(reader, [])]
+
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True)
+        try:
+            first_row = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+            return [value.strip() if value else "" for value in first_row]
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _sniff_delimiter(csvfile) -> str:
+        sample = csvfile.read(1024)
+        csvfile.seek(0)
+        return csv.Sniffer().sniff(sample).delimiter
+
+    def _iter_csv(self) -> Iterator[Dict]:
+        with open(self.file_path, "r", encoding="utf-8") as csvfile:
+            reader = csv.DictReader(csvfile, delimiter=self._sniff_delimiter(csvfile))
+            for row in reader:
+                # Clean up row data (extra values have no header and are dropped)
+                yield {k.strip(): v.strip() if v else "" for k, v in row.items() if k is not None}
+
+    def _iter_excel(self) -> Iterator[Dict]:
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [value.strip() if value else "" for value in next(rows, ())]
+            for row in rows:
+                row_data = {}
+                for i, value in enumerate(row):
+                    if i < len(headers):
+                        row_data[headers[i]] = str(value).strip() if value is not None else ""
+
+                # Skip empty rows
+                if any(row_data.values()):
+                    yield row_data
+        finally:
+            workbook.close()
+
+
+# Inventory schema: (header, attribute, kind)
+INVENTORY_COLUMNS = [
+    ("SKU", "sku", "sku"),
+    ("Name", "name", "text"),
+    ("Category", "category", "category"),
+    ("Karat", "karat", "int"),
+    ("Weight (grams)", "weight_grams", "decimal"),
+    ("Cost Price", "cost_price", "decimal"),
+    ("Selling Price", "selling_price", "decimal"),
+    ("Quantity", "quantity", "int"),
+    ("Serial Number", "serial_number", "optional"),
+    ("Lot Number", "lot_number", "optional"),
+]
+
+
+def _parse_number(header: str, field, kind: str, value: str):
+    """Parse an integer or decimal cell; errors are returned as a 1-tuple."""
+    if not value:
+        return (f"{header} is required",)
+    try:
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError(value)
+        if kind == "int":
+            return int(number) if INT_MIN <= number <= INT_MAX else (f"{header} is out of range",)
+        decimal = Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+    except (ValueError, InvalidOperation):
+        return (f"{header} must be a number",)
+    if decimal.adjusted() >= field.max_digits - field.decimal_places:
+        return (f"{header} is out of range",)
+    return decimal
+
+
+def _parse_column(header: str, field, kind: str, values: List[str]) -> List:
+    """
+    Parse one column of a chunk.
+
+    Returns:
+        list: The parsed value, or an error message (str wrapped in a tuple),
+        for each row
+    """
+    if kind in ("int", "decimal"):
+        return [_parse_number(header, field, kind, value) for value in values]
+
+    max_length = getattr(field, "max_length", None)
+    results = []
+    for value in values:
+        if kind in ("sku", "category") and not value:
+            results.append((f"{header} is required",))
+        elif max_length and len(value) > max_length:
+            results.append((f"{header} is longer than {max_length} characters",))
+        elif kind == "optional":
+            results.append(value or None)
+        else:
+            results.append(value)
+    return results
+
+
+def validate_inventory_chunk(rows: List[Dict], first_row_num: int) -> Tuple[List, List[str]]:
+    """
+    Validate a chunk of inventory rows column by column.
+
+    Args:
+        rows: Row dicts from ImportFileReader
+        first_row_num: File row number of the first row (header is row 1)
+
+    Returns:
+        tuple: ([(row_num, values)] for valid rows, ["Row N: error"] for invalid ones)
+    """
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    ProductCategory = apps.get_model("inventory", "ProductCategory")
+
+    columns = []
+    for header, attribute, kind in INVENTORY_COLUMNS:
+        field = (
+            ProductCategory._meta.get_field("name")
+            if kind == "category"
+            else InventoryItem._meta.get_field(attribute)
+        )
+        values = [row.get(header, "").strip() for row in rows]
+        columns.append((attribute, _parse_column(header, field, kind, values)))
+
+    valid = []
+    errors = []
+    for index in range(len(rows)):
+        row_num = first_row_num + index
+        values = {}
+        row_errors = []
+        for attribute, results in columns:
+            result = results[index]
+            if isinstance(result, tuple):
+                row_errors.append(f"Row {row_num}: {result[0]}")
+            else:
+                values[attribute] = result
+        if row_errors:
+            errors.extend(row_errors)
+        else:
+            valid.append((row_num, values))
+    return valid, errors
+
+
+def calculate_markup(cost_price: Decimal, selling_price: Decimal) -> Optional[Decimal]:
+    """Markup percentage as InventoryItem.save() calculates and PostgreSQL rounds it."""
+    if cost_price > 0:
+        markup = (selling_price - cost_price) / cost_price * 100
+        return markup.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return None
+
+
+class InventoryChunkWriter:
+    """
+    Write validated inventory rows, one chunk at a time.
+
+    The default branch and the tenant's categories are loaded once; each
+    chunk then costs one query to find existing SKUs plus its writes.
+    """
+
+    UPDATE_FIELDS = [
+        "name",
+        "category",
+        "karat",
+        "weight_grams",
+        "cost_price",
+        "selling_price",
+        "quantity",
+        "branch",
+        "serial_number",
+        "lot_number",
+        "markup_percentage",
+        "updated_at",
+    ]
+
+    def __init__(self, tenant: Tenant, update_existing: bool, use_copy: bool = False):
+        self.tenant = tenant
+        self.update_existing = update_existing
+        self.use_copy = use_copy
+
+        self.InventoryItem = apps.get_model("inventory", "InventoryItem")
+        self.ProductCategory = apps.get_model("inventory", "ProductCategory")
+        Branch = apps.get_model("core", "Branch")
+
+        self.branch = Branch.objects.filter(tenant=tenant).first()
+        self.categories = {}
+        for category in self.ProductCategory.objects.filter(tenant=tenant).order_by(
+            "created_at", "id"
+        ):
+            self.categories.setdefault(category.name, category)
+        self.categories_created = 0
+
+    def write(self, valid_rows: List) -> Tuple[int, List[str]]:
+        """
+        Write a chunk of validated rows.
+
+        Args:
+            valid_rows: [(row_num, values)] from validate_inventory_chunk
+
+        Returns:
+            tuple: (number of rows written, ["Row N: error"] for rejected rows)
+        """
+        self._create_missing_categories(valid_rows)
+
+        if not self.branch:
+            return 0, [f"Row {row_num}: No branch found for tenant" for row_num, _ in valid_rows]
+
+        rejected = {}  # row_num -> reason
+        pending = {}  # sku -> values; with update_existing the last row wins
+        pending_rows = {}  # sku -> row_num
+        first_values = {}  # sku -> values of the row that creates the item
+        for row_num, values in valid_rows:
+            sku = values["sku"]
+            if sku in pending and not self.update_existing:
+                rejected[row_num] = f"SKU {sku} already exists"
+                continue
+            first_values.setdefault(sku, values)
+            pending[sku] = values
+            pending_rows[sku] = row_num
+
+        existing = {}
+        previous_quantities = {}
+        # Locked so the stock movements below match what concurrent sales see
+        for item_id, sku, markup, quantity in (
+            self.InventoryItem.objects.select_for_update()
+            .filter(tenant=self.tenant, sku__in=list(pending))
+            .values_list("id", "sku", "markup_percentage", "quantity")
+        ):
+            existing[sku] = (item_id, markup)
+            previous_quantities[item_id] = quantity
+        if not self.update_existing:
+            for sku in existing:
+                del pending[sku]
+                rejected[pending_rows[sku]] = f"SKU {sku} already exists"
+
+        items, updates = self._build_items(pending, existing, first_values)
+        if self.use_copy:
+            self._write_with_copy(items + updates)
+        else:
+            self.InventoryItem.objects.bulk_create(items, batch_size=get_chunk_size())
+            self.InventoryItem.objects.bulk_update(
+                updates, self.UPDATE_FIELDS, batch_size=get_chunk_size()
+            )
+        self._record_movements(items + updates, previous_quantities)
+
+        errors = [f"Row {row_num}: {reason}" for row_num, reason in sorted(rejected.items())]
+        return len(valid_rows) - len(rejected), errors
+
+    def _record_movements(self, items: List, previous_quantities: Dict):
+        """Record the quantity each written item gained or lost in the stock ledger."""
+        StockMovement = apps.get_model("inventory", "StockMovement")
+        now = timezone.now()
+        StockMovement.objects.bulk_create(
+            [
+                StockMovement(
+                    tenant=self.tenant,
+                    inventory_item_id=item.id,
+                    branch=self.branch,
+                    movement_type=StockMovement.IMPORT,
+                    quantity_change=item.quantity - previous_quantities.get(item.id, 0),
+                    quantity_after=item.quantity,
+                    reason="Data import",
+                    created_at=now,
+                )
+                for item in items
+                if item.quantity != previous_quantities.get(item.id, 0)
+            ],
+            batch_size=get_chunk_size(),
+        )
+
+    def _create_missing_categories(self, valid_rows: List):
+        names = []
+        for _, values in valid_rows:
+            name = values["category"]
+            if name and name not in self.categories and name not in names:
+                names.append(name)
+
+        if names:
+            created = self.ProductCategory.objects.bulk_create(
+                [
+                    self.ProductCategory(tenant=self.tenant, name=name, slug=slugify(name))
+                    for name in names
+                ]
+            )
+            for category in created:
+                self.categories[category.name] = category
+            self.categories_created += len(created)
+
+    def _build_items(self, pending: Dict, existing: Dict, first_values: Dict) -> Tuple[List, List]:
+        now = timezone.now()
+        items = []
+        updates = []
+        for sku, values in pending.items():
+            item = self.InventoryItem(
+                tenant=self.tenant,
+                sku=sku,
+                name=values["name"],
+                category=self.categories.get(values["category"]),
+                karat=values["karat"],
+                weight_grams=values["weight_grams"],
+                cost_price=values["cost_price"],
+                selling_price=values["selling_price"],
+                quantity=values["quantity"],
+                branch=self.branch,
+                serial_number=values["serial_number"],
+                lot_number=values["lot_number"],
+            )
+            if sku in existing:
+                # Existing items keep their markup, as update_or_create() + save() did
+                item.id, item.markup_percentage = existing[sku]
+                if item.markup_percentage is None:
+                    item.markup_percentage = calculate_markup(item.cost_price, item.selling_price)
+                item.updated_at = now
+                updates.append(item)
+            else:
+                # Markup is calculated once, when the first row for the SKU creates it
+                first = first_values[sku]
+                item.markup_percentage = calculate_markup(
+                    first["cost_price"], first["selling_price"]
+                )
+                items.append(item)
+        return items, updates
+
+    def _write_with_copy(self, items: List):
+        """COPY the chunk into a staging table, then upsert it in one statement."""
+        if not items:
+            return
+
+        model = self.InventoryItem
+        table = model._meta.db_table
+        fields = model._meta.concrete_fields
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+
+        now = timezone.now()
+        buffer = io.StringIO()
+        for item in items:
+            item.created_at = item.created_at or now
+            item.updated_at = now
+            buffer.write(",".join(self._copy_value(item, field) for field in fields))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        updates = ", ".join(
+            f"{quote(column)} = EXCLUDED.{quote(column)}"
+            for column in (model._meta.get_field(name).column for name in self.UPDATE_FIELDS)
+        )
+        conflict = f"DO UPDATE SET {updates}" if self.update_existing else "DO NOTHING"
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {STAGING_TABLE} "
+                f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {STAGING_TABLE} "
+                f"ON CONFLICT (tenant_id, sku) {conflict}"
+            )
+            cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+
+    @staticmethod
+    def _copy_value(item, field) -> str:
+        """Format a field for COPY CSV: NULL is unquoted empty, everything else quoted."""
+        value = field.get_db_prep_save(getattr(item, field.attname), connection)
+        if value is None:
+            return ""
+        return '"' + str(value).replace('"', '""') + '"'
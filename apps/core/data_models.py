@@ -66,6 +66,7 @@ class DataActivity(models.Model):
     records_processed = models.IntegerField(null=True, blank=True)
     records_successful = models.IntegerField(null=True, blank=True)
     records_failed = models.IntegerField(null=True, blank=True)
+    last_committed_row = models.IntegerField(default=0)  # Resume point for chunked imports
 
     # Error information
     error_message = models.TextField(null=True, blank=True)
@@ -134,6 +135,26 @@ class DataActivity(models.Model):
             ]
         )
 
+    def record_progress(
+        self, last_committed_row, records_processed, records_successful, records_failed
+    ):
+        """
+        Record import progress after a chunk has been committed.
+
+        Written with a single UPDATE: per-chunk checkpoints are not audited.
+        """
+        self.last_committed_row = last_committed_row
+        self.records_processed = records_processed
+        self.records_successful = records_successful
+        self.records_failed = records_failed
+        type(self).objects.filter(pk=self.pk).update(
+            last_committed_row=last_committed_row,
+            records_processed=records_processed,
+            records_successful=records_successful,
+            records_failed=records_failed,
+            error_details=self.error_details,
+        )
+
     def mark_failed(self, error_message, error_details=None):
         """Mark activity as failed."""
         self.status = "FAILED"
@@ -3,7 +3,7 @@ Data management services for export, import, and backup operations.
 
 Implements Requirement 20: Settings and Configuration
 - Data export functionality (CSV/Excel)
-- Data import with validation
+- Data import with validation (streamed and committed in chunks)
 - Backup trigger interface
 """
 
@@ -17,17 +17,31 @@ from decimal import Decimal
 from typing import Dict, List, Optional
 
 from django.apps import apps
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
 import openpyxl
 from openpyxl.styles import Font, PatternFill
 
+from apps.core.cache_utils import invalidate_tenant_cache
+from apps.core.data_import_pipeline import (
+    MAX_REPORTED_ERRORS,
+    ImportFileReader,
+    InventoryChunkWriter,
+    get_chunk_size,
+    should_use_copy,
+    validate_inventory_chunk,
+)
 from apps.core.data_models import BackupTrigger, DataActivity
+from apps.core.db_routing import use_replica
 from apps.core.models import Tenant
 
 logger = logging.getLogger(__name__)
 
+# Seconds of replica lag exports accept (overridable with REPORT_REPLICA_MAX_LAG)
+DEFAULT_REPLICA_MAX_LAG = 300
+
 
 class DataExportService:
     """
@@ -79,10 +93,12 @@ class DataExportService:
             export_data = {}
             total_records = 0
 
-            for data_type in data_types:
-                data = self._get_data_for_export(data_type, date_from, date_to)
-                export_data[data_type] = data
-                total_records += len(data)
+            max_lag = getattr(settings, "REPORT_REPLICA_MAX_LAG", DEFAULT_REPLICA_MAX_LAG)
+            with use_replica(max_lag):
+                for data_type in data_types:
+                    data = self._get_data_for_export(data_type, date_from, date_to)
+                    export_data[data_type] = data
+                    total_records += len(data)
 
             # Generate export file
             if format == "csv":
@@ -455,8 +471,21 @@ class DataImportService:
         Returns:
             DataActivity: Created activity record
         """
-        # Create activity record
-        activity = DataActivity.objects.create(
+        activity = self.create_import_activity(
+            data_type, file_path, user, update_existing, validate_only
+        )
+        return self.run_import(activity)
+
+    def create_import_activity(
+        self,
+        data_type: str,
+        file_path: str,
+        user=None,
+        update_existing: bool = False,
+        validate_only: bool = False,
+    ) -> DataActivity:
+        """Create the activity record that tracks an import."""
+        return DataActivity.objects.create(
             tenant=self.tenant,
             activity_type="IMPORT",
             data_type=data_type,
@@ -470,38 +499,58 @@ class DataImportService:
             },
         )
 
-        try:
-            activity.mark_started()
+    def run_import(self, activity: DataActivity) -> DataActivity:
+        """
+        Run (or resume) the import tracked by an activity record.
 
-            # Parse file
-            data = self._parse_import_file(file_path)
+        The file is streamed and committed chunk by chunk; progress is
+        recorded on the activity after every chunk, so an interrupted import
+        resumes after its last committed chunk.
 
-            # Validate data
-            validation_errors = self._validate_import_data(data_type, data)
+        Args:
+            activity: Activity created by create_import_activity()
 
-            if validation_errors:
-                activity.mark_failed("Validation failed", {"validation_errors": validation_errors})
+        Returns:
+            DataActivity: The updated activity record
+        """
+        parameters = activity.parameters or {}
+        try:
+            activity.mark_started()
+            reader = ImportFileReader(activity.file_path)
+
+            # Validate headers
+            headers = set(reader.headers())
+            missing_fields = set(self._get_required_fields(activity.data_type)) - headers
+            if missing_fields:
+                activity.mark_failed(
+                    "Validation failed",
+                    {
+                        "validation_errors": [
+                            f"Missing required fields: {', '.join(missing_fields)}"
+                        ]
+                    },
+                )
                 return activity
 
-            if validate_only:
-                activity.mark_completed(
-                    records_processed=len(data), records_successful=len(data), records_failed=0
+            if parameters.get("validate_only"):
+                return self._validate_file(activity, reader)
+
+            results = self._import_data_records(
+                activity, reader, parameters.get("update_existing", False)
+            )
+
+            if results["total"] == 0:
+                activity.mark_failed(
+                    "Validation failed", {"validation_errors": ["No data found in file"]}
                 )
                 return activity
 
-            # Import data
-            results = self._import_data_records(data_type, data, update_existing)
-
             activity.mark_completed(
                 records_processed=results["total"],
                 records_successful=results["successful"],
                 records_failed=results["failed"],
             )
 
-            if results["errors"]:
-                activity.error_details = {"import_errors": results["errors"]}
-                activity.save(update_fields=["error_details"])
-
             logger.info(f"Import completed: {results['successful']}/{results['total']} records")
 
         except Exception as e:
@@ -511,58 +560,29 @@ class DataImportService:
 
         return activity
 
-    def _parse_import_file(self, file_path: str) -> List[Dict]:
-        """Parse import file based on extension."""
-        _, ext = os.path.splitext(file_path.lower())
+    def _validate_file(self, activity: DataActivity, reader: ImportFileReader) -> DataActivity:
+        """Validate every row of the file without importing anything."""
+        total = 0
+        errors = []
+        for start, rows in reader.chunks(get_chunk_size()):
+            total += len(rows)
+            errors.extend(self._validate_chunk(activity.data_type, rows, start + 2)[1])
 
-        if ext == ".csv":
-            return self._parse_csv_file(file_path)
-        elif ext in [".xlsx", ".xls"]:
-            return self._parse_excel_file(file_path)
+        if total == 0:
+            errors.append("No data found in file")
+        if errors:
+            activity.mark_failed(
+                "Validation failed", {"validation_errors": errors[:MAX_REPORTED_ERRORS]}
+            )
         else:
-            raise ValueError(f"Unsupported file format: {ext}")
+            activity.mark_completed(
+                records_processed=total, records_successful=total, records_failed=0
+            )
+        return activity
 
     def _parse_csv_file(self, file_path: str) -> List[Dict]:
         """Parse CSV file."""
-        data = []
-        with open(file_path, "r", encoding="utf-8") as csvfile:
-            # Try to detect delimiter
-            sample = csvfile.read(1024)
-            csvfile.seek(0)
-            sniffer = csv.Sniffer()
-            delimiter = sniffer.sniff(sample).delimiter
-
-            reader = csv.DictReader(csvfile, delimiter=delimiter)
-            for row in reader:
-                # Clean up row data
-                cleaned_row = {k.strip(): v.strip() if v else "" for k, v in row.items()}
-                data.append(cleaned_row)
-
-        return data
-
-    def _parse_excel_file(self, file_path: str) -> List[Dict]:
-        """Parse Excel file."""
-        workbook = openpyxl.load_workbook(file_path)
-        worksheet = workbook.active
-
-        # Get headers from first row
-        headers = []
-        for cell in worksheet[1]:
-            headers.append(cell.value.strip() if cell.value else "")
-
-        # Get data rows
-        data = []
-        for row in worksheet.iter_rows(min_row=2, values_only=True):
-            row_data = {}
-            for i, value in enumerate(row):
-                if i < len(headers):
-                    row_data[headers[i]] = str(value).strip() if value is not None else ""
-
-            # Skip empty rows
-            if any(row_data.values()):
-                data.append(row_data)
-
-        return data
+        return list(ImportFileReader(file_path))
 
     def _validate_import_data(self, data_type: str, data: List[Dict]) -> List[str]:
         """Validate import data."""
@@ -635,73 +655,105 @@ class DataImportService:
 
         return errors
 
-    def _import_data_records(self, data_type: str, data: List[Dict], update_existing: bool) -> Dict:
-        """Import data records."""
-        results = {"total": len(data), "successful": 0, "failed": 0, "errors": []}
+    def _validate_chunk(self, data_type: str, rows: List[Dict], first_row_num: int):
+        """
+        Validate a chunk of rows.
 
-        with transaction.atomic():
-            for i, row in enumerate(data):
-                try:
-                    if data_type == "inventory":
-                        self._import_inventory_record(row, update_existing)
-                    elif data_type == "customers":
-                        self._import_customer_record(row, update_existing)
-                    elif data_type == "suppliers":
-                        self._import_supplier_record(row, update_existing)
+        Returns:
+            tuple: ([(row_num, row)] for valid rows, ["Row N: error"] for invalid ones)
+        """
+        if data_type == "inventory":
+            return validate_inventory_chunk(rows, first_row_num)
 
-                    results["successful"] += 1
+        valid = []
+        errors = []
+        for i, row in enumerate(rows):
+            row_errors = self._validate_row(data_type, row, first_row_num + i)
+            if row_errors:
+                errors.extend(row_errors)
+            else:
+                valid.append((first_row_num + i, row))
+        return valid, errors
 
-                except Exception as e:
-                    results["failed"] += 1
-                    results["errors"].append(f"Row {i + 2}: {str(e)}")
+    def _import_data_records(
+        self, activity: DataActivity, reader: ImportFileReader, update_existing: bool
+    ) -> Dict:
+        """
+        Import data records chunk by chunk, resuming after the last committed row.
 
-        return results
+        Each chunk is committed together with the activity's progress, so the
+        recorded progress always matches the data written.
+        """
+        results = {
+            "total": activity.records_processed or 0,
+            "successful": activity.records_successful or 0,
+            "failed": activity.records_failed or 0,
+        }
+        activity.error_details = activity.error_details or {}
+        import_errors = activity.error_details.setdefault("import_errors", [])
 
-    def _import_inventory_record(self, row: Dict, update_existing: bool):
-        """Import inventory record."""
-        InventoryItem = apps.get_model("inventory", "InventoryItem")
-        ProductCategory = apps.get_model("inventory", "ProductCategory")
-        Branch = apps.get_model("core", "Branch")
-
-        # Get or create category
-        category_name = row.get("Category", "").strip()
-        category = None
-        if category_name:
-            category, _ = ProductCategory.objects.get_or_create(
-                tenant=self.tenant, name=category_name
+        writer = None
+        if activity.data_type == "inventory":
+            writer = InventoryChunkWriter(
+                self.tenant, update_existing, use_copy=should_use_copy(activity.file_path)
             )
 
-        # Get default branch
-        branch = Branch.objects.filter(tenant=self.tenant).first()
-        if not branch:
-            raise ValueError("No branch found for tenant")
+        try:
+            for start, rows in reader.chunks(get_chunk_size(), skip=activity.last_committed_row):
+                valid, errors = self._validate_chunk(activity.data_type, rows, start + 2)
+
+                with transaction.atomic():
+                    if writer:
+                        successful, write_errors = writer.write(valid)
+                    else:
+                        successful, write_errors = self._import_rows(
+                            activity.data_type, valid, update_existing
+                        )
+                    errors.extend(write_errors)
+
+                    results["total"] += len(rows)
+                    results["successful"] += successful
+                    results["failed"] += len(rows) - successful
+                    import_errors.extend(errors[: MAX_REPORTED_ERRORS - len(import_errors)])
+                    activity.record_progress(
+                        start + len(rows),
+                        results["total"],
+                        results["successful"],
+                        results["failed"],
+                    )
+        finally:
+            if writer and results["total"]:
+                invalidate_tenant_cache(self.tenant.id, prefix="inventory")
+                invalidate_tenant_cache(self.tenant.id, prefix="dashboard")
+                if writer.categories_created:
+                    invalidate_tenant_cache(self.tenant.id, prefix="category")
 
-        # Prepare data
-        item_data = {
-            "tenant": self.tenant,
-            "sku": row["SKU"].strip(),
-            "name": row["Name"].strip(),
-            "category": category,
-            "karat": int(float(row["Karat"])),
-            "weight_grams": Decimal(row["Weight (grams)"]),
-            "cost_price": Decimal(row["Cost Price"]),
-            "selling_price": Decimal(row["Selling Price"]),
-            "quantity": int(float(row["Quantity"])),
-            "branch": branch,
-            "serial_number": row.get("Serial Number", "").strip() or None,
-            "lot_number": row.get("Lot Number", "").strip() or None,
-        }
+        return results
 
-        if update_existing:
-            item, created = InventoryItem.objects.update_or_create(
-                tenant=self.tenant, sku=item_data["sku"], defaults=item_data
-            )
-        else:
-            # Check if SKU already exists
-            if InventoryItem.objects.filter(tenant=self.tenant, sku=item_data["sku"]).exists():
-                raise ValueError(f"SKU {item_data['sku']} already exists")
+    def _import_rows(self, data_type: str, rows: List, update_existing: bool):
+        """
+        Import validated customer or supplier rows one at a time.
+
+        Returns:
+            tuple: (number of rows imported, ["Row N: error"] for failed rows)
+        """
+        successful = 0
+        errors = []
+        for row_num, row in rows:
+            try:
+                # A savepoint per row keeps a failed row from aborting the chunk
+                with transaction.atomic():
+                    if data_type == "customers":
+                        self._import_customer_record(row, update_existing)
+                    elif data_type == "suppliers":
+                        self._import_supplier_record(row, update_existing)
+
+                successful += 1
+
+            except Exception as e:
+                errors.append(f"Row {row_num}: {str(e)}")
 
-            InventoryItem.objects.create(**item_data)
+        return successful, errors
 
     def _import_customer_record(self, row: Dict, update_existing: bool):
         """Import customer record."""
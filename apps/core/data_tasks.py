@@ -98,10 +98,13 @@ def import_data_async(
     user_id: Optional[str] = None,
     update_existing: bool = False,
     validate_only: bool = False,
+    activity_id: Optional[str] = None,
 ) -> str:
     """
     Asynchronously import tenant data.
 
+    Retries resume the same activity after its last committed chunk.
+
     Args:
         tenant_id: Tenant UUID
         data_type: Type of data to import
@@ -109,6 +112,7 @@ def import_data_async(
         user_id: User ID initiating the import
         update_existing: Whether to update existing records
         validate_only: Only validate, don't import
+        activity_id: Activity of an interrupted import to resume
 
     Returns:
         str: Activity ID
@@ -120,13 +124,18 @@ def import_data_async(
 
         # Create import service and import data
         import_service = DataImportService(tenant)
-        activity = import_service.import_data(
-            data_type=data_type,
-            file_path=file_path,
-            user=user,
-            update_existing=update_existing,
-            validate_only=validate_only,
-        )
+        if activity_id:
+            activity = DataActivity.objects.get(id=activity_id, tenant=tenant)
+        else:
+            activity = import_service.create_import_activity(
+                data_type=data_type,
+                file_path=file_path,
+                user=user,
+                update_existing=update_existing,
+                validate_only=validate_only,
+            )
+        activity_id = str(activity.id)
+        activity = import_service.run_import(activity)
 
         logger.info(f"Data import completed for tenant {tenant_id}: {activity.id}")
         return str(activity.id)
@@ -136,7 +145,7 @@ def import_data_async(
         raise
     except Exception as e:
         logger.exception(f"Data import failed for tenant {tenant_id}: {e}")
-        raise self.retry(exc=e)
+        raise self.retry(exc=e, kwargs={**self.request.kwargs, "activity_id": activity_id})
 
 
 @shared_task(
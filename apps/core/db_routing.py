@@ -0,0 +1,262 @@
+"""
+Read replica routing for analytic reads.
+
+Reports, dashboards, the audit explorer and data exports read through
+use_replica(), which routes their ORM reads to a database alias listed in
+DATABASE_REPLICAS. Everything else, and every write, stays on the primary,
+so POS checkouts no longer compete with month-end reports.
+
+A replica is only used when:
+- its replication lag, measured with pg_last_xact_replay_timestamp() and
+  cached for DATABASE_REPLICA_LAG_CACHE_TTL seconds per process, is within
+  the caller's freshness budget (max_lag, DATABASE_REPLICA_MAX_LAG by
+  default)
+- the user did not write anything in the last DATABASE_PIN_WINDOW seconds.
+  ReadYourWritesMiddleware sets a cookie after every unsafe request and
+  pins the user's next requests to the primary while it is valid
+
+Otherwise the block runs on the primary. RLS depends on the connection's
+session variables, so use_replica() copies the primary connection's tenant
+context and bypass flag to the replica connection on entry and clears them
+on exit.
+
+Statement timeouts are set per alias through the connection OPTIONS in the
+settings; replicas allow the longer statements of reports.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from prometheus_client import Counter
+
+from .tenant_context import set_session_context
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable in settings)
+DEFAULT_MAX_LAG = 30
+DEFAULT_LAG_CACHE_TTL = 5
+DEFAULT_PIN_WINDOW = 10
+
+PIN_COOKIE = "db_pinned_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+READS_ROUTED = Counter(
+    "database_analytic_reads_total",
+    "Analytic read blocks by database and routing reason",
+    ["database", "reason"],
+)
+
+# Alias of the current use_replica() block (None outside blocks)
+_read_alias: ContextVar[Optional[str]] = ContextVar("read_alias", default=None)
+# Epoch seconds until which the current user's reads stay on the primary
+_pinned_until: ContextVar[float] = ContextVar("pinned_until", default=0.0)
+
+_lag_cache: Dict[str, Tuple[float, Optional[float]]] = {}
+_lag_lock = threading.Lock()
+
+
+def get_replicas():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def _measure_lag(alias: str) -> Optional[float]:
+    """Replication lag of a replica in seconds, None when it cannot be measured."""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError as e:
+        logger.warning(f"Could not measure replication lag of {alias}: {e}")
+        return None
+    return None if lag is None else float(lag)
+
+
+def replica_lag(alias: str) -> Optional[float]:
+    """Replication lag of a replica, measured at most once per cache TTL."""
+    now = time.monotonic()
+    with _lag_lock:
+        cached = _lag_cache.get(alias)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    lag = _measure_lag(alias)
+    ttl = getattr(settings, "DATABASE_REPLICA_LAG_CACHE_TTL", DEFAULT_LAG_CACHE_TTL)
+    with _lag_lock:
+        _lag_cache[alias] = (now + ttl, lag)
+    return lag
+
+
+def clear_lag_cache() -> None:
+    with _lag_lock:
+        _lag_cache.clear()
+
+
+def is_pinned() -> bool:
+    """Whether the current user wrote recently and must read from the primary."""
+    return _pinned_until.get() > time.time()
+
+
+def choose_read_alias(max_lag: Optional[float] = None) -> str:
+    """
+    Pick the database for an analytic read.
+
+    Args:
+        max_lag: Seconds of replication lag the caller accepts
+            (DATABASE_REPLICA_MAX_LAG by default)
+
+    Returns:
+        A replica alias, or the primary's when no replica may be used
+    """
+    replicas = get_replicas()
+    if not replicas:
+        reason = "no_replica"
+    elif is_pinned():
+        reason = "pinned"
+    else:
+        if max_lag is None:
+            max_lag = getattr(settings, "DATABASE_REPLICA_MAX_LAG", DEFAULT_MAX_LAG)
+        fresh = []
+        for alias in replicas:
+            lag = replica_lag(alias)
+            # Replicas whose lag could not be measured are skipped
+            if lag is not None and lag <= max_lag:
+                fresh.append(alias)
+        if fresh:
+            alias = random.choice(fresh)
+            READS_ROUTED.labels(alias, "replica").inc()
+            return alias
+        reason = "lagging"
+    READS_ROUTED.labels(DEFAULT_DB_ALIAS, reason).inc()
+    return DEFAULT_DB_ALIAS
+
+
+def read_alias(max_lag: Optional[float] = None) -> str:
+    """
+    Database for an analytic read: the alias of the enclosing use_replica()
+    block, or a fresh choice outside blocks (for raw SQL run lazily).
+    """
+    return _read_alias.get() or choose_read_alias(max_lag)
+
+
+def _copy_session_context(alias: str) -> None:
+    """Give the replica connection the primary connection's RLS context."""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('app.current_tenant', true), "
+            "current_setting('app.bypass_rls', true);"
+        )
+        tenant_id, bypass = cursor.fetchone()
+    set_session_context(tenant_id or None, bypass == "true", using=alias)
+
+
+@contextmanager
+def use_replica(max_lag: Optional[float] = None) -> Iterator[str]:
+    """
+    Route the ORM reads of a block, view or task to a replica.
+
+    Also usable as a decorator (``@use_replica()``, or
+    ``@method_decorator(use_replica(), name="dispatch")`` on class-based
+    views). Nested blocks keep the outer block's database. Querysets must be
+    evaluated inside the block; anything evaluated later reads the primary.
+
+    Args:
+        max_lag: Seconds of replication lag the caller accepts
+
+    Yields:
+        The database alias reads are routed to
+    """
+    current = _read_alias.get()
+    if current is not None:
+        yield current
+        return
+
+    alias = choose_read_alias(max_lag)
+    if alias == DEFAULT_DB_ALIAS:
+        yield alias
+        return
+
+    _copy_session_context(alias)
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+        try:
+            set_session_context(None, using=alias)
+        except DatabaseError as e:
+            # A broken connection is discarded at the end of the request
+            logger.warning(f"Failed to clear session context on {alias}: {e}")
+
+
+class ReplicaRouter:
+    """
+    Database router sending reads inside use_replica() blocks to the chosen
+    replica and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Explicitly the primary outside blocks, even for related objects of
+        # instances that were loaded from a replica
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keep a user's reads on the primary for DATABASE_PIN_WINDOW seconds after
+    each of their writes (any unsafe request), so pages shown after a form
+    submission never miss the change on a lagging replica.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0.0
+        token = _pinned_until.set(pinned_until)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned_until.reset(token)
+
+        if request.method not in SAFE_METHODS and get_replicas():
+            window = getattr(settings, "DATABASE_PIN_WINDOW", DEFAULT_PIN_WINDOW)
+            response.set_cookie(
+                PIN_COOKIE,
+                str(int(time.time() + window)),
+                max_age=window,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -35,8 +35,32 @@ class ResilientEmailBackend(BaseEmailBackend):
         self.suppress_exceptions = getattr(settings, "EMAIL_FAILOVER_SUPPRESS_EXCEPTIONS", True)
         self.primary_backend_kwargs = kwargs.copy()
         self.failover_backend_kwargs = kwargs.copy()
+        self.primary_connection = None
         super().__init__(fail_silently=fail_silently, **kwargs)
 
+    def open(self):
+        """Open a primary connection to be reused until close() (batched sends)."""
+        if self.primary_connection is not None:
+            return False
+        self.primary_connection = get_connection(
+            self.primary_backend_path,
+            fail_silently=self.fail_silently,
+            **self.primary_backend_kwargs,
+        )
+        try:
+            return self.primary_connection.open()
+        except self.recoverable_exceptions as exc:  # pragma: no cover - network dependent
+            logger.error("Could not open primary email connection: %s", exc)
+            self.primary_connection = None
+            return False
+
+    def close(self):
+        if self.primary_connection is not None:
+            try:
+                self.primary_connection.close()
+            finally:
+                self.primary_connection = None
+
     def send_messages(self, email_messages: Iterable) -> int:
         messages = tuple(email_messages)
         if not messages:
@@ -63,6 +87,8 @@ class ResilientEmailBackend(BaseEmailBackend):
             return self._send_via_failover(messages, exc)
 
     def _send_with_backend(self, backend_path, email_messages, fail_silently, kwargs):
+        if backend_path == self.primary_backend_path and self.primary_connection is not None:
+            return self.primary_connection.send_messages(email_messages)
         connection = get_connection(
             backend_path,
             fail_silently=fail_silently,
@@ -0,0 +1,282 @@
+"""
+Cached, tenant-aware feature flag evaluation.
+
+Checking a flag used to cost three queries (kill switch, flag, tenant
+override) on every call. This module compiles every flag, kill switch and
+tenant override into one immutable snapshot:
+- The snapshot is kept in a process-local cache, backed by the Redis
+  `default` cache so a worker only compiles it when nobody else has
+- Snapshots are versioned by a single generation key, bumped whenever a
+  flag, override or kill switch is saved or deleted
+- Percentage rollouts use a stable hash of (flag, tenant id), so a tenant
+  stays in or out of a rollout without storing anything per tenant
+- Results are memoized on the request, so repeated checks are free
+
+Per Requirement 30 - Feature Flag Management
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from waffle.models import Flag
+
+from apps.core.feature_flags import EmergencyKillSwitch, TenantFeatureFlag
+
+logger = logging.getLogger(__name__)
+
+# Snapshot cache defaults (overridable in settings)
+DEFAULT_LOCAL_TTL = 2
+DEFAULT_CACHE_TTL = 3600
+
+CACHE_ALIAS = "default"
+GENERATION_KEY = "feature_flags:generation"
+
+# Attribute holding memoized flag states on the Django request
+REQUEST_ATTRIBUTE = "_tenant_feature_flags"
+
+# Rollout buckets: percentages are matched to a resolution of 0.001%
+ROLLOUT_BUCKETS = 100000
+
+
+class CompiledFlag(NamedTuple):
+    """State of one flag, as needed to evaluate it for a tenant."""
+
+    name: str
+    everyone: Optional[bool]
+    percent: Optional[float]
+    killed: bool
+
+
+def rollout_bucket(flag_name: str, tenant_id) -> float:
+    """
+    Stable position of a tenant in a flag's rollout, from 0 (inclusive) to 100.
+
+    The flag name is part of the hash so that the same tenants are not
+    always first into every rollout.
+    """
+    digest = hashlib.sha256(f"{flag_name}:{tenant_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") % ROLLOUT_BUCKETS * 100 / ROLLOUT_BUCKETS
+
+
+class FlagSnapshot:
+    """
+    Immutable view of all flags and tenant overrides at one generation.
+
+    Evaluation order matches is_flag_active_for_tenant():
+    1. Emergency kill switch
+    2. Tenant-specific override
+    3. Global flag state, then percentage rollout
+    """
+
+    __slots__ = ("generation", "flags", "overrides")
+
+    def __init__(self, generation: int, payload: Dict):
+        self.generation = generation
+        self.flags: Mapping[str, CompiledFlag] = MappingProxyType(
+            {row[0]: CompiledFlag(*row) for row in payload["flags"]}
+        )
+        self.overrides: Mapping[str, Mapping[str, bool]] = MappingProxyType(
+            {
+                tenant_id: MappingProxyType(flags)
+                for tenant_id, flags in payload["overrides"].items()
+            }
+        )
+
+    def is_active(self, flag_name: str, tenant_id) -> bool:
+        """Evaluate a flag for a tenant without touching the database."""
+        flag = self.flags.get(flag_name)
+        if flag is None or flag.killed:
+            return False
+
+        override = self.overrides.get(str(tenant_id), {}).get(flag_name)
+        if override is not None:
+            return override
+
+        if flag.everyone is not None:
+            return flag.everyone
+        if flag.percent:
+            return rollout_bucket(flag_name, tenant_id) < flag.percent
+        return False
+
+    def flags_for_tenant(self, tenant_id) -> Dict[str, bool]:
+        """Evaluate every flag for a tenant."""
+        return {name: self.is_active(name, tenant_id) for name in self.flags}
+
+
+def compile_snapshot_payload() -> Dict:
+    """
+    Read all flags, kill switches and tenant overrides.
+
+    Returns:
+        dict: Picklable payload from which a FlagSnapshot is built
+    """
+    killed = set(
+        EmergencyKillSwitch.objects.filter(is_active=True).values_list("flag_name", flat=True)
+    )
+    flags = [
+        (name, everyone, float(percent) if percent is not None else None, name in killed)
+        for name, everyone, percent in Flag.objects.values_list("name", "everyone", "percent")
+    ]
+
+    overrides: Dict[str, Dict[str, bool]] = {}
+    for tenant_id, flag_name, enabled in TenantFeatureFlag.objects.values_list(
+        "tenant_id", "flag__name", "enabled"
+    ):
+        overrides.setdefault(str(tenant_id), {})[flag_name] = enabled
+
+    return {"flags": flags, "overrides": overrides}
+
+
+def _snapshot_cache_key(generation: int) -> str:
+    return f"feature_flags:snapshot:{generation}"
+
+
+class FlagSnapshotCache:
+    """
+    Process-local snapshot cache, checked against the shared generation key.
+
+    The generation is read from Redis at most once per FEATURE_FLAG_LOCAL_TTL
+    seconds. When it has moved on, the snapshot for the new generation is
+    read from Redis, or compiled from the database by the first worker to
+    need it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[FlagSnapshot] = None
+        self._checked_until = 0.0
+
+    def get(self) -> FlagSnapshot:
+        """Get the current snapshot."""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and self._checked_until > now:
+            return snapshot
+
+        with self._lock:
+            generation = self._read_generation()
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.generation != generation:
+                snapshot = FlagSnapshot(generation, self._load_payload(generation))
+                self._snapshot = snapshot
+            local_ttl = getattr(settings, "FEATURE_FLAG_LOCAL_TTL", DEFAULT_LOCAL_TTL)
+            self._checked_until = now + local_ttl
+        return snapshot
+
+    def clear(self) -> None:
+        """Drop the local snapshot so the next check reads the generation."""
+        with self._lock:
+            self._snapshot = None
+            self._checked_until = 0.0
+
+    def _read_generation(self) -> int:
+        try:
+            return caches[CACHE_ALIAS].get(GENERATION_KEY) or 0
+        except Exception as e:
+            logger.warning(f"Feature flag cache unavailable: {e}")
+            return -1
+
+    def _load_payload(self, generation: int) -> Dict:
+        if generation < 0:
+            return compile_snapshot_payload()
+
+        cache = caches[CACHE_ALIAS]
+        key = _snapshot_cache_key(generation)
+        try:
+            payload = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Feature flag cache unavailable: {e}")
+            return compile_snapshot_payload()
+
+        if payload is None:
+            payload = compile_snapshot_payload()
+            try:
+                cache.set(
+                    key, payload, getattr(settings, "FEATURE_FLAG_CACHE_TTL", DEFAULT_CACHE_TTL)
+                )
+            except Exception as e:
+                logger.warning(f"Feature flag cache unavailable: {e}")
+        return payload
+
+
+snapshot_cache = FlagSnapshotCache()
+
+
+def _bump_generation() -> None:
+    cache = caches[CACHE_ALIAS]
+    try:
+        cache.add(GENERATION_KEY, 0, timeout=None)
+        cache.incr(GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"Feature flag cache unavailable: {e}")
+    snapshot_cache.clear()
+
+
+def invalidate_flags() -> None:
+    """
+    Move all workers on to a new snapshot generation.
+
+    The generation is bumped straight away, so this process sees the change
+    inside the current transaction, and again on commit, so no worker keeps
+    a snapshot compiled before the change was visible.
+    """
+    _bump_generation()
+    transaction.on_commit(_bump_generation)
+
+
+def _tenant_id(tenant):
+    return getattr(tenant, "pk", tenant)
+
+
+def flags_for_tenant(tenant, request=None) -> Dict[str, bool]:
+    """
+    Get the state of every flag for a tenant.
+
+    Args:
+        tenant: Tenant instance or id
+        request: Optional request on which the result is memoized
+
+    Returns:
+        dict: Flag name -> whether the flag is active for the tenant
+    """
+    tenant_id = _tenant_id(tenant)
+    if tenant_id is None:
+        return {}
+
+    memo = getattr(request, REQUEST_ATTRIBUTE, None) if request is not None else None
+    if memo is not None and tenant_id in memo:
+        return memo[tenant_id]
+
+    flags = snapshot_cache.get().flags_for_tenant(tenant_id)
+    if request is not None:
+        if memo is None:
+            memo = {}
+            setattr(request, REQUEST_ATTRIBUTE, memo)
+        memo[tenant_id] = flags
+    return flags
+
+
+def is_flag_active(flag_name: str, tenant, request=None) -> bool:
+    """
+    Check whether a flag is active for a tenant.
+
+    Args:
+        flag_name: Name of the waffle flag
+        tenant: Tenant instance or id
+        request: Optional request on which results are memoized
+    """
+    if request is not None:
+        return flags_for_tenant(tenant, request).get(flag_name, False)
+
+    tenant_id = _tenant_id(tenant)
+    if tenant_id is None:
+        return False
+    return snapshot_cache.get().is_active(flag_name, tenant_id)
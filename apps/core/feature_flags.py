@@ -15,7 +15,6 @@ This module provides:
 from django.db import models
 from django.utils import timezone
 
-from waffle import flag_is_active
 from waffle.models import Flag
 
 
@@ -341,38 +340,34 @@ class EmergencyKillSwitch(models.Model):
 # Service functions for feature flag management
 
 
-def is_flag_active_for_tenant(flag_name, tenant, user=None):
+def is_flag_active_for_tenant(flag_name, tenant, user=None, request=None):
     """
     Check if a flag is active for a specific tenant.
     Checks in order:
     1. Emergency kill switch
     2. Tenant-specific override
     3. Global flag state
+    4. Percentage rollout, by a stable hash of the flag and tenant
 
-    Acceptance Criteria 1, 3, 5
+    Flags are evaluated from a cached snapshot; pass the request to memoize
+    results for its lifetime. `user` is accepted for compatibility and is
+    not consulted.
+
+    Acceptance Criteria 1, 2, 3, 5
     """
-    # Check emergency kill switch first
-    if EmergencyKillSwitch.objects.filter(flag_name=flag_name, is_active=True).exists():
-        return False
-
-    # Check tenant-specific override
-    try:
-        flag = Flag.objects.get(name=flag_name)
-        tenant_override = TenantFeatureFlag.objects.filter(tenant=tenant, flag=flag).first()
-        if tenant_override is not None:
-            return tenant_override.enabled
-
-        # Fall back to global flag state
-        # Check if flag is explicitly enabled for everyone
-        if flag.everyone is True:
-            return True
-        elif flag.everyone is False:
-            return False
-        else:
-            # If everyone is None, use waffle's normal logic
-            return flag_is_active(user, flag_name) if user else False
-    except Flag.DoesNotExist:
-        return False
+    from apps.core.feature_flag_evaluator import is_flag_active
+
+    return is_flag_active(flag_name, tenant, request=request)
+
+
+def flags_for_tenant(tenant, request=None):
+    """
+    Get the state of every flag for a tenant, e.g. for template context.
+    Acceptance Criteria 1, 2, 3, 5
+    """
+    from apps.core.feature_flag_evaluator import flags_for_tenant as evaluate_flags
+
+    return evaluate_flags(tenant, request=request)
 
 
 def enable_flag_for_tenant(flag_name, tenant, user, notes=""):
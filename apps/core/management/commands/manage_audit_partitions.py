@@ -0,0 +1,70 @@
+"""
+Management command to maintain the monthly audit log partitions.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.core.audit_partitions import (
+    PARTITIONED_MODELS,
+    drop_partitions_before,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = "Create upcoming audit log partitions and optionally drop expired ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            help="Months of partitions to create after the current one",
+        )
+        parser.add_argument(
+            "--drop-older-than",
+            type=int,
+            metavar="DAYS",
+            help="Drop partitions holding only rows older than this many days",
+        )
+        parser.add_argument("--list", action="store_true", help="List the partitions of each table")
+
+    def handle(self, *args, **options):
+        """Create and drop partitions."""
+        created = ensure_partitions(months_ahead=options["months_ahead"])
+        for table, names in created.items():
+            for name in names:
+                self.stdout.write(self.style.SUCCESS(f"Created {name}"))
+            if not names:
+                self.stdout.write(f"{table}: partitions already in place")
+
+        days = options["drop_older_than"]
+        if days is not None:
+            if days < 30:
+                raise CommandError("Minimum retention period is 30 days for compliance")
+            cutoff = timezone.now() - timedelta(days=days)
+            for table in created:
+                names, rows = drop_partitions_before(table, cutoff)
+                for name in names:
+                    self.stdout.write(self.style.WARNING(f"Dropped {name}"))
+                self.stdout.write(f"{table}: {rows} rows removed")
+
+        if options["list"]:
+            self._list_partitions()
+
+    def _list_partitions(self):
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            if not is_partitioned(table):
+                self.stdout.write(f"{table} is not partitioned")
+                continue
+            for partition in list_partitions(table):
+                if partition.is_default:
+                    bounds = "DEFAULT"
+                else:
+                    bounds = f"{partition.lower or 'MINVALUE'} to {partition.upper or 'MAXVALUE'}"
+                self.stdout.write(f"{partition.name}: {bounds}")
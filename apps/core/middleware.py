@@ -3,6 +3,10 @@ Tenant context middleware for multi-tenant data isolation.
 
 This middleware extracts the tenant ID from the request (JWT token or session)
 and sets the PostgreSQL session variable for Row-Level Security (RLS) enforcement.
+
+Tenant rows are read through the cache in apps.core.tenant_resolver and the JWT
+is decoded at most once per request, so setting up a request costs a single
+set_config statement.
 """
 
 import logging
@@ -14,7 +18,8 @@ from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 
 from apps.core.models import Tenant
-from apps.core.tenant_context import clear_tenant_context, enable_rls_bypass, set_tenant_context
+from apps.core.tenant_context import clear_tenant_context, set_session_context
+from apps.core.tenant_resolver import get_tenant, get_validated_token
 
 logger = logging.getLogger(__name__)
 
@@ -58,22 +63,24 @@ class TenantContextMiddleware(MiddlewareMixin):
         Returns:
             None if processing should continue, HttpResponse if request should be rejected
         """
-        # Clear any existing tenant context from previous requests
-        clear_tenant_context()
-
         # Check if path is exempt from tenant context
         if self._is_exempt_path(request.path):
             # For admin and platform paths, enable RLS bypass if user is platform admin
-            if (
+            bypass = (
                 request.path.startswith("/admin/") or request.path.startswith("/platform/")
-            ) and self._is_platform_admin(request.user):
-                enable_rls_bypass()
+            ) and self._is_platform_admin(request.user)
+            # Replaces any context left over from previous requests
+            set_session_context(None, bypass=bypass)
+            if bypass:
                 logger.debug(f"RLS bypass enabled for platform admin: {request.user}")
             return None
 
         # Extract tenant ID from request
         tenant_id = self._extract_tenant_id(request)
 
+        # Set tenant context first (clearing bypass and any previous tenant), then validate
+        set_session_context(tenant_id)
+
         if not tenant_id:
             # No tenant context available
             if request.user and not isinstance(request.user, AnonymousUser):
@@ -85,13 +92,11 @@ class TenantContextMiddleware(MiddlewareMixin):
             # Anonymous users without tenant context are allowed (for login, etc.)
             return None
 
-        # Set tenant context first, then validate
-        set_tenant_context(tenant_id)
         logger.debug(f"Tenant context set for request: {tenant_id}")
 
-        # Now query the tenant - RLS will allow access since context is set
+        # Now load the tenant - RLS will allow access on a cache miss since context is set
         try:
-            tenant = Tenant.objects.get(id=tenant_id)
+            tenant = get_tenant(tenant_id)
         except Tenant.DoesNotExist:
             logger.error(f"Tenant not found: {tenant_id}")
             clear_tenant_context()
@@ -252,26 +257,16 @@ class TenantContextMiddleware(MiddlewareMixin):
         Returns:
             UUID of the tenant, or None if not found
         """
-        auth_header = request.headers.get("Authorization", "")
-
-        if not auth_header.startswith("Bearer "):
-            return None
-
         try:
-            # Import here to avoid circular imports
-            from rest_framework_simplejwt.tokens import AccessToken
-
-            token = auth_header.split(" ")[1]
-            access_token = AccessToken(token)
+            access_token = get_validated_token(request)
+            if access_token is None:
+                return None
 
             # Extract tenant_id from token payload
             tenant_id_str = access_token.get("tenant_id")
             if tenant_id_str:
                 return UUID(tenant_id_str)
 
-        except ImportError:
-            # JWT library not installed yet, skip JWT extraction
-            logger.debug("JWT library not available, skipping JWT extraction")
         except Exception as e:
             logger.warning(f"Error extracting tenant from JWT: {e}")
 
@@ -0,0 +1,43 @@
+# Generated migration for the concurrent webhook dispatcher
+# Adds per-webhook timeout and ordering settings, and replaces the
+# (status, next_retry_at) index with a partial index over due retries
+# Per Requirement 32: Webhook and Integration Management
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_add_secrets_key_rotation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhook",
+            name="timeout_seconds",
+            field=models.PositiveSmallIntegerField(
+                default=30, help_text="Seconds to wait for the endpoint to respond"
+            ),
+        ),
+        migrations.AddField(
+            model_name="webhook",
+            name="ordered_delivery",
+            field=models.BooleanField(
+                default=False,
+                help_text="Deliver events one at a time, in the order they occurred",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="webhookdelivery",
+            name="delivery_retry_idx",
+        ),
+        migrations.AddIndex(
+            model_name="webhookdelivery",
+            index=models.Index(
+                condition=models.Q(status="RETRYING"),
+                fields=["next_retry_at"],
+                name="delivery_due_retry_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated migration for the streaming data import pipeline
+# Tracks the last committed row so chunked imports can resume
+# Per Requirement 20: Settings and Configuration
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0028_webhook_dispatcher"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataactivity",
+            name="last_committed_row",
+            field=models.IntegerField(default=0),
+        ),
+    ]
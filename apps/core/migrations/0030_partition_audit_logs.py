@@ -0,0 +1,157 @@
+# Generated migration for partitioned audit log storage
+# Converts audit_logs and api_request_logs to monthly range partitions on
+# "timestamp" and adds a full-text search index for the audit log explorer
+# Per Requirement 8: Audit Logging
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+PARTITIONED_TABLES = ["audit_logs", "api_request_logs"]
+MONTHS_AHEAD = 3
+
+
+def _month_bounds(months_ahead):
+    """First days of next month through `months_ahead` months after it."""
+    from datetime import datetime, timezone
+
+    now = datetime.now(timezone.utc)
+    year, month = now.year, now.month
+    bounds = []
+    for _ in range(months_ahead + 2):
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+        bounds.append(datetime(year, month, 1, tzinfo=timezone.utc))
+    return bounds
+
+
+def partition_tables(apps, schema_editor):
+    """
+    Turn each table into a partitioned table.
+
+    The existing table is attached as a "history" partition holding
+    everything before next month, so no rows are copied; monthly partitions
+    follow it, and a DEFAULT partition catches rows beyond the last one.
+    Existing index names are moved to the partitioned table so later
+    migrations keep working.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    bounds = _month_bounds(MONTHS_AHEAD)
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            history = f"{table}_history"
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [table]
+            )
+            index_defs = [
+                (name, definition)
+                for name, definition in cursor.fetchall()
+                if name != f"{table}_pkey"
+            ]
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [table],
+            )
+            foreign_keys = cursor.fetchall()
+
+            for position, (name, _) in enumerate(index_defs):
+                cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{history}_idx{position}"')
+            cursor.execute(
+                f'ALTER TABLE "{table}" RENAME CONSTRAINT "{table}_pkey" TO "{history}_pkey"'
+            )
+            cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{history}"')
+
+            cursor.execute(
+                f'CREATE TABLE "{table}" (LIKE "{history}" INCLUDING DEFAULTS '
+                f'INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE ("timestamp")'
+            )
+            # The partition key must be part of the primary key
+            cursor.execute(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" '
+                f'PRIMARY KEY ("id", "timestamp")'
+            )
+            for name, definition in index_defs:
+                cursor.execute(definition)
+            for name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+            cursor.execute(f'ALTER TABLE "{history}" DROP CONSTRAINT "{history}_pkey"')
+            cursor.execute(
+                f'ALTER TABLE "{history}" ADD CONSTRAINT "{history}_pkey" '
+                f'PRIMARY KEY ("id", "timestamp")'
+            )
+            cursor.execute(
+                f'ALTER TABLE "{table}" ATTACH PARTITION "{history}" '
+                f"FOR VALUES FROM (MINVALUE) TO (%s)",
+                [bounds[0]],
+            )
+            for lower, upper in zip(bounds, bounds[1:]):
+                cursor.execute(
+                    f'CREATE TABLE "{table}_p{lower:%Y_%m}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [lower, upper],
+                )
+            cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+
+def unpartition_tables(apps, schema_editor):
+    """Copy each partitioned table back into a plain table."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            plain = f"{table}_plain"
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [table]
+            )
+            index_defs = [
+                (name, definition)
+                for name, definition in cursor.fetchall()
+                if name != f"{table}_pkey"
+            ]
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype = 'f'",
+                [table],
+            )
+            foreign_keys = cursor.fetchall()
+
+            cursor.execute(
+                f'CREATE TABLE "{plain}" (LIKE "{table}" INCLUDING DEFAULTS '
+                f"INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+            )
+            cursor.execute(f'INSERT INTO "{plain}" SELECT * FROM "{table}"')
+            cursor.execute(f'DROP TABLE "{table}" CASCADE')
+            cursor.execute(f'ALTER TABLE "{plain}" RENAME TO "{table}"')
+            cursor.execute(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ("id")'
+            )
+            for name, definition in index_defs:
+                cursor.execute(definition.replace(" ON ONLY ", " ON "))
+            for name, definition in foreign_keys:
+                cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0029_data_activity_last_committed_row"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "description", "request_path", config="simple"
+                ),
+                name="auditlog_search_idx",
+            ),
+        ),
+    ]
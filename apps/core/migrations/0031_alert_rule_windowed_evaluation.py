@@ -0,0 +1,44 @@
+# Generated by Django 4.2.26 on 2026-10-19 05:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0030_partition_audit_logs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alertrule",
+            name="aggregation",
+            field=models.CharField(
+                choices=[
+                    ("AVG", "Average"),
+                    ("P95", "95th Percentile"),
+                    ("MAX", "Maximum"),
+                    ("LAST", "Latest Sample"),
+                ],
+                default="AVG",
+                help_text="How the samples in the evaluation window are combined",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="alertrule",
+            name="clear_threshold",
+            field=models.FloatField(
+                blank=True,
+                help_text="Value the metric must get back to before an active alert resolves (defaults to the threshold less SYSTEM_METRICS_HYSTERESIS)",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="alertrule",
+            name="window_minutes",
+            field=models.PositiveIntegerField(
+                default=5, help_text="Length of the evaluation window (in minutes)"
+            ),
+        ),
+    ]
@@ -20,13 +20,10 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.views.generic import TemplateView, View
 
-import psutil
 import redis
-from celery.app.control import Inspect
 
+from apps.core import system_metrics
 from apps.core.admin_views import PlatformAdminRequiredMixin
-from apps.core.alert_models import AlertRule
-from apps.core.alert_service import AlertService
 
 
 class MonitoringDashboardView(PlatformAdminRequiredMixin, TemplateView):
@@ -108,108 +105,44 @@ class MonitoringDashboardView(PlatformAdminRequiredMixin, TemplateView):
             return {"name": "Redis", "status": "down", "message": str(e)}
 
     def _check_celery(self):
-        """Check Celery worker status."""
-        try:
-            from config.celery import app
-
-            inspect = Inspect(app=app)
-            stats = inspect.stats()
-
-            if stats:
-                worker_count = len(stats)
-                return {
-                    "name": "Celery",
-                    "status": "up",
-                    "message": f"{worker_count} worker(s) active",
-                    "workers": worker_count,
-                }
-            else:
-                return {"name": "Celery", "status": "down", "message": "No workers found"}
-        except Exception as e:
-            return {"name": "Celery", "status": "down", "message": str(e)}
+        """Check Celery worker status from the workers' stored samples."""
+        return check_celery_workers()
 
 
 class SystemMetricsAPIView(PlatformAdminRequiredMixin, View):
     """
-    API endpoint for real-time system metrics.
+    API endpoint for system metrics of all hosts.
 
     Requirement 7.1: Display real-time metrics for CPU usage, memory usage,
     disk space, and database connections.
+
+    Reads the last sample each host stored (see apps.core.system_metrics);
+    the top-level metrics are those of the host with the highest CPU usage.
     """
 
     def get(self, request):
         """Get current system metrics."""
+        hosts = system_metrics.reporting_hosts()
+        if not hosts:
+            # No sampler running yet: sample the host serving the request
+            values, details = system_metrics.sample_host()
+            host = platform.node()
+            system_metrics.MetricStore().record(host, values, details)
+            hosts = {host: details}
+
+        busiest = max(hosts, key=lambda host: hosts[host]["cpu"]["usage_percent"])
         metrics = {
-            "cpu": self._get_cpu_metrics(),
-            "memory": self._get_memory_metrics(),
-            "disk": self._get_disk_metrics(),
-            "network": self._get_network_metrics(),
+            "cpu": hosts[busiest]["cpu"],
+            "memory": hosts[busiest]["memory"],
+            "disk": hosts[busiest]["disk"],
+            "network": hosts[busiest]["network"],
+            "host": busiest,
+            "hosts": hosts,
             "timestamp": timezone.now().isoformat(),
         }
 
         return JsonResponse(metrics)
 
-    def _get_cpu_metrics(self):
-        """Get CPU usage metrics."""
-        cpu_percent = psutil.cpu_percent(interval=1, percpu=False)
-        cpu_count = psutil.cpu_count()
-        cpu_freq = psutil.cpu_freq()
-
-        # Check for alerts
-        AlertService.check_metric(AlertRule.CPU_USAGE, cpu_percent)
-
-        return {
-            "usage_percent": round(cpu_percent, 2),
-            "count": cpu_count,
-            "frequency_mhz": round(cpu_freq.current, 2) if cpu_freq else None,
-            "status": "critical" if cpu_percent > 90 else "warning" if cpu_percent > 80 else "ok",
-        }
-
-    def _get_memory_metrics(self):
-        """Get memory usage metrics."""
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-
-        return {
-            "total_gb": round(memory.total / (1024**3), 2),
-            "used_gb": round(memory.used / (1024**3), 2),
-            "available_gb": round(memory.available / (1024**3), 2),
-            "usage_percent": round(memory.percent, 2),
-            "swap_total_gb": round(swap.total / (1024**3), 2),
-            "swap_used_gb": round(swap.used / (1024**3), 2),
-            "swap_percent": round(swap.percent, 2),
-            "status": (
-                "critical" if memory.percent > 90 else "warning" if memory.percent > 80 else "ok"
-            ),
-        }
-
-    def _get_disk_metrics(self):
-        """Get disk usage metrics."""
-        disk = psutil.disk_usage("/")
-
-        return {
-            "total_gb": round(disk.total / (1024**3), 2),
-            "used_gb": round(disk.used / (1024**3), 2),
-            "free_gb": round(disk.free / (1024**3), 2),
-            "usage_percent": round(disk.percent, 2),
-            "status": "critical" if disk.percent > 90 else "warning" if disk.percent > 80 else "ok",
-        }
-
-    def _get_network_metrics(self):
-        """Get network I/O metrics."""
-        net_io = psutil.net_io_counters()
-
-        return {
-            "bytes_sent_mb": round(net_io.bytes_sent / (1024**2), 2),
-            "bytes_recv_mb": round(net_io.bytes_recv / (1024**2), 2),
-            "packets_sent": net_io.packets_sent,
-            "packets_recv": net_io.packets_recv,
-            "errors_in": net_io.errin,
-            "errors_out": net_io.errout,
-            "drops_in": net_io.dropin,
-            "drops_out": net_io.dropout,
-        }
-
 
 class DatabaseMetricsAPIView(PlatformAdminRequiredMixin, View):
     """
@@ -233,40 +166,7 @@ class DatabaseMetricsAPIView(PlatformAdminRequiredMixin, View):
     def _get_connection_metrics(self):
         """Get database connection metrics."""
         try:
-            with connection.cursor() as cursor:
-                # Get connection count
-                cursor.execute(
-                    """
-                    SELECT count(*) as total,
-                           count(*) FILTER (WHERE state = 'active') as active,
-                           count(*) FILTER (WHERE state = 'idle') as idle,
-                           count(*) FILTER (WHERE state = 'idle in transaction') as idle_in_transaction
-                    FROM pg_stat_activity
-                    WHERE datname = current_database()
-                """
-                )
-                row = cursor.fetchone()
-
-                # Get max connections
-                cursor.execute("SHOW max_connections")
-                max_conn = int(cursor.fetchone()[0])
-
-                total, active, idle, idle_in_trans = row
-                usage_percent = round((total / max_conn) * 100, 2) if max_conn > 0 else 0
-
-                return {
-                    "total": total,
-                    "active": active,
-                    "idle": idle,
-                    "idle_in_transaction": idle_in_trans,
-                    "max_connections": max_conn,
-                    "usage_percent": usage_percent,
-                    "status": (
-                        "critical"
-                        if usage_percent > 90
-                        else "warning" if usage_percent > 80 else "ok"
-                    ),
-                }
+            return system_metrics.database_connections()
         except Exception as e:
             return {"error": str(e)}
 
@@ -465,38 +365,13 @@ class CeleryMetricsAPIView(PlatformAdminRequiredMixin, View):
         return JsonResponse(metrics)
 
     def _get_worker_metrics(self):
-        """Get Celery worker metrics."""
+        """Get Celery worker metrics from the workers' stored samples."""
         try:
-            from config.celery import app
-
-            inspect = Inspect(app=app)
-
-            # Get worker stats
-            stats = inspect.stats()
-            active_tasks = inspect.active()
-            registered_tasks = inspect.registered()
-
-            workers = []
-            if stats:
-                for worker_name, worker_stats in stats.items():
-                    workers.append(
-                        {
-                            "name": worker_name,
-                            "status": "online",
-                            "pool": worker_stats.get("pool", {}).get("implementation", "Unknown"),
-                            "max_concurrency": worker_stats.get("pool", {}).get(
-                                "max-concurrency", 0
-                            ),
-                            "active_tasks": (
-                                len(active_tasks.get(worker_name, [])) if active_tasks else 0
-                            ),
-                            "registered_tasks": (
-                                len(registered_tasks.get(worker_name, []))
-                                if registered_tasks
-                                else 0
-                            ),
-                        }
-                    )
+            workers = [
+                {"status": "online", "host": host, **details["worker"]}
+                for host, details in sorted(system_metrics.reporting_hosts().items())
+                if "worker" in details
+            ]
 
             return {
                 "total_workers": len(workers),
@@ -507,32 +382,25 @@ class CeleryMetricsAPIView(PlatformAdminRequiredMixin, View):
             return {"error": str(e), "status": "error"}
 
     def _get_queue_metrics(self):
-        """Get Celery queue metrics."""
+        """Get the broker backlog of each Celery queue."""
         try:
-            from config.celery import app
-
-            inspect = Inspect(app=app)
-
-            # Get reserved tasks (tasks in queue)
-            reserved = inspect.reserved()
-            scheduled = inspect.scheduled()
-
-            total_reserved = 0
-            total_scheduled = 0
-
-            if reserved:
-                for tasks in reserved.values():
-                    total_reserved += len(tasks)
-
-            if scheduled:
-                for tasks in scheduled.values():
-                    total_scheduled += len(tasks)
+            store = system_metrics.MetricStore()
+            queues = store.latest([system_metrics.CLUSTER]).get(system_metrics.CLUSTER, {})
+            depths = queues.get("queues")
+            if depths is None:
+                # Not collected yet: LLEN is cheap enough to read directly
+                broker = system_metrics.get_broker_client()
+                depths = (
+                    system_metrics.queue_depths(broker, system_metrics.celery_queues())
+                    if broker is not None
+                    else {}
+                )
 
+            total_pending = sum(depths.values())
             return {
-                "reserved_tasks": total_reserved,
-                "scheduled_tasks": total_scheduled,
-                "total_pending": total_reserved + total_scheduled,
-                "status": "warning" if (total_reserved + total_scheduled) > 100 else "ok",
+                "queues": depths,
+                "total_pending": total_pending,
+                "status": "warning" if total_pending > 100 else "ok",
             }
         except Exception as e:
             return {"error": str(e)}
@@ -547,6 +415,24 @@ class CeleryMetricsAPIView(PlatformAdminRequiredMixin, View):
             return {"error": str(e)}
 
 
+def check_celery_workers():
+    """Celery status from the workers that stored a sample recently."""
+    try:
+        workers = [
+            details for details in system_metrics.reporting_hosts().values() if "worker" in details
+        ]
+        if workers:
+            return {
+                "name": "Celery",
+                "status": "up",
+                "message": f"{len(workers)} worker(s) active",
+                "workers": len(workers),
+            }
+        return {"name": "Celery", "status": "down", "message": "No workers found"}
+    except Exception as e:
+        return {"name": "Celery", "status": "down", "message": str(e)}
+
+
 class ServiceStatusAPIView(PlatformAdminRequiredMixin, View):
     """
     API endpoint for service status checks.
@@ -610,20 +496,4 @@ class ServiceStatusAPIView(PlatformAdminRequiredMixin, View):
 
     def _check_celery(self):
         """Check Celery status."""
-        try:
-            from config.celery import app
-
-            inspect = Inspect(app=app)
-            stats = inspect.stats()
-
-            if stats:
-                return {
-                    "name": "Celery",
-                    "status": "up",
-                    "message": f"{len(stats)} worker(s) active",
-                    "workers": len(stats),
-                }
-            else:
-                return {"name": "Celery", "status": "down", "message": "No workers found"}
-        except Exception as e:
-            return {"name": "Celery", "status": "down", "message": str(e)}
+        return check_celery_workers()
@@ -1,25 +1,142 @@
 """
 Rate limiting middleware for API endpoints.
 
-Applies rate limiting to all API endpoints based on user authentication status.
+Applies a tenant-aware token-bucket rate limit to all API endpoints. The
+middleware runs after AuthenticationMiddleware so session users are known,
+and reads the tenant and user from JWT bearer tokens without touching the
+database. Every request is checked against a per-tenant and a per-user
+bucket for its route class (POS, reporting, bulk or default) in a single
+Redis round-trip, and responses carry RateLimit-* headers.
 
 Per Requirement 25: Security Hardening and Compliance
 """
 
+import logging
+import re
+
+from django.conf import settings
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 
-from django_ratelimit.core import is_ratelimited
+from apps.core.rate_limiter import Bucket, TokenBucketLimiter
+from apps.core.tenant_resolver import get_validated_token
+
+logger = logging.getLogger(__name__)
+
+# Budgets per route class: sustained rate and burst capacity for the whole
+# tenant and for each user. Overridable with the API_RATE_LIMITS setting.
+DEFAULT_RATE_LIMITS = {
+    "pos": {
+        "tenant": ("18000/h", 600),
+        "user": ("3600/h", 120),
+    },
+    "reporting": {
+        "tenant": ("1200/h", 60),
+        "user": ("300/h", 20),
+    },
+    "bulk": {
+        "tenant": ("120/h", 10),
+        "user": ("60/h", 5),
+    },
+    "default": {
+        "tenant": ("6000/h", 300),
+        "user": ("1000/h", 60),
+    },
+    "anonymous": {
+        "ip": ("20/h", 20),
+    },
+}
+
+# First matching pattern decides the route class
+ROUTE_CLASSES = [
+    ("bulk", re.compile(r"^/api/(pos/offline/|.*/(bulk|import|export)(/|-))")),
+    ("pos", re.compile(r"^/api/(pos|terminals|receipts)/")),
+    ("reporting", re.compile(r"^/api/(dashboard|inventory/reports|reports)/")),
+]
+
+EXEMPT_PATHS = [
+    "/api/health/",
+    "/api/metrics/",
+]
+
+_limiter = None
+
+
+def get_limiter() -> TokenBucketLimiter:
+    """Get the process-wide limiter (the Lua script is registered once)."""
+    global _limiter
+    if _limiter is None:
+        _limiter = TokenBucketLimiter()
+    return _limiter
+
+
+def get_route_class(path: str) -> str:
+    """Classify an API path into a rate limit route class."""
+    for route_class, pattern in ROUTE_CLASSES:
+        if pattern.match(path):
+            return route_class
+    return "default"
+
+
+def _get_token_identity(request):
+    """
+    Read (user_id, tenant_id) from a JWT bearer token without a database query.
+
+    Returns None when the request has no valid bearer token.
+    """
+    token = get_validated_token(request)
+    if token is None:
+        return None
+    return token.get("user_id"), token.get("tenant_id")
+
+
+def get_identity(request):
+    """
+    Get the (user_id, tenant_id) a request is made on behalf of.
+
+    Returns None for anonymous requests.
+    """
+    identity = _get_token_identity(request)
+    if identity is not None and identity[0] is not None:
+        return identity
+
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.id, getattr(user, "tenant_id", None)
+    return None
+
+
+def get_buckets(request, route_class: str):
+    """Build the buckets that apply to a request."""
+    limits = getattr(settings, "API_RATE_LIMITS", DEFAULT_RATE_LIMITS)
+    identity = get_identity(request)
+
+    if identity is None:
+        rate, burst = limits["anonymous"]["ip"]
+        ip = request.META.get("REMOTE_ADDR", "unknown")
+        return [Bucket(f"ip:{ip}", rate, burst)]
+
+    user_id, tenant_id = identity
+    budget = limits.get(route_class, limits["default"])
+    buckets = []
+    if tenant_id:
+        rate, burst = budget["tenant"]
+        buckets.append(Bucket(f"tenant:{tenant_id}:{route_class}", rate, burst))
+    rate, burst = budget["user"]
+    buckets.append(Bucket(f"user:{user_id}:{route_class}", rate, burst))
+    return buckets
 
 
 class APIRateLimitMiddleware(MiddlewareMixin):
     """
     Middleware to apply rate limiting to API endpoints.
 
-    - Authenticated users: 100 requests per hour
+    - Authenticated users: per-tenant and per-user budgets by route class
     - Anonymous users: 20 requests per hour (per IP)
 
-    Only applies to paths starting with /api/
+    Only applies to paths starting with /api/. Must be placed after
+    AuthenticationMiddleware. If Redis is unavailable requests are allowed
+    through rather than failing the API.
     """
 
     def process_request(self, request):
@@ -29,43 +146,38 @@ class APIRateLimitMiddleware(MiddlewareMixin):
             return None
 
         # Skip rate limiting for certain endpoints (health checks, etc.)
-        exempt_paths = [
-            "/api/health/",
-            "/api/metrics/",
-        ]
+        if any(request.path.startswith(path) for path in EXEMPT_PATHS):
+            return None
 
-        if any(request.path.startswith(path) for path in exempt_paths):
+        if not getattr(settings, "RATELIMIT_ENABLE", True):
             return None
 
-        # Determine rate limit based on authentication
-        # Check if user attribute exists (may not be set yet in middleware chain)
-        if hasattr(request, "user") and request.user.is_authenticated:
-            # Authenticated users: 100/hour per user
-            rate = "100/h"
-            key = f"user:{request.user.id}"
-        else:
-            # Anonymous users: 20/hour per IP
-            rate = "20/h"
-            key = request.META.get("REMOTE_ADDR", "unknown")
-
-        # Check if rate limited
-        is_limited = is_ratelimited(
-            request=request,
-            group="api",
-            key=lambda g, r: key,
-            rate=rate,
-            method=request.method,
-            increment=True,
-        )
-
-        if is_limited:
+        route_class = get_route_class(request.path)
+        try:
+            result = get_limiter().consume(get_buckets(request, route_class))
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return None
+
+        request.rate_limit = result
+
+        if not result.allowed:
             return JsonResponse(
                 {
                     "error": "Rate limit exceeded",
                     "message": "You have exceeded the API rate limit. Please try again later.",
-                    "rate_limit": rate,
+                    "rate_limit": f"{result.limit} per {route_class} bucket",
+                    "retry_after": result.retry_after,
                 },
                 status=429,
             )
 
         return None
+
+    def process_response(self, request, response):
+        """Add RateLimit-* headers to API responses."""
+        result = getattr(request, "rate_limit", None)
+        if result is not None:
+            for header, value in result.get_headers().items():
+                response[header] = value
+        return response
@@ -0,0 +1,178 @@
+"""
+Distributed token-bucket rate limiter backed by Redis.
+
+Per Requirement 25: Security Hardening and Compliance
+
+Each request consumes one token from every bucket that applies to it, for
+example a per-user bucket and a per-tenant bucket for the request's route
+class. All buckets are checked and updated by a single Lua script, so a
+decision is atomic across processes and costs one Redis round-trip. The
+script reads the Redis server clock, so application hosts with skewed
+clocks still share consistent buckets.
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from django_redis import get_redis_connection
+
+# KEYS: bucket keys
+# ARGV: cost, then capacity and refill rate (tokens per millisecond) for each key
+# Returns: {allowed, limit, remaining, reset_ms, retry_after_ms} for the tightest bucket
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local cost = tonumber(ARGV[1])
+
+local allowed = 1
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - updated) * rate)
+    tokens[i] = available
+    if available < cost then
+        allowed = 0
+    end
+end
+
+local limit, remaining, reset_ms, retry_ms = 0, -1, 0, 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local available = tokens[i]
+    if allowed == 1 then
+        available = available - cost
+    else
+        retry_ms = math.max(retry_ms, math.ceil(math.max(0, cost - available) / rate))
+    end
+    local refill_ms = math.ceil((capacity - available) / rate)
+    redis.call('HSET', key, 'tokens', tostring(available), 'ts', now)
+    redis.call('PEXPIRE', key, refill_ms + 1000)
+
+    local whole = math.floor(available)
+    if remaining < 0 or whole < remaining then
+        limit, remaining = capacity, whole
+    end
+    reset_ms = math.max(reset_ms, refill_ms)
+end
+
+return {allowed, limit, remaining, reset_ms, retry_ms}
+"""
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+DEFAULT_CACHE_ALIAS = "api"
+KEY_PREFIX = "ratelimit:bucket"
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    Parse a rate such as '100/h' or '30/5m'.
+
+    Returns:
+        Tuple of (number of requests, period in seconds)
+    """
+    count, period = rate.split("/")
+    match = re.fullmatch(r"(\d*)([smhd])", period)
+    if not match:
+        raise ValueError(f"Invalid rate: {rate}")
+    multiplier = int(match.group(1) or 1)
+    return int(count), multiplier * PERIODS[match.group(2)]
+
+
+class Bucket:
+    """
+    A token bucket definition.
+
+    Args:
+        key: Redis key identifying the bucket
+        rate: Sustained rate such as '1800/h'
+        burst: Bucket capacity (defaults to the number of requests in the rate)
+    """
+
+    def __init__(self, key: str, rate: str, burst: Optional[int] = None):
+        count, period = parse_rate(rate)
+        self.key = f"{KEY_PREFIX}:{key}"
+        self.capacity = burst or count
+        self.refill_per_ms = count / (period * 1000)
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check, with values for the RateLimit-* headers."""
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, reset: int, retry_after: int):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        self.retry_after = retry_after
+
+    def get_headers(self) -> Dict[str, str]:
+        """Get the RateLimit-* response headers (and Retry-After when limited)."""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(self.remaining, 0)),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class TokenBucketLimiter:
+    """
+    Check and consume tokens from one or more buckets in one round-trip.
+
+    Example:
+        >>> limiter = TokenBucketLimiter()
+        >>> result = limiter.consume([Bucket("tenant:1:pos", "9000/h", burst=300)])
+        >>> result.allowed
+        True
+    """
+
+    def __init__(self, cache_alias: Optional[str] = None):
+        self.cache_alias = cache_alias or getattr(
+            settings, "API_RATE_LIMIT_CACHE", DEFAULT_CACHE_ALIAS
+        )
+        self._script = None
+
+    @property
+    def script(self):
+        """Registered Lua script (executed with EVALSHA, falling back to EVAL once)."""
+        if self._script is None:
+            client = get_redis_connection(self.cache_alias)
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    def consume(self, buckets: Sequence[Bucket], cost: int = 1) -> RateLimitResult:
+        """
+        Take ``cost`` tokens from every bucket, or from none if any is short.
+
+        Args:
+            buckets: Buckets that apply to the request
+            cost: Tokens to consume
+
+        Returns:
+            RateLimitResult for the most restrictive bucket
+        """
+        args: List = [cost]
+        for bucket in buckets:
+            args.extend([bucket.capacity, repr(bucket.refill_per_ms)])
+
+        allowed, limit, remaining, reset_ms, retry_ms = self.script(
+            keys=[bucket.key for bucket in buckets], args=args
+        )
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=int(limit),
+            remaining=int(remaining),
+            reset=math.ceil(int(reset_ms) / 1000),
+            retry_after=max(1, math.ceil(int(retry_ms) / 1000)),
+        )
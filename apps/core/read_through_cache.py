@@ -0,0 +1,220 @@
+"""
+Stampede-safe read-through caching.
+
+The decorators and helpers in apps.core.cache_utils delegate here. Values
+are stored with the time they should be refreshed (the soft TTL) and stay
+in the cache until a hard TTL, one stale window later:
+
+- Single flight: on a miss only the caller that takes a short per-key lock
+  (cache.add, a SET NX PX on Redis) computes; the others wait for its value
+- Stale-while-revalidate: once the soft TTL has passed, the lock holder
+  refreshes while every other caller is served the stale value
+- Probabilistic early expiration (XFetch): a caller may refresh a value
+  shortly before its soft TTL, the more likely the closer it is and the
+  longer the value took to compute, so hot keys do not all expire together
+- TTLs are jittered so keys written together expire apart
+- None and empty results are cached like any other value
+- An optional in-process L1 (bounded LRU, TTL of a few seconds) serves
+  ultra-hot keys without a Redis round-trip
+
+Lookups are counted per cache alias and key prefix; per-key labels would
+give Prometheus one series per tenant and argument combination.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from prometheus_client import Counter, Histogram
+
+# Defaults (overridable in settings)
+DEFAULT_LOCK_TIMEOUT = 10
+DEFAULT_TTL_JITTER = 0.1
+DEFAULT_XFETCH_BETA = 1.0
+DEFAULT_LOCAL_TTL = 2
+DEFAULT_LOCAL_SIZE = 1024
+
+# Seconds between checks while waiting for another worker's value
+WAIT_INTERVAL = 0.02
+
+LOOKUPS = Counter(
+    "read_through_cache_lookups_total",
+    "Read-through cache lookups by outcome (l1_hit, hit, miss, stale, refresh, lock_wait)",
+    ["cache", "prefix", "outcome"],
+)
+LOCK_WAIT = Histogram(
+    "read_through_cache_lock_wait_seconds",
+    "Time spent waiting for another worker to compute a missing value",
+    ["cache", "prefix"],
+)
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with its refresh time (epoch seconds, None for never)."""
+
+    value: Any
+    refresh_at: Optional[float]
+    compute_time: float
+
+
+_local_entries: "OrderedDict[Tuple[str, str], Tuple[float, CacheEntry]]" = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _local_get(key: Tuple[str, str]) -> Optional[CacheEntry]:
+    with _local_lock:
+        item = _local_entries.get(key)
+        if item is None:
+            return None
+        if item[0] <= time.monotonic():
+            del _local_entries[key]
+            return None
+        _local_entries.move_to_end(key)
+        return item[1]
+
+
+def _local_set(key: Tuple[str, str], entry: CacheEntry) -> None:
+    ttl = getattr(settings, "CACHE_LOCAL_TTL", DEFAULT_LOCAL_TTL)
+    if entry.refresh_at is not None:
+        ttl = min(ttl, entry.refresh_at - time.time())
+    if ttl <= 0:
+        return
+    size = getattr(settings, "CACHE_LOCAL_SIZE", DEFAULT_LOCAL_SIZE)
+    with _local_lock:
+        _local_entries[key] = (time.monotonic() + ttl, entry)
+        _local_entries.move_to_end(key)
+        while len(_local_entries) > size:
+            _local_entries.popitem(last=False)
+
+
+def clear_local_cache() -> None:
+    """Drop this process's L1 entries (other processes expire theirs within seconds)."""
+    with _local_lock:
+        _local_entries.clear()
+
+
+def _should_refresh(entry: CacheEntry, now: float) -> bool:
+    """XFetch: refresh early with a probability growing towards the soft TTL."""
+    if entry.refresh_at is None:
+        return False
+    beta = getattr(settings, "CACHE_XFETCH_BETA", DEFAULT_XFETCH_BETA)
+    return now - entry.compute_time * beta * math.log(1.0 - random.random()) >= entry.refresh_at
+
+
+def _read(cache, key: str) -> Optional[CacheEntry]:
+    entry = cache.get(key)
+    # Values written before entries were introduced count as misses
+    return entry if isinstance(entry, CacheEntry) else None
+
+
+def _compute_and_store(cache, key, compute, timeout, stale_timeout) -> CacheEntry:
+    start = time.monotonic()
+    value = compute()
+    compute_time = time.monotonic() - start
+
+    if timeout is None:
+        entry = CacheEntry(value, None, compute_time)
+        cache.set(key, entry, None)
+        return entry
+
+    jitter = getattr(settings, "CACHE_TTL_JITTER", DEFAULT_TTL_JITTER)
+    soft = timeout * (1 - jitter * random.random())
+    entry = CacheEntry(value, time.time() + soft, compute_time)
+    cache.set(key, entry, soft + (timeout if stale_timeout is None else stale_timeout))
+    return entry
+
+
+def _wait_for_value(cache, key, lock_key, lock_timeout, labels) -> Optional[CacheEntry]:
+    """Wait while another worker holds the lock; None once it is released without a value."""
+    LOOKUPS.labels(*labels, "lock_wait").inc()
+    start = time.monotonic()
+    try:
+        while time.monotonic() - start < lock_timeout:
+            time.sleep(WAIT_INTERVAL)
+            entry = _read(cache, key)
+            if entry is not None:
+                return entry
+            if cache.get(lock_key) is None:
+                return None
+        return None
+    finally:
+        LOCK_WAIT.labels(*labels).observe(time.monotonic() - start)
+
+
+def get_or_compute(  # noqa: C901
+    key: str,
+    compute: Callable[[], Any],
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    cache_alias: str = "default",
+    stale_timeout: Optional[float] = None,
+    local: bool = False,
+    prefix: Optional[str] = None,
+) -> Any:
+    """
+    Get a value from the cache, computing it at most once across workers.
+
+    Args:
+        key: Cache key
+        compute: Function computing the value on a miss or refresh
+        timeout: Soft TTL in seconds; None caches forever
+        cache_alias: Cache backend to use
+        stale_timeout: Seconds a value may be served stale while it is
+            refreshed (defaults to ``timeout``)
+        local: Also keep the value in the in-process L1 cache
+        prefix: Metrics label (defaults to the first segment of the key)
+
+    Returns:
+        Cached or computed value
+    """
+    cache = caches[cache_alias]
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = cache.default_timeout
+    if timeout is not None and timeout <= 0:
+        return compute()
+    labels = (cache_alias, prefix or key.split(":", 1)[0])
+
+    if local:
+        entry = _local_get((cache_alias, key))
+        if entry is not None:
+            LOOKUPS.labels(*labels, "l1_hit").inc()
+            return entry.value
+
+    lock_key = f"{key}:lock"
+    lock_timeout = getattr(settings, "CACHE_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT)
+
+    entry = _read(cache, key)
+    if entry is not None:
+        now = time.time()
+        if not _should_refresh(entry, now) or not cache.add(lock_key, 1, lock_timeout):
+            # Fresh, or another worker is refreshing it
+            stale = entry.refresh_at is not None and entry.refresh_at <= now
+            LOOKUPS.labels(*labels, "stale" if stale else "hit").inc()
+            if local and not stale:
+                _local_set((cache_alias, key), entry)
+            return entry.value
+        LOOKUPS.labels(*labels, "refresh").inc()
+    else:
+        LOOKUPS.labels(*labels, "miss").inc()
+        deadline = time.monotonic() + lock_timeout
+        while not cache.add(lock_key, 1, lock_timeout):
+            entry = _wait_for_value(cache, key, lock_key, lock_timeout, labels)
+            if entry is not None:
+                return entry.value
+            if time.monotonic() >= deadline:
+                # The lock holder is stuck; compute without the lock
+                return _compute_and_store(cache, key, compute, timeout, stale_timeout).value
+
+    try:
+        entry = _compute_and_store(cache, key, compute, timeout, stale_timeout)
+    finally:
+        cache.delete(lock_key)
+    if local:
+        _local_set((cache_alias, key), entry)
+    return entry.value
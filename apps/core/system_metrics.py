@@ -0,0 +1,648 @@
+"""
+Cluster-wide system metrics for monitoring alerts and dashboards.
+
+Metrics are collected continuously and stored in Redis, and both the alert
+rules and the monitoring dashboard read the stored series instead of probing
+whichever host happens to serve them:
+
+- Host metrics: every Celery worker starts a MetricsSampler thread that
+  samples CPU, memory and disk of its host with psutil every
+  SYSTEM_METRICS_SAMPLE_INTERVAL seconds, without blocking any task
+- Cluster metrics: collect_cluster_metrics reads the broker backlog of each
+  Celery queue with LLEN, database connection saturation with one
+  pg_stat_activity aggregation and Redis memory, and stores them under the
+  host name "cluster"
+
+Storage, in the Redis of the cache alias SYSTEM_METRICS_CACHE:
+
+- metrics:hosts: sorted set of host names scored by their last sample time
+- metrics:{host}:{metric}: sorted set of "<timestamp>:<value>" members
+  scored by timestamp, trimmed to SYSTEM_METRICS_RETENTION seconds
+- metrics:{host}:latest: JSON details of the host's last sample
+
+MetricsEvaluator loads all enabled alert rules once and evaluates each over
+an aggregate (average, p95, maximum or latest) of the samples in its window,
+per host for host metrics, using the worst host. Alerts open when a rule
+triggers and resolve only once the metric is back past the rule's clear
+threshold, so a metric hovering around the threshold does not flap.
+
+Per Requirements 7 - System Monitoring and Health Dashboard
+"""
+
+import json
+import logging
+import math
+import platform
+import threading
+import time
+from collections import defaultdict
+from statistics import fmean
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+import psutil
+import redis
+from celery import signals
+from django_redis import get_redis_connection
+
+from apps.core.alert_models import AlertRule, MonitoringAlert
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable in settings)
+DEFAULT_CACHE_ALIAS = "default"
+DEFAULT_SAMPLE_INTERVAL = 15
+DEFAULT_RETENTION = 3600
+DEFAULT_HYSTERESIS = 0.1
+
+KEY_PREFIX = "metrics"
+CLUSTER = "cluster"
+
+# Separator and priority steps of kombu's Redis transport: a message sent with
+# a priority goes to the list "<queue>\x06\x16<step>"
+PRIORITY_SEPARATOR = "\x06\x16"
+PRIORITY_STEPS = (3, 6, 9)
+
+# Alert rule metric type -> stored series
+HOST_METRICS = {
+    AlertRule.CPU_USAGE: "cpu_percent",
+    AlertRule.MEMORY_USAGE: "memory_percent",
+    AlertRule.DISK_USAGE: "disk_percent",
+}
+CLUSTER_METRICS = {
+    AlertRule.DATABASE_CONNECTIONS: "db_connections_percent",
+    AlertRule.REDIS_MEMORY: "redis_memory_percent",
+    AlertRule.CELERY_QUEUE_LENGTH: "queue_depth",
+}
+
+DB_CONNECTIONS_SQL = """
+SELECT count(*),
+       count(*) FILTER (WHERE state = 'active'),
+       count(*) FILTER (WHERE state = 'idle'),
+       count(*) FILTER (WHERE state = 'idle in transaction'),
+       current_setting('max_connections')::int
+FROM pg_stat_activity
+WHERE datname = current_database()
+"""
+
+
+def get_client():
+    """Redis client of the cache alias SYSTEM_METRICS_CACHE."""
+    return get_redis_connection(getattr(settings, "SYSTEM_METRICS_CACHE", DEFAULT_CACHE_ALIAS))
+
+
+def get_retention() -> int:
+    return getattr(settings, "SYSTEM_METRICS_RETENTION", DEFAULT_RETENTION)
+
+
+def usage_status(percent: float) -> str:
+    return "critical" if percent > 90 else "warning" if percent > 80 else "ok"
+
+
+# Window aggregation
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """q-th percentile of values, interpolating linearly between samples."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def aggregate(values: Sequence[float], aggregation: str) -> Optional[float]:
+    """
+    Combine the samples of a window.
+
+    Args:
+        values: Samples in time order
+        aggregation: One of AlertRule.AGGREGATION_CHOICES
+
+    Returns:
+        The aggregate, or None for an empty window
+    """
+    if not values:
+        return None
+    if aggregation == AlertRule.P95:
+        return percentile(values, 95)
+    if aggregation == AlertRule.MAXIMUM:
+        return max(values)
+    if aggregation == AlertRule.LATEST:
+        return values[-1]
+    return fmean(values)
+
+
+# Storage
+
+
+class MetricStore:
+    """Time series of host and cluster metrics in Redis sorted sets."""
+
+    def __init__(self, client=None, prefix: str = KEY_PREFIX):
+        self.client = client if client is not None else get_client()
+        self.prefix = prefix
+
+    def hosts_key(self) -> str:
+        return f"{self.prefix}:hosts"
+
+    def series_key(self, host: str, metric: str) -> str:
+        return f"{self.prefix}:{host}:{metric}"
+
+    def latest_key(self, host: str) -> str:
+        return f"{self.prefix}:{host}:latest"
+
+    def record(
+        self,
+        host: str,
+        values: Dict[str, float],
+        details: Optional[dict] = None,
+        timestamp: Optional[float] = None,
+    ) -> None:
+        """
+        Store one sample of a host in a single round trip.
+
+        Args:
+            host: Host name, or CLUSTER for cluster-wide metrics
+            values: Metric name -> value
+            details: JSON-serializable details shown on the dashboard
+            timestamp: Epoch seconds of the sample (now by default)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        retention = get_retention()
+        expired = timestamp - retention
+
+        pipe = self.client.pipeline(transaction=False)
+        for metric, value in values.items():
+            key = self.series_key(host, metric)
+            pipe.zadd(key, {f"{timestamp:.3f}:{float(value)}": timestamp})
+            pipe.zremrangebyscore(key, "-inf", expired)
+            pipe.expire(key, retention)
+        # A host's score only moves forward, whatever order samples arrive in
+        pipe.zadd(self.hosts_key(), {host: timestamp}, gt=True)
+        pipe.zremrangebyscore(self.hosts_key(), "-inf", expired)
+        if details is not None:
+            pipe.set(self.latest_key(host), json.dumps(details, default=str), ex=retention)
+        pipe.execute()
+
+    def hosts(self, since: float) -> List[str]:
+        """Hosts (CLUSTER excluded) that stored a sample since an epoch time."""
+        hosts = [
+            _decode(host) for host in self.client.zrangebyscore(self.hosts_key(), since, "+inf")
+        ]
+        return sorted(host for host in hosts if host != CLUSTER)
+
+    def windows(
+        self, metric: str, hosts: Sequence[str], since: float, until: float = math.inf
+    ) -> Dict[str, List[float]]:
+        """
+        Samples of a metric between two epoch times for several hosts.
+
+        Returns:
+            Host -> values in time order, for the hosts with samples
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for host in hosts:
+            pipe.zrangebyscore(
+                self.series_key(host, metric), since, "+inf" if until == math.inf else until
+            )
+        windows = {}
+        for host, members in zip(hosts, pipe.execute()):
+            values = [float(_decode(member).split(":", 1)[1]) for member in members]
+            if values:
+                windows[host] = values
+        return windows
+
+    def latest(self, hosts: Sequence[str]) -> Dict[str, dict]:
+        """Details of the last sample of several hosts."""
+        if not hosts:
+            return {}
+        raw = self.client.mget([self.latest_key(host) for host in hosts])
+        return {host: json.loads(value) for host, value in zip(hosts, raw) if value}
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+# Host sampling
+
+
+def sample_host() -> Tuple[Dict[str, float], dict]:
+    """
+    Sample CPU, memory and disk usage of this host without blocking.
+
+    CPU usage covers the time since the previous call in this process.
+
+    Returns:
+        (metric values, dashboard details)
+    """
+    cpu_percent = psutil.cpu_percent(interval=None)
+    cpu_freq = psutil.cpu_freq()
+    memory = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    disk = psutil.disk_usage("/")
+    net_io = psutil.net_io_counters()
+
+    values = {
+        "cpu_percent": cpu_percent,
+        "memory_percent": memory.percent,
+        "disk_percent": disk.percent,
+    }
+    details = {
+        "cpu": {
+            "usage_percent": round(cpu_percent, 2),
+            "count": psutil.cpu_count(),
+            "frequency_mhz": round(cpu_freq.current, 2) if cpu_freq else None,
+            "status": usage_status(cpu_percent),
+        },
+        "memory": {
+            "total_gb": round(memory.total / (1024**3), 2),
+            "used_gb": round(memory.used / (1024**3), 2),
+            "available_gb": round(memory.available / (1024**3), 2),
+            "usage_percent": round(memory.percent, 2),
+            "swap_total_gb": round(swap.total / (1024**3), 2),
+            "swap_used_gb": round(swap.used / (1024**3), 2),
+            "swap_percent": round(swap.percent, 2),
+            "status": usage_status(memory.percent),
+        },
+        "disk": {
+            "total_gb": round(disk.total / (1024**3), 2),
+            "used_gb": round(disk.used / (1024**3), 2),
+            "free_gb": round(disk.free / (1024**3), 2),
+            "usage_percent": round(disk.percent, 2),
+            "status": usage_status(disk.percent),
+        },
+        "network": {
+            "bytes_sent_mb": round(net_io.bytes_sent / (1024**2), 2),
+            "bytes_recv_mb": round(net_io.bytes_recv / (1024**2), 2),
+            "packets_sent": net_io.packets_sent,
+            "packets_recv": net_io.packets_recv,
+            "errors_in": net_io.errin,
+            "errors_out": net_io.errout,
+            "drops_in": net_io.dropin,
+            "drops_out": net_io.dropout,
+        },
+        "timestamp": timezone.now().isoformat(),
+    }
+    return values, details
+
+
+class MetricsSampler(threading.Thread):
+    """Daemon thread storing a sample of its host every interval."""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        interval: Optional[float] = None,
+        store: Optional[MetricStore] = None,
+        sampler: Callable[[], Tuple[Dict[str, float], dict]] = sample_host,
+        extra: Optional[Callable[[], dict]] = None,
+    ):
+        """
+        Args:
+            host: Name the samples are stored under (this host by default)
+            interval: Seconds between samples (SYSTEM_METRICS_SAMPLE_INTERVAL)
+            store: MetricStore to write to
+            sampler: Callable returning (metric values, details)
+            extra: Callable returning additional details, e.g. worker state
+        """
+        super().__init__(name="metrics-sampler", daemon=True)
+        self.host = host or platform.node()
+        self.interval = interval or getattr(
+            settings, "SYSTEM_METRICS_SAMPLE_INTERVAL", DEFAULT_SAMPLE_INTERVAL
+        )
+        self.store = store
+        self.sampler = sampler
+        self.extra = extra
+        self.stopped = threading.Event()
+
+    def sample_once(self) -> None:
+        values, details = self.sampler()
+        if self.extra is not None:
+            details.update(self.extra())
+        if self.store is None:
+            self.store = MetricStore()
+        self.store.record(self.host, values, details)
+
+    def run(self):
+        # The first CPU reading of a process has no reference period
+        psutil.cpu_percent(interval=None)
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.warning(f"Failed to store system metrics of {self.host}: {e}")
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+_sampler: Optional[MetricsSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def start_sampler(**kwargs) -> MetricsSampler:
+    """Start this process's sampler thread, once."""
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None or not _sampler.is_alive():
+            _sampler = MetricsSampler(**kwargs)
+            _sampler.start()
+        return _sampler
+
+
+@signals.worker_ready.connect
+def start_worker_sampler(sender=None, **kwargs):
+    """Sample every worker's host from its main process."""
+    if not getattr(settings, "SYSTEM_METRICS_SAMPLER_ENABLED", True):
+        return
+
+    controller = getattr(sender, "controller", None)
+    worker_name = getattr(sender, "hostname", None) or platform.node()
+
+    def worker_details():
+        from celery.worker import state
+
+        return {
+            "worker": {
+                "name": worker_name,
+                "pool": getattr(getattr(controller, "pool_cls", None), "__name__", "Unknown"),
+                "max_concurrency": getattr(controller, "concurrency", 0),
+                "active_tasks": len(state.active_requests),
+            }
+        }
+
+    start_sampler(extra=worker_details)
+    logger.info(f"System metrics sampler started for {worker_name}")
+
+
+def reporting_hosts(store: Optional[MetricStore] = None) -> Dict[str, dict]:
+    """Details of the last sample of each host that sampled in the last three intervals."""
+    store = store or MetricStore()
+    interval = getattr(settings, "SYSTEM_METRICS_SAMPLE_INTERVAL", DEFAULT_SAMPLE_INTERVAL)
+    return store.latest(store.hosts(time.time() - 3 * interval))
+
+
+# Cluster metrics
+
+
+def celery_queues() -> List[str]:
+    """Names of the queues tasks are routed to."""
+    from config.celery import app
+
+    queues = {app.conf.task_default_queue or "celery"}
+    for route in (app.conf.task_routes or {}).values():
+        if isinstance(route, dict) and route.get("queue"):
+            queues.add(route["queue"])
+    for entry in (app.conf.beat_schedule or {}).values():
+        queue = entry.get("options", {}).get("queue")
+        if queue:
+            queues.add(queue)
+    return sorted(queues)
+
+
+_broker_client = None
+
+
+def get_broker_client():
+    """Redis client of the Celery broker, None when the broker is not Redis."""
+    global _broker_client
+    if _broker_client is None:
+        url = getattr(settings, "CELERY_BROKER_URL", "") or ""
+        if not url.startswith(("redis://", "rediss://", "unix://")):
+            return None
+        _broker_client = redis.Redis.from_url(url)
+    return _broker_client
+
+
+def queue_depths(client, queues: Sequence[str]) -> Dict[str, int]:
+    """
+    Messages waiting in each queue of a Redis broker, read with LLEN.
+
+    Counts the lists of every priority step of a queue in one round trip.
+    """
+    pipe = client.pipeline(transaction=False)
+    for queue in queues:
+        pipe.llen(queue)
+        for step in PRIORITY_STEPS:
+            pipe.llen(f"{queue}{PRIORITY_SEPARATOR}{step}")
+    lengths = iter(pipe.execute())
+    return {queue: sum(next(lengths) for _ in range(len(PRIORITY_STEPS) + 1)) for queue in queues}
+
+
+def database_connections() -> dict:
+    """Connection usage of the database, from one pg_stat_activity aggregation."""
+    with connection.cursor() as cursor:
+        cursor.execute(DB_CONNECTIONS_SQL)
+        total, active, idle, idle_in_transaction, max_connections = cursor.fetchone()
+    usage_percent = round(total / max_connections * 100, 2) if max_connections > 0 else 0
+    return {
+        "total": total,
+        "active": active,
+        "idle": idle,
+        "idle_in_transaction": idle_in_transaction,
+        "max_connections": max_connections,
+        "usage_percent": usage_percent,
+        "status": usage_status(usage_percent),
+    }
+
+
+def collect_cluster_metrics(
+    store: Optional[MetricStore] = None, broker=None, queues: Optional[Sequence[str]] = None
+) -> Dict[str, float]:
+    """
+    Store one sample of the cluster-wide metrics.
+
+    Each probe fails independently; the others are still stored.
+
+    Returns:
+        The stored metric values
+    """
+    store = store or MetricStore()
+    values = {}
+    details = {"timestamp": timezone.now().isoformat()}
+
+    try:
+        broker = broker if broker is not None else get_broker_client()
+        if broker is not None:
+            depths = queue_depths(broker, queues if queues is not None else celery_queues())
+            values["queue_depth"] = sum(depths.values())
+            details["queues"] = depths
+    except Exception as e:
+        logger.error(f"Error reading Celery queue depths: {str(e)}")
+
+    try:
+        db = database_connections()
+        values["db_connections_percent"] = db["usage_percent"]
+        details["database"] = db
+    except Exception as e:
+        logger.error(f"Error checking database connections: {str(e)}")
+
+    try:
+        info = store.client.info("memory")
+        used_memory, max_memory = info.get("used_memory", 0), info.get("maxmemory", 0)
+        if max_memory > 0:
+            values["redis_memory_percent"] = used_memory / max_memory * 100
+    except Exception as e:
+        logger.error(f"Error checking Redis memory: {str(e)}")
+
+    store.record(CLUSTER, values, details)
+    return values
+
+
+# Alert rule evaluation
+
+
+def clear_threshold(rule: AlertRule) -> Optional[float]:
+    """Value a firing rule's metric must get back to for its alerts to resolve."""
+    if rule.clear_threshold is not None:
+        return rule.clear_threshold
+    band = abs(rule.threshold) * getattr(settings, "SYSTEM_METRICS_HYSTERESIS", DEFAULT_HYSTERESIS)
+    if rule.operator == AlertRule.GREATER_THAN:
+        return rule.threshold - band
+    if rule.operator == AlertRule.LESS_THAN:
+        return rule.threshold + band
+    return None
+
+
+def is_cleared(rule: AlertRule, value: float) -> bool:
+    """Whether a firing rule's metric is back to normal, past the hysteresis band."""
+    clear = clear_threshold(rule)
+    if rule.operator == AlertRule.GREATER_THAN:
+        return value <= clear
+    if rule.operator == AlertRule.LESS_THAN:
+        return value >= clear
+    return not rule.should_trigger(value)
+
+
+class MetricsEvaluator:
+    """Evaluate all enabled alert rules against the stored metric series."""
+
+    def __init__(self, store: Optional[MetricStore] = None, now: Optional[float] = None):
+        self.store = store or MetricStore()
+        self.now = time.time() if now is None else now
+        self._windows = {}
+        self._hosts = {}
+        self.resolved = 0
+
+    def hosts(self, since: float) -> List[str]:
+        if since not in self._hosts:
+            self._hosts[since] = self.store.hosts(since)
+        return self._hosts[since]
+
+    def window(self, metric_type: str, minutes: int) -> Dict[str, List[float]]:
+        """Samples of a rule metric in the last minutes, per host; fetched once per run."""
+        key = (metric_type, minutes)
+        if key not in self._windows:
+            since = self.now - minutes * 60
+            if metric_type in HOST_METRICS:
+                self._windows[key] = self.store.windows(
+                    HOST_METRICS[metric_type], self.hosts(since), since, self.now
+                )
+            else:
+                self._windows[key] = self.store.windows(
+                    CLUSTER_METRICS[metric_type], [CLUSTER], since, self.now
+                )
+        return self._windows[key]
+
+    def reading(self, rule: AlertRule) -> Optional[Tuple[float, str]]:
+        """
+        Aggregate of a rule's window for the worst host.
+
+        Returns:
+            (value, host), or None when no samples were stored in the window
+        """
+        readings = [
+            (aggregate(values, rule.aggregation), host)
+            for host, values in self.window(rule.metric_type, rule.window_minutes).items()
+        ]
+        if not readings:
+            return None
+        if rule.operator == AlertRule.LESS_THAN:
+            return min(readings)
+        return max(readings)
+
+    def run(self, trigger: bool = True) -> List[MonitoringAlert]:  # noqa: C901
+        """
+        Open alerts for rules that trigger and resolve those that cleared.
+
+        Args:
+            trigger: Whether to open new alerts, or only resolve
+
+        Returns:
+            The created alerts
+        """
+        from apps.core.alert_service import AlertService
+
+        rules = list(
+            AlertRule.objects.filter(
+                is_enabled=True, metric_type__in=[*HOST_METRICS, *CLUSTER_METRICS]
+            )
+        )
+        if not rules:
+            return []
+
+        open_alerts = defaultdict(list)
+        for alert in MonitoringAlert.objects.filter(alert_rule__in=rules).exclude(
+            status=MonitoringAlert.RESOLVED
+        ):
+            open_alerts[alert.alert_rule_id].append(alert.id)
+        last_alerts = dict(
+            MonitoringAlert.objects.filter(alert_rule__in=rules)
+            .values_list("alert_rule")
+            .annotate(last=Max("created_at"))
+        )
+
+        now = timezone.now()
+        created, cleared = [], {}
+        for rule in rules:
+            reading = self.reading(rule)
+            if reading is None:
+                continue
+            value, host = reading
+
+            if open_alerts[rule.id]:
+                # Between the thresholds a firing rule keeps firing
+                if is_cleared(rule, value):
+                    cleared[rule] = (value, open_alerts[rule.id])
+            elif trigger and rule.should_trigger(value):
+                last = last_alerts.get(rule.id)
+                if (
+                    rule.cooldown_minutes
+                    and last
+                    and now - last < timezone.timedelta(minutes=rule.cooldown_minutes)
+                ):
+                    continue
+                message = AlertService._generate_alert_message(rule, value)
+                if host != CLUSTER:
+                    message += f" on {host}"
+                created.append(
+                    MonitoringAlert(
+                        alert_rule=rule,
+                        message=message,
+                        current_value=value,
+                        threshold_value=rule.threshold,
+                        status=MonitoringAlert.ACTIVE,
+                    )
+                )
+
+        for rule, (value, alert_ids) in cleared.items():
+            self.resolved += MonitoringAlert.objects.filter(id__in=alert_ids).update(
+                status=MonitoringAlert.RESOLVED,
+                resolved_at=now,
+                resolution_notes=(
+                    f"Auto-resolved: {rule.get_metric_type_display()} back to {value:.2f}"
+                ),
+                updated_at=now,
+            )
+
+        if created:
+            MonitoringAlert.objects.bulk_create(created)
+            for alert in created:
+                AlertService.send_alert_notifications(alert)
+                logger.info(f"Alert created: {alert.id} - {alert.alert_rule.name}")
+        return created
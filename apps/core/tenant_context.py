@@ -10,7 +10,7 @@ from contextlib import contextmanager
 from typing import Optional
 from uuid import UUID
 
-from django.db import connection
+from django.db import DEFAULT_DB_ALIAS, connection, connections
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +43,34 @@ def set_tenant_context(tenant_id: Optional[UUID]) -> None:
             logger.debug(f"Set tenant context to: {tenant_id}")
 
 
+def set_session_context(
+    tenant_id: Optional[UUID], bypass: bool = False, using: str = DEFAULT_DB_ALIAS
+) -> None:
+    """
+    Set the tenant context and RLS bypass flag in a single statement.
+
+    Used once per request by TenantContextMiddleware, replacing separate
+    clear, set and bypass round-trips, and by apps.core.db_routing to carry
+    the context over to replica connections.
+
+    Args:
+        tenant_id: UUID of the tenant to set as context, or None to clear it
+        bypass: Whether RLS bypass should be enabled
+        using: Database alias of the connection to set it on
+
+    Requirements: Requirement 1 - Multi-Tenant Architecture with Data Isolation
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('app.current_tenant', %s, false), "
+            "set_config('app.bypass_rls', %s, false);",
+            [str(tenant_id) if tenant_id else None, "true" if bypass else "false"],
+        )
+    if bypass:
+        logger.warning("RLS bypass enabled - all tenant data is now accessible")
+    logger.debug(f"Session context set on {using}: tenant={tenant_id}, bypass={bypass}")
+
+
 def get_current_tenant() -> Optional[UUID]:
     """
     Get the current tenant ID from the database session.
@@ -202,6 +230,5 @@ def clear_tenant_context() -> None:
         >>> from apps.core.tenant_context import clear_tenant_context
         >>> clear_tenant_context()
     """
-    set_tenant_context(None)
-    disable_rls_bypass()
+    set_session_context(None)
     logger.debug("Tenant context cleared")
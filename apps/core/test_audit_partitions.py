@@ -0,0 +1,388 @@
+"""
+Tests for partitioned audit log storage and the audit log explorer queries.
+Per Requirement 8 - Audit Logging
+
+Checks the monthly partitions and their maintenance, partition-dropping
+retention, keyset pagination, full-text search, estimated counts and the
+uncapped streaming export, and benchmarks deep pages and retention on a
+few hundred thousand generated rows.
+"""
+
+import csv
+import io
+import json
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.audit_models import APIRequestLog, AuditLog
+from apps.core.audit_partitions import (
+    add_months,
+    apply_retention,
+    drop_partitions_before,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    partition_name,
+)
+from apps.core.audit_queries import (
+    encode_cursor,
+    estimated_count,
+    filter_audit_logs,
+    keyset_page,
+)
+from apps.core.audit_views import (
+    APIRequestLogExplorerView,
+    AuditLogExplorerView,
+    AuditLogExportView,
+)
+
+User = get_user_model()
+
+
+def generate_audit_logs(count, start, step="1 minute", description="Generated event"):
+    """Insert `count` audit logs, `step` apart from `start`, in one statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO audit_logs (id, category, action, severity, description, user_agent, "
+            "request_method, request_path, request_query_params, timestamp) "
+            "SELECT gen_random_uuid(), 'USER', 'UPDATE', 'INFO', %s || ' ' || n, '', 'GET', "
+            "'/api/items/' || n, '', %s + (n * %s::interval) FROM generate_series(1, %s) n",
+            [description, start, step, count],
+        )
+
+
+def partition_of(log):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT tableoid::regclass::text FROM audit_logs WHERE id = %s", [log.pk])
+        return cursor.fetchone()[0]
+
+
+class AuditLogPartitionTestCase(TestCase):
+    """Test the monthly partitions and partition maintenance."""
+
+    def setUp(self):
+        """Set up a month well after any partition created by the migration."""
+        self.future = add_months(month_start(timezone.now()), 24)
+
+    def test_tables_are_partitioned(self):
+        for table in ["audit_logs", "api_request_logs"]:
+            assert is_partitioned(table)
+            partitions = list_partitions(table)
+
+            assert partitions[0].name == f"{table}_history"
+            assert partitions[0].lower is None
+            assert partitions[-1].is_default
+            for previous, partition in zip(partitions, partitions[1:-1]):
+                assert partition.lower == previous.upper
+
+    def test_log_rows_land_in_monthly_partitions(self):
+        log = AuditLog.objects.create(category="USER", action="UPDATE", description="Recent")
+        api_log = APIRequestLog.objects.create(
+            method="GET",
+            path="/api/items/",
+            status_code=200,
+            response_time_ms=5,
+            ip_address="127.0.0.1",
+        )
+
+        assert partition_of(log).startswith("audit_logs_")
+        assert AuditLog.objects.get(pk=log.pk) == log
+        assert APIRequestLog.objects.filter(pk=api_log.pk).exists()
+
+    def test_ensure_partitions_moves_default_rows(self):
+        log = AuditLog.objects.create(category="USER", action="UPDATE", description="Future")
+        AuditLog.objects.filter(pk=log.pk).update(timestamp=self.future + timedelta(days=3))
+        assert partition_of(log) == "audit_logs_default"
+
+        created = ensure_partitions(months_ahead=1, now=self.future)
+
+        assert partition_name("audit_logs", self.future) in created["audit_logs"]
+        assert len(created["api_request_logs"]) == 2
+        assert partition_of(log) == partition_name("audit_logs", self.future)
+        assert ensure_partitions(months_ahead=1, now=self.future) == {
+            "audit_logs": [],
+            "api_request_logs": [],
+        }
+
+    def test_retention_drops_whole_partitions(self):
+        ensure_partitions(months_ahead=2, now=self.future)
+        generate_audit_logs(100, self.future, step="12 hours")
+        kept = AuditLog.objects.create(category="USER", action="UPDATE", description="Kept")
+        AuditLog.objects.filter(pk=kept.pk).update(timestamp=add_months(self.future, 2))
+        total_before = AuditLog.objects.count()
+
+        # The cutoff falls inside the second month: the first is dropped,
+        # the rest of the rows before the cutoff are deleted
+        cutoff = add_months(self.future, 1) + timedelta(days=10)
+        removed = apply_retention(AuditLog, cutoff)
+
+        names = [partition.name for partition in list_partitions("audit_logs")]
+        assert partition_name("audit_logs", self.future) not in names
+        assert "audit_logs_history" not in names
+        assert partition_name("audit_logs", add_months(self.future, 1)) in names
+        assert removed == total_before - AuditLog.objects.count()
+        assert not AuditLog.objects.filter(timestamp__lt=cutoff).exists()
+        assert list(AuditLog.objects.all()) != []
+        assert AuditLog.objects.filter(pk=kept.pk).exists()
+
+
+class AuditLogQueryTestCase(TestCase):
+    """Test search, pagination and counts in the audit log explorer."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_user(
+            username="auditadmin",
+            email="auditadmin@example.com",
+            password="admin123",
+            role="PLATFORM_ADMIN",
+        )
+        AuditLog.objects.all().delete()
+        generate_audit_logs(237, timezone.now() - timedelta(days=2))
+        # Rows sharing a timestamp are ordered by id
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE audit_logs SET timestamp = date_trunc('hour', timestamp) "
+                "WHERE description LIKE 'Generated event 1%%'"
+            )
+        self.factory = RequestFactory()
+
+    def test_keyset_pages_match_offset_ordering(self):
+        queryset = AuditLog.objects.all()
+        expected = list(queryset.order_by("-timestamp", "-pk").values_list("pk", flat=True))
+
+        seen = []
+        pages = []
+        page = keyset_page(queryset, 50)
+        while True:
+            pages.append(page)
+            seen.extend(log.pk for log in page)
+            if not page.has_next:
+                break
+            page = keyset_page(queryset, 50, after=page.next_cursor)
+
+        assert seen == expected
+        assert [len(page) for page in pages] == [50, 50, 50, 50, 37]
+        assert not pages[0].has_previous
+
+        # Walking back returns the same pages
+        previous = keyset_page(queryset, 50, before=pages[3].previous_cursor)
+        assert [log.pk for log in previous] == [log.pk for log in pages[2]]
+        assert previous.has_previous
+        first = keyset_page(queryset, 50, before=pages[1].previous_cursor)
+        assert [log.pk for log in first] == [log.pk for log in pages[0]]
+        assert not first.has_previous
+
+    def test_invalid_cursor_returns_first_page(self):
+        page = keyset_page(AuditLog.objects.all(), 50, after="not-a-cursor")
+        assert not page.has_previous
+        assert len(page) == 50
+
+    def test_search(self):
+        log = AuditLog.objects.create(
+            category="SECURITY",
+            action="SECURITY_BREACH",
+            description="Suspicious refund burst detected",
+            ip_address="203.0.113.7",
+            request_path="/api/refunds/bulk",
+            user=self.admin,
+        )
+
+        def search(q):
+            return set(filter_audit_logs(AuditLog.objects.all(), {"q": q}))
+
+        assert search("suspic") == {log}
+        assert search("refund burst") == {log}
+        assert search("/api/refunds") == {log}
+        assert search("203.0.113.7") == {log}
+        assert search("auditadm") == {log}
+        assert len(search("Generated")) == 237
+        assert search("nothing matches this") == set()
+
+    def test_search_uses_full_text_index(self):
+        queryset = filter_audit_logs(AuditLog.objects.all(), {"q": "suspicious"})
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        assert "Bitmap Index Scan on audit_logs_history_to_tsvector_idx" in plan
+
+    def test_estimated_count(self):
+        assert estimated_count(AuditLog.objects.all()) == (237, False)
+        assert estimated_count(AuditLog.objects.filter(description="x")) == (0, False)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE audit_logs")
+        with override_settings(AUDIT_EXACT_COUNT_THRESHOLD=10):
+            count, is_estimate = estimated_count(AuditLog.objects.all())
+        assert is_estimate
+        assert 150 < count < 350
+
+    def test_explorer_view_paginates_by_cursor(self):
+        request = self.factory.get("/platform/audit/", {"category": "USER"})
+        request.user = self.admin
+        response = AuditLogExplorerView.as_view()(request)
+
+        context = response.context_data
+        assert context["is_paginated"]
+        assert len(context["audit_logs"]) == 50
+        assert context["total_count"] == 237
+        assert not context["count_is_estimate"]
+        assert context["category_counts"]["USER"] == 237
+        assert context["filter_query"] == "category=USER"
+
+        request = self.factory.get(
+            "/platform/audit/", {"category": "USER", "after": context["page_obj"].next_cursor}
+        )
+        request.user = self.admin
+        second = AuditLogExplorerView.as_view()(request).context_data["audit_logs"]
+        assert not {log.pk for log in second} & {log.pk for log in context["audit_logs"]}
+        assert context["filter_query"] == "category=USER"
+
+    def test_api_explorer_filters_by_path_prefix(self):
+        APIRequestLog.objects.create(
+            method="GET",
+            path="/api/inventory/items/",
+            status_code=200,
+            response_time_ms=5,
+            ip_address="127.0.0.1",
+        )
+        APIRequestLog.objects.create(
+            method="GET",
+            path="/api/sales/inventory/",
+            status_code=500,
+            response_time_ms=5,
+            ip_address="127.0.0.1",
+        )
+        request = self.factory.get("/platform/audit/api-requests/", {"path": "/api/inventory"})
+        request.user = self.admin
+        context = APIRequestLogExplorerView.as_view()(request).context_data
+
+        assert [log.path for log in context["api_requests"]] == ["/api/inventory/items/"]
+        assert context["total_count"] == 1
+        assert context["error_count"] == 0
+
+
+class AuditLogExportTestCase(TestCase):
+    """Test the streaming audit log export."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_user(
+            username="exportadmin",
+            email="exportadmin@example.com",
+            password="admin123",
+            role="PLATFORM_ADMIN",
+        )
+        AuditLog.objects.all().delete()
+        generate_audit_logs(12000, timezone.now() - timedelta(days=20))
+
+    def export(self, **params):
+        request = RequestFactory().get("/platform/audit/export/", params)
+        request.user = self.admin
+        response = AuditLogExportView.as_view()(request)
+        with CaptureQueriesContext(connection) as queries:
+            content = b"".join(response.streaming_content).decode()
+        return response, content, len(queries)
+
+    def test_csv_export_is_not_capped(self):
+        response, content, query_count = self.export(category="USER")
+
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv"
+        rows = list(csv.reader(io.StringIO(content)))
+        assert rows[0][0] == "Timestamp"
+        assert len(rows) == 12001
+        # One server-side cursor, however many rows
+        assert query_count < 10
+
+    def test_jsonl_export(self):
+        response, content, _ = self.export(format="jsonl", q="Generated")
+
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert 'filename="audit_logs_' in response["Content-Disposition"]
+        lines = content.splitlines()
+        assert len(lines) == 12000
+        assert json.loads(lines[0])["Category"] == "User Activity"
+
+
+@override_settings(AUDIT_EXACT_COUNT_THRESHOLD=10000)
+class AuditLogBenchmarkTestCase(TestCase):
+    """Benchmark deep pages and retention on generated rows."""
+
+    rows = 300000
+
+    def setUp(self):
+        """Fill a month (and some of the next) well ahead of the current data."""
+        self.start = add_months(month_start(timezone.now()), 36)
+        ensure_partitions(months_ahead=2, now=self.start)
+        generate_audit_logs(self.rows, self.start, step="10 seconds")
+        with connection.cursor() as cursor:
+            # Run the inserts' deferred foreign key checks now, not inside a timing
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+            cursor.execute("ANALYZE audit_logs")
+
+    def timed(self, function, repeat=5):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def test_deep_keyset_page_costs_the_same_as_the_first(self):
+        queryset = AuditLog.objects.all()
+        deep_row = queryset.order_by("-timestamp", "-pk")[self.rows - 1000]
+        deep_cursor = encode_cursor(deep_row.timestamp, deep_row.pk)
+
+        first_page = self.timed(lambda: keyset_page(queryset, 50))
+        deep_page = self.timed(lambda: keyset_page(queryset, 50, after=deep_cursor))
+        deep_offset = self.timed(
+            lambda: list(queryset.order_by("-timestamp", "-pk")[self.rows - 1000 :][:50])
+        )
+
+        assert len(keyset_page(queryset, 50, after=deep_cursor)) == 50
+        assert deep_page < first_page * 3 + 0.005
+        assert deep_page < deep_offset
+
+    def test_estimated_total_avoids_full_count(self):
+        count, is_estimate = estimated_count(AuditLog.objects.all())
+
+        assert is_estimate
+        assert abs(count - self.rows) < self.rows * 0.2
+
+    def test_dropping_a_partition_beats_deleting_its_rows(self):
+        drop_partitions_before("audit_logs", self.start)
+        month = partition_name("audit_logs", self.start)
+
+        class RollBack(Exception):
+            pass
+
+        start = time.perf_counter()
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM "{month}"')
+                deleted = cursor.rowcount
+                raise RollBack
+        except RollBack:
+            pass
+        delete_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        removed = apply_retention(AuditLog, add_months(self.start, 1))
+        drop_time = time.perf_counter() - start
+
+        assert deleted == removed > 250000
+        assert month not in [p.name for p in list_partitions("audit_logs")]
+        assert AuditLog.objects.count() == self.rows - removed
+        assert drop_time * 2 < delete_time
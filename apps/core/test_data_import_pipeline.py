@@ -0,0 +1,384 @@
+"""
+Tests for the streaming data import pipeline.
+
+Generated 100k-row files check that queries stay bounded per chunk and that
+memory does not grow with the file; smaller files with bad rows check that
+results and error reporting match the row-by-row importer.
+
+Implements Requirement 20: Settings and Configuration
+"""
+
+import csv
+import math
+import os
+import re
+import tempfile
+import tracemalloc
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+import openpyxl
+
+from apps.core.data_import_pipeline import InventoryChunkWriter
+from apps.core.data_services import DataImportService
+from apps.core.models import Branch, Tenant
+from apps.core.tenant_context import bypass_rls
+from apps.inventory.models import InventoryItem, ProductCategory
+
+User = get_user_model()
+
+HEADERS = [
+    "SKU",
+    "Name",
+    "Category",
+    "Karat",
+    "Weight (grams)",
+    "Cost Price",
+    "Selling Price",
+    "Quantity",
+    "Serial Number",
+    "Lot Number",
+]
+CATEGORIES = ["Rings", "Necklaces", "Bracelets", "Earrings"]
+CHUNK_SIZE = 2000
+LARGE_FILE_ROWS = 100000
+
+
+def generate_row(index):
+    """A valid inventory row; the same index always gives the same row."""
+    return [
+        f"SKU-{index:06d}",
+        f"Item {index}",
+        CATEGORIES[index % len(CATEGORIES)],
+        str([14, 18, 22, 24][index % 4]),
+        f"{1 + index % 50}.{index % 100:02d}",
+        f"{100 + index % 900}.00",
+        f"{150 + index % 1200}.50",
+        str(index % 20),
+        f"SN-{index}" if index % 10 == 0 else "",
+        f"LOT-{index % 7}" if index % 3 == 0 else "",
+    ]
+
+
+def generate_rows(count, bad_rows=True):
+    """
+    Generate rows; with bad_rows, some rows have invalid numbers and one
+    SKU is repeated with different values.
+    """
+    for index in range(count):
+        row = generate_row(index)
+        if bad_rows:
+            if index % 37 == 5:
+                row[3] = "abc"  # Karat
+            elif index % 53 == 7:
+                row[5] = "12,5"  # Cost Price
+            elif index % 71 == 3:
+                row[7] = ""  # Quantity
+            elif index % 89 == 11:
+                row[2] = ""  # Category
+            elif index == count - 1:
+                row[0] = "SKU-000010"  # Repeats an earlier SKU
+                row[1] = "Repeated item"
+        yield row
+
+
+def write_csv(rows):
+    handle = tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False, newline="")
+    with handle:
+        writer = csv.writer(handle)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+    return handle.name
+
+
+def legacy_import_inventory(tenant, file_path, update_existing):
+    """
+    The original row-by-row inventory importer, kept here as the reference
+    the pipeline must agree with. Each row runs in its own savepoint so a
+    database error (an empty category) fails that row only.
+
+    Returns:
+        list: "Row N: error" for each failed row
+    """
+    errors = []
+    with open(file_path, "r", encoding="utf-8") as csvfile:
+        data = list(csv.DictReader(csvfile))
+
+    for i, row in enumerate(data):
+        try:
+            with transaction.atomic():
+                category_name = row.get("Category", "").strip()
+                category = None
+                if category_name:
+                    category, _ = ProductCategory.objects.get_or_create(
+                        tenant=tenant, name=category_name
+                    )
+
+                branch = Branch.objects.filter(tenant=tenant).first()
+                if not branch:
+                    raise ValueError("No branch found for tenant")
+
+                item_data = {
+                    "tenant": tenant,
+                    "sku": row["SKU"].strip(),
+                    "name": row["Name"].strip(),
+                    "category": category,
+                    "karat": int(float(row["Karat"])),
+                    "weight_grams": Decimal(row["Weight (grams)"]),
+                    "cost_price": Decimal(row["Cost Price"]),
+                    "selling_price": Decimal(row["Selling Price"]),
+                    "quantity": int(float(row["Quantity"])),
+                    "branch": branch,
+                    "serial_number": row.get("Serial Number", "").strip() or None,
+                    "lot_number": row.get("Lot Number", "").strip() or None,
+                }
+
+                if update_existing:
+                    InventoryItem.objects.update_or_create(
+                        tenant=tenant, sku=item_data["sku"], defaults=item_data
+                    )
+                else:
+                    if InventoryItem.objects.filter(tenant=tenant, sku=item_data["sku"]).exists():
+                        raise ValueError(f"SKU {item_data['sku']} already exists")
+
+                    InventoryItem.objects.create(**item_data)
+
+        except Exception as e:
+            errors.append(f"Row {i + 2}: {str(e)}")
+
+    return errors
+
+
+def row_numbers(errors):
+    return sorted({int(re.match(r"Row (\d+):", error).group(1)) for error in errors})
+
+
+class DataImportPipelineTests(TestCase):
+    """Test the chunked inventory import pipeline."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.files = []
+        self.tenant = self._tenant("pipeline-shop")
+        with bypass_rls():
+            self.user = User.objects.create_user(
+                username="pipelineuser",
+                password="testpass",
+                tenant=self.tenant,
+                role=User.TENANT_OWNER,
+            )
+
+    def tearDown(self):
+        for file_path in self.files:
+            os.unlink(file_path)
+
+    def _tenant(self, slug):
+        """A tenant with a branch, a category and a few existing items."""
+        with bypass_rls():
+            tenant = Tenant.objects.create(company_name=f"Shop {slug}", slug=slug)
+            branch = Branch.objects.create(tenant=tenant, name="Main Branch")
+            rings = ProductCategory.objects.create(tenant=tenant, name="Rings")
+            for index in range(20, 25):
+                InventoryItem.objects.create(
+                    tenant=tenant,
+                    sku=f"SKU-{index:06d}",
+                    name=f"Existing {index}",
+                    category=rings,
+                    karat=18,
+                    weight_grams=Decimal("5.00"),
+                    cost_price=Decimal("100.00"),
+                    selling_price=Decimal("130.00"),
+                    quantity=1,
+                    branch=branch,
+                )
+        return tenant
+
+    def _file(self, rows):
+        file_path = write_csv(rows)
+        self.files.append(file_path)
+        return file_path
+
+    def _snapshot(self, tenant):
+        return {
+            item.sku: (
+                item.name,
+                item.category.name if item.category else None,
+                item.karat,
+                item.weight_grams,
+                item.cost_price,
+                item.selling_price,
+                item.quantity,
+                item.serial_number,
+                item.lot_number,
+                item.markup_percentage,
+            )
+            for item in InventoryItem.objects.filter(tenant=tenant).select_related("category")
+        }
+
+    def _assert_parity(self, update_existing):
+        file_path = self._file(generate_rows(400))
+        legacy_tenant = self._tenant(f"legacy-{int(update_existing)}")
+        legacy_errors = legacy_import_inventory(legacy_tenant, file_path, update_existing)
+
+        activity = DataImportService(self.tenant).import_data(
+            "inventory", file_path, user=self.user, update_existing=update_existing
+        )
+
+        errors = activity.error_details["import_errors"]
+        self.assertEqual(activity.status, "COMPLETED")
+        self.assertEqual(self._snapshot(self.tenant), self._snapshot(legacy_tenant))
+        self.assertEqual(row_numbers(errors), row_numbers(legacy_errors))
+        self.assertEqual(
+            [error for error in errors if "already exists" in error],
+            [error for error in legacy_errors if "already exists" in error],
+        )
+        self.assertEqual(activity.records_processed, 400)
+        self.assertEqual(activity.records_failed, len(row_numbers(legacy_errors)))
+        self.assertEqual(
+            set(ProductCategory.objects.filter(tenant=self.tenant).values_list("name", flat=True)),
+            set(
+                ProductCategory.objects.filter(tenant=legacy_tenant).values_list("name", flat=True)
+            ),
+        )
+
+    def test_parity_with_row_by_row_importer(self):
+        self._assert_parity(update_existing=False)
+
+    def test_parity_with_row_by_row_importer_updating(self):
+        self._assert_parity(update_existing=True)
+
+    @override_settings(DATA_IMPORT_COPY_THRESHOLD=0)
+    def test_parity_with_row_by_row_importer_using_copy(self):
+        self._assert_parity(update_existing=False)
+
+    @override_settings(DATA_IMPORT_COPY_THRESHOLD=0)
+    def test_parity_with_row_by_row_importer_updating_using_copy(self):
+        self._assert_parity(update_existing=True)
+
+    def test_bad_rows_reported_without_aborting(self):
+        rows = [generate_row(index) for index in range(5)]
+        rows[1][0] = ""
+        rows[2][3] = "twenty"
+        rows[2][5] = "1e20"
+        rows[3][1] = "x" * 300
+        file_path = self._file(rows)
+
+        activity = DataImportService(self.tenant).import_data("inventory", file_path)
+
+        self.assertEqual(activity.status, "COMPLETED")
+        self.assertEqual(activity.records_successful, 2)
+        self.assertEqual(
+            activity.error_details["import_errors"],
+            [
+                "Row 3: SKU is required",
+                "Row 4: Karat must be a number",
+                "Row 4: Cost Price is out of range",
+                "Row 5: Name is longer than 255 characters",
+            ],
+        )
+
+    def test_missing_headers_fail_validation(self):
+        file_path = self._file([])
+        with open(file_path, "w") as handle:
+            handle.write("SKU,Name\nSKU-1,Ring\n")
+
+        activity = DataImportService(self.tenant).import_data("inventory", file_path)
+
+        self.assertEqual(activity.status, "FAILED")
+        self.assertIn("Missing required fields", activity.error_details["validation_errors"][0])
+
+    @override_settings(DATA_IMPORT_CHUNK_SIZE=100)
+    def test_resumes_after_last_committed_chunk(self):
+        file_path = self._file(generate_rows(1000, bad_rows=False))
+        service = DataImportService(self.tenant)
+        activity = service.create_import_activity("inventory", file_path)
+
+        original_write = InventoryChunkWriter.write
+        calls = []
+
+        def fail_on_fourth_chunk(writer, valid_rows):
+            calls.append(len(valid_rows))
+            if len(calls) == 4:
+                raise RuntimeError("Worker lost")
+            return original_write(writer, valid_rows)
+
+        with patch.object(InventoryChunkWriter, "write", fail_on_fourth_chunk):
+            with self.assertRaises(RuntimeError):
+                service.run_import(activity)
+
+        activity.refresh_from_db()
+        self.assertEqual(activity.status, "FAILED")
+        self.assertEqual(activity.last_committed_row, 300)
+        self.assertEqual(activity.records_successful, 295)  # 5 SKUs already existed
+
+        service.run_import(activity)
+
+        activity.refresh_from_db()
+        self.assertEqual(activity.status, "COMPLETED")
+        self.assertEqual(activity.records_processed, 1000)
+        self.assertEqual(activity.records_successful, 995)
+        self.assertEqual(len(activity.error_details["import_errors"]), 5)
+        self.assertEqual(InventoryItem.objects.filter(tenant=self.tenant).count(), 1000)
+
+    def test_excel_files_are_streamed(self):
+        workbook = openpyxl.Workbook()
+        worksheet = workbook.active
+        worksheet.append(HEADERS)
+        for index in range(30):
+            worksheet.append(generate_row(index))
+        worksheet.append([None] * len(HEADERS))  # Empty rows are skipped
+        file_path = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False).name
+        self.files.append(file_path)
+        workbook.save(file_path)
+
+        activity = DataImportService(self.tenant).import_data(
+            "inventory", file_path, update_existing=True
+        )
+
+        self.assertEqual(activity.records_processed, 30)
+        self.assertEqual(activity.records_successful, 30)
+        self.assertEqual(InventoryItem.objects.filter(tenant=self.tenant).count(), 30)
+
+    def _assert_query_count_bounded_per_chunk(self):
+        file_path = self._file(generate_rows(LARGE_FILE_ROWS))
+
+        with CaptureQueriesContext(connection) as context:
+            activity = DataImportService(self.tenant).import_data("inventory", file_path)
+
+        queries = [q for q in context.captured_queries if not q["sql"].startswith("EXPLAIN")]
+        chunks = math.ceil(LARGE_FILE_ROWS / CHUNK_SIZE)
+        self.assertEqual(activity.records_processed, LARGE_FILE_ROWS)
+        self.assertLessEqual(len(queries), 20 + 8 * chunks)
+        self.assertEqual(
+            InventoryItem.objects.filter(tenant=self.tenant).count(),
+            activity.records_successful + 5,  # The existing items were not imported
+        )
+
+    @override_settings(DATA_IMPORT_CHUNK_SIZE=CHUNK_SIZE, DATA_IMPORT_COPY_THRESHOLD=0)
+    def test_100k_rows_query_count_bounded_per_chunk_using_copy(self):
+        self._assert_query_count_bounded_per_chunk()
+
+    @override_settings(DATA_IMPORT_CHUNK_SIZE=CHUNK_SIZE, DATA_IMPORT_COPY_THRESHOLD=10**12)
+    def test_100k_rows_query_count_bounded_per_chunk_using_bulk_create(self):
+        self._assert_query_count_bounded_per_chunk()
+
+    @override_settings(DATA_IMPORT_CHUNK_SIZE=CHUNK_SIZE)
+    def test_100k_rows_peak_memory(self):
+        """Memory use is bounded by the chunk size, not the file size."""
+        file_path = self._file(generate_rows(LARGE_FILE_ROWS))
+
+        tracemalloc.start()
+        try:
+            DataImportService(self.tenant).import_data("inventory", file_path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # Reading the whole file as the old importer did takes well over this
+        self.assertLess(peak, 32 * 1024 * 1024)
+        self.assertGreater(InventoryItem.objects.filter(tenant=self.tenant).count(), 90000)
@@ -0,0 +1,212 @@
+"""
+Tests for read replica routing.
+
+The test settings define a second alias, "replica", that mirrors the test
+database, so both aliases reach the same data over separate connections.
+Replication lag is simulated by replacing the lag measurement, except where
+the real query runs against the (never lagging) primary.
+"""
+
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+import apps.core.data_models  # noqa: F401 - lets TransactionTestCase flush the tables they add
+from apps.core import db_routing
+from apps.core.db_routing import (
+    PIN_COOKIE,
+    ReadYourWritesMiddleware,
+    clear_lag_cache,
+    read_alias,
+    replica_lag,
+    use_replica,
+)
+from apps.core.models import Tenant, User
+from apps.core.tenant_context import bypass_rls, tenant_context
+from apps.procurement.models import Supplier
+from apps.reporting.services import ReportQueryEngine
+
+
+def simulate_lag(seconds):
+    return mock.patch.object(db_routing, "_measure_lag", return_value=seconds)
+
+
+@contextmanager
+def application_role():
+    """
+    Query the replica as a role without superuser rights, for which RLS
+    policies apply like they do for the application's database user.
+    """
+    with connections["replica"].cursor() as cursor:
+        cursor.execute(
+            "DO $$ BEGIN "
+            "IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = 'replica_test_reader') "
+            "THEN CREATE ROLE replica_test_reader NOLOGIN; END IF; END $$;"
+        )
+        cursor.execute("GRANT SELECT ON procurement_suppliers TO replica_test_reader")
+        cursor.execute("SET ROLE replica_test_reader")
+    try:
+        yield
+    finally:
+        with connections["replica"].cursor() as cursor:
+            cursor.execute("RESET ROLE")
+
+
+def replica_session_context():
+    with connections["replica"].cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('app.current_tenant', true), "
+            "current_setting('app.bypass_rls', true);"
+        )
+        return cursor.fetchone()
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        clear_lag_cache()
+
+    def test_reads_in_block_go_to_replica(self):
+        with simulate_lag(0):
+            with use_replica() as alias:
+                assert alias == "replica"
+                assert Supplier.objects.all().db == "replica"
+                assert router.db_for_write(Supplier) == "default"
+                # Nested blocks keep the outer block's database
+                with use_replica(max_lag=0) as inner:
+                    assert inner == "replica"
+                with CaptureQueriesContext(connections["replica"]) as replica_queries:
+                    list(Tenant.objects.all())
+
+        assert len(replica_queries) == 1
+        assert Supplier.objects.all().db == "default"
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_primary(self):
+        with use_replica() as alias:
+            assert alias == "default"
+            assert Supplier.objects.all().db == "default"
+
+    def test_tenant_isolation_on_replica(self):
+        with bypass_rls():
+            tenants = [
+                Tenant.objects.create(company_name=f"Replica {i}", slug=f"replica-{i}")
+                for i in range(2)
+            ]
+            users = [
+                User.objects.create_user(
+                    username=f"replica-owner-{i}",
+                    password="testpass123",
+                    tenant=tenant,
+                    role=User.TENANT_OWNER,
+                )
+                for i, tenant in enumerate(tenants)
+            ]
+        for tenant, user in zip(tenants, users):
+            with tenant_context(tenant.id):
+                Supplier.objects.create(
+                    tenant=tenant, name=f"{tenant.slug} supplier", created_by=user
+                )
+
+        # The real lag query: the mirrored primary is never behind
+        assert replica_lag("replica") == 0
+
+        for tenant in tenants:
+            with tenant_context(tenant.id):
+                with use_replica() as alias, application_role():
+                    names = list(Supplier.objects.values_list("name", flat=True))
+                    context = replica_session_context()
+            assert alias == "replica"
+            assert names == [f"{tenant.slug} supplier"]
+            assert context == (str(tenant.id), "false")
+            # The context does not outlive the block
+            assert replica_session_context() == ("", "false")
+
+        # Platform admins keep their bypass on the replica
+        with bypass_rls():
+            with use_replica():
+                assert replica_session_context()[1] == "true"
+        assert replica_session_context() == ("", "false")
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with simulate_lag(120) as measure:
+            with use_replica() as alias:
+                assert alias == "default"
+                assert Supplier.objects.all().db == "default"
+            # A caller accepting older data still uses the replica
+            with use_replica(max_lag=300) as alias:
+                assert alias == "replica"
+        # Measured once, then reused
+        assert measure.call_count == 1
+
+        clear_lag_cache()
+        with simulate_lag(None):
+            assert read_alias(max_lag=3600) == "default"
+
+    @override_settings(DATABASE_REPLICA_LAG_CACHE_TTL=0.05)
+    def test_lag_is_measured_again_after_cache_ttl(self):
+        with simulate_lag(0) as measure:
+            assert read_alias() == "replica"
+            assert read_alias() == "replica"
+            time.sleep(0.1)
+            assert read_alias() == "replica"
+        assert measure.call_count == 2
+
+    def test_reads_pinned_to_primary_after_write(self):
+        def view(request):
+            with use_replica() as alias:
+                return HttpResponse(alias)
+
+        middleware = ReadYourWritesMiddleware(view)
+        factory = RequestFactory()
+
+        with simulate_lag(0):
+            assert middleware(factory.get("/dashboard/")).content == b"replica"
+
+            response = middleware(factory.post("/sales/"))
+            pinned_until = response.cookies[PIN_COOKIE].value
+            assert response.cookies[PIN_COOKIE]["max-age"] == 10
+
+            request = factory.get("/dashboard/")
+            request.COOKIES[PIN_COOKIE] = pinned_until
+            assert middleware(request).content == b"default"
+            assert PIN_COOKIE not in middleware(request).cookies
+
+            request = factory.get("/dashboard/")
+            request.COOKIES[PIN_COOKIE] = str(int(time.time()) - 1)
+            assert middleware(request).content == b"replica"
+
+    def test_statement_timeout_set_per_alias(self):
+        def statement_timeout(alias):
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SHOW statement_timeout")
+                return cursor.fetchone()[0]
+
+        assert statement_timeout("replica") == "2min"
+        assert statement_timeout("default") != "2min"
+
+    def test_report_queries_run_on_replica(self):
+        with bypass_rls():
+            tenant = Tenant.objects.create(company_name="Replica Reports", slug="replica-reports")
+
+        engine = ReportQueryEngine(tenant)
+        with simulate_lag(0):
+            with CaptureQueriesContext(connections["replica"]) as replica_queries:
+                rows = engine._run_query(
+                    "SELECT current_setting('app.current_tenant', true) AS tenant", []
+                )
+        assert rows == [{"tenant": str(tenant.id)}]
+        assert len(replica_queries) == 2
+
+        clear_lag_cache()
+        with simulate_lag(3600):
+            with CaptureQueriesContext(connections["replica"]) as replica_queries:
+                engine._run_query("SELECT 1 AS one", [])
+        assert len(replica_queries) == 0
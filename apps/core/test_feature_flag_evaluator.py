@@ -0,0 +1,217 @@
+"""
+Tests for the cached, tenant-aware feature flag evaluator.
+Per Requirement 30 - Feature Flag Management
+
+Checks that warm flag checks never reach the database, that snapshots are
+invalidated when overrides change, that percentage rollouts are stable and
+evenly distributed, and compares evaluation cost with the query-per-check
+implementation.
+"""
+
+import time
+import uuid
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from waffle.models import Flag
+
+from apps.core.context_processors import waffle_flags
+from apps.core.feature_flag_evaluator import (
+    FlagSnapshot,
+    FlagSnapshotCache,
+    compile_snapshot_payload,
+    rollout_bucket,
+    snapshot_cache,
+)
+from apps.core.feature_flags import (
+    EmergencyKillSwitch,
+    TenantFeatureFlag,
+    disable_flag_for_tenant,
+    emergency_disable_flag,
+    enable_flag_for_tenant,
+    flags_for_tenant,
+    is_flag_active_for_tenant,
+)
+from apps.core.models import Tenant
+
+User = get_user_model()
+
+
+def legacy_is_flag_active_for_tenant(flag_name, tenant):
+    """The query-per-check implementation, kept as the benchmark baseline."""
+    if EmergencyKillSwitch.objects.filter(flag_name=flag_name, is_active=True).exists():
+        return False
+    try:
+        flag = Flag.objects.get(name=flag_name)
+        tenant_override = TenantFeatureFlag.objects.filter(tenant=tenant, flag=flag).first()
+        if tenant_override is not None:
+            return tenant_override.enabled
+        return flag.everyone is True
+    except Flag.DoesNotExist:
+        return False
+
+
+class FeatureFlagEvaluatorTestCase(TestCase):
+    """Test evaluation of flags from the cached snapshot."""
+
+    def setUp(self):
+        """Set up test data."""
+        self.tenant1 = Tenant.objects.create(company_name="Flag Shop 1", slug="flag-shop-1")
+        self.tenant2 = Tenant.objects.create(company_name="Flag Shop 2", slug="flag-shop-2")
+        self.admin = User.objects.create_user(
+            username="flagadmin",
+            email="flagadmin@example.com",
+            password="admin123",
+            role="PLATFORM_ADMIN",
+        )
+
+        Flag.objects.create(name="global_on", everyone=True)
+        Flag.objects.create(name="global_off", everyone=False)
+        Flag.objects.create(name="beta_feature", everyone=False)
+        Flag.objects.create(name="half_rollout", everyone=None, percent=50)
+        enable_flag_for_tenant("beta_feature", self.tenant1, self.admin)
+        disable_flag_for_tenant("global_on", self.tenant2, self.admin)
+
+    def test_evaluation_matches_precedence_rules(self):
+        assert is_flag_active_for_tenant("global_on", self.tenant1) is True
+        assert is_flag_active_for_tenant("global_on", self.tenant2) is False
+        assert is_flag_active_for_tenant("global_off", self.tenant1) is False
+        assert is_flag_active_for_tenant("beta_feature", self.tenant1) is True
+        assert is_flag_active_for_tenant("beta_feature", self.tenant2) is False
+        assert is_flag_active_for_tenant("missing_flag", self.tenant1) is False
+
+        for flag_name in ["global_on", "global_off", "beta_feature", "missing_flag"]:
+            for tenant in [self.tenant1, self.tenant2]:
+                assert is_flag_active_for_tenant(
+                    flag_name, tenant
+                ) == legacy_is_flag_active_for_tenant(flag_name, tenant)
+
+    def test_zero_queries_after_warm_up(self):
+        flags_for_tenant(self.tenant1)
+
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                is_flag_active_for_tenant("global_on", self.tenant1)
+                is_flag_active_for_tenant("beta_feature", self.tenant2)
+                is_flag_active_for_tenant("half_rollout", self.tenant1)
+            flags = flags_for_tenant(self.tenant2)
+
+        assert flags == {
+            "global_on": False,
+            "global_off": False,
+            "beta_feature": False,
+            "half_rollout": rollout_bucket("half_rollout", self.tenant2.pk) < 50,
+        }
+
+    def test_warm_snapshot_shared_through_redis(self):
+        flags_for_tenant(self.tenant1)
+
+        other_worker = FlagSnapshotCache()
+        with self.assertNumQueries(0):
+            snapshot = other_worker.get()
+
+        assert snapshot.generation == snapshot_cache.get().generation
+        assert snapshot.is_active("beta_feature", self.tenant1.pk) is True
+
+    def test_override_change_invalidates_snapshot(self):
+        assert is_flag_active_for_tenant("beta_feature", self.tenant2) is False
+
+        enable_flag_for_tenant("beta_feature", self.tenant2, self.admin)
+        assert is_flag_active_for_tenant("beta_feature", self.tenant2) is True
+
+        TenantFeatureFlag.objects.filter(tenant=self.tenant2).delete()
+        assert is_flag_active_for_tenant("beta_feature", self.tenant2) is False
+
+    @override_settings(FEATURE_FLAG_LOCAL_TTL=0)
+    def test_other_workers_see_new_generation(self):
+        other_worker = FlagSnapshotCache()
+        assert other_worker.get().is_active("beta_feature", self.tenant2.pk) is False
+
+        enable_flag_for_tenant("beta_feature", self.tenant2, self.admin)
+
+        assert other_worker.get().is_active("beta_feature", self.tenant2.pk) is True
+
+    def test_kill_switch_invalidates_snapshot(self):
+        assert is_flag_active_for_tenant("global_on", self.tenant1) is True
+
+        kill_switch = emergency_disable_flag("global_on", self.admin, reason="Critical bug")
+        assert is_flag_active_for_tenant("global_on", self.tenant1) is False
+
+        kill_switch.re_enable(self.admin)
+        assert is_flag_active_for_tenant("global_on", self.tenant1) is True
+
+    def test_request_memoizes_flags(self):
+        request = RequestFactory().get("/")
+        with patch.object(snapshot_cache, "get", wraps=snapshot_cache.get) as get_snapshot:
+            for _ in range(10):
+                is_flag_active_for_tenant("global_on", self.tenant1, request=request)
+                is_flag_active_for_tenant("beta_feature", self.tenant1, request=request)
+            flags_for_tenant(self.tenant1, request=request)
+
+        assert get_snapshot.call_count == 1
+
+    def test_context_processor_exposes_tenant_flags(self):
+        user = User.objects.create_user(
+            username="flaguser", password="pass123", tenant=self.tenant1
+        )
+        request = RequestFactory().get("/")
+        request.user = user
+
+        context = waffle_flags(request)
+
+        assert context["tenant_flags"]["beta_feature"] is True
+        assert context["tenant_flags"]["global_off"] is False
+
+    def test_rollout_distribution(self):
+        """Rollouts hit the requested share of 100k synthetic tenants."""
+        snapshot = FlagSnapshot(
+            0,
+            {
+                "flags": [
+                    ("rollout_10", None, 10.0, False),
+                    ("rollout_30", None, 30.0, False),
+                    ("rollout_30_other", None, 30.0, False),
+                ],
+                "overrides": {},
+            },
+        )
+        tenant_ids = [uuid.UUID(int=i, version=4) for i in range(100000)]
+
+        in_10 = {t for t in tenant_ids if snapshot.is_active("rollout_10", t)}
+        in_30 = {t for t in tenant_ids if snapshot.is_active("rollout_30", t)}
+        in_30_other = {t for t in tenant_ids if snapshot.is_active("rollout_30_other", t)}
+
+        assert abs(len(in_10) / len(tenant_ids) - 0.10) < 0.005
+        assert abs(len(in_30) / len(tenant_ids) - 0.30) < 0.005
+        assert abs(len(in_30_other) / len(tenant_ids) - 0.30) < 0.005
+        # Tenants stay in when a rollout widens ...
+        assert {t for t in in_10 if rollout_bucket("rollout_30", t) < 10} <= in_30
+        # ... and each flag rolls out to a different set of tenants
+        assert abs(len(in_30 & in_30_other) / len(tenant_ids) - 0.09) < 0.005
+
+    def test_snapshot_is_immutable(self):
+        snapshot = FlagSnapshot(0, compile_snapshot_payload())
+
+        with self.assertRaises(TypeError):
+            snapshot.flags["global_off"] = snapshot.flags["global_on"]
+        with self.assertRaises(TypeError):
+            snapshot.overrides[str(self.tenant1.pk)]["global_off"] = True
+
+    def test_benchmark_against_query_per_check(self):
+        """1M cached evaluations take less time than a few thousand uncached ones."""
+        legacy_calls = 300
+        start = time.perf_counter()
+        for _ in range(legacy_calls):
+            legacy_is_flag_active_for_tenant("beta_feature", self.tenant1)
+        legacy_per_call = (time.perf_counter() - start) / legacy_calls
+
+        is_flag_active_for_tenant("beta_feature", self.tenant1)
+        cached_calls = 1000000
+        start = time.perf_counter()
+        for _ in range(cached_calls):
+            is_flag_active_for_tenant("beta_feature", self.tenant1)
+        cached_per_call = (time.perf_counter() - start) / cached_calls
+
+        assert cached_per_call * 50 < legacy_per_call
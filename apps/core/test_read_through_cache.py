@@ -0,0 +1,218 @@
+"""
+Tests for the stampede-safe read-through cache.
+
+Covers single-flight computation of cold keys, stale-while-revalidate,
+probabilistic early refresh, TTL jitter, cached None results and the
+in-process L1 cache, with a micro-benchmark of L1 lookups against Redis.
+Runs against the Redis server of the test settings, like the rate limiter
+tests.
+"""
+
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+
+import pytest
+
+from apps.core import read_through_cache
+from apps.core.cache_utils import cache_query_result, get_or_set_cache, invalidate_cache
+from apps.core.read_through_cache import (
+    LOOKUPS,
+    CacheEntry,
+    _should_refresh,
+    clear_local_cache,
+    get_or_compute,
+)
+
+
+@pytest.fixture
+def key():
+    """A fresh cache key, deleted (with its lock) afterwards."""
+    prefix = f"rtc-test-{uuid.uuid4().hex[:8]}"
+    yield f"{prefix}:value"
+    caches["default"].delete_many([f"{prefix}:value", f"{prefix}:value:lock"])
+    clear_local_cache()
+
+
+def lookups(key, outcome):
+    return LOOKUPS.labels("default", key.split(":", 1)[0], outcome)._value.get()
+
+
+class Counting:
+    """A compute function counting its calls."""
+
+    def __init__(self, value="value", delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.value
+
+
+class TestSingleFlight:
+    def test_cold_key_is_computed_once(self, key):
+        compute = Counting(delay=0.2)
+        barrier = threading.Barrier(100)
+
+        def read():
+            barrier.wait()
+            return get_or_compute(key, compute, 60)
+
+        with ThreadPoolExecutor(max_workers=100) as pool:
+            results = list(pool.map(lambda _: read(), range(100)))
+
+        assert compute.calls == 1
+        assert results == ["value"] * 100
+        assert lookups(key, "lock_wait") >= 1
+
+    def test_none_is_cached(self, key):
+        compute = Counting(value=None)
+
+        assert get_or_compute(key, compute, 60) is None
+        assert get_or_compute(key, compute, 60) is None
+        assert compute.calls == 1
+
+    def test_decorator_caches_empty_results(self, key):
+        calls = []
+
+        @cache_query_result(timeout=60, cache_alias="default", key_prefix=key)
+        def load(tenant_id):
+            calls.append(tenant_id)
+            return []
+
+        assert load(1) == [] and load(1) == []
+        assert calls == [1]
+        invalidate_cache(f"{key}:*", "default")
+
+    def test_legacy_value_is_a_miss(self, key):
+        caches["default"].set(key, "raw value written by an older release", 60)
+
+        assert get_or_set_cache(key, Counting("fresh"), 60) == "fresh"
+        assert isinstance(caches["default"].get(key), CacheEntry)
+
+    def test_lock_holder_failure_releases_lock(self, key):
+        def fail():
+            raise RuntimeError("database unavailable")
+
+        with pytest.raises(RuntimeError):
+            get_or_compute(key, fail, 60)
+
+        assert caches["default"].get(f"{key}:lock") is None
+        assert get_or_compute(key, Counting(), 60) == "value"
+
+
+class TestStaleWhileRevalidate:
+    @pytest.fixture(autouse=True)
+    def no_jitter(self, settings):
+        settings.CACHE_TTL_JITTER = 0
+
+    def expire(self, key):
+        entry = caches["default"].get(key)
+        caches["default"].set(key, entry._replace(refresh_at=time.time() - 1), 60)
+
+    def test_stale_value_served_during_refresh(self, key):
+        get_or_compute(key, Counting("old"), 60)
+        self.expire(key)
+
+        refresh = Counting("new", delay=0.5)
+        refresher = threading.Thread(target=get_or_compute, args=(key, refresh, 60))
+        refresher.start()
+        while caches["default"].get(f"{key}:lock") is None:
+            time.sleep(0.005)
+
+        stale_before = lookups(key, "stale")
+        others = Counting("unused")
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(lambda _: get_or_compute(key, others, 60), range(20)))
+        refresher.join()
+
+        assert results == ["old"] * 20
+        assert others.calls == 0
+        assert lookups(key, "stale") - stale_before == 20
+        assert refresh.calls == 1
+        assert get_or_compute(key, others, 60) == "new"
+
+    def test_hard_ttl_covers_stale_window(self, key):
+        get_or_compute(key, Counting(), 60, stale_timeout=30)
+
+        ttl = caches["default"].ttl(key)
+        assert 85 <= ttl <= 90
+
+
+class TestEarlyRefresh:
+    def test_xfetch_probability_grows_towards_expiry(self):
+        now = time.time()
+
+        def refresh_rate(seconds_left):
+            entry = CacheEntry("value", now + seconds_left, compute_time=1.0)
+            return sum(_should_refresh(entry, now) for _ in range(2000)) / 2000
+
+        assert refresh_rate(30) == 0
+        assert 0 < refresh_rate(2) < refresh_rate(0.5) < 1
+        assert refresh_rate(0) == 1
+        assert not _should_refresh(CacheEntry("value", None, 1.0), now)
+
+    def test_ttls_are_jittered(self, key):
+        refresh_times = []
+        for i in range(20):
+            start = time.time()
+            get_or_compute(f"{key}{i}", Counting(), 100)
+            refresh_times.append(caches["default"].get(f"{key}{i}").refresh_at - start)
+        caches["default"].delete_many([f"{key}{i}" for i in range(20)])
+
+        assert all(89 <= seconds <= 100.5 for seconds in refresh_times)
+        assert statistics.pstdev(refresh_times) > 0.5
+
+
+class TestLocalCache:
+    def test_hot_key_served_from_memory(self, key):
+        compute = Counting()
+        get_or_compute(key, compute, 60, local=True)
+        caches["default"].delete(key)
+
+        assert get_or_compute(key, compute, 60, local=True) == "value"
+        assert compute.calls == 1
+        assert lookups(key, "l1_hit") == 1
+
+    def test_local_entries_expire(self, key, settings):
+        settings.CACHE_LOCAL_TTL = 0.05
+        compute = Counting()
+        get_or_compute(key, compute, 60, local=True)
+        caches["default"].delete(key)
+        time.sleep(0.1)
+
+        get_or_compute(key, compute, 60, local=True)
+        assert compute.calls == 2
+
+    def test_local_cache_is_bounded(self, key, settings):
+        settings.CACHE_LOCAL_SIZE = 2
+        for i in range(5):
+            get_or_compute(f"{key}{i}", Counting(), 60, local=True)
+        caches["default"].delete_many([f"{key}{i}" for i in range(5)])
+
+        assert len(read_through_cache._local_entries) == 2
+
+    def test_l1_is_faster_than_redis(self, key):
+        get_or_compute(key, Counting(), 60, local=True)
+        cache = caches["default"]
+
+        def timed(func, runs=2000):
+            start = time.perf_counter()
+            for _ in range(runs):
+                func()
+            return (time.perf_counter() - start) / runs
+
+        redis_get = timed(lambda: cache.get(key))
+        l1_get = timed(lambda: get_or_compute(key, Counting(), 60, local=True))
+
+        # A Redis round-trip costs far more than a dictionary lookup
+        assert l1_get * 5 < redis_get
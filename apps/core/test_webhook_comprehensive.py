@@ -423,13 +423,13 @@ class TestWebhookDeliveryAndRetries(TestCase):
             attempt_count=1,
         )
 
-        # Mock the deliver_webhook task
-        with patch("apps.core.webhook_tasks.deliver_webhook.delay") as mock_deliver:
+        # Mock the dispatch task
+        with patch("apps.core.webhook_tasks.dispatch_webhook_deliveries.delay") as mock_deliver:
             result = retry_failed_webhooks()
 
         # Verify only past-due delivery was scheduled
         self.assertEqual(result["retries_scheduled"], 1)
-        mock_deliver.assert_called_once_with(str(delivery1.id))
+        mock_deliver.assert_called_once_with([str(delivery1.id)])
 
 
 @pytest.mark.django_db
@@ -869,8 +869,8 @@ class TestWebhookEventTriggering(TestCase):
 
         event_id = uuid.uuid4()
 
-        # Mock the deliver_webhook task
-        with patch("apps.core.webhook_tasks.deliver_webhook.delay") as mock_deliver:
+        # Mock the dispatch task
+        with patch("apps.core.webhook_tasks.dispatch_webhook_deliveries.delay") as mock_deliver:
             count = trigger_webhook_event(
                 event_type=Webhook.EVENT_SALE_CREATED,
                 event_id=event_id,
@@ -914,8 +914,8 @@ class TestWebhookEventTriggering(TestCase):
 
         event_id = uuid.uuid4()
 
-        # Mock the deliver_webhook task
-        with patch("apps.core.webhook_tasks.deliver_webhook.delay"):
+        # Mock the dispatch task
+        with patch("apps.core.webhook_tasks.dispatch_webhook_deliveries.delay"):
             count = trigger_webhook_event(
                 event_type=Webhook.EVENT_SALE_CREATED,
                 event_id=event_id,
@@ -953,7 +953,7 @@ class TestWebhookEventTriggering(TestCase):
         event_id = uuid.uuid4()
 
         # Trigger sale event
-        with patch("apps.core.webhook_tasks.deliver_webhook.delay"):
+        with patch("apps.core.webhook_tasks.dispatch_webhook_deliveries.delay"):
             count = trigger_webhook_event(
                 event_type=Webhook.EVENT_SALE_CREATED,
                 event_id=event_id,
@@ -994,7 +994,7 @@ class TestWebhookEventTriggering(TestCase):
         event_id = uuid.uuid4()
 
         # Trigger event
-        with patch("apps.core.webhook_tasks.deliver_webhook.delay"):
+        with patch("apps.core.webhook_tasks.dispatch_webhook_deliveries.delay"):
             count = trigger_webhook_event(
                 event_type=Webhook.EVENT_SALE_CREATED,
                 event_id=event_id,
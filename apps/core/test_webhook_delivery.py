@@ -172,7 +172,7 @@ class WebhookDeliveryTestCase(TestCase):
     def test_webhook_delivery_timeout(self):
         """Test webhook delivery timeout handling."""
         # Deliver webhook with timeout
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.post") as mock_post:
             mock_post.side_effect = requests.Timeout("Request timed out")
             result = deliver_webhook(str(self.delivery.id))
 
@@ -290,13 +290,13 @@ class WebhookDeliveryTestCase(TestCase):
             attempt_count=1,
         )
 
-        # Mock the deliver_webhook task
-        with patch("apps.core.webhook_tasks.deliver_webhook.delay") as mock_deliver:
+        # Mock the dispatch task
+        with patch("apps.core.webhook_tasks.dispatch_webhook_deliveries.delay") as mock_deliver:
             result = retry_failed_webhooks()
 
         # Should have scheduled retry for delivery1 only
         self.assertEqual(result["retries_scheduled"], 1)
-        mock_deliver.assert_called_once_with(str(delivery1.id))
+        mock_deliver.assert_called_once_with([str(delivery1.id)])
 
     def test_cleanup_old_deliveries(self):
         """Test cleanup of old delivery records."""
@@ -350,8 +350,8 @@ class WebhookDeliveryTestCase(TestCase):
             "total": "499.99",
         }
 
-        # Mock the deliver_webhook task
-        with patch("apps.core.webhook_tasks.deliver_webhook.delay") as mock_deliver:
+        # Mock the dispatch task
+        with patch("apps.core.webhook_tasks.dispatch_webhook_deliveries.delay") as mock_deliver:
             count = trigger_webhook_event(
                 event_type=Webhook.EVENT_SALE_CREATED,
                 event_id=event_id,
@@ -0,0 +1,269 @@
+"""
+Tests for the concurrent webhook dispatcher.
+
+These tests deliver to a REAL local HTTP server whose endpoints can be made
+slow, flaky or dead, and check that throughput scales with concurrency, that
+a dead endpoint does not hold up healthy ones, and that connections are
+reused and payloads signed exactly as before.
+
+Per Requirement 32 - Webhook and Integration Management
+"""
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import TestCase
+
+import pytest
+
+from apps.core.models import Tenant, User
+from apps.core.webhook_dispatcher import CircuitBreaker, WebhookDispatcher
+from apps.core.webhook_models import Webhook, WebhookDelivery
+
+
+class DispatcherTestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoints: /ok, /slow (0.2s), /dead (hangs past the timeout) and
+    /flaky (fails the requests listed in ``flaky_failures``).
+    """
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is visible
+
+    received = []
+    lock = threading.Lock()
+    flaky_failures = set()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/dead":
+            time.sleep(2)
+        elif self.path == "/slow":
+            time.sleep(0.2)
+
+        with self.lock:
+            DispatcherTestHandler.received.append(
+                {
+                    "path": self.path,
+                    "headers": dict(self.headers),
+                    "body": body,
+                    "client": self.client_address,
+                    "time": time.monotonic(),
+                }
+            )
+            count = sum(1 for r in DispatcherTestHandler.received if r["path"] == self.path)
+
+        status = 500 if self.path == "/flaky" and count in self.flaky_failures else 200
+        response = b'{"status": "received"}'
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        """Suppress log messages."""
+        pass
+
+
+@pytest.mark.django_db
+class WebhookDispatcherTestCase(TestCase):
+    """Test concurrent delivery, circuit breaking and ordering."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), DispatcherTestHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        DispatcherTestHandler.received = []
+        DispatcherTestHandler.flaky_failures = set()
+        self.tenant = Tenant.objects.create(
+            company_name="Dispatcher Shop", slug=f"dispatcher-{uuid.uuid4().hex[:8]}"
+        )
+        self.user = User.objects.create_user(
+            username=f"dispatcher-{uuid.uuid4().hex[:8]}",
+            email="dispatcher@example.com",
+            password="testpass123",
+            tenant=self.tenant,
+            role=User.TENANT_OWNER,
+        )
+
+    def _webhook(self, path, **kwargs):
+        return Webhook.objects.create(
+            tenant=self.tenant,
+            name=f"Webhook {path}",
+            url=f"{self.base_url}{path}",
+            events=[Webhook.EVENT_SALE_CREATED],
+            created_by=self.user,
+            **kwargs,
+        )
+
+    def _deliveries(self, webhook, count):
+        deliveries = [
+            WebhookDelivery.objects.create(
+                webhook=webhook,
+                event_type=Webhook.EVENT_SALE_CREATED,
+                event_id=uuid.uuid4(),
+                payload={"event": "sale.created", "data": {"sale_number": f"SALE-{index}"}},
+            )
+            for index in range(count)
+        ]
+        return list(
+            WebhookDelivery.objects.select_related("webhook").filter(
+                id__in=[delivery.id for delivery in deliveries]
+            )
+        )
+
+    def test_throughput_scales_with_concurrency(self):
+        """Slow endpoints are served in parallel, not one after another."""
+        webhooks = [self._webhook("/slow") for _ in range(4)]
+
+        started = time.monotonic()
+        WebhookDispatcher(concurrency=1).dispatch(self._deliveries(webhooks[0], 8))
+        serial = time.monotonic() - started
+
+        deliveries = []
+        for webhook in webhooks:
+            deliveries.extend(self._deliveries(webhook, 8))
+        started = time.monotonic()
+        results = WebhookDispatcher(concurrency=16, lanes_per_endpoint=4).dispatch(deliveries)
+        concurrent = time.monotonic() - started
+
+        self.assertEqual([r["status"] for r in results], ["success"] * 32)
+        # Four times the work in less time than the serial run
+        self.assertLess(concurrent, serial)
+        self.assertGreater(serial, 1.5)
+
+    def test_dead_endpoint_does_not_delay_healthy_ones(self):
+        """A hanging endpoint only ties up its own lanes, then its circuit opens."""
+        dead = self._webhook("/dead", timeout_seconds=1)
+        healthy = self._webhook("/ok")
+        deliveries = self._deliveries(dead, 12) + self._deliveries(healthy, 12)
+
+        started = time.monotonic()
+        WebhookDispatcher(concurrency=8, lanes_per_endpoint=4).dispatch(deliveries)
+
+        healthy_times = [
+            r["time"] - started for r in DispatcherTestHandler.received if r["path"] == "/ok"
+        ]
+        self.assertEqual(len(healthy_times), 12)
+        self.assertLess(max(healthy_times), 0.5)
+        self.assertEqual(
+            WebhookDelivery.objects.filter(webhook=healthy, status=WebhookDelivery.SUCCESS).count(),
+            12,
+        )
+
+        # The circuit opened after five timeouts; the rest were postponed unsent
+        dead_deliveries = WebhookDelivery.objects.filter(webhook=dead)
+        self.assertFalse(dead_deliveries.exclude(status=WebhookDelivery.RETRYING).exists())
+        self.assertLessEqual(dead_deliveries.filter(attempt_count=1).count(), 8)
+        self.assertTrue(dead_deliveries.filter(attempt_count=0, error_message__icontains="circuit"))
+        self.assertIsNotNone(CircuitBreaker(dead.id).open_until())
+
+    def test_open_circuit_fails_fast_without_using_attempts(self):
+        webhook = self._webhook("/flaky")
+        DispatcherTestHandler.flaky_failures = set(range(1, 100))
+        WebhookDispatcher(concurrency=1).dispatch(self._deliveries(webhook, 5))
+        DispatcherTestHandler.received = []
+
+        delivery = self._deliveries(webhook, 1)[0]
+        started = time.monotonic()
+        result = WebhookDispatcher().dispatch([delivery])[0]
+
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(result["status"], "deferred")
+        self.assertFalse([r for r in DispatcherTestHandler.received if r["path"] == "/flaky"])
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, WebhookDelivery.RETRYING)
+        self.assertEqual(delivery.attempt_count, 0)
+
+    def test_success_closes_circuit(self):
+        webhook = self._webhook("/ok")
+        breaker = CircuitBreaker(webhook.id, threshold=1, cooldown=1)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow_request())
+
+        time.sleep(1.1)
+        self.assertTrue(breaker.allow_request())  # Half-open probe
+        self.assertFalse(breaker.allow_request())  # Only one probe at a time
+        breaker.record_success()
+
+        self.assertTrue(breaker.allow_request())
+        self.assertIsNone(breaker.open_until())
+
+    def test_connections_reused_per_host(self):
+        webhook = self._webhook("/ok")
+
+        WebhookDispatcher(concurrency=1).dispatch(self._deliveries(webhook, 10))
+
+        received = [r for r in DispatcherTestHandler.received if r["path"] == "/ok"]
+        clients = {r["client"] for r in received}
+        self.assertEqual(len(received), 10)
+        self.assertEqual(len(clients), 1)
+
+    def test_hmac_signature_unchanged(self):
+        """The body and signature are computed exactly as before."""
+        webhook = self._webhook("/ok", secret="dispatcher-secret")
+        delivery = self._deliveries(webhook, 1)[0]
+
+        WebhookDispatcher().dispatch([delivery])
+
+        request = [r for r in DispatcherTestHandler.received if r["path"] == "/ok"][0]
+        expected_body = json.dumps(delivery.payload, separators=(",", ":")).encode("utf-8")
+        expected_signature = hmac.new(
+            b"dispatcher-secret", expected_body, hashlib.sha256
+        ).hexdigest()
+        self.assertEqual(request["body"], expected_body)
+        self.assertEqual(request["headers"]["X-Webhook-Signature"], expected_signature)
+        self.assertEqual(request["headers"]["X-Webhook-Delivery"], str(delivery.id))
+        self.assertEqual(request["headers"]["X-Webhook-Event"], "sale.created")
+
+    def test_ordered_delivery_stops_at_first_failure(self):
+        """Later events wait for a failed earlier event of an ordered webhook."""
+        webhook = self._webhook("/flaky", ordered_delivery=True)
+        DispatcherTestHandler.flaky_failures = {2}
+        deliveries = self._deliveries(webhook, 4)
+
+        WebhookDispatcher(concurrency=8, lanes_per_endpoint=4).dispatch(deliveries)
+
+        sent = [
+            json.loads(r["body"])["data"]["sale_number"]
+            for r in DispatcherTestHandler.received
+            if r["path"] == "/flaky"
+        ]
+        self.assertEqual(sent, ["SALE-0", "SALE-1"])
+        statuses = {
+            d.payload["data"]["sale_number"]: d
+            for d in WebhookDelivery.objects.filter(webhook=webhook)
+        }
+        self.assertEqual(statuses["SALE-0"].status, WebhookDelivery.SUCCESS)
+        self.assertEqual(statuses["SALE-1"].attempt_count, 1)
+        for later in ("SALE-2", "SALE-3"):
+            self.assertEqual(statuses[later].status, WebhookDelivery.RETRYING)
+            self.assertEqual(statuses[later].attempt_count, 0)
+            self.assertEqual(statuses[later].next_retry_at, statuses["SALE-1"].next_retry_at)
+
+        # A new event waits behind the backlog
+        new_event = self._deliveries(webhook, 1)
+        result = WebhookDispatcher().dispatch(new_event)[0]
+        self.assertEqual(result["status"], "deferred")
+        self.assertEqual(
+            len([r for r in DispatcherTestHandler.received if r["path"] == "/flaky"]), 2
+        )
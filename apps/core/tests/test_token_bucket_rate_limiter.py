@@ -0,0 +1,233 @@
+"""
+Tests for the token-bucket API rate limiter.
+
+Per Requirement 25: Security Hardening and Compliance
+
+Covers bucket accounting, route classification, tenant/user identity
+resolution, RateLimit-* headers, and a load test showing the limiter's own
+overhead stays below a millisecond per request.
+"""
+
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+import pytest
+from django_redis import get_redis_connection
+
+from apps.core.models import Tenant
+from apps.core.rate_limit_middleware import APIRateLimitMiddleware, get_route_class
+from apps.core.rate_limiter import KEY_PREFIX, Bucket, TokenBucketLimiter, parse_rate
+
+User = get_user_model()
+
+
+@pytest.fixture
+def limiter():
+    """Limiter with its buckets cleaned up afterwards."""
+    yield TokenBucketLimiter()
+    client = get_redis_connection("api")
+    keys = list(client.scan_iter(f"{KEY_PREFIX}:*"))
+    if keys:
+        client.delete(*keys)
+
+
+def _bucket(rate="10/h", burst=None):
+    return Bucket(f"test:{uuid.uuid4()}", rate, burst)
+
+
+def _anonymous_request(path, ip=None):
+    request = RequestFactory().get(path)
+    request.user = type("User", (), {"is_authenticated": False})()
+    request.META["REMOTE_ADDR"] = ip or f"10.0.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}"
+    return request
+
+
+class TestParseRate:
+    """Test rate string parsing."""
+
+    def test_parse_rate(self):
+        assert parse_rate("100/h") == (100, 3600)
+        assert parse_rate("30/5m") == (30, 300)
+
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            parse_rate("10/week")
+
+
+class TestRouteClass:
+    """Test route classification."""
+
+    @pytest.mark.parametrize(
+        "path,route_class",
+        [
+            ("/api/pos/sales/create/", "pos"),
+            ("/api/terminals/", "pos"),
+            ("/api/pos/offline/sync-validation/", "bulk"),
+            ("/api/inventory/items/bulk-update/", "bulk"),
+            ("/api/dashboard/sales-trend/", "reporting"),
+            ("/api/customers/", "default"),
+        ],
+    )
+    def test_get_route_class(self, path, route_class):
+        assert get_route_class(path) == route_class
+
+
+class TestTokenBucketLimiter:
+    """Test bucket accounting against Redis."""
+
+    def test_burst_then_limited(self, limiter):
+        """A bucket allows its burst and then rejects with a retry hint."""
+        bucket = _bucket("3600/h", burst=3)
+
+        results = [limiter.consume([bucket]) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert [r.remaining for r in results[:3]] == [2, 1, 0]
+        assert results[3].limit == 3
+        assert results[3].retry_after == 1
+
+    def test_all_buckets_or_none(self, limiter):
+        """A request rejected by one bucket does not consume from the others."""
+        roomy = _bucket("100/h")
+        tight = _bucket("1/h")
+
+        assert limiter.consume([roomy, tight]).allowed
+        result = limiter.consume([roomy, tight])
+
+        assert not result.allowed
+        assert limiter.consume([roomy]).remaining == 98
+
+    def test_remaining_reports_tightest_bucket(self, limiter):
+        result = limiter.consume([_bucket("100/h"), _bucket("5/h")])
+
+        assert (result.limit, result.remaining) == (5, 4)
+
+    def test_concurrent_consumers_never_oversubscribe(self, limiter):
+        """Concurrent workers sharing a bucket get exactly its capacity."""
+        bucket = _bucket("50/d")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: limiter.consume([bucket]).allowed, range(200)))
+
+        assert results.count(True) == 50
+
+
+@pytest.mark.django_db
+class TestTokenBucketMiddleware:
+    """Test the middleware around the limiter."""
+
+    @pytest.fixture(autouse=True)
+    def enable_rate_limiting(self, settings):
+        settings.RATELIMIT_ENABLE = True
+        self.tenant = Tenant.objects.create(company_name="Test Company", slug="test-company")
+        self.user = User.objects.create_user(
+            username="testuser",
+            password="testpass123",
+            email="test@example.com",
+            tenant=self.tenant,
+            role="TENANT_OWNER",
+        )
+
+    def test_headers_added(self, limiter):
+        request = _anonymous_request("/api/customers/")
+        middleware = APIRateLimitMiddleware(lambda r: HttpResponse())
+
+        response = middleware(request)
+
+        assert response.status_code == 200
+        assert response["RateLimit-Limit"] == "20"
+        assert response["RateLimit-Remaining"] == "19"
+        assert int(response["RateLimit-Reset"]) > 0
+
+    def test_anonymous_limited_per_ip(self, limiter):
+        middleware = APIRateLimitMiddleware(lambda r: HttpResponse())
+
+        for _ in range(20):
+            assert middleware(_anonymous_request("/api/customers/", "10.1.1.1")).status_code == 200
+        response = middleware(_anonymous_request("/api/customers/", "10.1.1.1"))
+
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+        assert middleware(_anonymous_request("/api/customers/", "10.1.1.2")).status_code == 200
+
+    def test_user_and_tenant_budgets(self, limiter, settings):
+        """Users have their own budget inside the shared tenant budget."""
+        settings.API_RATE_LIMITS = {
+            "pos": {"tenant": ("3/h", 3), "user": ("2/h", 2)},
+            "default": {"tenant": ("100/h", 100), "user": ("100/h", 100)},
+            "anonymous": {"ip": ("20/h", 20)},
+        }
+        middleware = APIRateLimitMiddleware(lambda r: HttpResponse())
+
+        def pos_request(user):
+            request = RequestFactory().get("/api/pos/terminals/")
+            request.user = user
+            return middleware(request).status_code
+
+        other_user = type(
+            "User",
+            (),
+            {"is_authenticated": True, "id": uuid.uuid4(), "tenant_id": self.tenant.id},
+        )()
+
+        assert [pos_request(self.user) for _ in range(3)] == [200, 200, 429]
+        # Third tenant token left for another user, then the tenant budget is spent
+        assert [pos_request(other_user) for _ in range(2)] == [200, 429]
+
+        # Other route classes have separate budgets
+        request = RequestFactory().get("/api/customers/")
+        request.user = self.user
+        assert middleware(request).status_code == 200
+
+    def test_jwt_identity_without_session(self, limiter):
+        """Bearer tokens are keyed by their user, not the client IP."""
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = AccessToken.for_user(self.user)
+        token["tenant_id"] = str(self.tenant.id)
+        request = RequestFactory().get("/api/customers/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        request.user = type("User", (), {"is_authenticated": False})()
+
+        response = APIRateLimitMiddleware(lambda r: HttpResponse())(request)
+
+        assert response["RateLimit-Limit"] == "60"
+
+    def test_fails_open_without_redis(self, monkeypatch):
+        def unavailable(*args, **kwargs):
+            raise ConnectionError("redis down")
+
+        monkeypatch.setattr(TokenBucketLimiter, "consume", unavailable)
+
+        response = APIRateLimitMiddleware(lambda r: HttpResponse())(
+            _anonymous_request("/api/customers/")
+        )
+
+        assert response.status_code == 200
+        assert "RateLimit-Limit" not in response
+
+
+class TestRateLimiterOverhead:
+    """Load test for the limiter's own cost per request."""
+
+    def test_overhead_is_sub_millisecond(self, limiter):
+        """Median and p95 check latency stay below one millisecond."""
+        buckets = [_bucket("1000000/h"), _bucket("1000000/h")]
+        for _ in range(100):
+            limiter.consume(buckets)
+
+        timings = []
+        for _ in range(2000):
+            started = time.perf_counter()
+            limiter.consume(buckets)
+            timings.append(time.perf_counter() - started)
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95)]
+        assert statistics.median(timings) < 0.001
+        assert p95 < 0.001
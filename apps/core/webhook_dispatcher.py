@@ -0,0 +1,505 @@
+"""
+Concurrent webhook dispatcher.
+
+Sends many webhook deliveries at once instead of one blocking request per
+Celery task:
+- HTTP requests run on a thread pool; connections are reused through one
+  pooled requests.Session per host
+- Each endpoint gets a few "lanes" of its own, so a slow or dead endpoint
+  can only tie up its own lanes, never the whole pool
+- A per-endpoint circuit breaker, with its state in Redis, stops sending to
+  endpoints that keep failing and postpones their deliveries instead
+- Timeouts are set per webhook, and webhooks can opt in to ordered delivery
+- Database writes stay on the calling thread, recorded as results arrive
+
+Per Requirement 32 - Webhook and Integration Management
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+import requests
+from prometheus_client import Counter, Gauge, Histogram
+from requests.adapters import HTTPAdapter
+
+from .webhook_models import WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+# Dispatcher defaults (overridable in settings)
+DEFAULT_CONCURRENCY = 20
+DEFAULT_LANES_PER_ENDPOINT = 4
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 60
+
+CACHE_ALIAS = "default"
+USER_AGENT = "JewelryShop-Webhook/1.0"
+MAX_RESPONSE_BODY = 10000
+
+DELIVERY_LATENCY = Histogram(
+    "webhook_delivery_duration_seconds",
+    "Time taken by webhook endpoints to respond",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DELIVERIES = Counter(
+    "webhook_deliveries_total",
+    "Webhook delivery attempts by outcome",
+    ["outcome"],
+)
+BREAKER_OPEN = Gauge(
+    "webhook_circuit_breaker_open",
+    "Whether a webhook endpoint's circuit breaker is open",
+    ["webhook"],
+)
+BACKLOG = Gauge(
+    "webhook_delivery_backlog",
+    "Webhook deliveries due for a retry when last checked",
+)
+
+
+def generate_hmac_signature(secret, payload_bytes):
+    """
+    Generate HMAC-SHA256 signature for webhook payload.
+
+    Requirement 32.3: Sign webhook payloads with HMAC for verification.
+
+    Args:
+        secret: Webhook secret key
+        payload_bytes: Payload as bytes
+
+    Returns:
+        str: Hex-encoded HMAC signature
+    """
+    signature = hmac.new(
+        secret.encode("utf-8"),
+        payload_bytes,
+        hashlib.sha256,
+    ).hexdigest()
+
+    return signature
+
+
+def build_request(delivery):
+    """
+    Build the body and headers sent for a delivery.
+
+    Returns:
+        tuple: (payload bytes, headers dict)
+    """
+    payload_bytes = json.dumps(delivery.payload, separators=(",", ":")).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": USER_AGENT,
+        "X-Webhook-Signature": generate_hmac_signature(delivery.webhook.secret, payload_bytes),
+        "X-Webhook-Event": delivery.event_type,
+        "X-Webhook-Delivery": str(delivery.id),
+        "X-Webhook-Timestamp": str(int(time.time())),
+    }
+    return payload_bytes, headers
+
+
+_sessions: Dict[tuple, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Get the pooled session for a URL's host.
+
+    Sessions live for the life of the worker process, so keep-alive
+    connections (and TLS sessions) are reused across deliveries and tasks.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            pool_size = getattr(settings, "WEBHOOK_DISPATCH_CONCURRENCY", DEFAULT_CONCURRENCY)
+            session = requests.Session()
+            session.mount(
+                f"{parts.scheme}://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            )
+            _sessions[key] = session
+    return session
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one webhook endpoint, with its state in Redis.
+
+    After ``threshold`` consecutive failures the circuit opens for
+    ``cooldown`` seconds and nothing is sent. Once the cooldown has passed a
+    single probe request is let through: success closes the circuit, failure
+    opens it again. If Redis is unavailable the breaker stays closed.
+    """
+
+    def __init__(self, webhook_id, threshold=None, cooldown=None):
+        self.webhook_id = str(webhook_id)
+        self.threshold = threshold or getattr(
+            settings, "WEBHOOK_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD
+        )
+        self.cooldown = cooldown or getattr(
+            settings, "WEBHOOK_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN
+        )
+        prefix = f"webhook_breaker:{self.webhook_id}"
+        self.failures_key = f"{prefix}:failures"
+        self.open_until_key = f"{prefix}:open_until"
+        self.probe_key = f"{prefix}:probe"
+
+    @property
+    def cache(self):
+        return caches[CACHE_ALIAS]
+
+    def open_until(self) -> Optional[float]:
+        """Get the time (epoch seconds) the circuit stays open until, if open."""
+        try:
+            open_until = self.cache.get(self.open_until_key)
+        except Exception as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+            return None
+        if open_until is None or open_until <= time.time():
+            return None
+        return open_until
+
+    def allow_request(self) -> bool:
+        """Check whether a request may be sent to the endpoint now."""
+        try:
+            open_until = self.cache.get(self.open_until_key)
+            if open_until is None:
+                return True
+            if open_until > time.time():
+                return False
+            # Half-open: one probe at a time
+            return self.cache.add(self.probe_key, 1, self.cooldown)
+        except Exception as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+            return True
+
+    def record_success(self):
+        try:
+            self.cache.delete_many([self.failures_key, self.open_until_key, self.probe_key])
+        except Exception as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+        BREAKER_OPEN.labels(webhook=self.webhook_id).set(0)
+
+    def record_failure(self):
+        try:
+            self.cache.add(self.failures_key, 0, self.cooldown * 10)
+            failures = self.cache.incr(self.failures_key)
+            if failures >= self.threshold:
+                self.cache.set(
+                    self.open_until_key, time.time() + self.cooldown, self.cooldown * 10
+                )
+                self.cache.delete(self.probe_key)
+                BREAKER_OPEN.labels(webhook=self.webhook_id).set(1)
+        except Exception as e:
+            logger.warning(f"Circuit breaker state unavailable: {e}")
+
+
+@dataclass
+class DeliveryAttempt:
+    """Outcome of sending (or not sending) one delivery."""
+
+    delivery: WebhookDelivery
+    sent_at: Optional[datetime] = None
+    status_code: Optional[int] = None
+    response_body: str = ""
+    response_headers: dict = field(default_factory=dict)
+    error: str = ""
+    duration_ms: int = 0
+    # Not sent: the circuit is open until this time (epoch seconds)
+    circuit_open_until: Optional[float] = None
+    # Not sent: an earlier event for an ordered webhook failed
+    blocked: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.error and self.status_code is not None and 200 <= self.status_code < 300
+
+
+def send_delivery(delivery, breaker: CircuitBreaker) -> DeliveryAttempt:
+    """
+    Send one delivery over the pooled session for its host.
+
+    Runs on a worker thread; does not touch the database.
+    """
+    webhook = delivery.webhook
+    if not breaker.allow_request():
+        return DeliveryAttempt(delivery, circuit_open_until=breaker.open_until() or time.time())
+
+    payload_bytes, headers = build_request(delivery)
+    attempt = DeliveryAttempt(delivery, sent_at=timezone.now())
+    started = time.perf_counter()
+    try:
+        response = get_session(webhook.url).post(
+            webhook.url,
+            data=payload_bytes,
+            headers=headers,
+            timeout=webhook.timeout_seconds,
+            allow_redirects=False,
+        )
+        attempt.status_code = response.status_code
+        attempt.response_body = response.text[:MAX_RESPONSE_BODY]
+        attempt.response_headers = dict(response.headers)
+        if not attempt.succeeded:
+            attempt.error = f"HTTP {attempt.status_code}: {attempt.response_body[:200]}"
+    except requests.Timeout:
+        attempt.error = f"Request timed out after {webhook.timeout_seconds} seconds"
+    except requests.RequestException as e:
+        attempt.error = f"Request failed: {str(e)}"
+    except Exception as e:
+        logger.exception(f"Unexpected error delivering webhook {delivery.id}: {e}")
+        attempt.error = f"Unexpected error: {str(e)}"
+
+    elapsed = time.perf_counter() - started
+    attempt.duration_ms = int(elapsed * 1000)
+    outcome = "success" if attempt.succeeded else "failure"
+    DELIVERY_LATENCY.labels(outcome=outcome).observe(elapsed)
+    DELIVERIES.labels(outcome=outcome).inc()
+
+    if attempt.succeeded:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    return attempt
+
+
+class WebhookDispatcher:
+    """
+    Deliver a batch of webhook deliveries concurrently.
+
+    Deliveries are grouped by webhook. Each webhook gets up to
+    ``lanes_per_endpoint`` lanes (one if it wants ordered delivery), and each
+    lane sends that webhook's deliveries one after another on a pool thread.
+    Results are recorded on the calling thread as they arrive, using the
+    same model methods as before so retry scheduling, failure counters and
+    auto-disable behave the same.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        lanes_per_endpoint: Optional[int] = None,
+        on_failure: Optional[Callable[[WebhookDelivery], None]] = None,
+    ):
+        self.concurrency = concurrency or getattr(
+            settings, "WEBHOOK_DISPATCH_CONCURRENCY", DEFAULT_CONCURRENCY
+        )
+        self.lanes_per_endpoint = lanes_per_endpoint or getattr(
+            settings, "WEBHOOK_LANES_PER_ENDPOINT", DEFAULT_LANES_PER_ENDPOINT
+        )
+        self.on_failure = on_failure
+
+    def dispatch(self, deliveries: List[WebhookDelivery]) -> List[dict]:
+        """
+        Send deliveries and record their outcomes.
+
+        Args:
+            deliveries: WebhookDelivery instances (with webhook selected)
+
+        Returns:
+            list: One result dict per delivery, in no particular order
+        """
+        results = []
+        groups: Dict = {}
+        webhooks: Dict = {}
+        for delivery in deliveries:
+            # Share one Webhook instance so failure counters accumulate
+            delivery.webhook = webhooks.setdefault(delivery.webhook_id, delivery.webhook)
+            groups.setdefault(delivery.webhook_id, []).append(delivery)
+
+        lanes = []
+        for webhook_id, group in groups.items():
+            webhook = webhooks[webhook_id]
+            group.sort(key=lambda d: d.created_at)
+
+            if not webhook.is_active:
+                results.extend(self._skip_inactive(delivery) for delivery in group)
+                continue
+
+            if webhook.ordered_delivery:
+                backlog_until = self._ordered_backlog(webhook, group)
+                if backlog_until is not None:
+                    for delivery in group:
+                        delivery.defer(backlog_until, "Waiting for earlier events to be delivered")
+                        results.append(self._deferred_result(delivery))
+                    continue
+
+            pending = deque(group)
+            breaker = CircuitBreaker(webhook_id)
+            lane_count = 1 if webhook.ordered_delivery else min(self.lanes_per_endpoint, len(group))
+            lanes.extend((pending, breaker, webhook.ordered_delivery) for _ in range(lane_count))
+
+        total = sum(len(group) for group in groups.values()) - len(results)
+        if not total:
+            return results
+
+        attempts: "queue.Queue[DeliveryAttempt]" = queue.Queue()
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(lanes))) as pool:
+            for lane in lanes:
+                pool.submit(self._run_lane, attempts, *lane)
+
+            retry_at: Dict = {}
+            for _ in range(total):
+                results.append(self._record(attempts.get(), retry_at))
+
+        return results
+
+    def _run_lane(self, attempts, pending, breaker, ordered):
+        blocked = False
+        while True:
+            try:
+                delivery = pending.popleft()
+            except IndexError:
+                return
+            if blocked:
+                attempts.put(DeliveryAttempt(delivery, blocked=True))
+                continue
+            try:
+                attempt = send_delivery(delivery, breaker)
+            except Exception as e:
+                attempt = DeliveryAttempt(delivery, error=f"Unexpected error: {str(e)}")
+            # An ordered webhook must not receive later events before this one
+            blocked = ordered and not attempt.succeeded
+            attempts.put(attempt)
+
+    def _ordered_backlog(self, webhook, group):
+        """Get when older undelivered events of an ordered webhook are due, if any."""
+        return (
+            WebhookDelivery.objects.filter(
+                webhook=webhook,
+                status=WebhookDelivery.RETRYING,
+                created_at__lt=group[0].created_at,
+            )
+            .exclude(id__in=[delivery.id for delivery in group])
+            .order_by("next_retry_at")
+            .values_list("next_retry_at", flat=True)
+            .first()
+        )
+
+    def _record(self, attempt: DeliveryAttempt, retry_at: Dict) -> dict:
+        delivery = attempt.delivery
+
+        if attempt.circuit_open_until is not None:
+            until = datetime.fromtimestamp(attempt.circuit_open_until, tz=dt_timezone.utc)
+            delivery.defer(until, "Circuit breaker open: endpoint is failing")
+            DELIVERIES.labels(outcome="deferred").inc()
+            return self._deferred_result(delivery)
+
+        if attempt.blocked:
+            until = retry_at.get(delivery.webhook_id) or timezone.now()
+            delivery.defer(until, "Waiting for earlier events to be delivered")
+            return self._deferred_result(delivery)
+
+        delivery.sent_at = attempt.sent_at
+        if attempt.succeeded:
+            delivery.mark_as_success(
+                status_code=attempt.status_code,
+                response_body=attempt.response_body,
+                response_headers=attempt.response_headers,
+                duration_ms=attempt.duration_ms,
+            )
+            logger.info(
+                f"Webhook delivery {delivery.id} successful: "
+                f"{attempt.status_code} in {attempt.duration_ms}ms"
+            )
+            return {
+                "status": "success",
+                "delivery_id": str(delivery.id),
+                "status_code": attempt.status_code,
+                "duration_ms": attempt.duration_ms,
+            }
+
+        delivery.mark_as_failed(
+            error_message=attempt.error,
+            status_code=attempt.status_code,
+            response_body=attempt.response_body,
+            duration_ms=attempt.duration_ms,
+        )
+        if delivery.next_retry_at:
+            retry_at[delivery.webhook_id] = delivery.next_retry_at
+        logger.warning(f"Webhook delivery {delivery.id} failed: {attempt.error}")
+
+        if self.on_failure is not None:
+            self.on_failure(delivery)
+
+        return {
+            "status": "failed",
+            "delivery_id": str(delivery.id),
+            "status_code": attempt.status_code,
+            "error": attempt.error,
+            "can_retry": delivery.can_retry(),
+        }
+
+    def _skip_inactive(self, delivery):
+        logger.info(
+            f"Webhook {delivery.webhook_id} is inactive, skipping delivery {delivery.id}"
+        )
+        # Mark as failed without retry since webhook is inactive
+        delivery.error_message = "Webhook is inactive"
+        delivery.attempt_count = delivery.max_attempts
+        delivery.status = WebhookDelivery.FAILED
+        delivery.completed_at = timezone.now()
+        delivery.next_retry_at = None
+        delivery.save(
+            update_fields=[
+                "error_message",
+                "attempt_count",
+                "status",
+                "completed_at",
+                "next_retry_at",
+                "updated_at",
+            ]
+        )
+        return {
+            "status": "skipped",
+            "delivery_id": str(delivery.id),
+            "message": "Webhook is inactive",
+        }
+
+    def _deferred_result(self, delivery):
+        return {
+            "status": "deferred",
+            "delivery_id": str(delivery.id),
+            "error": delivery.error_message,
+            "next_retry_at": delivery.next_retry_at.isoformat(),
+        }
+
+
+def get_due_retry_count() -> int:
+    """Count deliveries waiting for a retry that is due (uses the partial index)."""
+    count = WebhookDelivery.objects.filter(
+        status=WebhookDelivery.RETRYING, next_retry_at__lte=timezone.now()
+    ).count()
+    BACKLOG.set(count)
+    return count
+
+
+def lease_deliveries(ids, seconds: int) -> None:
+    """
+    Push the retry time of scheduled deliveries into the future.
+
+    Keeps the next retry scan from picking them up again while their
+    dispatch task is still queued.
+    """
+    WebhookDelivery.objects.filter(id__in=ids).update(
+        next_retry_at=timezone.now() + timedelta(seconds=seconds)
+    )
+
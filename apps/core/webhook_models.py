@@ -110,6 +110,17 @@ class Webhook(models.Model):
         help_text="Whether the webhook is active and should receive events",
     )
 
+    # Delivery settings
+    timeout_seconds = models.PositiveSmallIntegerField(
+        default=30,
+        help_text="Seconds to wait for the endpoint to respond",
+    )
+
+    ordered_delivery = models.BooleanField(
+        default=False,
+        help_text="Deliver events one at a time, in the order they occurred",
+    )
+
     # Failure tracking
     consecutive_failures = models.IntegerField(
         default=0,
@@ -379,7 +390,11 @@ class WebhookDelivery(models.Model):
         indexes = [
             models.Index(fields=["webhook", "-created_at"], name="delivery_webhook_created_idx"),
             models.Index(fields=["webhook", "status"], name="delivery_webhook_status_idx"),
-            models.Index(fields=["status", "next_retry_at"], name="delivery_retry_idx"),
+            models.Index(
+                fields=["next_retry_at"],
+                name="delivery_due_retry_idx",
+                condition=models.Q(status="RETRYING"),
+            ),
             models.Index(fields=["event_type", "event_id"], name="delivery_event_idx"),
         ]
 
@@ -462,6 +477,7 @@ class WebhookDelivery(models.Model):
                 "response_body",
                 "response_headers",
                 "duration_ms",
+                "sent_at",
                 "completed_at",
                 "updated_at",
             ]
@@ -508,6 +524,7 @@ class WebhookDelivery(models.Model):
                 "response_body",
                 "duration_ms",
                 "next_retry_at",
+                "sent_at",
                 "completed_at",
                 "updated_at",
             ]
@@ -516,6 +533,22 @@ class WebhookDelivery(models.Model):
         # Update webhook failure tracking
         self.webhook.record_failure()
 
+    def defer(self, until, reason):
+        """
+        Postpone delivery without using up an attempt.
+
+        Used when the endpoint's circuit breaker is open or an earlier event
+        for an ordered webhook is still waiting to be delivered.
+
+        Args:
+            until: When the delivery should next be attempted
+            reason: Why the delivery was postponed
+        """
+        self.status = self.RETRYING
+        self.next_retry_at = until
+        self.error_message = reason
+        self.save(update_fields=["status", "next_retry_at", "error_message", "updated_at"])
+
     def get_retry_info(self):
         """
         Get human-readable retry information.
@@ -2,7 +2,8 @@
 Celery tasks for webhook delivery.
 
 This module provides:
-- Webhook delivery with HMAC signing
+- Webhook delivery with HMAC signing, through the concurrent dispatcher
+  (see webhook_dispatcher.py)
 - Retry logic with exponential backoff
 - Delivery status tracking
 - Request/response logging
@@ -11,45 +12,45 @@ This module provides:
 Per Requirement 32 - Webhook and Integration Management
 """
 
-import hashlib
-import hmac
-import json
 import logging
-import time
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
 
-import requests
 from celery import shared_task
 
+from .webhook_dispatcher import (  # noqa: F401 (generate_hmac_signature is re-exported)
+    WebhookDispatcher,
+    generate_hmac_signature,
+    get_due_retry_count,
+    lease_deliveries,
+)
 from .webhook_models import Webhook, WebhookDelivery
 
 logger = logging.getLogger(__name__)
 
+# Retry scheduling defaults (overridable in settings)
+DEFAULT_RETRY_BATCH_SIZE = 100
+DEFAULT_DISPATCH_LEASE = 300
 
-@shared_task(
-    name="apps.core.webhook_tasks.deliver_webhook",
-    bind=True,
-    max_retries=5,
-    default_retry_delay=60,  # 1 minute base delay
-    autoretry_for=(requests.RequestException,),
-    retry_backoff=True,
-    retry_backoff_max=14400,  # 4 hours max
-    retry_jitter=True,
-)
-def deliver_webhook(self, delivery_id):  # noqa: C901
+
+@shared_task(name="apps.core.webhook_tasks.deliver_webhook")
+def deliver_webhook(delivery_id):
     """
-    Deliver a webhook to its target URL.
+    Deliver a single webhook to its target URL.
 
     This task handles:
     - HMAC payload signing (Requirement 32.3)
-    - HTTP delivery with timeout
+    - HTTP delivery with the webhook's timeout
     - Response tracking
-    - Retry logic with exponential backoff (Requirement 32.4)
+    - Retry scheduling with exponential backoff (Requirement 32.4)
     - Status tracking (Requirement 32.5)
     - Request/response logging (Requirement 32.6)
 
+    Failed deliveries get a next_retry_at and are picked up again by
+    retry_failed_webhooks.
+
     Args:
         delivery_id: UUID of the WebhookDelivery to send
 
@@ -63,219 +64,30 @@ def deliver_webhook(self, delivery_id):  # noqa: C901
         logger.error(f"WebhookDelivery {delivery_id} not found")
         return {"status": "error", "message": "Delivery not found"}
 
-    webhook = delivery.webhook
-
-    # Check if webhook is still active
-    if not webhook.is_active:
-        logger.info(f"Webhook {webhook.id} is inactive, skipping delivery {delivery_id}")
-        # Mark as failed without retry since webhook is inactive
-        delivery.error_message = "Webhook is inactive"
-        delivery.attempt_count = delivery.max_attempts  # Set to max to prevent retries
-        delivery.status = WebhookDelivery.FAILED
-        delivery.completed_at = timezone.now()
-        delivery.save(
-            update_fields=[
-                "error_message",
-                "attempt_count",
-                "status",
-                "completed_at",
-                "updated_at",
-            ]
-        )
-        return {"status": "skipped", "message": "Webhook is inactive"}
-
-    # Prepare the payload
-    payload_json = json.dumps(delivery.payload, separators=(",", ":"))
-    payload_bytes = payload_json.encode("utf-8")
-
-    # Generate HMAC signature (Requirement 32.3)
-    signature = generate_hmac_signature(webhook.secret, payload_bytes)
-
-    # Prepare headers
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "JewelryShop-Webhook/1.0",
-        "X-Webhook-Signature": signature,
-        "X-Webhook-Event": delivery.event_type,
-        "X-Webhook-Delivery": str(delivery.id),
-        "X-Webhook-Timestamp": str(int(time.time())),
-    }
-
-    # Record the attempt
-    delivery.sent_at = timezone.now()
-    delivery.save(update_fields=["sent_at", "updated_at"])
+    return get_dispatcher().dispatch([delivery])[0]
 
-    # Make the HTTP request
-    start_time = time.time()
-    response_status_code = None
-    response_body = ""
-    response_headers = {}
-    error_message = ""
 
-    try:
-        # Send the webhook with timeout
-        response = requests.post(
-            webhook.url,
-            data=payload_bytes,
-            headers=headers,
-            timeout=30,  # 30 second timeout
-            allow_redirects=False,  # Don't follow redirects
-        )
-
-        # Calculate duration
-        duration_ms = int((time.time() - start_time) * 1000)
-
-        # Get response details
-        response_status_code = response.status_code
-        response_body = response.text[:10000]  # Truncate to 10KB
-        response_headers = dict(response.headers)
-
-        # Check if successful (2xx status codes)
-        if 200 <= response_status_code < 300:
-            # Mark as successful
-            delivery.mark_as_success(
-                status_code=response_status_code,
-                response_body=response_body,
-                response_headers=response_headers,
-                duration_ms=duration_ms,
-            )
-
-            logger.info(
-                f"Webhook delivery {delivery_id} successful: "
-                f"{response_status_code} in {duration_ms}ms"
-            )
-
-            return {
-                "status": "success",
-                "delivery_id": str(delivery_id),
-                "status_code": response_status_code,
-                "duration_ms": duration_ms,
-            }
-        else:
-            # Non-2xx status code is a failure
-            error_message = f"HTTP {response_status_code}: {response_body[:200]}"
-
-            # Mark as failed and schedule retry if possible
-            delivery.mark_as_failed(
-                error_message=error_message,
-                status_code=response_status_code,
-                response_body=response_body,
-                duration_ms=duration_ms,
-            )
-
-            logger.warning(
-                f"Webhook delivery {delivery_id} failed with status {response_status_code}: "
-                f"{error_message}"
-            )
-
-            # Check if we should alert on this failure
-            if webhook.should_alert_on_failure():
-                send_webhook_failure_alert.delay(webhook.id, delivery.id)
-
-            # Schedule retry if possible
-            if delivery.can_retry():
-                # Calculate retry delay based on attempt count
-                retry_delay = calculate_retry_delay(delivery.attempt_count)
-                logger.info(
-                    f"Scheduling retry for delivery {delivery_id} "
-                    f"in {retry_delay} seconds (attempt {delivery.attempt_count + 1})"
-                )
-                # Schedule the retry
-                deliver_webhook.apply_async(
-                    args=[str(delivery_id)],
-                    countdown=retry_delay,
-                )
-
-            return {
-                "status": "failed",
-                "delivery_id": str(delivery_id),
-                "status_code": response_status_code,
-                "error": error_message,
-                "can_retry": delivery.can_retry(),
-            }
-
-    except requests.Timeout:
-        # Request timed out
-        duration_ms = int((time.time() - start_time) * 1000)
-        error_message = "Request timed out after 30 seconds"
-
-        delivery.mark_as_failed(
-            error_message=error_message,
-            status_code=None,
-            response_body="",
-            duration_ms=duration_ms,
-        )
-
-        logger.warning(f"Webhook delivery {delivery_id} timed out")
-
-        # Check if we should alert
-        if webhook.should_alert_on_failure():
-            send_webhook_failure_alert.delay(webhook.id, delivery.id)
-
-        # Schedule retry if possible
-        if delivery.can_retry():
-            retry_delay = calculate_retry_delay(delivery.attempt_count)
-            deliver_webhook.apply_async(
-                args=[str(delivery_id)],
-                countdown=retry_delay,
-            )
-
-        return {
-            "status": "failed",
-            "delivery_id": str(delivery_id),
-            "error": error_message,
-            "can_retry": delivery.can_retry(),
-        }
-
-    except requests.RequestException as e:
-        # Network error or other request exception
-        duration_ms = int((time.time() - start_time) * 1000)
-        error_message = f"Request failed: {str(e)}"
-
-        delivery.mark_as_failed(
-            error_message=error_message,
-            status_code=None,
-            response_body="",
-            duration_ms=duration_ms,
-        )
-
-        logger.error(f"Webhook delivery {delivery_id} failed with exception: {e}")
+@shared_task(name="apps.core.webhook_tasks.dispatch_webhook_deliveries")
+def dispatch_webhook_deliveries(delivery_ids):
+    """
+    Deliver many webhooks concurrently.
 
-        # Check if we should alert
-        if webhook.should_alert_on_failure():
-            send_webhook_failure_alert.delay(webhook.id, delivery.id)
+    Used for event fan-out and retries: one task sends every delivery in the
+    batch through the pooled, circuit-breaking dispatcher.
 
-        # Schedule retry if possible
-        if delivery.can_retry():
-            retry_delay = calculate_retry_delay(delivery.attempt_count)
-            deliver_webhook.apply_async(
-                args=[str(delivery_id)],
-                countdown=retry_delay,
-            )
+    Args:
+        delivery_ids: UUIDs of the WebhookDeliveries to send
 
-        return {
-            "status": "failed",
-            "delivery_id": str(delivery_id),
-            "error": error_message,
-            "can_retry": delivery.can_retry(),
-        }
-
-    except Exception as e:
-        # Unexpected error
-        logger.exception(f"Unexpected error delivering webhook {delivery_id}: {e}")
-
-        delivery.mark_as_failed(
-            error_message=f"Unexpected error: {str(e)}",
-            status_code=None,
-            response_body="",
-            duration_ms=0,
-        )
+    Returns:
+        dict: Number of deliveries per result status
+    """
+    deliveries = list(WebhookDelivery.objects.select_related("webhook").filter(id__in=delivery_ids))
+    summary = {}
+    for result in get_dispatcher().dispatch(deliveries):
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
 
-        return {
-            "status": "error",
-            "delivery_id": str(delivery_id),
-            "error": str(e),
-        }
+    logger.info(f"Dispatched {len(deliveries)} webhook deliveries: {summary}")
+    return summary
 
 
 @shared_task(name="apps.core.webhook_tasks.send_webhook_failure_alert")
@@ -316,7 +128,7 @@ def send_webhook_failure_alert(webhook_id, delivery_id):
         )
 
     # Create in-app notification
-    from apps.notifications.models import Notification
+    from apps.notifications.services import create_notification
 
     # Build detailed message with error info
     detailed_message = (
@@ -327,7 +139,7 @@ def send_webhook_failure_alert(webhook_id, delivery_id):
 
     # Notify the webhook creator
     if webhook.created_by:
-        Notification.objects.create(
+        create_notification(
             user=webhook.created_by,
             title=f"Webhook Failure Alert: {webhook.name}",
             message=detailed_message,
@@ -337,7 +149,7 @@ def send_webhook_failure_alert(webhook_id, delivery_id):
     # Also notify tenant owner
     tenant_owner = webhook.tenant.users.filter(role="TENANT_OWNER").first()
     if tenant_owner and tenant_owner != webhook.created_by:
-        Notification.objects.create(
+        create_notification(
             user=tenant_owner,
             title=f"Webhook Failure Alert: {webhook.name}",
             message=detailed_message,
@@ -356,49 +168,38 @@ def retry_failed_webhooks():
     Periodic task to retry failed webhook deliveries.
 
     This task:
-    - Finds deliveries that are ready for retry
-    - Schedules delivery tasks for them
+    - Finds deliveries that are due for retry (a partial index covers
+      RETRYING deliveries only, so this does not scan the table)
+    - Schedules dispatch tasks for them in batches
     - Implements exponential backoff (Requirement 32.4)
 
     This should be run periodically (e.g., every minute) via Celery Beat.
     """
-    now = timezone.now()
-
-    # Find deliveries that are ready for retry
-    deliveries_to_retry = WebhookDelivery.objects.filter(
-        status=WebhookDelivery.RETRYING,
-        next_retry_at__lte=now,
-    ).select_related("webhook")
-
-    retry_count = 0
-
-    for delivery in deliveries_to_retry:
-        # Check if webhook is still active
-        if not delivery.webhook.is_active:
-            logger.info(
-                f"Skipping retry for delivery {delivery.id} - webhook {delivery.webhook.id} is inactive"
-            )
-            delivery.mark_as_failed(
-                error_message="Webhook was deactivated",
-                status_code=None,
-                response_body="",
-                duration_ms=0,
-            )
-            continue
+    batch_size = getattr(settings, "WEBHOOK_RETRY_BATCH_SIZE", DEFAULT_RETRY_BATCH_SIZE)
+    lease = getattr(settings, "WEBHOOK_DISPATCH_LEASE", DEFAULT_DISPATCH_LEASE)
 
-        # Schedule the delivery
-        deliver_webhook.delay(str(delivery.id))
-        retry_count += 1
+    get_due_retry_count()
 
-        logger.info(
-            f"Scheduled retry for delivery {delivery.id} "
-            f"(attempt {delivery.attempt_count + 1}/{delivery.max_attempts})"
+    # Oldest events first, so ordered webhooks receive them in order
+    due_ids = [
+        str(delivery_id)
+        for delivery_id in WebhookDelivery.objects.filter(
+            status=WebhookDelivery.RETRYING,
+            next_retry_at__lte=timezone.now(),
         )
+        .order_by("created_at")
+        .values_list("id", flat=True)[: batch_size * 10]
+    ]
 
-    if retry_count > 0:
-        logger.info(f"Scheduled {retry_count} webhook delivery retries")
+    for start in range(0, len(due_ids), batch_size):
+        batch = due_ids[start : start + batch_size]
+        lease_deliveries(batch, lease)
+        dispatch_webhook_deliveries.delay(batch)
 
-    return {"retries_scheduled": retry_count}
+    if due_ids:
+        logger.info(f"Scheduled {len(due_ids)} webhook delivery retries")
+
+    return {"retries_scheduled": len(due_ids)}
 
 
 @shared_task(name="apps.core.webhook_tasks.cleanup_old_deliveries")
@@ -441,26 +242,15 @@ def cleanup_old_deliveries(days=90):
 # Helper functions
 
 
-def generate_hmac_signature(secret, payload_bytes):
-    """
-    Generate HMAC-SHA256 signature for webhook payload.
-
-    Requirement 32.3: Sign webhook payloads with HMAC for verification.
-
-    Args:
-        secret: Webhook secret key
-        payload_bytes: Payload as bytes
+def get_dispatcher():
+    """Get a dispatcher that alerts the tenant about consistent failures."""
+    return WebhookDispatcher(on_failure=alert_on_failure)
 
-    Returns:
-        str: Hex-encoded HMAC signature
-    """
-    signature = hmac.new(
-        secret.encode("utf-8"),
-        payload_bytes,
-        hashlib.sha256,
-    ).hexdigest()
 
-    return signature
+def alert_on_failure(delivery):
+    """Send a failure alert when a webhook reaches an alert threshold (Requirement 32.7)."""
+    if delivery.webhook.should_alert_on_failure():
+        send_webhook_failure_alert.delay(delivery.webhook_id, delivery.id)
 
 
 def calculate_retry_delay(attempt_count):
@@ -508,25 +298,23 @@ def trigger_webhook_event(event_type, event_id, payload_data, tenant):
         events__contains=[event_type],
     )
 
-    triggered_count = 0
-
-    for webhook in webhooks:
-        # Create delivery record
-        delivery = WebhookDelivery.objects.create(
-            webhook=webhook,
-            event_type=event_type,
-            event_id=event_id,
-            payload=payload_data,
-            signature="",  # Will be generated during delivery
-            status=WebhookDelivery.PENDING,
-        )
-
-        # Schedule delivery task
-        deliver_webhook.delay(str(delivery.id))
-        triggered_count += 1
+    deliveries = WebhookDelivery.objects.bulk_create(
+        [
+            WebhookDelivery(
+                webhook=webhook,
+                event_type=event_type,
+                event_id=event_id,
+                payload=payload_data,
+                signature="",  # Will be generated during delivery
+                status=WebhookDelivery.PENDING,
+            )
+            for webhook in webhooks
+        ]
+    )
 
-        logger.info(
-            f"Triggered webhook {webhook.name} for event {event_type} " f"(delivery {delivery.id})"
-        )
+    # One task sends the event to every subscribed webhook
+    if deliveries:
+        dispatch_webhook_deliveries.delay([str(delivery.id) for delivery in deliveries])
+        logger.info(f"Triggered {len(deliveries)} webhooks for event {event_type}")
 
-    return triggered_count
+    return len(deliveries)
@@ -14,7 +14,7 @@ from uuid import UUID
 from django.utils import timezone
 
 from .webhook_models import Webhook, WebhookDelivery
-from .webhook_tasks import deliver_webhook
+from .webhook_tasks import dispatch_webhook_deliveries
 
 logger = logging.getLogger(__name__)
 
@@ -62,42 +62,43 @@ def trigger_webhook_event(
         events__contains=[event_type],
     )
 
-    triggered_count = 0
-
-    for webhook in webhooks:
-        # Enrich payload with metadata
-        enriched_payload = {
-            "event": event_type,
-            "event_id": str(event_id),
-            "timestamp": timezone.now().isoformat(),
-            "tenant_id": str(tenant.id),
-            "data": payload_data,
-        }
-
-        # Create delivery record
-        delivery = WebhookDelivery.objects.create(
-            webhook=webhook,
-            event_type=event_type,
-            event_id=event_id,
-            payload=enriched_payload,
-            signature="",  # Will be generated during delivery
-            status=WebhookDelivery.PENDING,
-        )
-
-        # Schedule delivery task
-        if async_delivery:
-            deliver_webhook.delay(str(delivery.id))
-        else:
-            # Synchronous delivery (useful for testing)
-            deliver_webhook(str(delivery.id))
-
-        triggered_count += 1
-
-        logger.info(
-            f"Triggered webhook {webhook.name} for event {event_type} " f"(delivery {delivery.id})"
-        )
-
-    return triggered_count
+    # Enrich payload with metadata
+    enriched_payload = {
+        "event": event_type,
+        "event_id": str(event_id),
+        "timestamp": timezone.now().isoformat(),
+        "tenant_id": str(tenant.id),
+        "data": payload_data,
+    }
+
+    # Create all delivery records with one INSERT
+    deliveries = WebhookDelivery.objects.bulk_create(
+        [
+            WebhookDelivery(
+                webhook=webhook,
+                event_type=event_type,
+                event_id=event_id,
+                payload=enriched_payload,
+                signature="",  # Will be generated during delivery
+                status=WebhookDelivery.PENDING,
+            )
+            for webhook in webhooks
+        ]
+    )
+    if not deliveries:
+        return 0
+
+    # One task sends the event to every subscribed webhook concurrently
+    delivery_ids = [str(delivery.id) for delivery in deliveries]
+    if async_delivery:
+        dispatch_webhook_deliveries.delay(delivery_ids)
+    else:
+        # Synchronous delivery (useful for testing)
+        dispatch_webhook_deliveries(delivery_ids)
+
+    logger.info(f"Triggered {len(deliveries)} webhooks for event {event_type}")
+
+    return len(deliveries)
 
 
 def trigger_sale_created(sale):
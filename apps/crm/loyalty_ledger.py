@@ -0,0 +1,221 @@
+"""
+Loyalty points ledger: bulk expiry, balance audit and point-in-time balances.
+
+Implements Requirement 36: Enhanced Loyalty Program
+- Point expiration policies to encourage usage (36.8)
+- Loyalty balances that always match the transaction history
+
+A customer's loyalty transactions are the source of truth: the balance kept
+on ``Customer.loyalty_points`` is the sum of their points. Points are spent
+first in, first out, so a redemption consumes the oldest points still
+available and only the unspent part of an old batch can expire.
+
+Expiry runs per tenant (or per customer) as one statement: window sums over
+the history find what is left of each old batch, the EXPIRED transactions
+are written with one ``INSERT ... SELECT`` and the balances adjusted with
+one ``UPDATE ... FROM`` over the per-customer totals. The cost is a few
+statements however many customers the tenant has. Only customers with old
+batches not yet processed are touched, so a nightly run does not grow with
+the size of the history.
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import LoyaltyTransaction
+
+logger = logging.getLogger(__name__)
+
+# Transaction types whose points expire
+EXPIRING_TYPES = (LoyaltyTransaction.EARNED, LoyaltyTransaction.BONUS)
+
+# Customers with an old expiring batch that no run has processed yet
+CANDIDATES_SQL = """
+    SELECT c.id FROM crm_customers c
+    WHERE {scope} AND EXISTS (
+        SELECT 1 FROM crm_loyalty_transactions t
+        WHERE t.customer_id = c.id AND t.transaction_type IN %(types)s
+          AND t.points > 0 AND t.created_at < %(cutoff)s AND t.expires_at IS NULL
+    )
+"""
+
+EXPIRE_SQL = """
+    WITH candidates AS ({candidates}),
+    credits AS (
+        -- Points credited before each old batch, in the order they are spent
+        SELECT t.id, t.customer_id, t.points, t.transaction_type,
+               COALESCE(SUM(t.points) OVER (
+                   PARTITION BY t.customer_id ORDER BY t.created_at, t.id
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ), 0) AS earlier
+        FROM crm_loyalty_transactions t
+        JOIN candidates c ON c.id = t.customer_id
+        WHERE t.points > 0 AND t.created_at < %(cutoff)s
+    ),
+    debits AS (
+        SELECT t.customer_id, -SUM(t.points) AS spent
+        FROM crm_loyalty_transactions t
+        JOIN candidates c ON c.id = t.customer_id
+        WHERE t.points < 0
+        GROUP BY t.customer_id
+    ),
+    batches AS (
+        -- What is left of each old batch once all debits consumed the oldest points
+        SELECT cr.id, cr.customer_id,
+               cr.points - LEAST(cr.points, GREATEST(COALESCE(d.spent, 0) - cr.earlier, 0))
+                   AS remaining
+        FROM credits cr
+        LEFT JOIN debits d ON d.customer_id = cr.customer_id
+        WHERE cr.transaction_type IN %(types)s
+    ),
+    totals AS (
+        SELECT customer_id, SUM(remaining)::integer AS expired
+        FROM batches
+        GROUP BY customer_id
+        HAVING SUM(remaining) > 0
+    ),
+    marked AS (
+        UPDATE crm_loyalty_transactions t SET expires_at = %(now)s
+        FROM batches b
+        WHERE t.id = b.id AND t.expires_at IS NULL
+    ),
+    inserted AS (
+        INSERT INTO crm_loyalty_transactions
+            (id, customer_id, transaction_type, points, description, metadata, created_at)
+        SELECT gen_random_uuid(), customer_id, %(expired_type)s, -expired, %(description)s,
+               %(metadata)s::jsonb, %(now)s
+        FROM totals
+    )
+    UPDATE crm_customers c
+    SET loyalty_points = GREATEST(c.loyalty_points - totals.expired, 0)
+    FROM totals
+    WHERE c.id = totals.customer_id
+    RETURNING c.id, totals.expired
+"""
+
+DRIFT_SQL = """
+    SELECT c.id, c.tenant_id, c.customer_number, c.loyalty_points,
+           GREATEST(COALESCE(l.points, 0), 0) AS ledger_points
+    FROM crm_customers c
+    LEFT JOIN (
+        SELECT t.customer_id, SUM(t.points) AS points
+        FROM crm_loyalty_transactions t
+        JOIN crm_customers c ON c.id = t.customer_id
+        WHERE {scope}
+        GROUP BY t.customer_id
+    ) l ON l.customer_id = c.id
+    WHERE {scope} AND c.loyalty_points <> GREATEST(COALESCE(l.points, 0), 0)
+"""
+
+
+def _scope(tenant_id=None, customer_id=None):
+    """WHERE clause on crm_customers c and its parameters."""
+    if customer_id:
+        return "c.id = %(customer)s", {"customer": str(customer_id)}
+    if tenant_id:
+        return "c.tenant_id = %(tenant)s", {"tenant": str(tenant_id)}
+    return "TRUE", {}
+
+
+def expire_points(
+    tenant_id=None,
+    customer_id=None,
+    expiration_months: int = 12,
+    now: Optional[datetime] = None,
+) -> Dict:
+    """
+    Expire the unspent part of points older than expiration_months.
+
+    Runs for one customer, one tenant or all tenants. Customers are locked
+    for the duration, so awards and redemptions made meanwhile wait and are
+    never counted twice. Old batches are marked with ``expires_at`` and not
+    looked at again; running twice expires nothing more.
+
+    Returns a dict mapping customer id to the points expired.
+    """
+    from dateutil.relativedelta import relativedelta
+
+    now = now or timezone.now()
+    scope, params = _scope(tenant_id, customer_id)
+    params.update(
+        types=EXPIRING_TYPES,
+        cutoff=now - relativedelta(months=expiration_months),
+        now=now,
+        expired_type=LoyaltyTransaction.EXPIRED,
+        description=f"Points expired after {expiration_months} months",
+        metadata=json.dumps({"expiration_months": expiration_months}),
+    )
+    candidates = CANDIDATES_SQL.format(scope=scope)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"{candidates} ORDER BY c.id FOR UPDATE OF c", params)
+        if not cursor.fetchall():
+            return {}
+        cursor.execute(EXPIRE_SQL.format(candidates=candidates), params)
+        expired = dict(cursor.fetchall())
+
+    if expired:
+        logger.info(
+            f"Expired {sum(expired.values())} loyalty points of {len(expired)} customers "
+            f"older than {expiration_months} months"
+        )
+    return expired
+
+
+def balance_at(customer, when: datetime) -> int:
+    """A customer's loyalty balance as of ``when``, from their transactions."""
+    return LoyaltyTransaction.objects.filter(customer=customer, created_at__lte=when).aggregate(
+        points=Coalesce(Sum("points"), 0)
+    )["points"]
+
+
+def find_balance_drift(tenant_id=None) -> List[Dict]:
+    """
+    Customers whose balance differs from the sum of their transactions.
+
+    Returns dicts with id, tenant_id, customer_number, loyalty_points and
+    ledger_points.
+    """
+    scope, params = _scope(tenant_id)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            DRIFT_SQL.format(scope=scope) + " ORDER BY c.tenant_id, c.customer_number", params
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def reconcile_balances(tenant_id=None, apply: bool = False) -> List[Dict]:
+    """
+    Report balance drift and, with ``apply``, rebuild balances from the history.
+
+    The rebuild is one ``UPDATE ... FROM`` over the drift query, run with the
+    customers locked so balances changed meanwhile are not overwritten.
+    """
+    if not apply:
+        return find_balance_drift(tenant_id)
+
+    scope, params = _scope(tenant_id)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT c.id FROM crm_customers c WHERE {scope} ORDER BY c.id FOR UPDATE OF c", params
+        )
+        cursor.execute(
+            "UPDATE crm_customers AS c SET loyalty_points = d.ledger_points "
+            f"FROM ({DRIFT_SQL.format(scope=scope)}) AS d WHERE c.id = d.id "
+            "RETURNING d.id, d.tenant_id, d.customer_number, d.loyalty_points, d.ledger_points",
+            params,
+        )
+        columns = [column[0] for column in cursor.description]
+        drift = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    if drift:
+        logger.warning(f"Rebuilt loyalty balance of {len(drift)} customers from transactions")
+    return sorted(drift, key=lambda row: (str(row["tenant_id"]), row["customer_number"]))
@@ -0,0 +1,54 @@
+"""
+Management command to check loyalty balances against the loyalty transactions.
+
+Usage:
+    python manage.py audit_loyalty_balances
+    python manage.py audit_loyalty_balances --tenant <uuid>
+    python manage.py audit_loyalty_balances --repair
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Tenant
+from apps.core.tenant_context import bypass_rls
+from apps.crm.loyalty_ledger import reconcile_balances
+
+
+class Command(BaseCommand):
+    """Management command to report and repair loyalty balance drift."""
+
+    help = "Report customers whose loyalty balance differs from their transactions, optionally fixing them"
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument("--tenant", type=str, help="Only check this tenant (UUID)")
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Recompute drifted balances from the loyalty transactions",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        with bypass_rls():
+            if options["tenant"] and not Tenant.objects.filter(id=options["tenant"]).exists():
+                raise CommandError(f"Tenant {options['tenant']} not found")
+
+            drift = reconcile_balances(options["tenant"], apply=options["repair"])
+
+        for row in drift:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Tenant {row['tenant_id']}: customer {row['customer_number']} has "
+                    f"{row['loyalty_points']} points, transactions add up to {row['ledger_points']}"
+                )
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("No loyalty balance drift found"))
+        elif options["repair"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"Recomputed {len(drift)} balance(s) from transactions")
+            )
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} balance(s) drifted"))
@@ -32,7 +32,8 @@ from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 
 from apps.core.models import Tenant
@@ -494,7 +495,35 @@ class Customer(models.Model):
         discount = amount * (self.loyalty_tier.discount_percentage / Decimal("100"))
         return discount.quantize(Decimal("0.01"))
 
-    def add_loyalty_points(self, points, description=""):
+    def _apply_loyalty_points(self, points, transaction_type, description, totals=None, **fields):
+        """
+        Change the balance by ``points`` and record the loyalty transaction.
+
+        The balance is changed by PostgreSQL with an F() expression, so
+        concurrent awards and redemptions never overwrite each other. A debit
+        only applies while the balance covers it; returns False otherwise.
+        """
+        totals = totals or {}
+        updates = {field: F(field) + amount for field, amount in totals.items()}
+        updates["loyalty_points"] = F("loyalty_points") + points
+        customers = Customer.objects.filter(pk=self.pk)
+        if points < 0:
+            customers = customers.filter(loyalty_points__gte=-points)
+
+        with transaction.atomic():
+            if not customers.update(**updates):
+                return False
+            LoyaltyTransaction.objects.create(
+                customer=self,
+                transaction_type=transaction_type,
+                points=points,
+                description=description,
+                **fields,
+            )
+        self.refresh_from_db(fields=["loyalty_points", *totals])
+        return True
+
+    def add_loyalty_points(self, points, description="", sale=None):
         """Add loyalty points to customer account."""
         if points <= 0:
             return
@@ -503,34 +532,33 @@ class Customer(models.Model):
         if self.loyalty_tier and self.loyalty_tier.points_multiplier:
             points = int(points * self.loyalty_tier.points_multiplier)
 
-        self.loyalty_points += points
-        self.total_points_earned += points
-        self.save(update_fields=["loyalty_points", "total_points_earned"])
-
-        # Create loyalty transaction record
-        LoyaltyTransaction.objects.create(
-            customer=self,
-            transaction_type=LoyaltyTransaction.EARNED,
-            points=points,
-            description=description or f"Points earned: {points}",
+        self._apply_loyalty_points(
+            points,
+            LoyaltyTransaction.EARNED,
+            description or f"Points earned: {points}",
+            totals={"total_points_earned": points},
+            sale=sale,
         )
 
     def redeem_loyalty_points(self, points, description=""):
         """Redeem loyalty points from customer account."""
-        if points <= 0 or points > self.loyalty_points:
+        if points <= 0 or not self._apply_loyalty_points(
+            -points,  # Negative for redemption
+            LoyaltyTransaction.REDEEMED,
+            description or f"Points redeemed: {points}",
+            totals={"total_points_redeemed": points},
+        ):
             raise ValueError("Invalid points amount for redemption")
 
-        self.loyalty_points -= points
-        self.total_points_redeemed += points
-        self.save(update_fields=["loyalty_points", "total_points_redeemed"])
-
-        # Create loyalty transaction record
-        LoyaltyTransaction.objects.create(
-            customer=self,
-            transaction_type=LoyaltyTransaction.REDEEMED,
-            points=-points,  # Negative for redemption
-            description=description or f"Points redeemed: {points}",
-        )
+    def deduct_loyalty_points(self, points, description="", created_by=None):
+        """Remove loyalty points from customer account as a manual adjustment."""
+        if points <= 0 or not self._apply_loyalty_points(
+            -points,
+            LoyaltyTransaction.ADJUSTED,
+            description or f"Manual adjustment: -{points}",
+            created_by=created_by,
+        ):
+            raise ValueError("Insufficient loyalty points")
 
     def transfer_points_to(self, recipient, points, description=""):
         """
@@ -538,76 +566,51 @@ class Customer(models.Model):
 
         Implements Requirement 36.9: Allow point transfers between family members
         """
-        if points <= 0 or points > self.loyalty_points:
+        if points <= 0:
             raise ValueError("Invalid points amount for transfer")
 
-        if recipient.tenant != self.tenant:
+        if recipient.tenant_id != self.tenant_id:
             raise ValueError("Can only transfer points within same tenant")
 
-        # Deduct from sender
-        self.loyalty_points -= points
-        self.save(update_fields=["loyalty_points"])
-
-        # Add to recipient (without multiplier)
-        recipient.loyalty_points += points
-        recipient.total_points_earned += points
-        recipient.save(update_fields=["loyalty_points", "total_points_earned"])
-
-        # Create transaction records
-        LoyaltyTransaction.objects.create(
-            customer=self,
-            transaction_type=LoyaltyTransaction.ADJUSTED,
-            points=-points,
-            description=description
-            or f"Transferred {points} points to {recipient.get_full_name()}",
-        )
-
-        LoyaltyTransaction.objects.create(
-            customer=recipient,
-            transaction_type=LoyaltyTransaction.BONUS,
-            points=points,
-            description=description or f"Received {points} points from {self.get_full_name()}",
-        )
+        with transaction.atomic():
+            # Deduct from sender
+            if not self._apply_loyalty_points(
+                -points,
+                LoyaltyTransaction.ADJUSTED,
+                description or f"Transferred {points} points to {recipient.get_full_name()}",
+            ):
+                raise ValueError("Invalid points amount for transfer")
+
+            # Add to recipient (without multiplier)
+            recipient._apply_loyalty_points(
+                points,
+                LoyaltyTransaction.BONUS,
+                description or f"Received {points} points from {self.get_full_name()}",
+                totals={"total_points_earned": points},
+            )
 
     def expire_old_points(self, expiration_months=12):
         """
         Expire loyalty points older than specified months.
 
         Implements Requirement 36.8: Set point expiration policies to encourage usage
-        """
-        from dateutil.relativedelta import relativedelta
 
-        expiration_date = timezone.now() - relativedelta(months=expiration_months)
+        Only the part of old points not yet spent expires (points are spent
+        oldest first); see apps.crm.loyalty_ledger.
+        """
+        from .loyalty_ledger import expire_points
 
-        # Find unexpired earned points older than expiration date
-        old_transactions = LoyaltyTransaction.objects.filter(
-            customer=self,
-            transaction_type__in=[LoyaltyTransaction.EARNED, LoyaltyTransaction.BONUS],
-            created_at__lt=expiration_date,
-            expires_at__isnull=True,  # Not already expired
+        total_expired = expire_points(customer_id=self.pk, expiration_months=expiration_months).get(
+            self.pk, 0
         )
+        self.refresh_from_db(fields=["loyalty_points"])
+        return total_expired
 
-        total_expired = 0
-        for transaction in old_transactions:
-            if transaction.points > 0:
-                total_expired += transaction.points
-                transaction.expires_at = timezone.now()
-                transaction.save(update_fields=["expires_at"])
-
-        if total_expired > 0:
-            # Deduct expired points from customer balance
-            self.loyalty_points = max(0, self.loyalty_points - total_expired)
-            self.save(update_fields=["loyalty_points"])
-
-            # Create expiration transaction
-            LoyaltyTransaction.objects.create(
-                customer=self,
-                transaction_type=LoyaltyTransaction.EXPIRED,
-                points=-total_expired,
-                description=f"Points expired after {expiration_months} months",
-            )
+    def loyalty_points_at(self, when):
+        """Loyalty points balance as of the given time, from the transaction history."""
+        from .loyalty_ledger import balance_at
 
-        return total_expired
+        return balance_at(self, when)
 
     def add_store_credit(self, amount, description="", created_by=None, sale=None):
         """
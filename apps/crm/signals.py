@@ -6,6 +6,7 @@ Implements Requirement 36: Enhanced Loyalty Program
 - Automatic tier upgrades based on spending
 """
 
+from django.db.models import F
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -65,13 +66,17 @@ def award_loyalty_points_on_sale(sender, instance, created, **kwargs):
 
     # Award points to CRM customer (tier multiplier is applied in add_loyalty_points method)
     crm_customer.add_loyalty_points(
-        base_points, description=f"Purchase: {instance.sale_number} (${instance.total})"
+        base_points,
+        description=f"Purchase: {instance.sale_number} (${instance.total})",
+        sale=instance,
     )
 
     # Update customer's total purchases and last purchase date
-    crm_customer.total_purchases += instance.total
-    crm_customer.last_purchase_at = instance.completed_at or instance.created_at
-    crm_customer.save(update_fields=["total_purchases", "last_purchase_at"])
+    CRMCustomer.objects.filter(pk=crm_customer.pk).update(
+        total_purchases=F("total_purchases") + instance.total,
+        last_purchase_at=instance.completed_at or instance.created_at,
+    )
+    crm_customer.refresh_from_db(fields=["total_purchases", "last_purchase_at"])
 
     # Check for tier upgrade
     crm_customer.update_loyalty_tier()
@@ -0,0 +1,57 @@
+"""
+Celery tasks for the loyalty program.
+
+Implements Requirement 36: Enhanced Loyalty Program
+- Point expiration policies to encourage usage
+"""
+
+import logging
+from typing import Dict
+
+from django.conf import settings
+
+from celery import shared_task
+
+from apps.core.models import Tenant
+
+from .loyalty_ledger import expire_points
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOYALTY_POINTS_EXPIRATION_MONTHS = 12
+
+
+@shared_task(name="apps.crm.tasks.expire_loyalty_points")
+def expire_loyalty_points() -> Dict:
+    """
+    Expire old loyalty points of every active tenant.
+
+    Each tenant is expired with a few set-based statements in its own
+    transaction, so one tenant's failure does not hold back the others.
+
+    Returns:
+        Dict with the number of tenants, customers and points expired
+    """
+    months = getattr(
+        settings, "LOYALTY_POINTS_EXPIRATION_MONTHS", DEFAULT_LOYALTY_POINTS_EXPIRATION_MONTHS
+    )
+    summary = {"tenants": 0, "customers": 0, "points": 0, "failed": 0}
+
+    for tenant_id in Tenant.objects.filter(status=Tenant.ACTIVE).values_list("id", flat=True):
+        try:
+            expired = expire_points(tenant_id=tenant_id, expiration_months=months)
+        except Exception as e:
+            logger.error(
+                f"Error expiring loyalty points for tenant {tenant_id}: {e}", exc_info=True
+            )
+            summary["failed"] += 1
+            continue
+        summary["tenants"] += 1
+        summary["customers"] += len(expired)
+        summary["points"] += sum(expired.values())
+
+    logger.info(
+        f"Loyalty expiry: {summary['points']} points of {summary['customers']} customers "
+        f"in {summary['tenants']} tenants"
+    )
+    return summary
@@ -0,0 +1,491 @@
+"""
+Tests for the loyalty points ledger.
+
+Covers set-based FIFO expiry against the per-customer expiry it replaces,
+atomic awards and redemptions under concurrency, the balance audit, the
+point-in-time balance and a bulk expiry benchmark.
+
+Implements Requirement 36: Enhanced Loyalty Program
+"""
+
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from apps.core.models import Tenant
+from apps.core.tenant_context import bypass_rls
+
+from .loyalty_ledger import balance_at, expire_points, find_balance_drift
+from .models import Customer, LoyaltyTier, LoyaltyTransaction
+
+CREDIT_TYPES = [LoyaltyTransaction.EARNED, LoyaltyTransaction.BONUS, LoyaltyTransaction.REFERRAL]
+DEBIT_TYPES = [LoyaltyTransaction.REDEEMED, LoyaltyTransaction.ADJUSTED]
+
+
+def create_customer(tenant, number, loyalty_points=0):
+    return Customer.objects.create(
+        tenant=tenant,
+        customer_number=number,
+        first_name="Test",
+        last_name=number,
+        phone="+1234567890",
+        loyalty_points=loyalty_points,
+    )
+
+
+def record_history(customer, history, now):
+    """Store (days ago, type, points) events and return the transactions."""
+    transactions = LoyaltyTransaction.objects.bulk_create(
+        LoyaltyTransaction(
+            customer=customer, transaction_type=kind, points=points, description=kind
+        )
+        for _, kind, points in history
+    )
+    # created_at is set on insert; move each transaction back to its date
+    values = ", ".join(["(%s::uuid, %s::timestamptz)"] * len(history))
+    params = []
+    for i, (transaction, (days_ago, _, _)) in enumerate(zip(transactions, history)):
+        params += [str(transaction.id), now - timedelta(days=days_ago, seconds=-i)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE crm_loyalty_transactions AS t SET created_at = v.created_at "
+            f"FROM (VALUES {values}) AS v (id, created_at) WHERE t.id = v.id",
+            params,
+        )
+    customer.loyalty_points = sum(points for _, _, points in history)
+    customer.save(update_fields=["loyalty_points"])
+    return transactions
+
+
+def random_history(rng, redemptions=True):
+    """Events from two years ago until now; debits never exceed the balance."""
+    history, balance = [], 0
+    for days_ago in sorted(rng.sample(range(1, 730), rng.randint(1, 12)), reverse=True):
+        if 335 <= days_ago <= 395:
+            continue  # Keep clear of the 12 month boundary
+        if redemptions and balance and rng.random() < 0.4:
+            points = -rng.randint(1, balance)
+            history.append((days_ago, rng.choice(DEBIT_TYPES), points))
+        else:
+            points = rng.randint(10, 200)
+            history.append((days_ago, rng.choice(CREDIT_TYPES), points))
+        balance += points
+    return history
+
+
+def fifo_expiry(history, cutoff_days):
+    """Points of old EARNED/BONUS batches left once debits spent the oldest points."""
+    spent = -sum(points for _, _, points in history if points < 0)
+    expired = 0
+    for days_ago, kind, points in history:
+        if points <= 0:
+            continue
+        used = min(points, spent)
+        spent -= used
+        if days_ago > cutoff_days and kind in (LoyaltyTransaction.EARNED, LoyaltyTransaction.BONUS):
+            expired += points - used
+    return expired
+
+
+def legacy_expire_old_points(customer, expiration_months=12):
+    """The per-customer expiry this ledger replaces, one save per transaction."""
+    expiration_date = timezone.now() - relativedelta(months=expiration_months)
+    old_transactions = LoyaltyTransaction.objects.filter(
+        customer=customer,
+        transaction_type__in=[LoyaltyTransaction.EARNED, LoyaltyTransaction.BONUS],
+        created_at__lt=expiration_date,
+        expires_at__isnull=True,
+    )
+    total_expired = 0
+    for transaction in old_transactions:
+        if transaction.points > 0:
+            total_expired += transaction.points
+            transaction.expires_at = timezone.now()
+            transaction.save(update_fields=["expires_at"])
+    if total_expired > 0:
+        customer.loyalty_points = max(0, customer.loyalty_points - total_expired)
+        customer.save(update_fields=["loyalty_points"])
+        LoyaltyTransaction.objects.create(
+            customer=customer,
+            transaction_type=LoyaltyTransaction.EXPIRED,
+            points=-total_expired,
+            description=f"Points expired after {expiration_months} months",
+        )
+    return total_expired
+
+
+def expiry_state(tenant):
+    """Balance, expired points and expired batches per customer number."""
+    state = {}
+    for customer in Customer.objects.filter(tenant=tenant):
+        transactions = customer.loyalty_transactions.order_by("created_at", "id")
+        state[customer.customer_number] = (
+            customer.loyalty_points,
+            -sum(
+                t.points for t in transactions if t.transaction_type == LoyaltyTransaction.EXPIRED
+            ),
+            [t.expires_at is not None for t in transactions if t.points > 0],
+        )
+    return state
+
+
+@pytest.mark.django_db
+class TestExpiry:
+    """Set-based expiry compared with the per-customer expiry."""
+
+    def create_tenants(self, *slugs):
+        with bypass_rls():
+            return [
+                Tenant.objects.create(company_name=slug, slug=slug, status=Tenant.ACTIVE)
+                for slug in slugs
+            ]
+
+    def test_matches_per_customer_expiry_without_redemptions(self):
+        legacy, ledger = self.create_tenants("legacy-expiry", "ledger-expiry")
+        rng = random.Random(45)
+        now = timezone.now()
+        with bypass_rls():
+            for i in range(40):
+                history = random_history(rng, redemptions=False)
+                for tenant in (legacy, ledger):
+                    record_history(create_customer(tenant, f"CUST-{i}"), history, now)
+
+            for customer in Customer.objects.filter(tenant=legacy):
+                legacy_expire_old_points(customer)
+            expired = expire_points(tenant_id=ledger.id)
+
+            assert expiry_state(ledger) == expiry_state(legacy)
+            assert sum(expired.values()) > 0
+
+    def test_partially_redeemed_batches_expire_fifo(self):
+        (tenant,) = self.create_tenants("fifo-expiry")
+        rng = random.Random(7)
+        now = timezone.now()
+        histories = {}
+        with bypass_rls():
+            for i in range(60):
+                histories[f"CUST-{i}"] = history = random_history(rng)
+                record_history(create_customer(tenant, f"CUST-{i}"), history, now)
+
+            expired = expire_points(tenant_id=tenant.id)
+
+            cutoff_days = (now - (now - relativedelta(months=12))).days
+            for customer in Customer.objects.filter(tenant=tenant):
+                history = histories[customer.customer_number]
+                expected = fifo_expiry(history, cutoff_days)
+                assert expired.get(customer.id, 0) == expected
+                assert customer.loyalty_points == sum(p for _, _, p in history) - expected
+            assert find_balance_drift(tenant.id) == []
+
+    def test_redeemed_batch_only_expires_the_rest(self, tenant):
+        """100 old points of which 80 were redeemed: 20 expire, not 100."""
+        now = timezone.now()
+        with bypass_rls():
+            customer = create_customer(tenant, "CUST-PARTIAL")
+            history = [
+                (500, LoyaltyTransaction.EARNED, 100),
+                (200, LoyaltyTransaction.REDEEMED, -80),
+                (100, LoyaltyTransaction.EARNED, 50),
+            ]
+            record_history(customer, history, now)
+
+            assert customer.expire_old_points(expiration_months=12) == 20
+            assert customer.loyalty_points == 50
+            # Expiring again finds nothing left
+            assert customer.expire_old_points(expiration_months=12) == 0
+            assert customer.loyalty_points == 50
+
+            # The per-customer expiry took the recent points as well
+            legacy = create_customer(tenant, "CUST-LEGACY")
+            record_history(legacy, history, now)
+            assert legacy_expire_old_points(legacy) == 100
+            assert legacy.loyalty_points == 0
+
+    def test_later_runs_expire_newly_aged_points_only(self, tenant):
+        now = timezone.now()
+        with bypass_rls():
+            customer = create_customer(tenant, "CUST-NIGHTLY")
+            record_history(
+                customer,
+                [(500, LoyaltyTransaction.EARNED, 100), (300, LoyaltyTransaction.BONUS, 40)],
+                now,
+            )
+            assert expire_points(customer_id=customer.id, now=now) == {customer.id: 100}
+            assert expire_points(customer_id=customer.id, now=now) == {}
+            # Three months on the bonus has aged too
+            later = now + relativedelta(months=3)
+            assert expire_points(customer_id=customer.id, now=later) == {customer.id: 40}
+            customer.refresh_from_db()
+            assert customer.loyalty_points == 0
+
+    def test_scope(self, tenant):
+        (other,) = self.create_tenants("other-expiry")
+        now = timezone.now()
+        old_points = [(500, LoyaltyTransaction.EARNED, 100)]
+        with bypass_rls():
+            first = create_customer(tenant, "CUST-1")
+            second = create_customer(tenant, "CUST-2")
+            elsewhere = create_customer(other, "CUST-1")
+            for customer in (first, second, elsewhere):
+                record_history(customer, old_points, now)
+
+            assert first.expire_old_points() == 100
+            assert expire_points(tenant_id=tenant.id) == {second.id: 100}
+            elsewhere.refresh_from_db()
+            assert elsewhere.loyalty_points == 100
+
+    def test_query_count_independent_of_customer_count(self):
+        def queries_for(count):
+            (tenant,) = self.create_tenants(f"count-{count}")
+            now = timezone.now()
+            with bypass_rls():
+                for i in range(count):
+                    record_history(
+                        create_customer(tenant, f"CUST-{i}"),
+                        [(500, LoyaltyTransaction.EARNED, 100), (10, LoyaltyTransaction.EARNED, 5)],
+                        now,
+                    )
+                with CaptureQueriesContext(connection) as queries:
+                    expired = expire_points(tenant_id=tenant.id)
+            assert len(expired) == count
+            return len(queries)
+
+        assert queries_for(3) == queries_for(30)
+
+
+@pytest.mark.django_db
+class TestBalances:
+    """Atomic balance changes, point-in-time balances and the drift audit."""
+
+    def test_balance_changes_do_not_use_stale_balances(self, tenant):
+        with bypass_rls():
+            customer = create_customer(tenant, "CUST-STALE")
+            stale = Customer.objects.get(id=customer.id)
+            customer.add_loyalty_points(100)
+            # The stale copy still thinks the balance is 0
+            stale.add_loyalty_points(50)
+            assert stale.loyalty_points == 150
+            stale.redeem_loyalty_points(120)
+
+            customer.refresh_from_db()
+            assert customer.loyalty_points == 30
+            assert customer.total_points_earned == 150
+            assert customer.total_points_redeemed == 120
+            with pytest.raises(ValueError, match="Invalid points amount for redemption"):
+                customer.redeem_loyalty_points(31)
+            assert find_balance_drift(tenant.id) == []
+
+    def test_tier_multiplier_and_transfer(self, tenant):
+        with bypass_rls():
+            tier = LoyaltyTier.objects.create(
+                tenant=tenant, name="Gold", min_spending=Decimal("0"), points_multiplier=2
+            )
+            sender = create_customer(tenant, "CUST-SENDER")
+            sender.loyalty_tier = tier
+            sender.save()
+            recipient = create_customer(tenant, "CUST-RECIPIENT")
+
+            sender.add_loyalty_points(50)
+            sender.transfer_points_to(recipient, 60)
+            assert (sender.loyalty_points, recipient.loyalty_points) == (40, 60)
+
+            with pytest.raises(ValueError, match="Invalid points amount for transfer"):
+                sender.transfer_points_to(recipient, 41)
+            # Nothing of the failed transfer was recorded
+            assert recipient.loyalty_transactions.count() == 1
+            assert find_balance_drift(tenant.id) == []
+
+    def test_balance_at(self, tenant):
+        now = timezone.now()
+        with bypass_rls():
+            customer = create_customer(tenant, "CUST-HISTORY")
+            record_history(
+                customer,
+                [
+                    (30, LoyaltyTransaction.EARNED, 100),
+                    (20, LoyaltyTransaction.REDEEMED, -40),
+                    (10, LoyaltyTransaction.BONUS, 15),
+                ],
+                now,
+            )
+            assert balance_at(customer, now - timedelta(days=40)) == 0
+            assert balance_at(customer, now - timedelta(days=25)) == 100
+            assert customer.loyalty_points_at(now - timedelta(days=15)) == 60
+            assert customer.loyalty_points_at(now) == customer.loyalty_points == 75
+
+    def test_audit_command(self, tenant):
+        with bypass_rls():
+            customer = create_customer(tenant, "CUST-DRIFT")
+            customer.add_loyalty_points(100)
+            in_sync = create_customer(tenant, "CUST-OK")
+            in_sync.add_loyalty_points(10)
+            Customer.objects.filter(id=customer.id).update(loyalty_points=130)
+
+        out = StringIO()
+        call_command("audit_loyalty_balances", tenant=str(tenant.id), stdout=out)
+        assert "customer CUST-DRIFT has 130 points, transactions add up to 100" in out.getvalue()
+        assert "1 balance(s) drifted" in out.getvalue()
+        with bypass_rls():
+            customer.refresh_from_db()
+        assert customer.loyalty_points == 130
+
+        out = StringIO()
+        call_command("audit_loyalty_balances", tenant=str(tenant.id), repair=True, stdout=out)
+        assert "Recomputed 1 balance(s) from transactions" in out.getvalue()
+        with bypass_rls():
+            customer.refresh_from_db()
+            assert customer.loyalty_points == 100
+            assert find_balance_drift(tenant.id) == []
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrency:
+    """Awards and redemptions from many connections at once."""
+
+    def run_concurrently(self, customer_id, actions):
+        errors = []
+        barrier = threading.Barrier(len(actions))
+
+        def worker(action):
+            try:
+                with bypass_rls():
+                    customer = Customer.objects.get(id=customer_id)
+                    barrier.wait()
+                    action(customer)
+            except ValueError as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(action,)) for action in actions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def test_awards_and_redemptions(self):
+        with bypass_rls():
+            tenant = Tenant.objects.create(
+                company_name="Concurrency", slug="loyalty-concurrency", status=Tenant.ACTIVE
+            )
+            customer = create_customer(tenant, "CUST-RACE")
+            customer.add_loyalty_points(100)
+
+        # 10 awards of 10 and 15 redemptions of 10 against a balance of 100
+        actions = [lambda c: c.add_loyalty_points(10)] * 10
+        actions += [lambda c: c.redeem_loyalty_points(10)] * 15
+        errors = self.run_concurrently(customer.id, actions)
+
+        with bypass_rls():
+            customer.refresh_from_db()
+            redeemed = customer.loyalty_transactions.filter(
+                transaction_type=LoyaltyTransaction.REDEEMED
+            ).count()
+            assert redeemed + len(errors) == 15
+            assert customer.loyalty_points == 200 - 10 * redeemed >= 0
+            assert customer.total_points_earned == 200
+            assert customer.total_points_redeemed == 10 * redeemed
+            assert find_balance_drift(tenant.id) == []
+
+    def test_redemptions_never_overdraw(self):
+        with bypass_rls():
+            tenant = Tenant.objects.create(
+                company_name="Overdraw", slug="loyalty-overdraw", status=Tenant.ACTIVE
+            )
+            customer = create_customer(tenant, "CUST-OVERDRAW")
+            customer.add_loyalty_points(100)
+
+        errors = self.run_concurrently(customer.id, [lambda c: c.redeem_loyalty_points(30)] * 8)
+
+        with bypass_rls():
+            customer.refresh_from_db()
+            assert len(errors) == 5
+            assert customer.loyalty_points == 10
+            assert find_balance_drift(tenant.id) == []
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+class TestExpiryBenchmark:
+    """
+    Tenant-wide expiry versus the per-customer expiry.
+
+    Scaled down from 500k customers / 10M transactions to 20k customers /
+    400k transactions so it runs in the test suite; the per-customer expiry
+    is timed on a sample and extrapolated.
+    """
+
+    CUSTOMERS = 20_000
+    TRANSACTIONS_PER_CUSTOMER = 20
+    SAMPLE = 200
+    # 15 purchases of 40 points and 5 redemptions of 20 points
+    BALANCE = 15 * 40 - 5 * 20
+
+    def test_benchmark(self):
+        with bypass_rls():
+            tenant = Tenant.objects.create(
+                company_name="Benchmark", slug="loyalty-benchmark", status=Tenant.ACTIVE
+            )
+            Customer.objects.bulk_create(
+                (
+                    Customer(
+                        tenant=tenant,
+                        customer_number=f"CUST-{i}",
+                        referral_code=f"BENCH{i}",
+                        first_name="Bench",
+                        last_name=str(i),
+                        phone="+1234567890",
+                        loyalty_points=self.BALANCE,
+                    )
+                    for i in range(self.CUSTOMERS)
+                ),
+                batch_size=5000,
+            )
+            # A purchase every month for twenty months, every fourth one redeemed
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO crm_loyalty_transactions
+                        (id, customer_id, transaction_type, points, description, metadata,
+                         created_at)
+                    SELECT gen_random_uuid(), c.id,
+                           CASE WHEN m %% 4 = 3 THEN 'REDEEMED' ELSE 'EARNED' END,
+                           CASE WHEN m %% 4 = 3 THEN -20 ELSE 40 END,
+                           'Benchmark', '{}', now() - make_interval(days => 30 * m)
+                    FROM crm_customers c, generate_series(1, %s) AS m
+                    WHERE c.tenant_id = %s
+                    """,
+                    [self.TRANSACTIONS_PER_CUSTOMER, str(tenant.id)],
+                )
+                cursor.execute("ANALYZE crm_customers")
+                cursor.execute("ANALYZE crm_loyalty_transactions")
+
+            sample = list(Customer.objects.filter(tenant=tenant).order_by("id")[: self.SAMPLE])
+            start = time.perf_counter()
+            for customer in sample:
+                legacy_expire_old_points(customer)
+            per_customer = (time.perf_counter() - start) / self.SAMPLE
+
+            start = time.perf_counter()
+            expired = expire_points(tenant_id=tenant.id)
+            bulk = time.perf_counter() - start
+
+        assert len(expired) == self.CUSTOMERS - self.SAMPLE
+        assert bulk < per_customer * (self.CUSTOMERS - self.SAMPLE)
+        print(
+            f"\n{self.CUSTOMERS} customers, {self.CUSTOMERS * self.TRANSACTIONS_PER_CUSTOMER} "
+            f"transactions: set-based {bulk:.2f}s, per-customer "
+            f"{per_customer * 1000:.1f}ms each (~{per_customer * self.CUSTOMERS:.0f}s in total)"
+        )
@@ -19,16 +19,9 @@ from django.views.decorators.http import require_http_methods
 from rest_framework import filters, generics, permissions
 
 from apps.core.permissions import HasTenantAccess
-from apps.core.tenant_context import set_tenant_context
-
-from .models import (
-    Customer,
-    CustomerCommunication,
-    GiftCard,
-    GiftCardTransaction,
-    LoyaltyTier,
-    LoyaltyTransaction,
-)
+from apps.core.tenant_resolver import ensure_tenant_context
+
+from .models import Customer, CustomerCommunication, GiftCard, GiftCardTransaction, LoyaltyTier
 from .serializers import (
     CustomerDetailSerializer,
     CustomerListSerializer,
@@ -43,8 +36,7 @@ class TenantContextMixin:
     def initial(self, request, *args, **kwargs):
         """Set tenant context after authentication."""
         super().initial(request, *args, **kwargs)
-        if hasattr(request, "user") and hasattr(request.user, "tenant") and request.user.tenant:
-            set_tenant_context(request.user.tenant.id)
+        ensure_tenant_context(request)
 
 
 # Customer Management Views
@@ -779,19 +771,10 @@ def loyalty_points_adjust(request, customer_id):
         if points > 0:
             customer.add_loyalty_points(points, description or f"Manual adjustment: +{points}")
         else:
-            # For negative adjustments, use redeem but with adjusted transaction type
-            abs_points = abs(points)
-            if abs_points > customer.loyalty_points:
-                return JsonResponse({"error": "Insufficient loyalty points"}, status=400)
-
-            customer.loyalty_points -= abs_points
-            customer.save(update_fields=["loyalty_points"])
-
-            LoyaltyTransaction.objects.create(
-                customer=customer,
-                transaction_type=LoyaltyTransaction.ADJUSTED,
-                points=-abs_points,
-                description=description or f"Manual adjustment: {points}",
+            # Negative adjustments are recorded as ADJUSTED, guarded against the balance
+            customer.deduct_loyalty_points(
+                abs(points),
+                description or f"Manual adjustment: {points}",
                 created_by=request.user,
             )
 
@@ -803,6 +786,8 @@ def loyalty_points_adjust(request, customer_id):
             }
         )
 
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
@@ -0,0 +1,52 @@
+"""
+Management command to check inventory quantities against the stock movement ledger.
+
+Usage:
+    python manage.py reconcile_stock
+    python manage.py reconcile_stock --tenant <uuid>
+    python manage.py reconcile_stock --apply
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Tenant
+from apps.core.tenant_context import bypass_rls
+from apps.inventory.stock_movements import reconcile_stock
+
+
+class Command(BaseCommand):
+    """Management command to report and repair stock drift."""
+
+    help = "Report items whose quantity differs from their stock movements, optionally fixing them"
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument("--tenant", type=str, help="Only check this tenant (UUID)")
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="Rebuild drifted quantities from the stock movements",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        with bypass_rls():
+            if options["tenant"] and not Tenant.objects.filter(id=options["tenant"]).exists():
+                raise CommandError(f"Tenant {options['tenant']} not found")
+
+            drift = reconcile_stock(options["tenant"], apply=options["apply"])
+
+        for row in drift:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Tenant {row['tenant_id']}: {row['sku']} ({row['name']}) has quantity "
+                    f"{row['quantity']}, movements add up to {row['ledger_quantity']}"
+                )
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("No stock drift found"))
+        elif options["apply"]:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(drift)} item(s) from movements"))
+        else:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} item(s) drifted"))
@@ -0,0 +1,159 @@
+# Generated by Django 4.2.26 on 2026-10-19 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0030_partition_audit_logs"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("inventory", "0005_add_performance_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockMovement",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "movement_type",
+                    models.CharField(
+                        choices=[
+                            ("OPENING", "Opening Balance"),
+                            ("PURCHASE", "Purchase Receipt"),
+                            ("SALE", "Sale"),
+                            ("RETURN", "Sale Return/Void"),
+                            ("TRANSFER_OUT", "Transfer Out"),
+                            ("TRANSFER_IN", "Transfer In"),
+                            ("ADJUSTMENT", "Adjustment"),
+                            ("MATERIAL_USE", "Material Use"),
+                            ("IMPORT", "Data Import"),
+                        ],
+                        help_text="Kind of movement",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "quantity_change",
+                    models.IntegerField(
+                        help_text="Change in quantity (negative for stock leaving)"
+                    ),
+                ),
+                (
+                    "quantity_after",
+                    models.IntegerField(help_text="Item quantity right after this movement"),
+                ),
+                (
+                    "reason",
+                    models.CharField(
+                        blank=True, help_text="Reason for the movement", max_length=255
+                    ),
+                ),
+                (
+                    "source_type",
+                    models.CharField(
+                        blank=True,
+                        help_text="Model of the document that caused the movement",
+                        max_length=100,
+                    ),
+                ),
+                (
+                    "source_id",
+                    models.CharField(
+                        blank=True,
+                        help_text="Primary key of the document that caused the movement",
+                        max_length=64,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, help_text="When the movement happened"
+                    ),
+                ),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        help_text="Branch where the movement happened",
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="stock_movements",
+                        to="core.branch",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="User who made the change",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="stock_movements",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "inventory_item",
+                    models.ForeignKey(
+                        help_text="Inventory item whose quantity changed",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_movements",
+                        to="inventory.inventoryitem",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        help_text="Tenant that owns this movement",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stock_movements",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Stock Movement",
+                "verbose_name_plural": "Stock Movements",
+                "db_table": "inventory_stock_movements",
+                "ordering": ["-created_at", "-id"],
+                "indexes": [
+                    models.Index(fields=["inventory_item", "id"], name="stock_mvmt_item_idx"),
+                    models.Index(
+                        fields=["tenant", "-created_at"], name="stock_mvmt_tenant_created_idx"
+                    ),
+                    models.Index(fields=["source_type", "source_id"], name="stock_mvmt_source_idx"),
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE inventory_stock_movements ENABLE ROW LEVEL SECURITY;
+            CREATE POLICY tenant_isolation_policy ON inventory_stock_movements
+                USING (
+                    is_rls_bypassed() = true
+                    OR tenant_id = get_current_tenant()
+                );
+            """,
+            reverse_sql="""
+            DROP POLICY IF EXISTS tenant_isolation_policy ON inventory_stock_movements;
+            ALTER TABLE inventory_stock_movements DISABLE ROW LEVEL SECURITY;
+            """,
+        ),
+        # Existing stock becomes each item's opening balance
+        migrations.RunSQL(
+            sql="""
+            INSERT INTO inventory_stock_movements (
+                tenant_id, inventory_item_id, branch_id, movement_type, quantity_change,
+                quantity_after, reason, source_type, source_id, created_at
+            )
+            SELECT tenant_id, id, branch_id, 'OPENING', quantity, quantity,
+                   'Opening balance', '', '', NOW()
+            FROM inventory_items
+            WHERE quantity <> 0;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
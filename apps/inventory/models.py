@@ -14,6 +14,7 @@ from decimal import Decimal
 
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from django_fsm import FSMField, transition
 
@@ -384,14 +385,42 @@ class InventoryItem(models.Model):
     def __str__(self):
         return f"{self.sku} - {self.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded quantity so direct edits can be recorded as movements."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_quantity = instance.__dict__.get("quantity")
+        return instance
+
     def save(self, *args, **kwargs):
         """
         Override save to calculate markup percentage if not provided.
+
+        Quantity changes made by editing the item (rather than through
+        apps.inventory.stock_movements) are recorded in the stock movement
+        ledger: new items get an opening balance, edits an adjustment.
         """
         if self.markup_percentage is None and self.cost_price > 0:
             self.markup_percentage = (self.selling_price - self.cost_price) / self.cost_price * 100
+
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        previous_quantity = 0 if adding else getattr(self, "_loaded_quantity", None)
         super().save(*args, **kwargs)
 
+        quantity_saved = update_fields is None or "quantity" in update_fields
+        if previous_quantity is not None and quantity_saved and self.quantity != previous_quantity:
+            StockMovement.objects.create(
+                tenant_id=self.tenant_id,
+                inventory_item=self,
+                branch_id=self.branch_id,
+                movement_type=StockMovement.OPENING if adding else StockMovement.ADJUSTMENT,
+                quantity_change=self.quantity - previous_quantity,
+                quantity_after=self.quantity,
+                reason="Opening balance" if adding else "Quantity edited",
+            )
+        self._loaded_quantity = self.quantity
+
     def is_low_stock(self):
         """Check if item is below minimum quantity threshold."""
         return self.quantity <= self.min_quantity
@@ -426,35 +455,54 @@ class InventoryItem(models.Model):
         """Check if we can deduct the specified quantity."""
         return self.quantity >= quantity
 
-    def deduct_quantity(self, quantity, reason=""):
+    def deduct_quantity(self, quantity, reason="", movement_type=None, source=None, user=None):
         """
         Deduct quantity from inventory.
 
+        The deduction is a single guarded UPDATE, so concurrent deductions
+        can neither oversell nor lose updates, and it is recorded as a
+        stock movement.
+
         Args:
             quantity: Amount to deduct
             reason: Reason for deduction (for audit trail)
+            movement_type: StockMovement type (defaults to ADJUSTMENT)
+            source: Document causing the deduction (sale, transfer, ...)
+            user: User making the change
 
         Raises:
-            ValueError: If insufficient quantity
+            InsufficientStockError: If insufficient quantity
         """
-        if not self.can_deduct_quantity(quantity):
-            raise ValueError(
-                f"Insufficient inventory for {self.name}. "
-                f"Available: {self.quantity}, Requested: {quantity}"
-            )
-        self.quantity -= quantity
-        self.save(update_fields=["quantity", "updated_at"])
+        from .stock_movements import apply_stock_changes
+
+        apply_stock_changes(
+            [(self, -quantity)],
+            movement_type or StockMovement.ADJUSTMENT,
+            reason=reason,
+            source=source,
+            user=user,
+        )
 
-    def add_quantity(self, quantity, reason=""):
+    def add_quantity(self, quantity, reason="", movement_type=None, source=None, user=None):
         """
         Add quantity to inventory.
 
         Args:
             quantity: Amount to add
             reason: Reason for addition (for audit trail)
+            movement_type: StockMovement type (defaults to ADJUSTMENT)
+            source: Document causing the addition (goods receipt, transfer, ...)
+            user: User making the change
         """
-        self.quantity += quantity
-        self.save(update_fields=["quantity", "updated_at"])
+        from .stock_movements import apply_stock_changes
+
+        apply_stock_changes(
+            [(self, quantity)],
+            movement_type or StockMovement.ADJUSTMENT,
+            reason=reason,
+            source=source,
+            user=user,
+        )
 
 
 class InventoryTransfer(models.Model):
@@ -699,14 +747,24 @@ class InventoryTransfer(models.Model):
         """
         from django.utils import timezone
 
+        from .stock_movements import apply_stock_changes
+
         self.shipped_by = user
         self.shipped_at = timezone.now()
 
-        # Deduct inventory from source branch
-        for item in self.items.all():
-            item.inventory_item.deduct_quantity(
-                item.quantity, reason=f"Transfer {self.transfer_number} to {self.to_branch.name}"
-            )
+        # Deduct inventory from source branch, all items in one statement
+        apply_stock_changes(
+            [
+                (inventory_item_id, -quantity)
+                for inventory_item_id, quantity in self.items.values_list(
+                    "inventory_item_id", "quantity"
+                )
+            ],
+            StockMovement.TRANSFER_OUT,
+            reason=f"Transfer {self.transfer_number} to {self.to_branch.name}",
+            source=self,
+            user=user,
+        )
 
     @transition(field=status, source=IN_TRANSIT, target=RECEIVED)
     def mark_received(self, user, discrepancies=None):
@@ -719,10 +777,13 @@ class InventoryTransfer(models.Model):
         """
         from django.utils import timezone
 
+        from .stock_movements import apply_stock_changes
+
         self.received_by = user
         self.received_at = timezone.now()
 
         # Process each item
+        changes = []
         for item in self.items.all():
             actual_quantity = item.quantity
             if discrepancies and str(item.id) in discrepancies:
@@ -740,10 +801,15 @@ class InventoryTransfer(models.Model):
             # Note: In a real system, we might need to create new inventory items
             # or update existing ones at the destination branch
             # For now, we'll assume the inventory item exists at destination
-            item.inventory_item.add_quantity(
-                actual_quantity,
-                reason=f"Transfer {self.transfer_number} from {self.from_branch.name}",
-            )
+            changes.append((item.inventory_item_id, actual_quantity))
+
+        apply_stock_changes(
+            changes,
+            StockMovement.TRANSFER_IN,
+            reason=f"Transfer {self.transfer_number} from {self.from_branch.name}",
+            source=self,
+            user=user,
+        )
 
     @transition(field=status, source=[PENDING, APPROVED], target=CANCELLED)
     def cancel(self, user, reason=""):
@@ -885,3 +951,126 @@ class InventoryTransferItem(models.Model):
         if self.received_quantity is not None:
             return self.received_quantity - self.quantity
         return 0
+
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of inventory quantity changes.
+
+    Every change to InventoryItem.quantity is recorded here with its reason
+    and source document, so on-hand quantities can be audited and rebuilt
+    (see the reconcile_stock management command). Movements are never
+    updated; corrections are new movements.
+    """
+
+    OPENING = "OPENING"
+    PURCHASE = "PURCHASE"
+    SALE = "SALE"
+    RETURN = "RETURN"
+    TRANSFER_OUT = "TRANSFER_OUT"
+    TRANSFER_IN = "TRANSFER_IN"
+    ADJUSTMENT = "ADJUSTMENT"
+    MATERIAL_USE = "MATERIAL_USE"
+    IMPORT = "IMPORT"
+
+    MOVEMENT_TYPE_CHOICES = [
+        (OPENING, "Opening Balance"),
+        (PURCHASE, "Purchase Receipt"),
+        (SALE, "Sale"),
+        (RETURN, "Sale Return/Void"),
+        (TRANSFER_OUT, "Transfer Out"),
+        (TRANSFER_IN, "Transfer In"),
+        (ADJUSTMENT, "Adjustment"),
+        (MATERIAL_USE, "Material Use"),
+        (IMPORT, "Data Import"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name="stock_movements",
+        help_text="Tenant that owns this movement",
+    )
+
+    inventory_item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="stock_movements",
+        help_text="Inventory item whose quantity changed",
+    )
+
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.PROTECT,
+        related_name="stock_movements",
+        help_text="Branch where the movement happened",
+    )
+
+    movement_type = models.CharField(
+        max_length=20,
+        choices=MOVEMENT_TYPE_CHOICES,
+        help_text="Kind of movement",
+    )
+
+    quantity_change = models.IntegerField(
+        help_text="Change in quantity (negative for stock leaving)",
+    )
+
+    quantity_after = models.IntegerField(
+        help_text="Item quantity right after this movement",
+    )
+
+    reason = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Reason for the movement",
+    )
+
+    # Source document (e.g. sales.sale, inventory.inventorytransfer)
+    source_type = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Model of the document that caused the movement",
+    )
+
+    source_id = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Primary key of the document that caused the movement",
+    )
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stock_movements",
+        help_text="User who made the change",
+    )
+
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the movement happened",
+    )
+
+    class Meta:
+        db_table = "inventory_stock_movements"
+        ordering = ["-created_at", "-id"]
+        verbose_name = "Stock Movement"
+        verbose_name_plural = "Stock Movements"
+        indexes = [
+            models.Index(fields=["inventory_item", "id"], name="stock_mvmt_item_idx"),
+            models.Index(fields=["tenant", "-created_at"], name="stock_mvmt_tenant_created_idx"),
+            models.Index(fields=["source_type", "source_id"], name="stock_mvmt_source_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory_item_id} {self.quantity_change:+d} ({self.movement_type})"
+
+    def save(self, *args, **kwargs):
+        """Movements are append-only."""
+        if not self._state.adding:
+            raise ValueError("Stock movements cannot be changed once recorded.")
+        super().save(*args, **kwargs)
@@ -7,6 +7,7 @@ Implements Requirement 9: Advanced Inventory Management
 from rest_framework import serializers
 
 from .models import InventoryItem, InventoryTransfer, InventoryTransferItem, ProductCategory
+from .stock_movements import set_stock
 
 
 class ProductCategorySerializer(serializers.ModelSerializer):
@@ -346,15 +347,16 @@ class StockAdjustmentSerializer(serializers.Serializer):
         adjustment_type = self.validated_data["adjustment_type"]
         quantity = self.validated_data["quantity"]
         reason = self.validated_data.get("reason", "")
+        request = self.context.get("request")
+        user = request.user if request else None
 
         if adjustment_type == self.ADJUSTMENT_ADD:
-            inventory_item.add_quantity(quantity, reason)
+            inventory_item.add_quantity(quantity, reason, user=user)
         elif adjustment_type == self.ADJUSTMENT_DEDUCT:
-            inventory_item.deduct_quantity(quantity, reason)
+            inventory_item.deduct_quantity(quantity, reason, user=user)
         elif adjustment_type == self.ADJUSTMENT_SET:
-            # Set to specific quantity
-            inventory_item.quantity = quantity
-            inventory_item.save(update_fields=["quantity", "updated_at"])
+            # Set to specific quantity (a stock count)
+            set_stock(inventory_item, quantity, reason, user=user)
 
         return inventory_item
 
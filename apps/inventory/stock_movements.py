@@ -0,0 +1,260 @@
+"""
+Stock movement ledger and race-free quantity updates.
+
+Implements Requirement 9: Advanced Inventory Management
+- Inventory movements recorded in an append-only ledger
+- Real-time inventory levels that stay correct under concurrent checkouts
+
+Quantities are never read, changed in Python and saved back. Each change is
+a guarded UPDATE (``quantity + delta >= 0``) evaluated by PostgreSQL against
+the current row, so two terminals selling the last ring cannot both succeed
+and concurrent changes never overwrite each other. Multi-item changes (a
+transfer, a checkout) are one ``UPDATE ... FROM (VALUES ...)`` statement and
+are all-or-nothing: if any item is short, nothing is changed.
+
+Every change is recorded as a StockMovement, so an item's quantity always
+equals the sum of its movements; ``reconcile_stock`` reports and repairs
+items where the two drifted apart.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from uuid import UUID
+
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import InventoryItem, StockMovement
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStockError(ValueError):
+    """Raised when a change would take an item's quantity below zero."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(
+            "; ".join(
+                f"Insufficient inventory for {name}. Available: {available}, Requested: {requested}"
+                for name, available, requested in shortages
+            )
+        )
+
+
+def _source_fields(source) -> Dict[str, str]:
+    """Movement source columns for a document (sale, transfer, goods receipt, ...)."""
+    if source is None:
+        return {"source_type": "", "source_id": ""}
+    return {"source_type": source._meta.label_lower, "source_id": str(source.pk)}
+
+
+def _user_id(user):
+    if user is None or not getattr(user, "is_authenticated", False):
+        return None
+    return user.pk
+
+
+def _update_quantities(deltas: Dict[UUID, int], now) -> List[Tuple]:
+    """
+    Apply quantity deltas in one statement, skipping rows that would go negative.
+
+    Returns (id, quantity, branch_id, tenant_id) for every row that changed.
+    """
+    with connection.cursor() as cursor:
+        if len(deltas) == 1:
+            [(item_id, delta)] = deltas.items()
+            cursor.execute(
+                "UPDATE inventory_items SET quantity = quantity + %s, updated_at = %s "
+                "WHERE id = %s AND quantity + %s >= 0 "
+                "RETURNING id, quantity, branch_id, tenant_id",
+                [delta, now, item_id, delta],
+            )
+            return cursor.fetchall()
+
+        # Lock in a fixed order first so overlapping multi-item changes
+        # (two transfers sharing items) wait for each other instead of deadlocking
+        ids = sorted(deltas)
+        cursor.execute(
+            "SELECT id FROM inventory_items WHERE id = ANY(%s::uuid[]) ORDER BY id FOR UPDATE",
+            [ids],
+        )
+        values = ", ".join(["(%s::uuid, %s::integer)"] * len(ids))
+        params = [value for item_id in ids for value in (item_id, deltas[item_id])]
+        cursor.execute(
+            "UPDATE inventory_items AS i "
+            "SET quantity = i.quantity + v.delta, updated_at = %s "
+            f"FROM (VALUES {values}) AS v (id, delta) "
+            "WHERE i.id = v.id AND i.quantity + v.delta >= 0 "
+            "RETURNING i.id, i.quantity, i.branch_id, i.tenant_id",
+            [now] + params,
+        )
+        return cursor.fetchall()
+
+
+def _raise_shortages(deltas: Dict[UUID, int], changed) -> None:
+    missing = set(deltas) - changed
+    items = InventoryItem.objects.filter(id__in=missing).values_list("id", "name", "quantity")
+    found = {item_id: (name, quantity) for item_id, name, quantity in items}
+    if len(found) < len(missing):
+        raise InventoryItem.DoesNotExist(
+            f"Inventory items not found: {', '.join(str(i) for i in missing - set(found))}"
+        )
+    raise InsufficientStockError(
+        [(name, quantity, -deltas[item_id]) for item_id, (name, quantity) in found.items()]
+    )
+
+
+def apply_stock_changes(
+    changes: Iterable[Tuple[Union[InventoryItem, UUID, str], int]],
+    movement_type: str,
+    reason: str = "",
+    source=None,
+    user=None,
+) -> List[StockMovement]:
+    """
+    Change the quantities of several items atomically and record the movements.
+
+    Args:
+        changes: (item or item id, delta) pairs; negative deltas take stock out.
+            Repeated items are combined.
+        movement_type: StockMovement type recorded for every item
+        reason: Reason recorded on the movements
+        source: Document causing the change (sale, transfer, ...)
+        user: User making the change
+
+    Returns:
+        The recorded movements, one per changed item.
+
+    Raises:
+        InsufficientStockError: If any item would go below zero. No quantity
+            is changed in that case.
+    """
+    deltas = defaultdict(int)
+    instances = defaultdict(list)
+    for item, delta in changes:
+        item_id = item.pk if isinstance(item, InventoryItem) else item
+        item_id = item_id if isinstance(item_id, UUID) else UUID(str(item_id))
+        deltas[item_id] += delta
+        if isinstance(item, InventoryItem):
+            instances[item_id].append(item)
+    deltas = {item_id: delta for item_id, delta in deltas.items() if delta}
+    if not deltas:
+        return []
+
+    now = timezone.now()
+    with transaction.atomic():
+        rows = _update_quantities(deltas, now)
+        if len(rows) < len(deltas):
+            _raise_shortages(deltas, {row[0] for row in rows})
+
+        movements = StockMovement.objects.bulk_create(
+            [
+                StockMovement(
+                    tenant_id=tenant_id,
+                    inventory_item_id=item_id,
+                    branch_id=branch_id,
+                    movement_type=movement_type,
+                    quantity_change=deltas[item_id],
+                    quantity_after=quantity,
+                    reason=reason[:255],
+                    created_by_id=_user_id(user),
+                    created_at=now,
+                    **_source_fields(source),
+                )
+                for item_id, quantity, branch_id, tenant_id in rows
+            ]
+        )
+
+    for item_id, quantity, _branch_id, _tenant_id in rows:
+        for instance in instances.get(item_id, []):
+            instance.quantity = instance._loaded_quantity = quantity
+            instance.updated_at = now
+    return movements
+
+
+def set_stock(
+    item: InventoryItem, quantity: int, reason: str = "", source=None, user=None
+) -> Optional[StockMovement]:
+    """
+    Set an item's quantity (a stock count) and record the difference.
+
+    Returns the recorded movement, or None if the quantity was already right.
+    """
+    if quantity < 0:
+        raise ValueError("Quantity cannot be negative.")
+
+    now = timezone.now()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE inventory_items AS i SET quantity = %s, updated_at = %s "
+                "FROM (SELECT id, quantity FROM inventory_items WHERE id = %s FOR UPDATE) AS old "
+                "WHERE i.id = old.id "
+                "RETURNING old.quantity, i.branch_id, i.tenant_id",
+                [quantity, now, item.pk],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            raise InventoryItem.DoesNotExist(f"Inventory item not found: {item.pk}")
+        previous, branch_id, tenant_id = row
+
+        movement = None
+        if quantity != previous:
+            movement = StockMovement.objects.create(
+                tenant_id=tenant_id,
+                inventory_item_id=item.pk,
+                branch_id=branch_id,
+                movement_type=StockMovement.ADJUSTMENT,
+                quantity_change=quantity - previous,
+                quantity_after=quantity,
+                reason=reason[:255],
+                created_by_id=_user_id(user),
+                created_at=now,
+                **_source_fields(source),
+            )
+
+    item.quantity = item._loaded_quantity = quantity
+    item.updated_at = now
+    return movement
+
+
+def find_stock_drift(tenant_id=None) -> List[Dict]:
+    """
+    Items whose quantity differs from the sum of their movements.
+
+    Returns dicts with id, sku, name, tenant_id, quantity and ledger_quantity.
+    """
+    items = InventoryItem.objects.all()
+    if tenant_id:
+        items = items.filter(tenant_id=tenant_id)
+    return list(
+        items.annotate(ledger_quantity=Coalesce(Sum("stock_movements__quantity_change"), 0))
+        .exclude(quantity=F("ledger_quantity"))
+        .order_by("tenant_id", "sku")
+        .values("id", "sku", "name", "tenant_id", "quantity", "ledger_quantity")
+    )
+
+
+def reconcile_stock(tenant_id=None, apply: bool = False) -> List[Dict]:
+    """
+    Report stock drift and, with ``apply``, rebuild quantities from the ledger.
+
+    The movements are the source of truth: drifted items get the quantity
+    their movements add up to.
+    """
+    drift = find_stock_drift(tenant_id)
+    if drift and apply:
+        values = ", ".join(["(%s::uuid, %s::integer)"] * len(drift))
+        params = [value for row in drift for value in (row["id"], row["ledger_quantity"])]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE inventory_items AS i SET quantity = v.quantity, updated_at = %s "
+                f"FROM (VALUES {values}) AS v (id, quantity) WHERE i.id = v.id",
+                [timezone.now()] + params,
+            )
+        logger.warning(f"Rebuilt quantity of {len(drift)} inventory items from stock movements")
+    return drift
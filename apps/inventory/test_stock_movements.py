@@ -0,0 +1,313 @@
+"""
+Tests for the stock movement ledger and race-free quantity updates.
+
+Checks that concurrent deductions against PostgreSQL neither oversell nor
+lose updates, that a large transfer costs a constant number of statements
+and is all-or-nothing, and that drift between quantities and movements is
+reported and repaired.
+"""
+
+import threading
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+import apps.core.data_models  # noqa: F401 - lets TransactionTestCase flush the tables they add
+from apps.core.models import Branch, Tenant, User
+from apps.core.tenant_context import bypass_rls, tenant_context
+from apps.inventory.models import (
+    InventoryItem,
+    InventoryTransfer,
+    InventoryTransferItem,
+    ProductCategory,
+    StockMovement,
+)
+from apps.inventory.stock_movements import (
+    InsufficientStockError,
+    apply_stock_changes,
+    find_stock_drift,
+    set_stock,
+)
+
+
+class StockFixtureMixin:
+    """A tenant with two branches and helpers to create stock."""
+
+    def create_fixture(self, slug):
+        with bypass_rls():
+            self.tenant = Tenant.objects.create(
+                company_name=f"Stock Shop {slug}", slug=slug, status=Tenant.ACTIVE
+            )
+            self.user = User.objects.create_user(
+                username=f"{slug}-owner",
+                password="testpass123",
+                tenant=self.tenant,
+                role=User.TENANT_OWNER,
+            )
+        with tenant_context(self.tenant.id):
+            self.branch_a = Branch.objects.create(tenant=self.tenant, name="Branch A")
+            self.branch_b = Branch.objects.create(tenant=self.tenant, name="Branch B")
+            self.category = ProductCategory.objects.create(tenant=self.tenant, name="Rings")
+
+    def create_item(self, sku, quantity, branch=None):
+        return InventoryItem.objects.create(
+            tenant=self.tenant,
+            sku=sku,
+            name=f"Gold Ring {sku}",
+            category=self.category,
+            karat=18,
+            weight_grams=Decimal("5.00"),
+            cost_price=Decimal("100.00"),
+            selling_price=Decimal("150.00"),
+            quantity=quantity,
+            branch=branch or self.branch_a,
+        )
+
+    def ledger_quantity(self, item):
+        return StockMovement.objects.filter(inventory_item=item).aggregate(
+            total=Sum("quantity_change")
+        )["total"]
+
+
+class ConcurrentStockUpdateTest(StockFixtureMixin, TransactionTestCase):
+    """Concurrent quantity changes from separate connections."""
+
+    def setUp(self):
+        self.create_fixture("concurrent-stock")
+
+    def run_concurrently(self, changes):
+        """Run each (item_id, delta) in its own thread and connection, all at once."""
+        barrier = threading.Barrier(len(changes))
+        results = []
+
+        def worker(item_id, delta):
+            try:
+                with tenant_context(self.tenant.id):
+                    barrier.wait()
+                    try:
+                        apply_stock_changes([(item_id, delta)], StockMovement.SALE)
+                        results.append("ok")
+                    except InsufficientStockError:
+                        results.append("short")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=change) for change in changes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_deductions_never_oversell(self):
+        with tenant_context(self.tenant.id):
+            item = self.create_item("LAST-TEN", 10)
+
+        results = self.run_concurrently([(item.id, -1)] * 25)
+
+        assert results.count("ok") == 10
+        assert results.count("short") == 15
+        with tenant_context(self.tenant.id):
+            item.refresh_from_db()
+            assert item.quantity == 0
+            assert self.ledger_quantity(item) == 0
+            assert (
+                StockMovement.objects.filter(
+                    inventory_item=item, movement_type=StockMovement.SALE
+                ).count()
+                == 10
+            )
+
+    def test_concurrent_changes_lose_no_updates(self):
+        with tenant_context(self.tenant.id):
+            item = self.create_item("BUSY", 50)
+
+        results = self.run_concurrently([(item.id, 3)] * 15 + [(item.id, -2)] * 15)
+
+        assert results == ["ok"] * 30
+        with tenant_context(self.tenant.id):
+            item.refresh_from_db()
+            assert item.quantity == 50 + 45 - 30
+            assert self.ledger_quantity(item) == item.quantity
+            assert find_stock_drift(self.tenant.id) == []
+
+
+class StockMovementTest(StockFixtureMixin, TestCase):
+    """Guarded updates, transfers and reconciliation."""
+
+    def setUp(self):
+        self.create_fixture("stock-movements")
+
+    def create_transfer(self, items, quantity=1):
+        transfer = InventoryTransfer.objects.create(
+            tenant=self.tenant,
+            transfer_number=f"TRF-{len(items)}",
+            from_branch=self.branch_a,
+            to_branch=self.branch_b,
+            requested_by=self.user,
+            status=InventoryTransfer.APPROVED,
+        )
+        InventoryTransferItem.objects.bulk_create(
+            [
+                InventoryTransferItem(
+                    transfer=transfer,
+                    inventory_item=item,
+                    quantity=quantity,
+                    unit_cost=item.cost_price,
+                )
+                for item in items
+            ]
+        )
+        return transfer
+
+    def create_items(self, prefix, count, quantity):
+        """Create items in bulk and record their opening balances in one call."""
+        items = InventoryItem.objects.bulk_create(
+            [
+                InventoryItem(
+                    tenant=self.tenant,
+                    sku=f"{prefix}-{i:03d}",
+                    name=f"Chain {i}",
+                    category=self.category,
+                    karat=18,
+                    weight_grams=Decimal("2.00"),
+                    cost_price=Decimal("50.00"),
+                    selling_price=Decimal("80.00"),
+                    quantity=0,
+                    branch=self.branch_a,
+                )
+                for i in range(count)
+            ]
+        )
+        apply_stock_changes([(item, quantity) for item in items], StockMovement.OPENING)
+        return items
+
+    def test_new_and_edited_items_are_recorded(self):
+        with tenant_context(self.tenant.id):
+            item = self.create_item("RING-1", 5)
+            item = InventoryItem.objects.get(pk=item.pk)
+            item.quantity = 8
+            item.save()
+
+            movements = list(
+                StockMovement.objects.filter(inventory_item=item)
+                .order_by("id")
+                .values_list("movement_type", "quantity_change", "quantity_after")
+            )
+            assert movements == [
+                (StockMovement.OPENING, 5, 5),
+                (StockMovement.ADJUSTMENT, 3, 8),
+            ]
+
+    def test_guarded_deduction(self):
+        with tenant_context(self.tenant.id):
+            item = self.create_item("RING-1", 3)
+
+            with self.assertNumQueries(4):  # savepoint, update, movement, release
+                item.deduct_quantity(2, reason="Damaged", user=self.user)
+            assert item.quantity == 1
+
+            with self.assertRaisesMessage(InsufficientStockError, "Available: 1, Requested: 2"):
+                item.deduct_quantity(2)
+
+            item.refresh_from_db()
+            assert item.quantity == 1
+            movement = StockMovement.objects.filter(inventory_item=item).first()
+            assert (movement.quantity_change, movement.reason, movement.created_by) == (
+                -2,
+                "Damaged",
+                self.user,
+            )
+
+    def test_set_stock_records_difference(self):
+        with tenant_context(self.tenant.id):
+            item = self.create_item("RING-1", 3)
+
+            movement = set_stock(item, 7, "Stock count")
+            assert (movement.quantity_change, movement.quantity_after) == (4, 7)
+            assert set_stock(item, 7, "Stock count") is None
+            assert InventoryItem.objects.get(pk=item.pk).quantity == 7
+
+    def test_300_line_transfer_statement_count(self):
+        with tenant_context(self.tenant.id):
+            small = self.create_transfer(self.create_items("SMALL", 3, 5))
+            large_items = self.create_items("LARGE", 300, 5)
+            large = self.create_transfer(large_items)
+
+            with CaptureQueriesContext(connection) as small_ship:
+                small.mark_shipped(self.user)
+            with CaptureQueriesContext(connection) as large_ship:
+                large.mark_shipped(self.user)
+            with CaptureQueriesContext(connection) as large_receive:
+                large.mark_received(self.user)
+
+            assert len(large_ship) == len(small_ship) <= 8
+            assert len(large_receive) <= 8
+
+            quantities = InventoryItem.objects.filter(
+                pk__in=[item.pk for item in large_items]
+            ).values_list("quantity", flat=True)
+            assert set(quantities) == {5}
+            assert (
+                StockMovement.objects.filter(
+                    source_type="inventory.inventorytransfer", source_id=str(large.pk)
+                ).count()
+                == 600
+            )
+            assert find_stock_drift(self.tenant.id) == []
+
+    def test_transfer_is_all_or_nothing(self):
+        with tenant_context(self.tenant.id):
+            items = self.create_items("CHAIN", 50, 5)
+            short = self.create_item("SHORT", 0)
+            transfer = self.create_transfer(items + [short])
+            movements = StockMovement.objects.count()
+
+            with self.assertRaisesMessage(InsufficientStockError, "Gold Ring SHORT"):
+                transfer.mark_shipped(self.user)
+
+            assert set(
+                InventoryItem.objects.filter(sku__startswith="CHAIN").values_list(
+                    "quantity", flat=True
+                )
+            ) == {5}
+            assert StockMovement.objects.count() == movements
+
+    def test_repeated_items_are_combined(self):
+        with tenant_context(self.tenant.id):
+            item = self.create_item("RING-1", 3)
+
+            with self.assertRaises(InsufficientStockError):
+                apply_stock_changes([(item, -2), (item.pk, -2)], StockMovement.SALE)
+
+            [movement] = apply_stock_changes([(item, -2), (str(item.pk), -1)], StockMovement.SALE)
+            assert (movement.quantity_change, movement.quantity_after) == (-3, 0)
+            assert item.quantity == 0
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        with tenant_context(self.tenant.id):
+            item = self.create_item("RING-1", 10)
+            self.create_item("RING-2", 4)
+            item.deduct_quantity(3, movement_type=StockMovement.SALE)
+            # A write that bypassed the ledger
+            InventoryItem.objects.filter(pk=item.pk).update(quantity=99)
+
+        out = StringIO()
+        call_command("reconcile_stock", tenant=str(self.tenant.id), stdout=out)
+        assert "RING-1 (Gold Ring RING-1) has quantity 99, movements add up to 7" in out.getvalue()
+        assert "RING-2" not in out.getvalue()
+        assert InventoryItem.objects.get(pk=item.pk).quantity == 99
+
+        out = StringIO()
+        call_command("reconcile_stock", apply=True, stdout=out)
+        assert "Rebuilt 1 item(s)" in out.getvalue()
+        assert InventoryItem.objects.get(pk=item.pk).quantity == 7
+
+        out = StringIO()
+        call_command("reconcile_stock", stdout=out)
+        assert "No stock drift found" in out.getvalue()
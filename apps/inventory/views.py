@@ -15,7 +15,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from apps.core.permissions import HasTenantAccess
-from apps.core.tenant_context import set_tenant_context
+from apps.core.tenant_resolver import ensure_tenant_context
 
 from .models import InventoryItem, ProductCategory
 from .serializers import (
@@ -33,8 +33,7 @@ class TenantContextMixin:
     def initial(self, request, *args, **kwargs):
         """Set tenant context after authentication."""
         super().initial(request, *args, **kwargs)
-        if hasattr(request, "user") and hasattr(request.user, "tenant") and request.user.tenant:
-            set_tenant_context(request.user.tenant.id)
+        ensure_tenant_context(request)
 
 
 class InventoryItemListView(TenantContextMixin, generics.ListAPIView):
@@ -226,7 +225,7 @@ def stock_adjustment(request, item_id):
 
     # Validate the adjustment
     serializer = StockAdjustmentSerializer(
-        data=request.data, context={"inventory_item": inventory_item}
+        data=request.data, context={"inventory_item": inventory_item, "request": request}
     )
 
     if not serializer.is_valid():
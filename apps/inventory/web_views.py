@@ -27,6 +27,7 @@ from apps.core.tenant_context import tenant_context
 
 from .forms import InventoryItemForm, ProductCategoryForm, StockAdjustmentForm
 from .models import InventoryItem, InventoryTransfer, ProductCategory
+from .stock_movements import InsufficientStockError
 
 
 class InventoryListView(LoginRequiredMixin, TenantRequiredMixin, ListView):
@@ -331,25 +332,23 @@ def stock_adjustment_view(request, id):
         if form.is_valid():
             adjustment_type = form.cleaned_data["adjustment_type"]
             quantity = form.cleaned_data["quantity"]
-            # reason = form.cleaned_data["reason"]  # TODO: Add audit logging
-            # notes = form.cleaned_data.get("notes", "")  # TODO: Add audit logging
+            reason = form.cleaned_data["reason"]
+            notes = form.cleaned_data.get("notes", "")
+            if notes:
+                reason = f"{reason}: {notes}"
 
             with tenant_context(request.user.tenant.id):
-                # Update quantity
+                # Update quantity and record the movement
                 if adjustment_type == "increase":
-                    item.quantity += quantity
+                    item.add_quantity(quantity, reason, user=request.user)
                 else:
-                    if item.quantity < quantity:
+                    try:
+                        item.deduct_quantity(quantity, reason, user=request.user)
+                    except InsufficientStockError:
                         messages.error(request, _("Cannot decrease quantity below zero."))
                         return render(
                             request, "inventory/stock_adjustment.html", {"item": item, "form": form}
                         )
-                    item.quantity -= quantity
-
-                item.save()
-
-                # Log adjustment (if audit model exists)
-                # StockAdjustment.objects.create(...)
 
                 messages.success(
                     request,
@@ -0,0 +1,336 @@
+"""
+Batched email delivery engine.
+
+Sending a bulk email one recipient at a time costs a template lookup, two or
+three template compilations, a preference query, a few INSERTs and an SMTP
+handshake per recipient. This module delivers the same emails in chunks:
+- Compiled templates are kept in an LRU keyed by (template id, updated_at)
+- Preferences for a chunk of recipients are loaded with one query
+- In-app notifications and EmailNotification rows are written with bulk_create
+- Each chunk is sent over a single connection opened once
+- Addresses that fail are retried individually; the rest of the chunk is not resent
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import QuerySet
+from django.template import Context, Template
+from django.utils import timezone
+
+from .models import EmailNotification, EmailTemplate, Notification, NotificationPreference
+from .push import publish_created
+
+logger = logging.getLogger(__name__)
+
+# Delivery defaults (overridable in settings)
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_RETRIES = 1
+TEMPLATE_CACHE_SIZE = 128
+
+
+class CompiledEmailTemplate:
+    """Compiled subject, HTML and text templates of an EmailTemplate."""
+
+    def __init__(self, template: EmailTemplate):
+        self.subject = Template(template.subject_template)
+        self.html = Template(template.html_template)
+        self.text = Template(template.text_template) if template.text_template else None
+
+    def render(self, context: Dict) -> Dict[str, str]:
+        """Render the templates; same output as EmailTemplate.render()."""
+        rendered = {
+            "subject": self.subject.render(Context(context)),
+            "html_body": self.html.render(Context(context)),
+        }
+        if self.text is not None:
+            rendered["text_body"] = self.text.render(Context(context))
+        return rendered
+
+
+_template_cache: "OrderedDict[tuple, CompiledEmailTemplate]" = OrderedDict()
+_template_cache_lock = threading.Lock()
+
+
+def get_compiled_template(template: EmailTemplate) -> CompiledEmailTemplate:
+    """
+    Get the compiled form of an email template from the LRU cache.
+
+    Editing a template bumps ``updated_at``, so stale compilations are never
+    served; they simply age out of the cache.
+    """
+    key = (template.pk, template.updated_at)
+    with _template_cache_lock:
+        compiled = _template_cache.get(key)
+        if compiled is not None:
+            _template_cache.move_to_end(key)
+            return compiled
+
+    compiled = CompiledEmailTemplate(template)
+
+    with _template_cache_lock:
+        _template_cache[key] = compiled
+        while len(_template_cache) > TEMPLATE_CACHE_SIZE:
+            _template_cache.popitem(last=False)
+    return compiled
+
+
+def render_email_template(template: EmailTemplate, context: Dict) -> Dict[str, str]:
+    """Render an email template using the compiled-template cache."""
+    return get_compiled_template(template).render(context)
+
+
+def get_preference_type(email_type: str) -> str:
+    """Get the notification type whose EMAIL preference governs an email type."""
+    return "TRANSACTIONAL" if email_type == "TRANSACTIONAL" else "MARKETING"
+
+
+def get_email_preferences(
+    user_ids: Sequence, notification_type: str
+) -> Dict[int, NotificationPreference]:
+    """Load the EMAIL preferences of many users with one query."""
+    preferences = NotificationPreference.objects.filter(
+        user_id__in=user_ids, notification_type=notification_type, channel="EMAIL"
+    )
+    return {preference.user_id: preference for preference in preferences}
+
+
+def preference_allows(
+    preference: Optional[NotificationPreference], notification_type: str, channel: str = "EMAIL"
+) -> bool:
+    """Apply the should_send_notification() rules to an already loaded preference."""
+    if preference is None:
+        return channel == "IN_APP"
+    if not preference.is_enabled:
+        return False
+    if notification_type not in ["ERROR", "SYSTEM"] and preference.is_in_quiet_hours():
+        return False
+    return True
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of up to ``size`` items; querysets are streamed."""
+    if isinstance(items, QuerySet):
+        items = items.iterator(chunk_size=size)
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def deliver_messages(
+    messages: Sequence[EmailMultiAlternatives],
+    retries: Optional[int] = None,
+    connection_factory: Callable = get_connection,
+) -> Dict[int, str]:
+    """
+    Send messages over one connection, retrying failures individually.
+
+    Each message is handed to ``send_messages`` on the shared, already open
+    connection, so one bad address cannot abort the rest of the chunk and
+    successful messages are never sent twice.
+
+    Args:
+        messages: Messages to send
+        retries: Retry attempts for each failed message
+        connection_factory: Callable returning an email backend
+
+    Returns:
+        Dictionary mapping the index of each undeliverable message to its error
+    """
+    if retries is None:
+        retries = getattr(settings, "EMAIL_BATCH_RETRIES", DEFAULT_RETRIES)
+
+    failures = {}
+    connection = connection_factory()
+    try:
+        connection.open()
+        for index, message in enumerate(messages):
+            try:
+                if not connection.send_messages([message]):
+                    failures[index] = "Message was not accepted"
+            except Exception as e:
+                failures[index] = str(e)
+    finally:
+        connection.close()
+
+    for index in list(failures):
+        for _ in range(retries):
+            try:
+                if connection_factory().send_messages([messages[index]]):
+                    del failures[index]
+                    break
+            except Exception as e:
+                failures[index] = str(e)
+
+    return failures
+
+
+def build_message(
+    subject: str, html_body: str, text_body: Optional[str], from_email: str, to_email: str
+) -> EmailMultiAlternatives:
+    """Build the multipart message _send_email_now would send."""
+    message = EmailMultiAlternatives(
+        subject=subject, body=text_body or html_body, from_email=from_email, to=[to_email]
+    )
+    if html_body:
+        message.attach_alternative(html_body, "text/html")
+    return message
+
+
+def send_batched_email(
+    users: Iterable,
+    template_name: str,
+    context: Dict,
+    email_type: str = "MARKETING",
+    campaign_id: Optional[str] = None,
+    subject: Optional[str] = None,
+    from_email: Optional[str] = None,
+    create_in_app_notification: Optional[bool] = None,
+    chunk_size: Optional[int] = None,
+    connection_factory: Callable = get_connection,
+) -> List[EmailNotification]:
+    """
+    Send a templated email to many users in chunks.
+
+    Produces the same emails, EmailNotification rows and in-app notifications
+    as calling send_email_notification() per user, with a constant number of
+    queries and one connection per chunk.
+
+    Args:
+        users: Users (list or queryset) to send to
+        template_name: Name of the email template
+        context: Context variables for template rendering
+        email_type: Type of email (TRANSACTIONAL, MARKETING, SYSTEM)
+        campaign_id: Optional campaign ID for tracking
+        subject: Optional override for email subject
+        from_email: Optional override for from email
+        create_in_app_notification: Create in-app notifications (default: not for marketing)
+        chunk_size: Recipients per chunk (default: EMAIL_BATCH_CHUNK_SIZE setting)
+        connection_factory: Callable returning an email backend
+
+    Returns:
+        List of EmailNotification instances, one per recipient emailed
+    """
+    try:
+        template = EmailTemplate.objects.get(name=template_name, is_active=True)
+    except EmailTemplate.DoesNotExist:
+        logger.error(f"Email template '{template_name}' not found or inactive")
+        return []
+
+    if create_in_app_notification is None:
+        create_in_app_notification = email_type != "MARKETING"
+    chunk_size = chunk_size or getattr(settings, "EMAIL_BATCH_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    preference_type = get_preference_type(email_type)
+    compiled = get_compiled_template(template)
+
+    email_notifications = []
+    for chunk in chunked(users, chunk_size):
+        email_notifications.extend(
+            _send_chunk(
+                chunk,
+                compiled,
+                template_name,
+                context,
+                email_type,
+                campaign_id,
+                subject,
+                from_email,
+                create_in_app_notification,
+                preference_type,
+                connection_factory,
+            )
+        )
+
+    logger.info(f"Sent {len(email_notifications)} batched emails using template '{template_name}'")
+    return email_notifications
+
+
+def _send_chunk(
+    users: List,
+    compiled: CompiledEmailTemplate,
+    template_name: str,
+    context: Dict,
+    email_type: str,
+    campaign_id: Optional[str],
+    subject: Optional[str],
+    from_email: str,
+    create_in_app_notification: bool,
+    preference_type: str,
+    connection_factory: Callable,
+) -> List[EmailNotification]:
+    """Render, record and send one chunk of recipients."""
+    users = [user for user in users if user.email]
+    preferences = get_email_preferences([user.id for user in users], preference_type)
+    recipients = [
+        user for user in users if preference_allows(preferences.get(user.id), preference_type)
+    ]
+    if not recipients:
+        return []
+
+    # The context is shared by every recipient, so the chunk renders once
+    output = compiled.render(context)
+    email_subject = subject or output["subject"]
+    html_body = output["html_body"]
+    text_body = output.get("text_body")
+
+    notifications = [None] * len(recipients)
+    if create_in_app_notification:
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(
+                    user=user,
+                    title=email_subject,
+                    message=text_body or html_body[:200] + "...",
+                    notification_type="INFO",
+                )
+                for user in recipients
+            ]
+        )
+        publish_created(notifications)
+
+    email_notifications = EmailNotification.objects.bulk_create(
+        [
+            EmailNotification(
+                user=user,
+                notification=notification,
+                subject=email_subject,
+                to_email=user.email,
+                from_email=from_email,
+                template_name=template_name,
+                email_type=email_type,
+                campaign_id=campaign_id,
+            )
+            for user, notification in zip(recipients, notifications)
+        ]
+    )
+
+    messages = [
+        build_message(email_subject, html_body, text_body, from_email, record.to_email)
+        for record in email_notifications
+    ]
+    failures = deliver_messages(messages, connection_factory=connection_factory)
+
+    now = timezone.now()
+    for index, record in enumerate(email_notifications):
+        if index in failures:
+            record.status = "FAILED"
+            record.failed_at = now
+            record.error_message = failures[index]
+            logger.error(f"Failed to send email to {record.to_email}: {failures[index]}")
+        else:
+            record.status = "SENT"
+            record.sent_at = now
+    EmailNotification.objects.bulk_update(
+        email_notifications, ["status", "sent_at", "failed_at", "error_message"]
+    )
+
+    return email_notifications
@@ -0,0 +1,140 @@
+"""
+Management command to benchmark the batched email delivery engine.
+
+Creates throwaway recipients inside a transaction that is rolled back, sends
+them a templated email through the locmem backend and reports elapsed time,
+queries and mail connections. With --compare, the per-recipient path is timed
+on a sample for reference.
+
+Usage:
+    python manage.py benchmark_bulk_email
+    python manage.py benchmark_bulk_email --recipients 10000 --chunk-size 500 --compare 500
+"""
+
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from apps.core.models import Tenant
+from apps.core.tenant_context import bypass_rls
+from apps.notifications.email_delivery import send_batched_email
+from apps.notifications.models import EmailTemplate, NotificationPreference
+from apps.notifications.services import send_email_notification
+
+User = get_user_model()
+
+
+class CountingBackend(EmailBackend):
+    """Locmem backend that counts the connections opened."""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class Command(BaseCommand):
+    """Management command to benchmark bulk email delivery."""
+
+    help = "Benchmark batched bulk email delivery (all changes are rolled back)"
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument("--recipients", type=int, default=10000, help="Number of recipients")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Recipients per chunk")
+        parser.add_argument(
+            "--compare",
+            type=int,
+            default=0,
+            help="Also time the per-recipient path for this many recipients",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        backend = f"{CountingBackend.__module__}.CountingBackend"
+        with override_settings(EMAIL_BACKEND=backend), bypass_rls(), transaction.atomic():
+            users = self._create_recipients(options["recipients"])
+            template = EmailTemplate.objects.create(
+                name=f"benchmark-{uuid.uuid4().hex[:8]}",
+                subject_template="{{ shop }} offers for you",
+                html_template="<h1>{{ shop }}</h1><p>{{ message }}</p>",
+                text_template="{{ shop }}: {{ message }}",
+                email_type="MARKETING",
+            )
+            context = {"shop": "Benchmark Jewelry", "message": "New collection in store"}
+
+            self._run(
+                "batched",
+                lambda: send_batched_email(
+                    User.objects.filter(id__in=[user.id for user in users]).order_by("id"),
+                    template.name,
+                    context,
+                    chunk_size=options["chunk_size"],
+                ),
+                len(users),
+            )
+
+            if options["compare"]:
+                sample = users[: options["compare"]]
+                self._run(
+                    "per-recipient",
+                    lambda: [
+                        send_email_notification(
+                            user,
+                            template.name,
+                            context,
+                            email_type="MARKETING",
+                            create_in_app_notification=False,
+                        )
+                        for user in sample
+                    ],
+                    len(sample),
+                )
+
+            transaction.set_rollback(True)
+
+    def _create_recipients(self, count):
+        tenant = Tenant.objects.create(
+            company_name="Email Benchmark", slug=f"email-benchmark-{uuid.uuid4().hex[:8]}"
+        )
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench-{tenant.slug}-{index}",
+                    email=f"bench{index}@example.com",
+                    tenant=tenant,
+                    role="TENANT_EMPLOYEE",
+                )
+                for index in range(count)
+            ],
+            batch_size=1000,
+        )
+        NotificationPreference.objects.bulk_create(
+            [
+                NotificationPreference(
+                    user=user, notification_type="MARKETING", channel="EMAIL", is_enabled=True
+                )
+                for user in users
+            ],
+            batch_size=1000,
+        )
+        return users
+
+    def _run(self, label, send, recipients):
+        CountingBackend.opened = 0
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            send()
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{label}: {recipients} recipients in {elapsed:.2f}s "
+            f"({recipients / elapsed:.0f}/s), {len(queries)} queries, "
+            f"{CountingBackend.opened} connections"
+        )
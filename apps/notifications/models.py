@@ -5,6 +5,8 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .push import publish_read
+
 User = get_user_model()
 
 
@@ -93,7 +95,11 @@ class Notification(models.Model):
         if not self.is_read:
             self.is_read = True
             self.read_at = timezone.now()
-            self.save(update_fields=["is_read", "read_at"])
+            # Conditional update: only one of several concurrent calls counts the read
+            updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+                is_read=True, read_at=self.read_at
+            )
+            publish_read(self.user_id, updated)
 
     def is_expired(self):
         """Check if notification has expired"""
@@ -0,0 +1,204 @@
+"""
+Server push for in-app notifications.
+
+Open pages no longer poll the unread count every 30 seconds. They keep a
+Server-Sent Events stream open (apps/notifications/stream.py) and this
+module publishes to it through Redis pub/sub:
+
+- notifications:user:<id> carries events for one user (a new notification,
+  a changed unread count)
+- notifications:tenant:<id> carries events for every user of a tenant, so a
+  tenant-wide announcement is one PUBLISH instead of one per user
+
+The unread count is a Redis counter per user. It is seeded from the
+database the first time it is read, incremented when notifications are
+created and decremented when they are marked read, and expires after
+NOTIFICATION_UNREAD_COUNT_TTL seconds so that expired notifications and any
+missed update are corrected by the next COUNT. Counters are only changed
+when they exist; a missing counter is simply seeded again.
+
+Stream URLs carry a short-lived signed token instead of a session, so the
+stream does not need the session, tenant or RLS middleware. Redis errors
+are logged and never fail the request creating or reading notifications.
+"""
+
+import json
+import logging
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_ALIAS = "default"
+DEFAULT_UNREAD_COUNT_TTL = 900
+DEFAULT_TOKEN_TTL = 300
+STREAM_PATH = "/notifications/stream/"
+TOKEN_SALT = "notifications.stream"
+
+# KEYS: counter keys; ARGV: amount for each key (negative to decrement)
+# Returns the new value of each counter, or -1 where the counter did not exist
+ADJUST_COUNTERS_SCRIPT = """
+local values = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        local value = redis.call('INCRBY', key, ARGV[i])
+        if value < 0 then
+            redis.call('SET', key, 0, 'KEEPTTL')
+            value = 0
+        end
+        values[i] = value
+    else
+        values[i] = -1
+    end
+end
+return values
+"""
+
+
+def unread_count_key(user_id) -> str:
+    return f"notifications:unread:{user_id}"
+
+
+def user_channel(user_id) -> str:
+    return f"notifications:user:{user_id}"
+
+
+def tenant_channel(tenant_id) -> str:
+    return f"notifications:tenant:{tenant_id}"
+
+
+def get_client():
+    """Redis client shared with the cache alias NOTIFICATION_PUSH_CACHE."""
+    return get_redis_connection(getattr(settings, "NOTIFICATION_PUSH_CACHE", DEFAULT_CACHE_ALIAS))
+
+
+def make_stream_token(user) -> str:
+    """Signed token identifying the user (and tenant) of a notification stream."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign_object(
+        {"u": str(user.pk), "t": str(user.tenant_id) if user.tenant_id else None}
+    )
+
+
+def read_stream_token(token: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Check a stream token.
+
+    Returns:
+        (user id, tenant id or None), or None if the token is invalid or expired
+    """
+    try:
+        payload = signing.TimestampSigner(salt=TOKEN_SALT).unsign_object(
+            token,
+            max_age=getattr(settings, "NOTIFICATION_STREAM_TOKEN_TTL", DEFAULT_TOKEN_TTL),
+        )
+    except signing.BadSignature:
+        return None
+    return payload["u"], payload["t"]
+
+
+def stream_url(user) -> str:
+    return f"{STREAM_PATH}?token={make_stream_token(user)}"
+
+
+def cached_unread_count(user_id, compute: Callable[[], int]) -> int:
+    """
+    The user's unread count from Redis, seeded with compute() when missing.
+    """
+    key = unread_count_key(user_id)
+    try:
+        client = get_client()
+        value = client.get(key)
+        if value is not None:
+            return int(value)
+        count = compute()
+        ttl = getattr(settings, "NOTIFICATION_UNREAD_COUNT_TTL", DEFAULT_UNREAD_COUNT_TTL)
+        client.set(key, count, ex=ttl, nx=True)
+        return count
+    except RedisError as e:
+        logger.warning(f"Unread count cache unavailable, counting in the database: {e}")
+        return compute()
+
+
+def reset_unread_counts(user_ids: Iterable) -> None:
+    """Drop cached counts so they are seeded from the database on next read."""
+    keys = [unread_count_key(user_id) for user_id in set(user_ids)]
+    if not keys:
+        return
+    try:
+        get_client().delete(*keys)
+    except RedisError as e:
+        logger.warning(f"Failed to reset unread counts: {e}")
+
+
+def _adjust_and_publish(amounts: Dict, messages: Iterable[Tuple[str, Dict]]) -> None:
+    """Adjust unread counters and publish events in one round-trip."""
+    try:
+        client = get_client()
+        pipe = client.pipeline(transaction=False)
+        if amounts:
+            client.register_script(ADJUST_COUNTERS_SCRIPT)(
+                keys=[unread_count_key(user_id) for user_id in amounts],
+                args=list(amounts.values()),
+                client=pipe,
+            )
+        for channel, event in messages:
+            pipe.publish(channel, json.dumps(event))
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to publish notification events: {e}")
+
+
+def _on_commit(func: Callable[[], None]) -> None:
+    # Subscribers and counters only see notifications that were committed
+    transaction.on_commit(func)
+
+
+def _notification_event(notification) -> Dict:
+    return {
+        "event": "notification",
+        "id": notification.pk,
+        "title": notification.title,
+        "notification_type": notification.notification_type,
+        "action_url": notification.action_url,
+    }
+
+
+def publish_created(notifications) -> None:
+    """Count and announce new notifications to their users."""
+    notifications = [n for n in notifications if n.pk is not None and not n.is_read]
+    if not notifications:
+        return
+    amounts = Counter(n.user_id for n in notifications)
+    latest = {n.user_id: n for n in notifications}
+    messages = [(user_channel(user_id), _notification_event(n)) for user_id, n in latest.items()]
+    _on_commit(lambda: _adjust_and_publish(amounts, messages))
+
+
+def publish_tenant_created(tenant_id, notifications) -> None:
+    """
+    Count new notifications sent to every user of a tenant and announce them
+    with a single tenant-wide event.
+    """
+    notifications = [n for n in notifications if n.pk is not None and not n.is_read]
+    if not notifications:
+        return
+    amounts = Counter(n.user_id for n in notifications)
+    # Each user got their own copy, so the shared event has no id
+    event = dict(_notification_event(notifications[0]), id=None)
+    messages = [(tenant_channel(tenant_id), event)]
+    _on_commit(lambda: _adjust_and_publish(amounts, messages))
+
+
+def publish_read(user_id, count: int) -> None:
+    """Count notifications marked read and update the user's open pages."""
+    if count <= 0:
+        return
+    messages = [(user_channel(user_id), {"event": "count"})]
+    _on_commit(lambda: _adjust_and_publish({user_id: -count}, messages))
@@ -7,7 +7,8 @@ checking user preferences, and managing notification delivery including email an
 
 import logging
 import uuid
-from typing import Dict, List, Optional
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -15,6 +16,11 @@ from django.core.mail import EmailMultiAlternatives
 from django.db import models
 from django.utils import timezone
 
+from .email_delivery import (
+    get_preference_type,
+    render_email_template,
+    send_batched_email,
+)
 from .models import (
     CampaignAnalytics,
     CommunicationLog,
@@ -30,6 +36,13 @@ from .models import (
     SMSOptOut,
     SMSTemplate,
 )
+from .push import (
+    cached_unread_count,
+    publish_created,
+    publish_read,
+    publish_tenant_created,
+    reset_unread_counts,
+)
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -79,6 +92,7 @@ def create_notification(
         action_text=action_text,
         expires_at=expires_at,
     )
+    publish_created([notification])
 
     logger.info(
         f"Created notification '{title}' for user {user.username} " f"(type: {notification_type})"
@@ -129,6 +143,7 @@ def create_notification_from_template(
         action_text=rendered.get("action_text"),
         expires_at=expires_at,
     )
+    publish_created([notification])
 
     logger.info(f"Created notification from template '{template_name}' for user {user.username}")
 
@@ -184,6 +199,7 @@ def bulk_create_notifications(
 
     # Bulk create for better performance
     created_notifications = Notification.objects.bulk_create(notifications)
+    publish_created(created_notifications)
 
     logger.info(
         f"Created {len(created_notifications)} notifications of type '{notification_type}' "
@@ -193,6 +209,112 @@ def bulk_create_notifications(
     return created_notifications
 
 
+def notify_tenant_users(
+    tenant,
+    title: str,
+    message: str,
+    notification_type: str = "INFO",
+    action_url: Optional[str] = None,
+    action_text: Optional[str] = None,
+    expires_at: Optional[timezone.datetime] = None,
+) -> List[Notification]:
+    """
+    Create a notification for every active user of a tenant.
+
+    Open pages of the tenant's users are updated by a single tenant-wide
+    event rather than one event per user.
+
+    Args:
+        tenant: Tenant whose users receive the notification
+        title: Notification title
+        message: Notification message
+        notification_type: Type of notification (default: 'INFO')
+        action_url: Optional URL for action button
+        action_text: Optional text for action button
+        expires_at: Optional expiration datetime
+
+    Returns:
+        List of created Notification instances
+    """
+    notifications = Notification.objects.bulk_create(
+        [
+            Notification(
+                user=user,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                action_url=action_url,
+                action_text=action_text,
+                expires_at=expires_at,
+            )
+            for user in User.objects.filter(tenant=tenant, is_active=True).only("id")
+        ]
+    )
+    publish_tenant_created(tenant.id, notifications)
+
+    logger.info(
+        f"Created {len(notifications)} notifications of type '{notification_type}' "
+        f"for the users of {tenant.company_name}"
+    )
+
+    return notifications
+
+
+def notify_tenants(
+    notices: Dict[Any, Tuple[str, str]],
+    notification_type: str = "INFO",
+    action_url: Optional[str] = None,
+    action_text: Optional[str] = None,
+) -> List[Notification]:
+    """
+    Create a notification for every active user of several tenants at once.
+
+    One query loads the users of all tenants and one bulk insert creates
+    the notifications; each tenant's open pages get a single tenant-wide
+    event.
+
+    Args:
+        notices: (title, message) for each tenant id
+        notification_type: Type of notification (default: 'INFO')
+        action_url: Optional URL for action button
+        action_text: Optional text for action button
+
+    Returns:
+        List of created Notification instances
+    """
+    if not notices:
+        return []
+
+    users = User.objects.filter(tenant_id__in=notices, is_active=True).only("id", "tenant_id")
+    by_tenant = defaultdict(list)
+    for user in users:
+        title, message = notices[user.tenant_id]
+        by_tenant[user.tenant_id].append(
+            Notification(
+                user_id=user.id,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                action_url=action_url,
+                action_text=action_text,
+            )
+        )
+
+    notifications = Notification.objects.bulk_create(
+        [notification for batch in by_tenant.values() for notification in batch],
+        batch_size=1000,
+    )
+    for tenant_id, tenant_notifications in by_tenant.items():
+        publish_tenant_created(tenant_id, tenant_notifications)
+
+    logger.info(
+        f"Created {len(notifications)} notifications of type '{notification_type}' "
+        f"for the users of {len(notices)} tenants"
+    )
+
+    return notifications
+
+
 def get_user_notifications(
     user: User,
     unread_only: bool = False,
@@ -242,6 +364,10 @@ def get_unread_count(user: User) -> int:
     """
     Get count of unread notifications for a user.
 
+    The count is cached in Redis and kept up to date as notifications are
+    created and read, so the database is only counted when the cached value
+    is missing or has expired.
+
     Args:
         user: User to count notifications for
 
@@ -253,10 +379,11 @@ def get_unread_count(user: User) -> int:
         >>> count = get_unread_count(user)
         >>> print(f"You have {count} unread notifications")
     """
-    return (
-        user.notifications.filter(is_read=False)
+    return cached_unread_count(
+        user.pk,
+        lambda: user.notifications.filter(is_read=False)
         .filter(models.Q(expires_at__isnull=True) | models.Q(expires_at__gt=timezone.now()))
-        .count()
+        .count(),
     )
 
 
@@ -285,7 +412,10 @@ def mark_notifications_as_read(user: User, notification_ids: Optional[List[int]]
     if notification_ids:
         queryset = queryset.filter(id__in=notification_ids)
 
+    # Only rows this call changed are counted, so concurrent calls never
+    # decrement the cached unread count twice for the same notification
     count = queryset.update(is_read=True, read_at=timezone.now())
+    publish_read(user.pk, count)
 
     logger.info(f"Marked {count} notifications as read for user {user.username}")
 
@@ -307,7 +437,9 @@ def cleanup_expired_notifications() -> int:
         >>> deleted_count = cleanup_expired_notifications()
         >>> print(f"Cleaned up {deleted_count} expired notifications")
     """
-    deleted_count, _ = Notification.objects.filter(expires_at__lt=timezone.now()).delete()
+    expired = Notification.objects.filter(expires_at__lt=timezone.now())
+    reset_unread_counts(expired.filter(is_read=False).values_list("user_id", flat=True))
+    deleted_count, _ = expired.delete()
 
     logger.info(f"Cleaned up {deleted_count} expired notifications")
 
@@ -420,15 +552,13 @@ def send_email_notification(
     # Check user preferences - use a generic notification type for email delivery
     # For transactional emails, we should generally allow them regardless of preferences
     # But we'll check for a generic 'TRANSACTIONAL' type preference
-    notification_type_for_preference = (
-        "TRANSACTIONAL" if email_type == "TRANSACTIONAL" else "MARKETING"
-    )
+    notification_type_for_preference = get_preference_type(email_type)
     if not should_send_notification(user, notification_type_for_preference, "EMAIL"):
         logger.info(f"Email notification skipped for user {user.username} due to preferences")
         return None
 
-    # Render template
-    rendered = template.render(context)
+    # Render template (compiled templates are cached)
+    rendered = render_email_template(template, context)
     email_subject = subject or rendered["subject"]
     html_body = rendered["html_body"]
     text_body = rendered.get("text_body")
@@ -616,8 +746,11 @@ def send_bulk_email(
     """
     Send bulk emails to multiple users.
 
+    Recipients are processed in chunks by the batch delivery engine: one
+    preference query, bulk inserts and one mail connection per chunk.
+
     Args:
-        users: List of users to send emails to
+        users: List or queryset of users to send emails to
         template_name: Name of the email template
         context: Context variables for template rendering
         email_type: Type of email
@@ -627,21 +760,15 @@ def send_bulk_email(
     Returns:
         List of EmailNotification instances
     """
-    email_notifications = []
-
-    for user in users:
-        if user.email:  # Only send to users with email addresses
-            email_notification = send_email_notification(
-                user=user,
-                template_name=template_name,
-                context=context,
-                subject=subject,
-                email_type=email_type,
-                campaign_id=campaign_id,
-                create_in_app_notification=(email_type != "MARKETING"),
-            )
-            if email_notification:
-                email_notifications.append(email_notification)
+    email_notifications = send_batched_email(
+        users=users,
+        template_name=template_name,
+        context=context,
+        email_type=email_type,
+        campaign_id=campaign_id,
+        subject=subject,
+        create_in_app_notification=(email_type != "MARKETING"),
+    )
 
     logger.info(f"Sent {len(email_notifications)} bulk emails using template '{template_name}'")
 
@@ -0,0 +1,237 @@
+"""
+Server-Sent Events stream of in-app notification updates.
+
+A plain ASGI application mounted in front of Django by config/asgi.py. An
+open stream costs no Django request, middleware or database query: the
+user comes from the signed token in the URL and every update comes from
+Redis (apps/notifications/push.py).
+
+Each worker process holds a single Redis pub/sub connection, shared by all
+of its open streams, and subscribes to a channel only while a stream needs
+it. Streams send a comment line every NOTIFICATION_STREAM_HEARTBEAT seconds
+so proxies keep them open, and end after NOTIFICATION_STREAM_MAX_AGE
+seconds; the page then reconnects with a fresh token.
+
+Events:
+- count: {"unread_count": n} when the stream opens and after notifications
+  are marked read
+- notification: a new notification (title, type, action URL) with the new
+  unread_count
+
+unread_count is null when the counter is not cached; the page then fetches
+the count once from the regular notification count endpoint.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Optional, Set
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from .push import get_client, read_stream_token, tenant_channel, unread_count_key, user_channel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT = 20
+DEFAULT_MAX_AGE = 3600
+RETRY_MS = 5000
+QUEUE_SIZE = 100
+# Per worker process: the shared subscription plus unread count reads
+REDIS_CONNECTIONS = 20
+
+HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-cache"),
+    # Stop Nginx from buffering the stream
+    (b"x-accel-buffering", b"no"),
+]
+
+
+def _async_client() -> aioredis.Redis:
+    """asyncio client for the Redis server behind NOTIFICATION_PUSH_CACHE."""
+    url = getattr(settings, "NOTIFICATION_STREAM_REDIS_URL", None)
+    if url:
+        pool = aioredis.BlockingConnectionPool.from_url(url, max_connections=REDIS_CONNECTIONS)
+    else:
+        kwargs = get_client().connection_pool.connection_kwargs
+        pool = aioredis.BlockingConnectionPool(
+            max_connections=REDIS_CONNECTIONS,
+            **{
+                key: kwargs[key]
+                for key in ("host", "port", "db", "username", "password")
+                if key in kwargs
+            },
+        )
+    return aioredis.Redis(connection_pool=pool)
+
+
+class NotificationHub:
+    """Fans messages from one Redis pub/sub connection out to open streams."""
+
+    def __init__(self, client: aioredis.Redis):
+        self.client = client
+        self.pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self.queues: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.lock = asyncio.Lock()
+        self.reader: Optional[asyncio.Task] = None
+
+    async def subscribe(self, channels, queue: asyncio.Queue) -> None:
+        async with self.lock:
+            new = [channel for channel in channels if not self.queues.get(channel)]
+            for channel in channels:
+                self.queues[channel].add(queue)
+            if new:
+                await self.pubsub.subscribe(*new)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(self, channels, queue: asyncio.Queue) -> None:
+        async with self.lock:
+            idle = []
+            for channel in channels:
+                self.queues[channel].discard(queue)
+                if not self.queues[channel]:
+                    del self.queues[channel]
+                    idle.append(channel)
+            if idle:
+                await self.pubsub.unsubscribe(*idle)
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except RedisError as e:
+                # The connection resubscribes its channels when it reconnects
+                logger.warning(f"Notification hub lost Redis: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not message or message["type"] != "message":
+                continue
+            channel = message["channel"].decode()
+            for queue in list(self.queues.get(channel, ())):
+                try:
+                    queue.put_nowait(message["data"])
+                except asyncio.QueueFull:
+                    # A stuck client misses events; its next count event catches up
+                    pass
+
+    async def unread_count(self, user_id) -> Optional[int]:
+        try:
+            value = await self.client.get(unread_count_key(user_id))
+        except RedisError as e:
+            logger.warning(f"Failed to read unread count: {e}")
+            return None
+        return None if value is None else int(value)
+
+
+_hubs: Dict[asyncio.AbstractEventLoop, NotificationHub] = {}
+
+
+def get_hub() -> NotificationHub:
+    """The hub of the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _hubs:
+        for closed in [other for other in _hubs if other.is_closed()]:
+            del _hubs[closed]
+        _hubs[loop] = NotificationHub(_async_client())
+    return _hubs[loop]
+
+
+def format_event(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def _reject(send, status: int, message: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain")],
+        }
+    )
+    await send({"type": "http.response.body", "body": message})
+
+
+async def _wait_for_disconnect(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _next_chunk(hub, user_id, queue, disconnect, timeout) -> Optional[bytes]:
+    """The next event, a keepalive comment after ``timeout``, or None on disconnect."""
+    get = asyncio.ensure_future(queue.get())
+    done, _ = await asyncio.wait(
+        {get, disconnect}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+    )
+    if get not in done:
+        get.cancel()
+        return None if disconnect.done() else b": keepalive\n\n"
+
+    event = json.loads(get.result())
+    name = event.pop("event")
+    event["unread_count"] = await hub.unread_count(user_id)
+    return format_event(name, event)
+
+
+async def notification_stream(scope, receive, send) -> None:  # noqa: C901
+    """ASGI application serving a user's notification stream."""
+    if scope["method"] != "GET":
+        await _reject(send, 405, b"Method not allowed")
+        return
+    token = parse_qs(scope["query_string"].decode()).get("token", [""])[0]
+    identity = read_stream_token(token)
+    if identity is None:
+        await _reject(send, 403, b"Invalid or expired token")
+        return
+
+    user_id, tenant_id = identity
+    channels = [user_channel(user_id)]
+    if tenant_id:
+        channels.append(tenant_channel(tenant_id))
+
+    heartbeat = getattr(settings, "NOTIFICATION_STREAM_HEARTBEAT", DEFAULT_HEARTBEAT)
+    max_age = getattr(settings, "NOTIFICATION_STREAM_MAX_AGE", DEFAULT_MAX_AGE)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+
+    hub = get_hub()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    try:
+        await hub.subscribe(channels, queue)
+    except RedisError as e:
+        logger.warning(f"Notification stream unavailable: {e}")
+        await _reject(send, 503, b"Notification stream unavailable")
+        return
+
+    disconnect = asyncio.create_task(_wait_for_disconnect(receive))
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": HEADERS})
+        count = await hub.unread_count(user_id)
+        await send(
+            {
+                "type": "http.response.body",
+                "body": f"retry: {RETRY_MS}\n\n".encode()
+                + format_event("count", {"unread_count": count}),
+                "more_body": True,
+            }
+        )
+
+        while not disconnect.done():
+            timeout = min(heartbeat, deadline - loop.time())
+            if timeout <= 0:
+                break
+            chunk = await _next_chunk(hub, user_id, queue, disconnect, timeout)
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        if not disconnect.done():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        disconnect.cancel()
+        await hub.unsubscribe(channels, queue)
@@ -98,30 +98,20 @@ def send_bulk_email_task(
     try:
         users = User.objects.filter(id__in=user_ids, email__isnull=False).exclude(email="")
 
-        from .services import send_email_notification
-
-        sent_count = 0
-        failed_count = 0
-
-        for user in users:
-            try:
-                email_notification = send_email_notification(
-                    user=user,
-                    template_name=template_name,
-                    context=context,
-                    email_type=email_type,
-                    campaign_id=campaign_id,
-                    create_in_app_notification=(email_type != "MARKETING"),
-                )
-
-                if email_notification:
-                    sent_count += 1
-                else:
-                    failed_count += 1
+        from .email_delivery import send_batched_email
+
+        email_notifications = send_batched_email(
+            users=users.order_by("id"),
+            template_name=template_name,
+            context=context,
+            email_type=email_type,
+            campaign_id=campaign_id,
+            create_in_app_notification=(email_type != "MARKETING"),
+        )
 
-            except Exception as e:
-                logger.error(f"Failed to send bulk email to user {user.id}: {str(e)}")
-                failed_count += 1
+        sent_count = sum(1 for email in email_notifications if email.status == "SENT")
+        # Recipients skipped by their preferences count as failed, as before
+        failed_count = users.count() - sent_count
 
         logger.info(f"Bulk email task completed: {sent_count} sent, {failed_count} failed")
 
@@ -0,0 +1,22 @@
+"""
+Template tags for the notifications app.
+"""
+
+from django import template
+
+from ..push import stream_url
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def notification_stream_url(context):
+    """
+    Signed URL of the current user's notification stream, or "" if logged out.
+    Usage: {% notification_stream_url %}
+    """
+    request = context.get("request")
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return ""
+    return stream_url(user)
@@ -0,0 +1,357 @@
+"""
+Tests for pushed notification updates.
+
+Checks that an open Server-Sent Events stream receives a notification as
+soon as it is created, that the cached unread count stays exact under
+concurrent mark-read calls, that tenant-wide notifications reach every
+stream of the tenant through one event, and that idle streams cost no
+requests or queries, against the polling they replace. Runs against the
+Redis server of the test settings, like the rate limiter tests.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+
+import apps.core.data_models  # noqa: F401 - lets TransactionTestCase flush the tables they add
+from apps.core.models import Tenant, User
+from apps.core.tenant_context import bypass_rls
+from apps.notifications.models import Notification
+from apps.notifications.push import (
+    get_client,
+    make_stream_token,
+    tenant_channel,
+    unread_count_key,
+    user_channel,
+)
+from apps.notifications.services import (
+    create_notification,
+    get_unread_count,
+    mark_notifications_as_read,
+    notify_tenant_users,
+)
+from config.asgi import application
+
+
+def stream_scope(token):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/notifications/stream/",
+        "raw_path": b"/notifications/stream/",
+        "query_string": f"token={token}".encode(),
+        "headers": [],
+    }
+
+
+def parse_events(body):
+    """(event, data) pairs of an SSE body, skipping comments and retry fields."""
+    events = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line)
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class Stream:
+    """An open notification stream driven in-process."""
+
+    def __init__(self, token):
+        self.communicator = ApplicationCommunicator(application, stream_scope(token))
+
+    async def open(self):
+        await self.communicator.send_input({"type": "http.request", "body": b""})
+        start = await self.communicator.receive_output(timeout=5)
+        return start["status"], await self.events()
+
+    async def events(self, timeout=5):
+        message = await self.communicator.receive_output(timeout=timeout)
+        return parse_events(message["body"])
+
+    async def close(self):
+        await self.communicator.send_input({"type": "http.disconnect"})
+        await self.communicator.wait(timeout=5)
+
+
+async def wait_for_subscribers(channel, count):
+    """Wait until the hub's subscription reached Redis."""
+    client = get_client()
+    for _ in range(100):
+        if dict(client.pubsub_numsub(channel))[channel.encode()] >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{channel} has no subscribers")
+
+
+class PushFixtureMixin:
+    """A tenant with users whose cached counts start empty."""
+
+    def create_fixture(self, slug, users=1):
+        with bypass_rls():
+            self.tenant = Tenant.objects.create(
+                company_name=f"Push Shop {slug}", slug=slug, status=Tenant.ACTIVE
+            )
+            self.users = [
+                User.objects.create_user(
+                    username=f"{slug}-{i}",
+                    password="testpass123",
+                    tenant=self.tenant,
+                    role=User.TENANT_EMPLOYEE,
+                )
+                for i in range(users)
+            ]
+        self.user = self.users[0]
+        # User ids are reused when the test database is recreated
+        get_client().delete(*[unread_count_key(user.pk) for user in self.users])
+
+
+class NotificationStreamTest(PushFixtureMixin, TestCase):
+    """Streams served by the ASGI application."""
+
+    def setUp(self):
+        self.create_fixture("push-stream", users=2)
+
+    def create(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_notification(self.user, title, "Gold rate changed")
+
+    def test_event_arrives_after_notification_is_created(self):
+        self.create("Older")
+        assert get_unread_count(self.user) == 1
+
+        async def scenario():
+            stream = Stream(make_stream_token(self.user))
+            status, events = await stream.open()
+            assert status == 200
+            assert events == [("count", {"unread_count": 1})]
+            await wait_for_subscribers(user_channel(self.user.pk), 1)
+
+            notification = await sync_to_async(self.create)("Low stock: Gold Ring")
+            [(event, data)] = await stream.events()
+            await stream.close()
+            return notification, event, data
+
+        notification, event, data = async_to_sync(scenario)()
+
+        assert event == "notification"
+        assert data == {
+            "id": notification.pk,
+            "title": "Low stock: Gold Ring",
+            "notification_type": "INFO",
+            "action_url": None,
+            "unread_count": 2,
+        }
+
+    def test_mark_read_updates_open_streams(self):
+        notifications = [self.create(f"Alert {i}") for i in range(3)]
+        assert get_unread_count(self.user) == 3
+
+        async def scenario():
+            stream = Stream(make_stream_token(self.user))
+            await stream.open()
+            await wait_for_subscribers(user_channel(self.user.pk), 1)
+
+            def mark():
+                with self.captureOnCommitCallbacks(execute=True):
+                    mark_notifications_as_read(self.user, [notifications[0].pk])
+
+            await sync_to_async(mark)()
+            events = await stream.events()
+            await stream.close()
+            return events
+
+        assert async_to_sync(scenario)() == [("count", {"unread_count": 2})]
+
+    def test_tenant_notification_is_one_event(self):
+        for user in self.users:
+            assert get_unread_count(user) == 0
+
+        async def scenario():
+            streams = [Stream(make_stream_token(user)) for user in self.users]
+            for stream in streams:
+                await stream.open()
+            await wait_for_subscribers(tenant_channel(self.tenant.pk), 1)
+
+            def notify():
+                with self.captureOnCommitCallbacks(execute=True):
+                    notify_tenant_users(self.tenant, "Closing early", "Holiday hours")
+
+            await sync_to_async(notify)()
+            received = [await stream.events() for stream in streams]
+            for stream in streams:
+                await stream.close()
+            return received
+
+        received = async_to_sync(scenario)()
+
+        for events in received:
+            assert events == [
+                (
+                    "notification",
+                    {
+                        "id": None,
+                        "title": "Closing early",
+                        "notification_type": "INFO",
+                        "action_url": None,
+                        "unread_count": 1,
+                    },
+                )
+            ]
+        assert Notification.objects.filter(title="Closing early").count() == 2
+
+    def test_invalid_token_is_rejected(self):
+        async def scenario():
+            communicator = ApplicationCommunicator(
+                application, stream_scope(make_stream_token(self.user) + "x")
+            )
+            await communicator.send_input({"type": "http.request", "body": b""})
+            start = await communicator.receive_output(timeout=5)
+            await communicator.wait()
+            return start["status"]
+
+        assert async_to_sync(scenario)() == 403
+
+    @override_settings(NOTIFICATION_STREAM_MAX_AGE=0.2, NOTIFICATION_STREAM_HEARTBEAT=0.05)
+    def test_idle_stream_sends_keepalives_and_ends(self):
+        async def scenario():
+            stream = Stream(make_stream_token(self.user))
+            await stream.open()
+            bodies = []
+            while True:
+                message = await stream.communicator.receive_output(timeout=5)
+                bodies.append(message["body"])
+                if not message.get("more_body"):
+                    break
+            await stream.communicator.wait()
+            return bodies
+
+        bodies = async_to_sync(scenario)()
+        assert b": keepalive\n\n" in bodies
+        assert bodies[-1] == b""
+
+
+class UnreadCounterTest(PushFixtureMixin, TestCase):
+    """The cached unread count."""
+
+    def setUp(self):
+        self.create_fixture("push-counter")
+
+    def test_count_is_served_from_redis(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                create_notification(self.user, f"Alert {i}", "Message")
+
+        assert get_unread_count(self.user) == 3
+        with self.assertNumQueries(0):
+            assert get_unread_count(self.user) == 3
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notification(self.user, "Alert 3", "Message")
+            Notification.objects.filter(user=self.user).first().mark_as_read()
+        with self.assertNumQueries(0):
+            assert get_unread_count(self.user) == 3
+
+
+class ConcurrentMarkReadTest(PushFixtureMixin, TransactionTestCase):
+    """Concurrent mark-read calls from separate connections."""
+
+    def setUp(self):
+        self.create_fixture("push-concurrent")
+
+    def test_counter_stays_exact(self):
+        notifications = [
+            create_notification(self.user, f"Alert {i}", "Message") for i in range(10)
+        ]
+        ids = [notification.pk for notification in notifications]
+        assert get_unread_count(self.user) == 10
+
+        # Overlapping batches and repeated single reads of the same rows
+        calls = [lambda: mark_notifications_as_read(self.user, ids[:6])] * 5
+        calls += [lambda: mark_notifications_as_read(self.user, ids[3:9])] * 5
+        calls += [lambda: Notification.objects.get(pk=ids[0]).mark_as_read()] * 5
+        barrier = threading.Barrier(len(calls))
+
+        def worker(call):
+            try:
+                barrier.wait()
+                call()
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(call,)) for call in calls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert Notification.objects.filter(user=self.user, is_read=False).count() == 1
+        assert int(get_client().get(unread_count_key(self.user.pk))) == 1
+
+
+class PollingVersusPushTest(PushFixtureMixin, TestCase):
+    """
+    2,000 idle clients over five minutes: polling every 30 seconds against
+    open streams. tests/load/locustfile_notifications.py runs the same
+    comparison against a deployed server.
+    """
+
+    clients = 2000
+    window = 300
+
+    def setUp(self):
+        self.create_fixture("push-load")
+
+    def test_idle_clients(self):
+        self.client.force_login(self.user)
+        # Tenant pages read the tenant portal's session cookie
+        self.client.cookies["tenant_sessionid"] = self.client.cookies["sessionid"].value
+        with CaptureQueriesContext(connection) as poll:
+            response = self.client.get("/notifications/count/")
+        assert response.status_code == 200
+        polls = self.clients * self.window // 30
+        polling_queries = polls * len(poll)
+
+        streams_opened = []
+
+        async def scenario():
+            streams = [Stream(make_stream_token(self.user)) for _ in range(self.clients)]
+            for stream in streams:
+                await stream.communicator.send_input({"type": "http.request", "body": b""})
+            for stream in streams:
+                await stream.communicator.receive_output(timeout=30)
+                await stream.events(timeout=30)
+                streams_opened.append(stream)
+            await wait_for_subscribers(user_channel(self.user.pk), 1)
+            subscriptions = dict(get_client().pubsub_numsub(user_channel(self.user.pk)))
+            # Idle time: only keepalives
+            await asyncio.sleep(0.5)
+            for stream in streams:
+                await stream.close()
+            return subscriptions[user_channel(self.user.pk).encode()]
+
+        with CaptureQueriesContext(connection) as push:
+            with override_settings(NOTIFICATION_STREAM_HEARTBEAT=0.1):
+                start = time.perf_counter()
+                redis_subscriptions = async_to_sync(scenario)()
+                elapsed = time.perf_counter() - start
+
+        assert len(streams_opened) == self.clients
+        # One shared subscription per worker, not one per client
+        assert redis_subscriptions == 1
+        # Polling: 20,000 Django requests through the full middleware stack
+        assert polls == 20000 and polling_queries >= polls
+        # Push: the streams opened and idled without a request or a query
+        assert len(push) == 0
+        assert elapsed < 60
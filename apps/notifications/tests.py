@@ -1,8 +1,11 @@
+import smtplib
 from datetime import time, timedelta
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from apps.core.models import Tenant
@@ -2438,3 +2441,151 @@ class SegmentationServiceTests(TestCase):
 
         customers = get_segment_customers(str(uuid.uuid4()))
         self.assertIsNone(customers)
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    """Locmem backend that counts connections and can refuse addresses."""
+
+    connections = 0
+    refused = {}
+
+    def open(self):
+        CountingEmailBackend.connections += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            address = message.to[0]
+            if CountingEmailBackend.refused.get(address, 0) > 0:
+                CountingEmailBackend.refused[address] -= 1
+                raise smtplib.SMTPRecipientsRefused({address: (550, b"Mailbox unavailable")})
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="apps.notifications.tests.CountingEmailBackend")
+class BatchEmailDeliveryTests(TestCase):
+    """Test cases for the batched email delivery engine"""
+
+    def setUp(self):
+        """Set up test data"""
+        from apps.core.tenant_context import enable_rls_bypass
+
+        from .models import EmailTemplate
+
+        enable_rls_bypass()
+
+        CountingEmailBackend.connections = 0
+        CountingEmailBackend.refused = {}
+
+        self.tenant = Tenant.objects.create(company_name="Batch Shop", slug="batch-shop")
+        self.users = [self._create_user(index) for index in range(6)]
+
+        self.email_template = EmailTemplate.objects.create(
+            name="batch_template",
+            subject_template="Offer: {{ name }}",
+            html_template="<h1>Hello {{ name }}</h1>",
+            text_template="Hello {{ name }}",
+            email_type="MARKETING",
+        )
+
+    def _create_user(self, index, opted_in=True):
+        user = User.objects.create_user(
+            username=f"batchuser{index}",
+            email=f"batch{index}@example.com",
+            password="testpass123",
+            tenant=self.tenant,
+            role="TENANT_EMPLOYEE",
+        )
+        for notification_type in ("MARKETING", "TRANSACTIONAL"):
+            NotificationPreference.objects.create(
+                user=user,
+                notification_type=notification_type,
+                channel="EMAIL",
+                is_enabled=opted_in,
+            )
+        return user
+
+    def _send(self, users, **kwargs):
+        from .email_delivery import send_batched_email
+
+        return send_batched_email(users, "batch_template", {"name": "John"}, **kwargs)
+
+    def test_one_connection_per_chunk(self):
+        """Each chunk is sent over a single connection"""
+        emails = self._send(self.users, chunk_size=4)
+
+        self.assertEqual(len(emails), 6)
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(CountingEmailBackend.connections, 2)
+        self.assertTrue(all(email.status == "SENT" for email in emails))
+
+    def test_constant_queries_per_chunk(self):
+        """Queries do not grow with the number of recipients in a chunk"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def count_queries(users):
+            with CaptureQueriesContext(connection) as queries:
+                self._send(users, email_type="TRANSACTIONAL", chunk_size=10)
+            # Ignore EXPLAINs added by the query profiler in development settings
+            return len([q for q in queries if not q["sql"].startswith("EXPLAIN")])
+
+        # Template, preferences, notifications, emails, status update
+        self.assertEqual(count_queries(self.users[:2]), 5)
+        self.assertEqual(count_queries(self.users), 5)
+
+    def test_preferences_respected(self):
+        """Recipients who opted out, or never opted in, are skipped"""
+        opted_out = self._create_user(10, opted_in=False)
+        no_preference = User.objects.create_user(
+            username="nopref", email="nopref@example.com", password="x", tenant=self.tenant
+        )
+
+        emails = self._send([self.users[0], opted_out, no_preference])
+
+        self.assertEqual([email.user for email in emails], [self.users[0]])
+
+    def test_rendered_output_matches_single_send(self):
+        """Batched emails are identical to those of send_email_notification"""
+        from .services import send_email_notification
+
+        send_email_notification(
+            self.users[0], "batch_template", {"name": "John"}, email_type="TRANSACTIONAL"
+        )
+        self._send([self.users[1]], email_type="TRANSACTIONAL")
+
+        single, batched = mail.outbox
+        self.assertEqual(single.subject, batched.subject)
+        self.assertEqual(single.body, batched.body)
+        self.assertEqual(single.alternatives, batched.alternatives)
+        self.assertEqual(
+            Notification.objects.get(user=self.users[0]).message,
+            Notification.objects.get(user=self.users[1]).message,
+        )
+
+    def test_failed_address_retried_individually(self):
+        """Failures are retried alone and the rest of the chunk is not resent"""
+        CountingEmailBackend.refused = {"batch1@example.com": 1, "batch2@example.com": 5}
+
+        emails = self._send(self.users, chunk_size=10)
+
+        statuses = {email.to_email: email.status for email in emails}
+        self.assertEqual(statuses["batch1@example.com"], "SENT")
+        self.assertEqual(statuses["batch2@example.com"], "FAILED")
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(len({message.to[0] for message in mail.outbox}), 5)
+
+    def test_template_cache_follows_updates(self):
+        """Editing a template invalidates its compiled form"""
+        from .email_delivery import get_compiled_template
+
+        compiled = get_compiled_template(self.email_template)
+        self.assertIs(get_compiled_template(self.email_template), compiled)
+
+        self.email_template.subject_template = "New offer: {{ name }}"
+        self.email_template.save()
+
+        self.assertEqual(
+            get_compiled_template(self.email_template).render({"name": "Ann"})["subject"],
+            "New offer: Ann",
+        )
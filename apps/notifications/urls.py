@@ -16,6 +16,8 @@ urlpatterns = [
     path("count/", views.NotificationCountView.as_view(), name="count"),
     path("list/", views.NotificationListView.as_view(), name="list"),
     path("dropdown/", views.NotificationDropdownView.as_view(), name="dropdown"),
+    # Server-Sent Events stream URL (the stream itself is served by config/asgi.py)
+    path("stream-token/", views.stream_token, name="stream_token"),
     # Mark as read endpoints
     path("mark-read/", views.mark_as_read, name="mark_read"),
     path("mark-read/<int:notification_id>/", views.mark_single_as_read, name="mark_single_read"),
@@ -3,7 +3,7 @@ Views for the notification system.
 
 This module provides views for managing in-app notifications including:
 - Notification center
-- Real-time notification updates via HTMX
+- Real-time notification updates via Server-Sent Events, with HTMX polling as fallback
 - Notification preferences management
 - Mark as read functionality
 """
@@ -25,6 +25,7 @@ from django.views.generic import ListView
 from apps.core.decorators import portal_login_required
 
 from .models import Notification, NotificationPreference
+from .push import stream_url
 from .services import (
     get_unread_count,
     get_user_notifications,
@@ -297,6 +298,16 @@ class NotificationDropdownView(View):
         )
 
 
+@require_http_methods(["GET"])
+@portal_login_required
+def stream_token(request: HttpRequest) -> JsonResponse:
+    """
+    Return a fresh notification stream URL.
+    Pages call this when their stream ends or its token has expired.
+    """
+    return JsonResponse({"url": stream_url(request.user)})
+
+
 @require_http_methods(["POST"])
 def sms_webhook(request: HttpRequest) -> HttpResponse:
     """
@@ -0,0 +1,211 @@
+"""
+Indexed price alert evaluation across all tenants.
+
+A gold rate tick is checked against every active alert of its market at
+once instead of tenant by tenant:
+
+- One query loads the active alerts of the market
+- AlertIndex keeps the thresholds of each condition type in sorted arrays,
+  so the alerts a rate fires are found by binary search in O(log n + k):
+  THRESHOLD_ABOVE alerts fire for thresholds <= rate (a prefix),
+  THRESHOLD_BELOW alerts for thresholds >= rate (a suffix) and
+  PERCENTAGE_CHANGE alerts for thresholds <= |change| (a prefix), with the
+  change computed once per tick by GoldRate.calculate_percentage_change
+- One UPDATE ... WHERE id = ANY(...) marks the fired alerts whose cooldown
+  has passed; the cooldown is checked in that statement, so overlapping
+  runs never trigger an alert twice
+- Each tenant gets one in-app notification listing its triggered alerts,
+  created for all tenants in one batch
+
+Results match PriceAlert.check_condition for every alert. Alerts without a
+threshold never fire.
+"""
+
+import logging
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.core.models import Tenant
+from apps.core.tenant_context import bypass_rls
+from apps.notifications.services import notify_tenants
+from apps.pricing.models import GoldRate, PriceAlert
+
+logger = logging.getLogger(__name__)
+
+ALERT_FIELDS = (
+    "id",
+    "tenant_id",
+    "name",
+    "alert_type",
+    "threshold_rate",
+    "percentage_threshold",
+    "notify_in_app",
+)
+
+# Alert type -> field holding the threshold its condition compares against
+THRESHOLD_FIELDS = {
+    PriceAlert.THRESHOLD_ABOVE: "threshold_rate",
+    PriceAlert.THRESHOLD_BELOW: "threshold_rate",
+    PriceAlert.PERCENTAGE_CHANGE: "percentage_threshold",
+}
+
+MARK_TRIGGERED_SQL = """
+UPDATE pricing_alerts
+SET last_triggered_at = %s, trigger_count = trigger_count + 1
+WHERE id = ANY(%s::uuid[])
+  AND is_active
+  AND (
+      last_triggered_at IS NULL
+      OR last_triggered_at <= %s - make_interval(mins => cooldown_minutes)
+  )
+RETURNING id
+"""
+
+
+class AlertIndex:
+    """Active alerts of a market indexed by condition type and threshold."""
+
+    def __init__(self, alerts: Iterable):
+        """
+        Args:
+            alerts: Rows with at least alert_type, threshold_rate and
+                percentage_threshold attributes
+        """
+        entries = defaultdict(list)
+        for alert in alerts:
+            field = THRESHOLD_FIELDS.get(alert.alert_type)
+            threshold = getattr(alert, field) if field else None
+            if threshold is not None:
+                entries[alert.alert_type].append((threshold, alert))
+
+        self.thresholds: Dict[str, List[Decimal]] = {}
+        self.alerts: Dict[str, List] = {}
+        for alert_type in THRESHOLD_FIELDS:
+            ordered = sorted(entries[alert_type], key=lambda entry: entry[0])
+            self.thresholds[alert_type] = [threshold for threshold, _ in ordered]
+            self.alerts[alert_type] = [alert for _, alert in ordered]
+
+    def __len__(self):
+        return sum(len(alerts) for alerts in self.alerts.values())
+
+    def matches(self, rate: Decimal, change: Optional[Decimal] = None) -> List:
+        """
+        Alerts fired by a rate.
+
+        Args:
+            rate: Current rate per gram
+            change: Absolute percentage change from the previous rate, or
+                None when there is no previous rate
+
+        Returns:
+            The fired alerts
+        """
+        above = PriceAlert.THRESHOLD_ABOVE
+        below = PriceAlert.THRESHOLD_BELOW
+        fired = self.alerts[above][: bisect_right(self.thresholds[above], rate)]
+        fired += self.alerts[below][bisect_left(self.thresholds[below], rate) :]
+        if change is not None:
+            percentage = PriceAlert.PERCENTAGE_CHANGE
+            fired += self.alerts[percentage][: bisect_right(self.thresholds[percentage], change)]
+        return fired
+
+
+def rate_change(current_rate: GoldRate, previous_rate: Optional[GoldRate]) -> Optional[Decimal]:
+    """Absolute percentage change percentage alerts compare against."""
+    if not previous_rate:
+        return None
+    return abs(current_rate.calculate_percentage_change(previous_rate))
+
+
+class PriceAlertEngine:
+    """
+    Evaluate and trigger the price alerts of a market for a new gold rate.
+
+    Checks every active tenant by default, or a single tenant.
+    """
+
+    def __init__(self, market: str, tenant: Optional[Tenant] = None):
+        self.market = market
+        self.tenant = tenant
+
+    def load_index(self) -> AlertIndex:
+        """Index of the market's active alerts, loaded with one query."""
+        alerts = PriceAlert.objects.filter(market=self.market, is_active=True)
+        if self.tenant is not None:
+            alerts = alerts.filter(tenant=self.tenant)
+        else:
+            alerts = alerts.filter(tenant__status=Tenant.ACTIVE)
+        return AlertIndex(alerts.values_list(*ALERT_FIELDS, named=True).iterator(chunk_size=5000))
+
+    def run(self, current_rate: GoldRate, previous_rate: Optional[GoldRate] = None) -> List:
+        """
+        Trigger the alerts fired by a rate and notify their tenants.
+
+        Args:
+            current_rate: Current GoldRate instance
+            previous_rate: Previous GoldRate instance (for percentage change alerts)
+
+        Returns:
+            Rows (ALERT_FIELDS) of the alerts that were triggered
+        """
+        with bypass_rls():
+            index = self.load_index()
+            fired = index.matches(
+                current_rate.rate_per_gram, rate_change(current_rate, previous_rate)
+            )
+            if not fired:
+                return []
+
+            with transaction.atomic():
+                triggered_ids = self._mark_triggered([alert.id for alert in fired])
+                triggered = [alert for alert in fired if alert.id in triggered_ids]
+                self._notify(triggered, current_rate)
+
+        logger.info(
+            f"{len(index)} {self.market} alerts checked at {current_rate.rate_per_gram}/g: "
+            f"{len(fired)} fired, {len(triggered)} triggered"
+        )
+        return triggered
+
+    def _mark_triggered(self, alert_ids: List) -> set:
+        """Record the trigger of every alert out of its cooldown; returns their ids."""
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(MARK_TRIGGERED_SQL, [now, [str(pk) for pk in alert_ids], now])
+            return {row[0] for row in cursor.fetchall()}
+
+    def _notify(self, triggered: List, current_rate: GoldRate) -> None:
+        """One in-app notification per tenant listing its triggered alerts."""
+        by_tenant = defaultdict(list)
+        for alert in triggered:
+            if alert.notify_in_app:
+                by_tenant[alert.tenant_id].append(alert)
+
+        notices = {}
+        for tenant_id, alerts in by_tenant.items():
+            lines = [
+                f"{alert.name}: {describe_condition(alert)}"
+                for alert in sorted(alerts, key=lambda alert: alert.name)
+            ]
+            lines.append(f"Current rate: {current_rate.rate_per_gram}/g ({current_rate.market})")
+            title = (
+                f"Price alert: {alerts[0].name}"
+                if len(alerts) == 1
+                else f"{len(alerts)} price alerts triggered"
+            )
+            notices[tenant_id] = (title, "\n".join(lines))
+        notify_tenants(notices, notification_type="WARNING")
+
+
+def describe_condition(alert) -> str:
+    """PriceAlert.get_condition_description for an alert row."""
+    return PriceAlert(
+        alert_type=alert.alert_type,
+        threshold_rate=alert.threshold_rate,
+        percentage_threshold=alert.percentage_threshold,
+    ).get_condition_description()
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.26 on 2026-10-19 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pricing", "0002_add_price_change_and_override_models"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pricealert",
+            name="cooldown_minutes",
+            field=models.PositiveIntegerField(
+                default=60, help_text="Minimum time between two triggers of this alert (in minutes)"
+            ),
+        ),
+    ]
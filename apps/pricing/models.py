@@ -665,6 +665,11 @@ class PriceAlert(models.Model):
         help_text="Send in-app notifications",
     )
 
+    cooldown_minutes = models.PositiveIntegerField(
+        default=60,
+        help_text="Minimum time between two triggers of this alert (in minutes)",
+    )
+
     # Tracking
     last_triggered_at = models.DateTimeField(
         null=True,
@@ -600,6 +600,10 @@ class PriceAlertService:
         """
         Check all active alerts for the tenant and trigger if conditions met.
 
+        Alerts still within their cooldown are not triggered again. Evaluation
+        and notifications go through apps.pricing.alert_engine, like the
+        periodic check across all tenants.
+
         Args:
             current_rate: Current GoldRate instance
             previous_rate: Previous GoldRate instance (for percentage change alerts)
@@ -607,42 +611,11 @@ class PriceAlertService:
         Returns:
             List of triggered PriceAlert instances
         """
-        alerts = PriceAlert.objects.filter(
-            tenant=self.tenant,
-            is_active=True,
-            market=current_rate.market,
-        )
-
-        triggered_alerts = []
-
-        for alert in alerts:
-            if alert.check_condition(current_rate, previous_rate):
-                alert.trigger_alert()
-                triggered_alerts.append(alert)
-
-                # Send notifications
-                self._send_alert_notifications(alert, current_rate)
-
-        return triggered_alerts
+        from apps.pricing.alert_engine import PriceAlertEngine
 
-    def _send_alert_notifications(self, alert: PriceAlert, current_rate: GoldRate):
-        """
-        Send notifications for a triggered alert.
-
-        Args:
-            alert: Triggered PriceAlert instance
-            current_rate: Current GoldRate instance
-        """
-        # TODO: Implement actual notification sending
-        # This would integrate with the notification system (email, SMS, in-app)
-
-        message = (
-            f"Price Alert: {alert.name}\n"
-            f"Condition: {alert.get_condition_description()}\n"
-            f"Current Rate: {current_rate.rate_per_gram}/g\n"
-            f"Market: {current_rate.market}\n"
-            f"Time: {current_rate.timestamp}"
+        triggered = PriceAlertEngine(current_rate.market, tenant=self.tenant).run(
+            current_rate, previous_rate
         )
-
-        # Placeholder for notification sending
-        print(f"Alert triggered: {message}")
+        if not triggered:
+            return []
+        return list(PriceAlert.objects.filter(id__in=[alert.id for alert in triggered]))
@@ -353,13 +353,14 @@ def check_price_alerts() -> str:
     Check all active price alerts and trigger notifications if conditions are met.
 
     This task runs after gold rates are updated to check if any alerts should be triggered.
+    The alerts of every active tenant are evaluated together by the indexed alert
+    engine (apps.pricing.alert_engine) with a constant number of queries.
 
     Returns:
         str: Summary of alerts checked and triggered
     """
     try:
-        from apps.core.models import Tenant
-        from apps.pricing.services import PriceAlertService
+        from apps.pricing.alert_engine import PriceAlertEngine
 
         # Get current and previous gold rates
         current_rate = GoldRate.get_latest_rate()
@@ -378,24 +379,8 @@ def check_price_alerts() -> str:
             .first()
         )
 
-        total_triggered = 0
-
-        # Check alerts for all active tenants
-        tenants = Tenant.objects.filter(status="ACTIVE")
-
-        for tenant in tenants:
-            try:
-                service = PriceAlertService(tenant)
-                triggered_alerts = service.check_alerts(current_rate, previous_rate)
-                total_triggered += len(triggered_alerts)
-
-                if triggered_alerts:
-                    logger.info(
-                        f"Triggered {len(triggered_alerts)} alerts for tenant {tenant.company_name}"
-                    )
-
-            except Exception as e:
-                logger.error(f"Error checking alerts for tenant {tenant.company_name}: {e}")
+        triggered = PriceAlertEngine(current_rate.market).run(current_rate, previous_rate)
+        total_triggered = len(triggered)
 
         logger.info(f"Alert check complete: {total_triggered} alerts triggered")
         return f"Checked price alerts: {total_triggered} triggered"
@@ -0,0 +1,274 @@
+"""
+Tests for the indexed price alert engine.
+
+Covers equivalence of the index with PriceAlert.check_condition, cooldowns,
+per-tenant notification batching and a query count independent of the
+number of tenants.
+"""
+
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.models import Tenant, User
+from apps.core.tenant_context import bypass_rls
+from apps.notifications.models import Notification
+from apps.pricing.alert_engine import AlertIndex, PriceAlertEngine, rate_change
+from apps.pricing.models import GoldRate, PriceAlert
+from apps.pricing.services import PriceAlertService
+
+ALERT_TYPES = [PriceAlert.THRESHOLD_ABOVE, PriceAlert.THRESHOLD_BELOW, PriceAlert.PERCENTAGE_CHANGE]
+
+
+def make_rate(rate_per_gram):
+    return GoldRate(
+        rate_per_gram=Decimal(rate_per_gram),
+        rate_per_tola=Decimal("0"),
+        rate_per_ounce=Decimal("0"),
+        market=GoldRate.INTERNATIONAL,
+        currency="USD",
+        source="Test",
+    )
+
+
+def random_alert(rng, pk):
+    return PriceAlert(
+        id=pk,
+        name=f"Alert {pk}",
+        alert_type=rng.choice(ALERT_TYPES),
+        market=GoldRate.INTERNATIONAL,
+        threshold_rate=Decimal(rng.randint(5000, 7000)) / 100,
+        percentage_threshold=Decimal(rng.randint(0, 500)) / 100,
+        is_active=True,
+    )
+
+
+class AlertIndexTest(TestCase):
+    """The index fires exactly the alerts check_condition accepts."""
+
+    def test_matches_check_condition(self):
+        rng = random.Random(43)
+        for _ in range(20):
+            alerts = [random_alert(rng, pk) for pk in range(rng.randint(0, 200))]
+            index = AlertIndex(alerts)
+            # Rates equal to thresholds are included to cover the boundaries
+            thresholds = [alert.threshold_rate for alert in alerts]
+            rates = [Decimal(rng.randint(4900, 7100)) / 100 for _ in range(10)]
+            rates += rng.sample(thresholds, min(len(thresholds), 10))
+
+            previous_rate = None
+            for value in rates:
+                current_rate = make_rate(value)
+                expected = {
+                    alert.id
+                    for alert in alerts
+                    if alert.check_condition(current_rate, previous_rate)
+                }
+                fired = index.matches(value, rate_change(current_rate, previous_rate))
+                self.assertEqual({alert.id for alert in fired}, expected)
+                self.assertEqual(len(fired), len(expected))
+                previous_rate = current_rate
+
+    def test_percentage_boundary(self):
+        alerts = [
+            SimpleNamespace(
+                id=pk,
+                alert_type=PriceAlert.PERCENTAGE_CHANGE,
+                threshold_rate=None,
+                percentage_threshold=Decimal(threshold),
+            )
+            for pk, threshold in enumerate(["4.99", "5.00", "5.01"])
+        ]
+        index = AlertIndex(alerts)
+        change = rate_change(make_rate("63.00"), make_rate("60.00"))
+        self.assertEqual(change, Decimal("5.00"))
+        self.assertEqual([alert.id for alert in index.matches(Decimal("63.00"), change)], [0, 1])
+        # Also for a fall of the same size
+        change = rate_change(make_rate("57.00"), make_rate("60.00"))
+        self.assertEqual([alert.id for alert in index.matches(Decimal("57.00"), change)], [0, 1])
+        # Without a previous rate percentage alerts never fire
+        self.assertEqual(index.matches(Decimal("63.00"), None), [])
+
+    def test_alerts_without_threshold_are_skipped(self):
+        alerts = [
+            SimpleNamespace(
+                id=1,
+                alert_type=PriceAlert.THRESHOLD_ABOVE,
+                threshold_rate=None,
+                percentage_threshold=None,
+            ),
+            SimpleNamespace(
+                id=2,
+                alert_type=PriceAlert.THRESHOLD_BELOW,
+                threshold_rate=Decimal("70.00"),
+                percentage_threshold=None,
+            ),
+        ]
+        index = AlertIndex(alerts)
+        self.assertEqual(len(index), 1)
+        self.assertEqual([alert.id for alert in index.matches(Decimal("60.00"))], [2])
+
+    def test_benchmark_against_condition_scan(self):
+        """
+        1M alerts over 10k tenants: one tick evaluated with the index versus
+        check_condition on every alert. The alerts are kept in memory; the
+        database side is covered by the constant query count below.
+        """
+        rng = random.Random(1)
+        alerts = [
+            PriceAlert(
+                id=pk,
+                tenant_id=pk % 10_000,
+                alert_type=ALERT_TYPES[pk % 3],
+                threshold_rate=Decimal(rng.randint(5000, 7000)) / 100,
+                percentage_threshold=Decimal(rng.randint(0, 500)) / 100,
+                is_active=True,
+            )
+            for pk in range(1_000_000)
+        ]
+        index = AlertIndex(alerts)
+        current_rate, previous_rate = make_rate("64.37"), make_rate("63.10")
+        change = rate_change(current_rate, previous_rate)
+
+        start = time.perf_counter()
+        fired = index.matches(current_rate.rate_per_gram, change)
+        indexed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scanned = [alert for alert in alerts if alert.check_condition(current_rate, previous_rate)]
+        scan = time.perf_counter() - start
+
+        self.assertEqual(len(fired), len(scanned))
+        self.assertLess(indexed, scan)
+        print(f"\n1M alerts: index {indexed * 1000:.1f}ms, condition scan {scan * 1000:.1f}ms")
+
+
+class PriceAlertEngineTest(TestCase):
+    """Triggering, cooldowns and notifications against the database."""
+
+    def setUp(self):
+        with bypass_rls():
+            self.tenant = self.create_tenant("engine")
+        self.previous_rate = make_rate("60.00")
+        self.previous_rate.save()
+        self.current_rate = make_rate("70.00")
+        self.current_rate.save()
+
+    def create_tenant(self, slug):
+        tenant = Tenant.objects.create(company_name=slug, slug=slug, status=Tenant.ACTIVE)
+        User.objects.create_user(
+            username=f"{slug}-owner",
+            password="testpass123",
+            tenant=tenant,
+            role=User.TENANT_OWNER,
+        )
+        return tenant
+
+    def create_alert(self, tenant, name="High", **kwargs):
+        kwargs.setdefault("alert_type", PriceAlert.THRESHOLD_ABOVE)
+        kwargs.setdefault("threshold_rate", Decimal("65.00"))
+        kwargs.setdefault("market", GoldRate.INTERNATIONAL)
+        with bypass_rls():
+            return PriceAlert.objects.create(tenant=tenant, name=name, **kwargs)
+
+    def run_engine(self, tenant=None):
+        return PriceAlertEngine(GoldRate.INTERNATIONAL, tenant=tenant).run(
+            self.current_rate, self.previous_rate
+        )
+
+    def test_cooldown(self):
+        alert = self.create_alert(self.tenant, cooldown_minutes=30)
+        self.assertEqual(len(self.run_engine()), 1)
+        # The next tick falls within the cooldown
+        self.assertEqual(self.run_engine(), [])
+        alert.refresh_from_db()
+        self.assertEqual(alert.trigger_count, 1)
+
+        # Once it has passed the alert triggers again
+        PriceAlert.objects.filter(id=alert.id).update(
+            last_triggered_at=timezone.now() - timedelta(minutes=31)
+        )
+        self.assertEqual([row.id for row in self.run_engine()], [alert.id])
+        alert.refresh_from_db()
+        self.assertEqual(alert.trigger_count, 2)
+
+    def test_no_cooldown(self):
+        alert = self.create_alert(self.tenant, cooldown_minutes=0)
+        for _ in range(3):
+            self.assertEqual(len(self.run_engine()), 1)
+        alert.refresh_from_db()
+        self.assertEqual(alert.trigger_count, 3)
+
+    def test_inactive_tenants_and_other_markets_are_ignored(self):
+        with bypass_rls():
+            suspended = self.create_tenant("suspended")
+            suspended.status = Tenant.SUSPENDED
+            suspended.save()
+        self.create_alert(suspended)
+        self.create_alert(self.tenant, name="Local", market=GoldRate.LOCAL)
+        self.create_alert(self.tenant, name="Inactive", is_active=False)
+        self.assertEqual(self.run_engine(), [])
+
+    def test_one_notification_per_tenant(self):
+        self.create_alert(self.tenant, name="High")
+        self.create_alert(
+            self.tenant,
+            name="Move",
+            alert_type=PriceAlert.PERCENTAGE_CHANGE,
+            percentage_threshold=Decimal("5.00"),
+        )
+        self.create_alert(self.tenant, name="Silent", notify_in_app=False)
+        with bypass_rls():
+            other = self.create_tenant("other")
+        self.create_alert(other, name="Other high")
+
+        self.assertEqual(len(self.run_engine()), 4)
+
+        notifications = Notification.objects.filter(user__tenant=self.tenant)
+        self.assertEqual(notifications.count(), 1)
+        notification = notifications.get()
+        self.assertEqual(notification.title, "2 price alerts triggered")
+        self.assertEqual(notification.notification_type, "WARNING")
+        self.assertIn("High: Rate above 65.00/g", notification.message)
+        self.assertIn("Move: Change ≥ 5.00%", notification.message)
+        self.assertNotIn("Silent", notification.message)
+
+        notification = Notification.objects.get(user__tenant=other)
+        self.assertEqual(notification.title, "Price alert: Other high")
+
+    def test_query_count_independent_of_tenant_count(self):
+        def queries_for(tenant_count):
+            PriceAlert.objects.all().delete()
+            with bypass_rls():
+                tenants = [
+                    self.create_tenant(f"count-{tenant_count}-{i}") for i in range(tenant_count)
+                ]
+            for tenant in tenants:
+                self.create_alert(tenant)
+                self.create_alert(tenant, name="Low", alert_type=PriceAlert.THRESHOLD_BELOW)
+            with CaptureQueriesContext(connection) as queries:
+                triggered = self.run_engine()
+            self.assertEqual(len(triggered), tenant_count)
+            return len(queries)
+
+        self.assertEqual(queries_for(5), queries_for(50))
+
+    def test_service_checks_its_tenant_only(self):
+        alert = self.create_alert(self.tenant)
+        with bypass_rls():
+            other = self.create_tenant("other")
+        other_alert = self.create_alert(other)
+
+        triggered = PriceAlertService(self.tenant).check_alerts(
+            self.current_rate, self.previous_rate
+        )
+        self.assertEqual(triggered, [alert])
+        other_alert.refresh_from_db()
+        self.assertEqual(other_alert.trigger_count, 0)
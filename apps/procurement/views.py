@@ -1148,7 +1148,7 @@ def _create_or_update_inventory_item(receipt_item):
 
     This function handles the inventory update logic when goods are received.
     """
-    from apps.inventory.models import InventoryItem, ProductCategory
+    from apps.inventory.models import InventoryItem, ProductCategory, StockMovement
 
     po_item = receipt_item.purchase_order_item
     purchase_order = receipt_item.goods_receipt.purchase_order
@@ -1168,6 +1168,8 @@ def _create_or_update_inventory_item(receipt_item):
         existing_item.add_quantity(
             receipt_item.quantity_accepted,
             reason=f"Goods receipt {receipt_item.goods_receipt.receipt_number}",
+            movement_type=StockMovement.PURCHASE,
+            source=receipt_item.goods_receipt,
         )
         receipt_item.inventory_item = existing_item
         receipt_item.save(update_fields=["inventory_item"])
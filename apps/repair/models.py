@@ -841,6 +841,8 @@ class MaterialRequirement(models.Model):
         Raises:
             ValueError: If insufficient inventory or already acquired
         """
+        from apps.inventory.models import StockMovement
+
         if self.is_acquired:
             raise ValueError("Material requirement is already acquired")
 
@@ -853,6 +855,8 @@ class MaterialRequirement(models.Model):
         inventory_item.deduct_quantity(
             int(self.quantity_required),
             reason=f"Used for custom order {self.custom_order.order_number}",
+            movement_type=StockMovement.MATERIAL_USE,
+            source=self.custom_order,
         )
 
         # Mark as acquired with inventory cost
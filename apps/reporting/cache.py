@@ -0,0 +1,270 @@
+"""
+Report result caching for the reporting system.
+
+Results are cached under a key built from the report, its normalized
+parameters and a data-version watermark for every table the report reads.
+Watermarks are per-tenant write-version counters bumped when a tracked model
+is saved or deleted, so a cached result is only reused while the data behind
+it is unchanged. Concurrent misses for the same key are coalesced: one caller
+runs the query while the others wait for its result.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.core.cache_utils import (
+    cache_report_result,
+    get_cached_report_result,
+    get_tenant_cache_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Models each predefined report reads from. Custom SQL reports depend on all of them.
+REPORT_DATA_SOURCES = {
+    "sales_summary": ("sales.SalesRollup", "core.Branch"),
+    "sales_by_product": (
+        "sales.ProductSalesRollup",
+        "inventory.InventoryItem",
+        "inventory.ProductCategory",
+    ),
+    "sales_by_employee": ("sales.SalesRollup", "core.Branch"),
+    "sales_by_branch": ("sales.SalesRollup", "sales.Sale", "core.Branch"),
+    "inventory_valuation": ("inventory.InventoryItem", "inventory.ProductCategory", "core.Branch"),
+    "inventory_turnover": (
+        "sales.Sale",
+        "sales.SaleItem",
+        "inventory.InventoryItem",
+        "inventory.ProductCategory",
+        "core.Branch",
+    ),
+    "dead_stock": (
+        "sales.Sale",
+        "sales.SaleItem",
+        "inventory.InventoryItem",
+        "inventory.ProductCategory",
+        "core.Branch",
+    ),
+    "financial_summary": ("sales.Sale", "procurement.PurchaseOrder"),
+    "revenue_trends": ("sales.Sale",),
+    "expense_breakdown": ("procurement.PurchaseOrder", "repair.RepairOrder"),
+    "top_customers": ("sales.Sale", "crm.Customer", "crm.LoyaltyTier"),
+    "customer_acquisition": ("sales.Sale", "crm.Customer", "crm.LoyaltyTier"),
+    "loyalty_analytics": ("sales.Sale", "crm.Customer", "crm.LoyaltyTier"),
+    "customer_analysis": ("sales.Sale", "crm.Customer", "crm.LoyaltyTier"),
+}
+
+# Rollup tables are written in bulk, so their versions are bumped when a refresh
+# completes rather than by model signals
+ROLLUP_SOURCES = ("sales.SalesRollup", "sales.ProductSalesRollup")
+
+ALL_SOURCES = tuple(sorted(set(chain.from_iterable(REPORT_DATA_SOURCES.values()))))
+TRACKED_MODELS = tuple(source for source in ALL_SOURCES if source not in ROLLUP_SOURCES)
+
+# Result cache defaults (overridable in settings)
+DEFAULT_TIMEOUT = 900
+DEFAULT_MAX_ROWS = 10000
+LOCK_TIMEOUT = 300
+WAIT_TIMEOUT = 60
+POLL_INTERVAL = 0.2
+
+VERSION_CACHE_ALIAS = "default"
+
+
+def _version_key(tenant_id: Union[str, int], source: str) -> str:
+    return f"tenant:{tenant_id}:data_version:{source.lower()}"
+
+
+def get_data_versions(tenant_id: Union[str, int], sources: Iterable[str]) -> Dict[str, int]:
+    """
+    Get the current write-version of each data source for a tenant.
+
+    Missing counters (never written, or evicted) are seeded with the current
+    time in nanoseconds so they can never collide with a version an older
+    cache entry was stored under.
+
+    Returns:
+        Dictionary mapping source label to version
+    """
+    cache = caches[VERSION_CACHE_ALIAS]
+    keys = {_version_key(tenant_id, source): source for source in sources}
+    versions = cache.get_many(list(keys))
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_data_version(tenant_id: Union[str, int], source: str) -> None:
+    """Advance the write-version of a data source, invalidating dependent results."""
+    cache = caches[VERSION_CACHE_ALIAS]
+    key = _version_key(tenant_id, source)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_report_sources(report) -> Tuple[str, ...]:
+    """Get the data sources a report depends on."""
+    if report.report_type == "PREDEFINED":
+        report_name = report.query_config.get("report_name")
+        if report_name in REPORT_DATA_SOURCES:
+            return REPORT_DATA_SOURCES[report_name]
+    return ALL_SOURCES
+
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return normalize_parameters(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(item) for item in value]
+    return value
+
+
+def normalize_parameters(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize report parameters so equivalent requests share a cache key.
+
+    Empty values are dropped, strings are stripped and dates are rendered in
+    ISO format. Key order is irrelevant because keys are sorted when hashed.
+    """
+    normalized = {}
+    for name, value in parameters.items():
+        if value is None or value == "" or value == [] or value == {}:
+            continue
+        normalized[name] = _normalize_value(value)
+    return normalized
+
+
+def get_report_fingerprint(report, parameters: Dict[str, Any]) -> str:
+    """Hash the report definition and its normalized parameters."""
+    payload = {
+        "query_config": report.query_config,
+        "parameters": normalize_parameters(parameters),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ReportResultCache:
+    """
+    Cache report results keyed by query fingerprint and data-version watermarks.
+
+    Only results up to ``max_rows`` rows are stored; larger results are
+    streamed through without being cached so exports keep their flat memory
+    profile.
+    """
+
+    def __init__(self, tenant, timeout: int = None, max_rows: int = None):
+        self.tenant = tenant
+        self.timeout = timeout or getattr(settings, "REPORT_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+        self.max_rows = max_rows or getattr(settings, "REPORT_CACHE_MAX_ROWS", DEFAULT_MAX_ROWS)
+        self.lock_cache = caches["query"]
+
+    def get_cache_params(self, report, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the key parameters for a report run: fingerprint plus watermarks."""
+        versions = get_data_versions(self.tenant.id, get_report_sources(report))
+        watermark = ",".join(f"{source}={versions[source]}" for source in sorted(versions))
+        return {
+            "fingerprint": get_report_fingerprint(report, parameters),
+            "watermark": hashlib.md5(watermark.encode("utf-8")).hexdigest(),
+        }
+
+    def get(self, report, parameters: Dict[str, Any]):
+        """Get a cached result, or None on a miss."""
+        cache_params = self.get_cache_params(report, parameters)
+        return get_cached_report_result(self.tenant.id, str(report.id), cache_params)
+
+    def get_or_execute(
+        self,
+        report,
+        parameters: Dict[str, Any],
+        execute: Callable[[], Iterable[Dict[str, Any]]],
+    ) -> Tuple[Iterable[Dict[str, Any]], bool]:
+        """
+        Return cached rows, or run ``execute`` once for all concurrent callers.
+
+        Args:
+            report: Report being executed
+            parameters: Processed report parameters
+            execute: Callable that runs the query and returns rows
+
+        Returns:
+            Tuple of (rows, cache_hit)
+        """
+        report_key = str(report.id)
+        cache_params = self.get_cache_params(report, parameters)
+
+        cached = get_cached_report_result(self.tenant.id, report_key, cache_params)
+        if cached is not None:
+            logger.info(f"Report {report.name} served from cache")
+            return cached, True
+
+        lock_key = get_tenant_cache_key(self.tenant.id, f"report:{report_key}:lock", **cache_params)
+
+        if not self.lock_cache.add(lock_key, 1, LOCK_TIMEOUT):
+            cached = self._wait_for_result(report_key, cache_params, lock_key)
+            if cached is not None:
+                logger.info(f"Report {report.name} served from a coalesced run")
+                return cached, True
+            return execute(), False
+
+        try:
+            buffered, remainder = self._buffer_rows(execute())
+            if remainder is not None:
+                # Too large to cache; hand back the buffer followed by the rest of the stream
+                return chain(buffered, remainder), False
+
+            cache_report_result(
+                self.tenant.id, report_key, cache_params, buffered, timeout=self.timeout
+            )
+            return buffered, False
+        finally:
+            self.lock_cache.delete(lock_key)
+
+    def _buffer_rows(self, rows: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Any]:
+        """
+        Read rows until the stream ends or ``max_rows`` is exceeded.
+
+        Returns:
+            Tuple of (buffered rows, iterator over the unread rows or None if complete)
+        """
+        iterator = iter(rows)
+        buffered = []
+        for row in iterator:
+            buffered.append(row)
+            if len(buffered) > self.max_rows:
+                return buffered, iterator
+        return buffered, None
+
+    def _wait_for_result(self, report_key: str, cache_params: Dict[str, Any], lock_key: str):
+        """Poll for the result of an in-flight run of the same query."""
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            cached = get_cached_report_result(self.tenant.id, report_key, cache_params)
+            if cached is not None:
+                return cached
+            if self.lock_cache.get(lock_key) is None:
+                # The other run finished without caching (error or oversized result)
+                return None
+        return None
@@ -9,33 +9,50 @@ Implements Requirement 15: Advanced Reporting and Analytics
 """
 
 import csv
-import json
 import logging
 import os
 import tempfile
-from datetime import timedelta
-from typing import Any, Dict, List, Tuple
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from django.conf import settings
 from django.core.mail import EmailMessage
-from django.db import connection
+from django.db import connections
 from django.template.loader import render_to_string
 from django.utils import timezone
 
-import openpyxl
 from import_export import resources
-from import_export.formats.base_formats import CSV, JSON, XLSX
-from openpyxl.styles import Font, PatternFill
+from import_export.formats.base_formats import JSON
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
+from apps.core.db_routing import read_alias
 from apps.core.models import Tenant
+from apps.reporting.cache import ReportResultCache
 from apps.reporting.models import Report, ReportCategory, ReportExecution
+from apps.reporting.streaming import (
+    DEFAULT_CHUNK_SIZE,
+    RowCounter,
+    iter_csv,
+    iter_cursor_rows,
+    iter_json_document,
+    iter_ndjson,
+    peek_rows,
+    write_text_stream,
+    write_xlsx,
+)
+from apps.sales.rollups import get_day_start
 
 logger = logging.getLogger(__name__)
 
+# Report results: a list when materialized, an iterator when streamed
+ReportRows = Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]
+
+# Seconds of replica lag reports accept (overridable with REPORT_REPLICA_MAX_LAG)
+DEFAULT_REPLICA_MAX_LAG = 300
+
 # Optional WeasyPrint import
 try:
     import weasyprint
@@ -46,6 +63,17 @@ except ImportError:
     logger.warning("WeasyPrint not available. PDF export will use ReportLab only.")
 
 
+def _as_date(value: Any) -> Optional[date]:
+    """Coerce a date parameter (date, datetime or ISO string) to a local date."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
 class ReportParameterProcessor:
     """
     Process and validate report parameters.
@@ -116,12 +144,21 @@ class ReportParameterProcessor:
 class ReportQueryEngine:
     """
     Execute report queries and return data.
+
+    By default results are materialized into a list. With ``stream=True`` every
+    query returns a lazy row iterator backed by a server-side cursor that is
+    drained with ``fetchmany``, so exports never hold the full result in memory.
+
+    Queries run on a read replica when one is within REPORT_REPLICA_MAX_LAG
+    seconds of the primary (see apps.core.db_routing).
     """
 
-    def __init__(self, tenant: Tenant):
+    def __init__(self, tenant: Tenant, stream: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE):
         self.tenant = tenant
+        self.stream = stream
+        self.chunk_size = chunk_size
 
-    def execute_query(self, report: Report, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def execute_query(self, report: Report, parameters: Dict[str, Any]) -> ReportRows:
         """
         Execute a report query with parameters.
 
@@ -130,7 +167,7 @@ class ReportQueryEngine:
             parameters: Processed parameters
 
         Returns:
-            List of result rows as dictionaries
+            List of result rows as dictionaries, or a row iterator when streaming
         """
         query_config = report.query_config
 
@@ -141,9 +178,51 @@ class ReportQueryEngine:
         else:
             raise ValueError(f"Unsupported report type: {report.report_type}")
 
-    def _execute_predefined_report(
-        self, report: Report, parameters: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    def _connection(self):
+        """Connection of the database the next query reads from."""
+        return connections[
+            read_alias(getattr(settings, "REPORT_REPLICA_MAX_LAG", DEFAULT_REPLICA_MAX_LAG))
+        ]
+
+    def _run_query(self, sql: str, params) -> ReportRows:
+        """Run a report query under the tenant's RLS context."""
+        if self.stream:
+            return self._iter_rows(sql, params)
+
+        with self._connection().cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
+            )
+            cursor.execute(sql, params)
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def _iter_rows(self, sql: str, params) -> Iterator[Dict[str, Any]]:
+        """
+        Yield query rows in chunks from a server-side (named) cursor.
+
+        The tenant context is set when iteration starts rather than when the
+        generator is created, because streaming responses are consumed after
+        the tenant middleware has already reset the connection.
+
+        Outside a transaction Django declares the cursor WITH HOLD so it survives
+        autocommit. When server-side cursors are disabled (PgBouncer in
+        transaction mode) ``chunked_cursor`` falls back to a regular cursor.
+        """
+        connection = self._connection()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
+            )
+
+        cursor = connection.chunked_cursor()
+        try:
+            cursor.execute(sql, params)
+            yield from iter_cursor_rows(cursor, self.chunk_size)
+        finally:
+            cursor.close()
+
+    def _execute_predefined_report(self, report: Report, parameters: Dict[str, Any]) -> ReportRows:
         """Execute a predefined report."""
         report_name = report.query_config.get("report_name")
 
@@ -177,69 +256,57 @@ class ReportQueryEngine:
 
     def _execute_custom_query(
         self, query_config: Dict[str, Any], parameters: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    ) -> ReportRows:
         """Execute a custom SQL query."""
         sql_query = query_config.get("sql")
         if not sql_query:
             raise ValueError("Custom report must have SQL query")
 
-        # Set tenant context for RLS
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
+        return self._run_query(sql_query, parameters)
 
-            # Execute the main query
-            cursor.execute(sql_query, parameters)
-            columns = [col[0] for col in cursor.description]
-            results = []
-
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
+    # Sales Reports
+    def _get_report_dates(self, parameters: Dict[str, Any], default_days: int) -> Tuple[date, date]:
+        """Get the report date range as inclusive local dates."""
+        today = timezone.localdate()
+        start_date = _as_date(parameters.get("date_range_start"))
+        end_date = _as_date(parameters.get("date_range_end"))
+        return start_date or today - timedelta(days=default_days), end_date or today
 
-            return results
+    # Sales reports read the daily rollups maintained by apps.sales.rollups
 
-    # Sales Reports
-    def _get_sales_summary(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_sales_summary(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get daily sales summary report data."""
-        start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=30))
-        end_date = parameters.get("date_range_end", timezone.now())
+        start_date, end_date = self._get_report_dates(parameters, 30)
         branch_id = parameters.get("branch_id")
 
         sql = """
         SELECT
-            DATE(s.created_at) as sale_date,
+            r.bucket_date as sale_date,
             b.name as branch_name,
-            COUNT(s.id) as total_sales,
-            SUM(s.total) as total_amount,
-            AVG(s.total) as average_sale,
-            SUM(s.tax) as total_tax,
-            SUM(s.discount) as total_discount
-        FROM sales s
-        JOIN branches b ON s.branch_id = b.id
-        WHERE s.created_at >= %s AND s.created_at <= %s
+            SUM(r.sale_count) as total_sales,
+            SUM(r.total) as total_amount,
+            SUM(r.total) / NULLIF(SUM(r.sale_count), 0) as average_sale,
+            SUM(r.tax) as total_tax,
+            SUM(r.discount) as total_discount
+        FROM sales_rollups r
+        JOIN branches b ON r.branch_id = b.id
+        WHERE r.tenant_id = %s AND r.granularity = 'DAY' AND r.sale_count > 0
+            AND r.bucket_date >= %s AND r.bucket_date <= %s
         """
 
-        params = [start_date, end_date]
+        params = [self.tenant.id, start_date, end_date]
 
         if branch_id:
-            sql += " AND s.branch_id = %s"
+            sql += " AND r.branch_id = %s"
             params.append(branch_id)
 
-        sql += " GROUP BY DATE(s.created_at), b.name ORDER BY sale_date DESC"
+        sql += " GROUP BY r.bucket_date, b.name ORDER BY sale_date DESC"
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, params)
 
-    def _get_sales_by_product(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_sales_by_product(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get sales by product report data."""
-        start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=30))
-        end_date = parameters.get("date_range_end", timezone.now())
+        start_date, end_date = self._get_report_dates(parameters, 30)
         branch_id = parameters.get("branch_id")
         category_id = parameters.get("category_id")
 
@@ -248,27 +315,27 @@ class ReportQueryEngine:
             i.sku,
             i.name as product_name,
             pc.name as category_name,
-            SUM(si.quantity) as total_quantity_sold,
-            SUM(si.subtotal) as total_revenue,
-            AVG(si.unit_price) as average_price,
-            COUNT(DISTINCT s.id) as number_of_sales,
+            SUM(p.quantity_sold) as total_quantity_sold,
+            SUM(p.revenue) as total_revenue,
+            SUM(p.unit_price_total) / NULLIF(SUM(p.line_count), 0) as average_price,
+            SUM(p.sale_count) as number_of_sales,
             i.karat,
             i.weight_grams
-        FROM sale_items si
-        JOIN sales s ON si.sale_id = s.id
-        JOIN inventory_items i ON si.inventory_item_id = i.id
-        JOIN inventory_categories pc ON i.category_id = pc.id
-        WHERE s.created_at >= %s AND s.created_at <= %s
+        FROM sales_product_rollups p
+        JOIN inventory_items i ON p.inventory_item_id = i.id
+        LEFT JOIN inventory_categories pc ON p.category_id = pc.id
+        WHERE p.tenant_id = %s AND p.granularity = 'DAY'
+            AND p.bucket_date >= %s AND p.bucket_date <= %s
         """
 
-        params = [start_date, end_date]
+        params = [self.tenant.id, start_date, end_date]
 
         if branch_id:
-            sql += " AND s.branch_id = %s"
+            sql += " AND p.branch_id = %s"
             params.append(branch_id)
 
         if category_id:
-            sql += " AND i.category_id = %s"
+            sql += " AND p.category_id = %s"
             params.append(category_id)
 
         sql += """
@@ -276,18 +343,11 @@ class ReportQueryEngine:
         ORDER BY total_revenue DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, params)
 
-    def _get_sales_by_employee(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_sales_by_employee(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get sales by employee report data."""
-        start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=30))
-        end_date = parameters.get("date_range_end", timezone.now())
+        start_date, end_date = self._get_report_dates(parameters, 30)
         branch_id = parameters.get("branch_id")
 
         sql = """
@@ -296,22 +356,23 @@ class ReportQueryEngine:
             u.last_name,
             u.email,
             b.name as branch_name,
-            COUNT(s.id) as total_sales,
-            SUM(s.total) as total_revenue,
-            AVG(s.total) as average_sale_value,
-            SUM(s.tax) as total_tax_collected,
-            MIN(s.created_at) as first_sale_date,
-            MAX(s.created_at) as last_sale_date
-        FROM sales s
-        JOIN users u ON s.employee_id = u.id
-        JOIN branches b ON s.branch_id = b.id
-        WHERE s.created_at >= %s AND s.created_at <= %s
+            SUM(r.sale_count) as total_sales,
+            SUM(r.total) as total_revenue,
+            SUM(r.total) / NULLIF(SUM(r.sale_count), 0) as average_sale_value,
+            SUM(r.tax) as total_tax_collected,
+            MIN(r.bucket_date) as first_sale_date,
+            MAX(r.bucket_date) as last_sale_date
+        FROM sales_rollups r
+        JOIN users u ON r.employee_id = u.id
+        JOIN branches b ON r.branch_id = b.id
+        WHERE r.tenant_id = %s AND r.granularity = 'DAY' AND r.sale_count > 0
+            AND r.bucket_date >= %s AND r.bucket_date <= %s
         """
 
-        params = [start_date, end_date]
+        params = [self.tenant.id, start_date, end_date]
 
         if branch_id:
-            sql += " AND s.branch_id = %s"
+            sql += " AND r.branch_id = %s"
             params.append(branch_id)
 
         sql += """
@@ -319,48 +380,55 @@ class ReportQueryEngine:
         ORDER BY total_revenue DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, params)
 
-    def _get_sales_by_branch(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Get sales by branch report data."""
-        start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=30))
-        end_date = parameters.get("date_range_end", timezone.now())
+    def _get_sales_by_branch(self, parameters: Dict[str, Any]) -> ReportRows:
+        """
+        Get sales by branch report data.
+
+        Distinct customers cannot be summed across days, so unique_customers is
+        still counted from the sales table (one indexed range scan per branch).
+        """
+        start_date, end_date = self._get_report_dates(parameters, 30)
 
         sql = """
         SELECT
             b.name as branch_name,
             b.address as branch_address,
-            COUNT(s.id) as total_sales,
-            SUM(s.total) as total_revenue,
-            AVG(s.total) as average_sale_value,
-            SUM(s.tax) as total_tax_collected,
-            COUNT(DISTINCT s.employee_id) as active_employees,
-            COUNT(DISTINCT s.customer_id) as unique_customers,
-            MIN(s.created_at) as first_sale_date,
-            MAX(s.created_at) as last_sale_date
-        FROM sales s
-        JOIN branches b ON s.branch_id = b.id
-        WHERE s.created_at >= %s AND s.created_at <= %s
+            SUM(r.sale_count) as total_sales,
+            SUM(r.total) as total_revenue,
+            SUM(r.total) / NULLIF(SUM(r.sale_count), 0) as average_sale_value,
+            SUM(r.tax) as total_tax_collected,
+            COUNT(DISTINCT r.employee_id) as active_employees,
+            (
+                SELECT COUNT(DISTINCT s.customer_id)
+                FROM sales s
+                WHERE s.tenant_id = %s AND s.branch_id = b.id AND s.status = 'COMPLETED'
+                    AND s.created_at >= %s AND s.created_at < %s
+            ) as unique_customers,
+            MIN(r.bucket_date) as first_sale_date,
+            MAX(r.bucket_date) as last_sale_date
+        FROM sales_rollups r
+        JOIN branches b ON r.branch_id = b.id
+        WHERE r.tenant_id = %s AND r.granularity = 'DAY' AND r.sale_count > 0
+            AND r.bucket_date >= %s AND r.bucket_date <= %s
         GROUP BY b.id, b.name, b.address
         ORDER BY total_revenue DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        params = [
+            self.tenant.id,
+            get_day_start(start_date),
+            get_day_start(end_date + timedelta(days=1)),
+            self.tenant.id,
+            start_date,
+            end_date,
+        ]
+
+        return self._run_query(sql, params)
 
     # Inventory Reports
-    def _get_inventory_valuation(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_inventory_valuation(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get inventory valuation report data."""
         branch_id = parameters.get("branch_id")
         category_id = parameters.get("category_id")
@@ -398,15 +466,9 @@ class ReportQueryEngine:
 
         sql += " ORDER BY total_selling_value DESC"
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, params)
 
-    def _get_inventory_turnover(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_inventory_turnover(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get inventory turnover report data."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=90))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -450,15 +512,9 @@ class ReportQueryEngine:
         ORDER BY turnover_ratio DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, params)
 
-    def _get_dead_stock(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_dead_stock(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get dead stock analysis report data."""
         days_threshold = parameters.get("days_threshold", 90)
         branch_id = parameters.get("branch_id")
@@ -507,16 +563,10 @@ class ReportQueryEngine:
         ORDER BY tied_up_value DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, params)
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, params)
 
     # Financial Reports
-    def _get_financial_summary(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_financial_summary(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get financial summary report data."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=30))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -548,15 +598,11 @@ class ReportQueryEngine:
         ORDER BY type, amount DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date, start_date, end_date, start_date, end_date])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(
+            sql, [start_date, end_date, start_date, end_date, start_date, end_date]
+        )
 
-    def _get_revenue_trends(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_revenue_trends(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get revenue trends report data."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=90))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -584,15 +630,9 @@ class ReportQueryEngine:
         ORDER BY period
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, [start_date, end_date])
 
-    def _get_expense_breakdown(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_expense_breakdown(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get expense breakdown report data."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=30))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -623,16 +663,10 @@ class ReportQueryEngine:
         ORDER BY total_amount DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date, start_date, end_date])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, [start_date, end_date, start_date, end_date])
 
     # Customer Reports
-    def _get_top_customers(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_top_customers(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get top customers report data."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=90))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -667,15 +701,9 @@ class ReportQueryEngine:
         LIMIT %s
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date, limit])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, [start_date, end_date, limit])
 
-    def _get_customer_acquisition(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_customer_acquisition(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get customer acquisition report data."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=90))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -713,15 +741,9 @@ class ReportQueryEngine:
         ORDER BY period
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date, start_date, end_date])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, [start_date, end_date, start_date, end_date])
 
-    def _get_loyalty_analytics(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_loyalty_analytics(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get loyalty program analytics report data."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=90))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -760,15 +782,9 @@ class ReportQueryEngine:
             END
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, [start_date, end_date])
 
-    def _get_customer_analysis(self, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _get_customer_analysis(self, parameters: Dict[str, Any]) -> ReportRows:
         """Get customer analysis report data (legacy method)."""
         start_date = parameters.get("date_range_start", timezone.now() - timedelta(days=90))
         end_date = parameters.get("date_range_end", timezone.now())
@@ -797,13 +813,7 @@ class ReportQueryEngine:
         ORDER BY period_spending DESC
         """
 
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT set_config('app.current_tenant', %s, false)", [str(self.tenant.id)]
-            )
-            cursor.execute(sql, [start_date, end_date])
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return self._run_query(sql, [start_date, end_date])
 
 
 class ReportDataResource(resources.Resource):
@@ -848,39 +858,44 @@ class ReportExportService:
 
     Implements Requirement 15: Advanced Reporting and Analytics
     - PDF export using ReportLab and WeasyPrint
-    - Excel export using openpyxl and django-import-export
-    - CSV export using django-import-export
+    - Excel export using openpyxl write-only workbooks
+    - CSV, NDJSON and JSON export using streaming writers
+
+    CSV, NDJSON, JSON and Excel exports accept any row iterable and write rows
+    as they arrive, so memory stays flat regardless of the result size.
     """
 
     def __init__(self, tenant: Tenant):
         self.tenant = tenant
 
-    def export_to_csv(self, data: List[Dict[str, Any]], filename: str) -> str:
+    def export_to_csv(self, data: Iterable[Dict[str, Any]], filename: str) -> str:
         """
-        Export data to CSV format using django-import-export.
+        Export data to CSV format, writing rows as they are produced.
 
         Args:
-            data: Report data
+            data: Report data (list or row iterator)
             filename: Output filename
 
         Returns:
             Path to the generated file
         """
-        if not data:
-            raise ValueError("No data to export")
-
         filepath = os.path.join(tempfile.gettempdir(), filename)
+        return write_text_stream(iter_csv(data), filepath)
 
-        # Use django-import-export for CSV export
-        resource = ReportDataResource(data)
-        dataset = resource.export()
-        csv_format = CSV()
-        export_data = csv_format.export_data(dataset)
+    def export_to_ndjson(self, data: Iterable[Dict[str, Any]], filename: str) -> str:
+        """
+        Export data to newline-delimited JSON, one row per line.
 
-        with open(filepath, "w", encoding="utf-8") as csvfile:
-            csvfile.write(export_data)
+        Args:
+            data: Report data (list or row iterator)
+            filename: Output filename
 
-        return filepath
+        Returns:
+            Path to the generated file
+        """
+        _, rows = peek_rows(data)
+        filepath = os.path.join(tempfile.gettempdir(), filename)
+        return write_text_stream(iter_ndjson(rows), filepath)
 
     def export_to_csv_basic(self, data: List[Dict[str, Any]], filename: str) -> str:
         """
@@ -907,150 +922,51 @@ class ReportExportService:
         return filepath
 
     def export_to_excel(
-        self, data: List[Dict[str, Any]], filename: str, report_name: str = ""
+        self, data: Iterable[Dict[str, Any]], filename: str, report_name: str = ""
     ) -> str:
         """
-        Export data to Excel format using django-import-export with enhanced formatting.
+        Export data to Excel format using an openpyxl write-only workbook.
+
+        The title block and header styling are written in the same pass as the
+        data, so the file is never re-opened for formatting.
 
         Args:
-            data: Report data
+            data: Report data (list or row iterator)
             filename: Output filename
             report_name: Report name for the title
 
         Returns:
             Path to the generated file
         """
-        if not data:
-            raise ValueError("No data to export")
-
         filepath = os.path.join(tempfile.gettempdir(), filename)
-
-        # Use django-import-export for Excel export
-        resource = ReportDataResource(data)
-        dataset = resource.export()
-        xlsx_format = XLSX()
-        export_data = xlsx_format.export_data(dataset)
-
-        # Save the basic export first
-        with open(filepath, "wb") as excelfile:
-            excelfile.write(export_data)
-
-        # Now enhance with formatting using openpyxl
-        if report_name:
-            self._enhance_excel_formatting(filepath, report_name)
-
-        return filepath
+        return write_xlsx(data, filepath, report_name, self._tenant_name())
 
     def export_to_excel_advanced(
-        self, data: List[Dict[str, Any]], filename: str, report_name: str = ""
+        self, data: Iterable[Dict[str, Any]], filename: str, report_name: str = ""
     ) -> str:
         """
         Export data to Excel format with advanced formatting using openpyxl.
 
+        Kept for backwards compatibility; the write-only export now applies the
+        same title, header styling and column widths.
+
         Args:
-            data: Report data
+            data: Report data (list or row iterator)
             filename: Output filename
             report_name: Report name for the title
 
         Returns:
             Path to the generated file
         """
-        if not data:
-            raise ValueError("No data to export")
+        return self.export_to_excel(data, filename, report_name)
 
-        filepath = os.path.join(tempfile.gettempdir(), filename)
-        workbook = openpyxl.Workbook()
-        worksheet = workbook.active
-        worksheet.title = "Report Data"
-
-        # Add title and headers
-        start_row = self._add_excel_title(worksheet, report_name)
-        headers = self._add_excel_headers(worksheet, data, start_row)
-
-        # Add data and format
-        self._add_excel_data(worksheet, data, headers, start_row)
-        self._adjust_excel_columns(worksheet)
-
-        workbook.save(filepath)
-        return filepath
-
-    def _add_excel_title(self, worksheet, report_name: str) -> int:
-        """Add title section to Excel worksheet."""
-        if report_name:
-            worksheet["A1"] = report_name
-            worksheet["A1"].font = Font(size=16, bold=True)
-            worksheet["A2"] = f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            worksheet["A3"] = f"Tenant: {self.tenant.company_name if self.tenant else 'Unknown'}"
-            return 5
-        return 1
-
-    def _add_excel_headers(self, worksheet, data: List[Dict], start_row: int) -> List[str]:
-        """Add headers to Excel worksheet."""
-        headers = list(data[0].keys())
-        for col, header in enumerate(headers, 1):
-            cell = worksheet.cell(row=start_row, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        return headers
-
-    def _add_excel_data(self, worksheet, data: List[Dict], headers: List[str], start_row: int):
-        """Add data rows to Excel worksheet."""
-        for row_idx, row_data in enumerate(data, start_row + 1):
-            for col_idx, header in enumerate(headers, 1):
-                value = row_data.get(header, "")
-                worksheet.cell(row=row_idx, column=col_idx, value=value)
-
-    def _adjust_excel_columns(self, worksheet):
-        """Auto-adjust column widths in Excel worksheet."""
-        for column in worksheet.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except (TypeError, AttributeError):
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[column_letter].width = adjusted_width
-
-    def _enhance_excel_formatting(self, filepath: str, report_name: str) -> None:
-        """
-        Enhance Excel file with additional formatting.
-
-        Args:
-            filepath: Path to the Excel file
-            report_name: Report name for the title
-        """
-        try:
-            workbook = openpyxl.load_workbook(filepath)
-            worksheet = workbook.active
-
-            # Insert title rows at the top
-            worksheet.insert_rows(1, 3)
-
-            # Add title
-            worksheet["A1"] = report_name
-            worksheet["A1"].font = Font(size=16, bold=True)
-            worksheet["A2"] = f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            worksheet["A3"] = f"Tenant: {self.tenant.company_name if self.tenant else 'Unknown'}"
-
-            # Format header row (now row 4)
-            for cell in worksheet[4]:
-                if cell.value:
-                    cell.font = Font(bold=True)
-                    cell.fill = PatternFill(
-                        start_color="CCCCCC", end_color="CCCCCC", fill_type="solid"
-                    )
-
-            workbook.save(filepath)
-        except Exception as e:
-            logger.warning(f"Failed to enhance Excel formatting: {e}")
-            # Continue without enhanced formatting
+    def _tenant_name(self) -> str:
+        """Get the tenant name shown in export headers."""
+        return self.tenant.company_name if self.tenant else "Unknown"
 
     def export_to_pdf(
         self,
-        data: List[Dict[str, Any]],
+        data: Iterable[Dict[str, Any]],
         filename: str,
         report_name: str = "",
         use_weasyprint: bool = False,
@@ -1067,6 +983,8 @@ class ReportExportService:
         Returns:
             Path to the generated file
         """
+        # PDF tables are laid out as a whole, so row iterators are materialized
+        data = list(data)
         if not data:
             raise ValueError("No data to export")
 
@@ -1254,65 +1172,51 @@ class ReportExportService:
         return html
 
     def export_to_json(
-        self, data: List[Dict[str, Any]], filename: str, use_import_export: bool = False
+        self, data: Iterable[Dict[str, Any]], filename: str, use_import_export: bool = False
     ) -> str:
         """
         Export data to JSON format.
 
         Args:
-            data: Report data
+            data: Report data (list or row iterator)
             filename: Output filename
             use_import_export: Whether to use django-import-export JSON format
 
         Returns:
             Path to the generated file
         """
-        if not data:
-            raise ValueError("No data to export")
-
+        _, rows = peek_rows(data)
         filepath = os.path.join(tempfile.gettempdir(), filename)
 
         if use_import_export:
-            # Use django-import-export for JSON export
-            resource = ReportDataResource(data)
+            # django-import-export builds the whole dataset in memory
+            resource = ReportDataResource(list(rows))
             dataset = resource.export()
             json_format = JSON()
             export_data = json_format.export_data(dataset)
 
             with open(filepath, "w", encoding="utf-8") as jsonfile:
                 jsonfile.write(export_data)
-        else:
-            # Use custom JSON format with metadata (compatible with existing tests)
-            export_data = {
-                "generated_at": timezone.now().isoformat(),
-                "tenant": self.tenant.company_name if self.tenant else "Unknown",
-                "row_count": len(data),
-                "data": data,
-            }
-
-            with open(filepath, "w", encoding="utf-8") as jsonfile:
-                json.dump(export_data, jsonfile, indent=2, default=str)
+            return filepath
 
-        return filepath
+        # Custom JSON format with metadata, streamed row by row
+        return write_text_stream(iter_json_document(rows, self._tenant_name()), filepath)
 
     def export_data(
-        self, data: List[Dict[str, Any]], format_type: str, filename: str, report_name: str = ""
+        self, data: Iterable[Dict[str, Any]], format_type: str, filename: str, report_name: str = ""
     ) -> str:
         """
         Export data to the specified format.
 
         Args:
-            data: Report data
-            format_type: Export format (CSV, EXCEL, PDF, JSON)
+            data: Report data (list or row iterator)
+            format_type: Export format (CSV, EXCEL, PDF, JSON, NDJSON)
             filename: Output filename
             report_name: Report name for the title
 
         Returns:
             Path to the generated file
         """
-        if not data:
-            raise ValueError("No data to export")
-
         format_type = format_type.upper()
 
         try:
@@ -1324,6 +1228,8 @@ class ReportExportService:
                 return self.export_to_pdf(data, filename, report_name)
             elif format_type == "JSON":
                 return self.export_to_json(data, filename)
+            elif format_type == "NDJSON":
+                return self.export_to_ndjson(data, filename)
             else:
                 raise ValueError(f"Unsupported export format: {format_type}")
 
@@ -1338,7 +1244,7 @@ class ReportExportService:
         Returns:
             List of supported format names
         """
-        return ["CSV", "EXCEL", "PDF", "JSON"]
+        return ["CSV", "EXCEL", "PDF", "JSON", "NDJSON"]
 
     def get_format_mime_type(self, format_type: str) -> str:
         """
@@ -1355,6 +1261,7 @@ class ReportExportService:
             "EXCEL": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             "PDF": "application/pdf",
             "JSON": "application/json",
+            "NDJSON": "application/x-ndjson",
         }
 
         return mime_types.get(format_type.upper(), "application/octet-stream")
@@ -1374,6 +1281,7 @@ class ReportExportService:
             "EXCEL": ".xlsx",
             "PDF": ".pdf",
             "JSON": ".json",
+            "NDJSON": ".ndjson",
         }
 
         return extensions.get(format_type.upper(), ".txt")
@@ -1766,7 +1674,8 @@ class ReportExecutionService:
     def __init__(self, tenant: Tenant):
         self.tenant = tenant
         self.parameter_processor = None
-        self.query_engine = ReportQueryEngine(tenant)
+        self.query_engine = ReportQueryEngine(tenant, stream=True)
+        self.result_cache = ReportResultCache(tenant)
         self.export_service = ReportExportService(tenant)
         self.email_service = ReportEmailService(tenant)
 
@@ -1778,10 +1687,14 @@ class ReportExecutionService:
         user,
         email_recipients: List[str] = None,
         trigger_type: str = "MANUAL",
+        use_cache: bool = True,
     ) -> ReportExecution:
         """
         Execute a report with given parameters.
 
+        Results are served from the report result cache when the same report
+        was run with equivalent parameters and its source data is unchanged.
+
         Args:
             report: Report to execute
             parameters: Report parameters
@@ -1789,6 +1702,7 @@ class ReportExecutionService:
             user: User executing the report
             email_recipients: Optional email recipients
             trigger_type: How the report was triggered
+            use_cache: Whether cached results may be used
 
         Returns:
             ReportExecution instance
@@ -1818,24 +1732,26 @@ class ReportExecutionService:
             # Process parameters
             processed_params = self.parameter_processor.process_parameters(parameters)
 
-            # Execute query
-            data = self.query_engine.execute_query(report, processed_params)
-
-            if not data:
-                logger.warning(f"Report {report.name} returned no data")
+            # Execute query; rows are streamed straight into the exporter
+            rows = RowCounter(self._get_rows(report, processed_params, use_cache))
 
             # Generate filename
             timestamp = timezone.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{report.name.replace(' ', '_')}_{timestamp}.{output_format.lower()}"
 
             # Export data
-            file_path = self._export_data(data, output_format, filename, report.name)
+            try:
+                file_path = self._export_data(rows, output_format, filename, report.name)
+            except ValueError:
+                if not rows.count:
+                    logger.warning(f"Report {report.name} returned no data")
+                raise
 
             # Get file size
             file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
 
             # Mark as completed
-            execution.mark_completed(file_path, len(data))
+            execution.mark_completed(file_path, rows.count)
             execution.result_file_size = file_size
             execution.save(update_fields=["result_file_size"])
 
@@ -1846,7 +1762,7 @@ class ReportExecutionService:
             # Update report statistics
             report.increment_run_count()
 
-            logger.info(f"Report {report.name} executed successfully: {len(data)} rows")
+            logger.info(f"Report {report.name} executed successfully: {rows.count} rows")
 
             return execution
 
@@ -1855,8 +1771,20 @@ class ReportExecutionService:
             execution.mark_failed(str(e))
             raise
 
+    def _get_rows(
+        self, report: Report, parameters: Dict[str, Any], use_cache: bool
+    ) -> Iterable[Dict[str, Any]]:
+        """Get report rows from the result cache or by running the query."""
+        if not use_cache:
+            return self.query_engine.execute_query(report, parameters)
+
+        rows, _ = self.result_cache.get_or_execute(
+            report, parameters, lambda: self.query_engine.execute_query(report, parameters)
+        )
+        return rows
+
     def _export_data(
-        self, data: List[Dict[str, Any]], format_type: str, filename: str, report_name: str
+        self, data: Iterable[Dict[str, Any]], format_type: str, filename: str, report_name: str
     ) -> str:
         """Export data to the specified format."""
         if format_type == "CSV":
@@ -1867,5 +1795,7 @@ class ReportExecutionService:
             return self.export_service.export_to_pdf(data, filename, report_name)
         elif format_type == "JSON":
             return self.export_service.export_to_json(data, filename)
+        elif format_type == "NDJSON":
+            return self.export_service.export_to_ndjson(data, filename)
         else:
             raise ValueError(f"Unsupported export format: {format_type}")
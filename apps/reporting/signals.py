@@ -4,10 +4,13 @@ Signal handlers for the reporting app.
 
 import logging
 
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from apps.reporting.cache import ROLLUP_SOURCES, TRACKED_MODELS, bump_data_version
 from apps.reporting.models import ReportExecution, ReportSchedule
+from apps.sales.rollups import sales_rollups_refreshed
 
 logger = logging.getLogger(__name__)
 
@@ -62,3 +65,50 @@ def cleanup_execution_files(sender, instance, **kwargs):
                 logger.info(f"Cleaned up report file: {instance.result_file_path}")
         except Exception as e:
             logger.warning(f"Failed to clean up report file {instance.result_file_path}: {e}")
+
+
+def _get_instance_tenant_id(instance):
+    """Resolve the tenant of a tracked instance (sale items inherit it from their sale)."""
+    tenant_id = getattr(instance, "tenant_id", None)
+    if tenant_id is None and getattr(instance, "sale_id", None):
+        tenant_id = instance.sale.tenant_id
+    return tenant_id
+
+
+def bump_report_data_version(sender, instance, **kwargs):
+    """
+    Advance the report data-version watermark when tracked data changes.
+
+    The bump runs after commit so a concurrent report run cannot cache
+    pre-commit data under the new version.
+    """
+    tenant_id = _get_instance_tenant_id(instance)
+    if tenant_id is None:
+        return
+
+    source = sender._meta.label
+    transaction.on_commit(lambda: bump_data_version(tenant_id, source))
+
+
+for model_label in TRACKED_MODELS:
+    post_save.connect(
+        bump_report_data_version,
+        sender=model_label,
+        dispatch_uid=f"report_data_version_save_{model_label}",
+    )
+    post_delete.connect(
+        bump_report_data_version,
+        sender=model_label,
+        dispatch_uid=f"report_data_version_delete_{model_label}",
+    )
+
+
+@receiver(sales_rollups_refreshed)
+def bump_rollup_data_version(sender, tenant_id, **kwargs):
+    """Advance the rollup watermarks once a rollup refresh is committed."""
+
+    def bump():
+        for source in ROLLUP_SOURCES:
+            bump_data_version(tenant_id, source)
+
+    transaction.on_commit(bump)
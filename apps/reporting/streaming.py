@@ -0,0 +1,289 @@
+"""
+Streaming export helpers for the reporting system.
+
+Report results are consumed as row iterators rather than materialized lists so
+that exports run in constant memory regardless of row count:
+- CSV and NDJSON writers that yield encoded chunks as rows arrive
+- openpyxl write-only workbooks for XLSX
+- StreamingHttpResponse builders for downloads
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+# Rows fetched per round trip from a server-side cursor
+DEFAULT_CHUNK_SIZE = 2000
+
+# Rows sampled from the head of the stream to size XLSX columns
+COLUMN_WIDTH_SAMPLE_SIZE = 100
+
+STREAMING_CONTENT_TYPES = {
+    "CSV": "text/csv",
+    "NDJSON": "application/x-ndjson",
+    "JSON": "application/json",
+    "EXCEL": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class RowCounter:
+    """
+    Iterator wrapper that counts the rows passing through it.
+
+    Lets callers report ``row_count`` after a stream has been consumed without
+    holding the rows in memory.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self._rows = iter(rows)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        row = next(self._rows)
+        self.count += 1
+        return row
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of buffering it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def peek_rows(
+    rows: Iterable[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """
+    Return the first row and an iterator over all rows (first row included).
+
+    Raises:
+        ValueError: If the stream is empty
+    """
+    iterator = iter(rows)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        raise ValueError("No data to export")
+    return first, chain([first], iterator)
+
+
+def iter_cursor_rows(cursor, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yield result rows as dictionaries, fetching ``chunk_size`` rows per round trip.
+    """
+    columns = [col[0] for col in cursor.description]
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        for row in chunk:
+            yield dict(zip(columns, row))
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values json.dumps cannot handle natively."""
+    if isinstance(value, Decimal):
+        return str(value)
+    return DjangoJSONEncoder().default(value)
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield CSV lines (header first) for a stream of row dictionaries."""
+    first, rows = peek_rows(rows)
+    headers = list(first.keys())
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([row.get(header, "") for header in headers])
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield one JSON document per line for a stream of row dictionaries."""
+    for row in rows:
+        yield json.dumps(row, default=_json_default) + "\n"
+
+
+def iter_json_document(rows: Iterable[Dict[str, Any]], tenant_name: str) -> Iterator[str]:
+    """
+    Yield a JSON document with report metadata and a ``data`` array.
+
+    ``row_count`` is emitted after the array because it is only known once the
+    stream has been consumed.
+    """
+    counter = RowCounter(rows)
+    yield "{\n"
+    yield f'  "generated_at": {json.dumps(timezone.now().isoformat())},\n'
+    yield f'  "tenant": {json.dumps(tenant_name)},\n'
+    yield '  "data": ['
+    separator = "\n    "
+    for row in counter:
+        yield separator + json.dumps(row, default=_json_default)
+        separator = ",\n    "
+    yield "\n  ],\n"
+    yield f'  "row_count": {counter.count}\n'
+    yield "}\n"
+
+
+def write_text_stream(chunks: Iterable[str], filepath: str) -> str:
+    """Write text chunks to ``filepath`` as they are produced."""
+    with open(filepath, "w", newline="", encoding="utf-8") as output:
+        for chunk in chunks:
+            output.write(chunk)
+    return filepath
+
+
+def _column_widths(sample: List[Dict[str, Any]], headers: List[str]) -> List[int]:
+    """Estimate column widths from the header and a sample of leading rows."""
+    widths = []
+    for header in headers:
+        longest = max([len(str(header))] + [len(str(row.get(header, ""))) for row in sample])
+        widths.append(min(longest + 2, 50))
+    return widths
+
+
+def write_xlsx(
+    rows: Iterable[Dict[str, Any]],
+    filepath: str,
+    report_name: str = "",
+    tenant_name: str = "Unknown",
+) -> str:
+    """
+    Write rows to an XLSX file using an openpyxl write-only workbook.
+
+    Write-only mode flushes rows to disk as they are appended, so memory does not
+    grow with the number of rows. Column widths are estimated from the first
+    rows because they must be set before any row is written.
+    """
+    first, rows = peek_rows(rows)
+    headers = list(first.keys())
+
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= COLUMN_WIDTH_SAMPLE_SIZE:
+            break
+    rows = chain(sample, rows)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title="Report Data")
+
+    for index, width in enumerate(_column_widths(sample, headers), 1):
+        worksheet.column_dimensions[get_column_letter(index)].width = width
+
+    if report_name:
+        title = WriteOnlyCell(worksheet, value=report_name)
+        title.font = Font(size=16, bold=True)
+        worksheet.append([title])
+        worksheet.append([f"Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"])
+        worksheet.append([f"Tenant: {tenant_name}"])
+        worksheet.append([])
+
+    header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(worksheet, value=header)
+        cell.font = Font(bold=True)
+        cell.fill = header_fill
+        header_cells.append(cell)
+    worksheet.append(header_cells)
+
+    for row in rows:
+        worksheet.append([_excel_value(row.get(header, "")) for header in headers])
+
+    workbook.save(filepath)
+    return filepath
+
+
+def _excel_value(value: Any) -> Any:
+    """Convert a row value into something openpyxl can store."""
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        # Excel has no timezone support
+        return timezone.localtime(value).replace(tzinfo=None)
+    if value is None or isinstance(value, (str, int, float, Decimal, bool, date, time, timedelta)):
+        return value
+    return str(value)
+
+
+def _attachment(response, filename: str):
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def build_streaming_response(
+    rows: Iterable[Dict[str, Any]],
+    format_type: str,
+    filename: str,
+    report_name: str = "",
+    tenant_name: str = "Unknown",
+):
+    """
+    Build an HTTP response that streams report rows to the client.
+
+    CSV, NDJSON and JSON bodies are generated while the response is being sent,
+    so the first byte leaves before the query has finished. XLSX is a zip
+    archive and cannot be emitted incrementally; it is written in write-only
+    mode to a temporary file which is then streamed from disk.
+
+    Args:
+        rows: Iterator of result rows
+        format_type: CSV, NDJSON, JSON or EXCEL
+        filename: Download filename
+        report_name: Report name for the XLSX title
+        tenant_name: Tenant name for document metadata
+
+    Returns:
+        StreamingHttpResponse or FileResponse
+    """
+    format_type = format_type.upper()
+
+    # Surface empty results before any bytes are sent
+    _, rows = peek_rows(rows)
+
+    if format_type == "CSV":
+        content = iter_csv(rows)
+    elif format_type == "NDJSON":
+        content = iter_ndjson(rows)
+    elif format_type == "JSON":
+        content = iter_json_document(rows, tenant_name)
+    elif format_type == "EXCEL":
+        handle, filepath = tempfile.mkstemp(suffix=".xlsx")
+        os.close(handle)
+        write_xlsx(rows, filepath, report_name, tenant_name)
+        # The file is unlinked once opened; the open handle keeps it readable
+        stream = open(filepath, "rb")
+        os.unlink(filepath)
+        response = FileResponse(stream, content_type=STREAMING_CONTENT_TYPES["EXCEL"])
+        return _attachment(response, filename)
+    else:
+        raise ValueError(f"Unsupported streaming format: {format_type}")
+
+    response = StreamingHttpResponse(content, content_type=STREAMING_CONTENT_TYPES[format_type])
+    return _attachment(response, filename)
+
+
+def get_streaming_extension(format_type: str) -> Optional[str]:
+    """Get the file extension for a streaming format."""
+    return {
+        "CSV": ".csv",
+        "NDJSON": ".ndjson",
+        "JSON": ".json",
+        "EXCEL": ".xlsx",
+    }.get(format_type.upper())
@@ -7,6 +7,7 @@ Tests the core functionality of report builder infrastructure.
 import json
 import os
 from datetime import timedelta
+from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
 from django.contrib.auth import get_user_model
@@ -94,6 +95,216 @@ class ReportExportServiceTests(TestCase):
         self.assertGreater(os.path.getsize(filepath), 0)
 
 
+class StreamingExportTests(TestCase):
+    """Test the streaming export pipeline with row iterators."""
+
+    def setUp(self):
+        self.mock_tenant = MagicMock()
+        self.mock_tenant.company_name = "Test Shop"
+        self.export_service = ReportExportService(self.mock_tenant)
+
+    def _rows(self, count):
+        """Generate rows lazily, as a server-side cursor would."""
+        for index in range(count):
+            yield {"sku": f"SKU-{index}", "quantity": index, "price": Decimal("10.50")}
+
+    def test_csv_export_from_iterator(self):
+        """CSV export consumes a generator and writes every row."""
+        filepath = self.export_service.export_to_csv(self._rows(500), "stream.csv")
+
+        with open(filepath, newline="") as f:
+            lines = f.read().splitlines()
+
+        self.assertEqual(lines[0], "sku,quantity,price")
+        self.assertEqual(len(lines), 501)
+        self.assertEqual(lines[-1], "SKU-499,499,10.50")
+
+    def test_json_export_from_iterator(self):
+        """Streamed JSON keeps the metadata envelope and counts rows."""
+        filepath = self.export_service.export_to_json(self._rows(3), "stream.json")
+
+        with open(filepath) as f:
+            data = json.load(f)
+
+        self.assertEqual(data["row_count"], 3)
+        self.assertEqual(data["tenant"], "Test Shop")
+        self.assertEqual(data["data"][2]["price"], "10.50")
+
+    def test_ndjson_export(self):
+        """NDJSON export writes one JSON document per line."""
+        filepath = self.export_service.export_to_ndjson(self._rows(4), "stream.ndjson")
+
+        with open(filepath) as f:
+            records = [json.loads(line) for line in f]
+
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[1]["sku"], "SKU-1")
+
+    def test_excel_export_write_only(self):
+        """Excel export writes title, header and data rows in one pass."""
+        import openpyxl
+
+        filepath = self.export_service.export_to_excel(
+            self._rows(250), "stream.xlsx", "Stock Report"
+        )
+
+        worksheet = openpyxl.load_workbook(filepath, read_only=True).active
+        rows = list(worksheet.iter_rows(values_only=True))
+
+        self.assertEqual(rows[0][0], "Stock Report")
+        self.assertEqual(rows[4], ("sku", "quantity", "price"))
+        self.assertEqual(len(rows), 5 + 250)
+
+    def test_empty_iterator_raises(self):
+        """Empty generators are rejected like empty lists."""
+        with self.assertRaises(ValueError):
+            self.export_service.export_to_csv(iter([]), "empty.csv")
+
+        with self.assertRaises(ValueError):
+            self.export_service.export_to_excel(iter([]), "empty.xlsx")
+
+    def test_streaming_response(self):
+        """Downloads are served as a StreamingHttpResponse."""
+        from django.http import StreamingHttpResponse
+
+        from apps.reporting.streaming import build_streaming_response
+
+        response = build_streaming_response(self._rows(3), "CSV", "stock.csv")
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="stock.csv"', response["Content-Disposition"])
+
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_row_counter(self):
+        """RowCounter reports how many rows passed through it."""
+        from apps.reporting.streaming import RowCounter
+
+        counter = RowCounter(self._rows(7))
+        self.export_service.export_to_csv(counter, "counted.csv")
+
+        self.assertEqual(counter.count, 7)
+
+
+class ReportResultCacheTests(TestCase):
+    """Test report result caching keyed by fingerprint and data versions."""
+
+    def setUp(self):
+        import uuid
+
+        self.tenant = MagicMock()
+        self.tenant.id = str(uuid.uuid4())
+        self.report = Report(
+            id=uuid.uuid4(),
+            name="Cached Sales",
+            report_type="PREDEFINED",
+            query_config={"report_name": "sales_summary"},
+        )
+        self.rows = [{"sale_date": "2024-01-01", "total_sales": 3}]
+        self.execute = MagicMock(return_value=self.rows)
+
+    def _cache(self, **kwargs):
+        from apps.reporting.cache import ReportResultCache
+
+        return ReportResultCache(self.tenant, **kwargs)
+
+    def test_second_run_is_served_from_cache(self):
+        """Identical requests only run the query once."""
+        cache = self._cache()
+        params = {"date_range_start": "2024-01-01"}
+
+        first, first_hit = cache.get_or_execute(self.report, params, self.execute)
+        second, second_hit = cache.get_or_execute(self.report, params, self.execute)
+
+        self.assertFalse(first_hit)
+        self.assertTrue(second_hit)
+        self.assertEqual(second, self.rows)
+        self.execute.assert_called_once()
+
+    def test_parameters_are_normalized(self):
+        """Key order, whitespace and empty values do not change the key."""
+        cache = self._cache()
+
+        cache.get_or_execute(
+            self.report, {"branch_id": " 7 ", "date_range_start": "2024-01-01"}, self.execute
+        )
+        _, hit = cache.get_or_execute(
+            self.report,
+            {"date_range_start": "2024-01-01", "branch_id": "7", "category_id": ""},
+            self.execute,
+        )
+
+        self.assertTrue(hit)
+
+    def test_data_version_bump_invalidates(self):
+        """Writes to a source table produce a new watermark and a miss."""
+        from apps.reporting.cache import bump_data_version
+
+        cache = self._cache()
+        cache.get_or_execute(self.report, {}, self.execute)
+
+        bump_data_version(self.tenant.id, "sales.SalesRollup")
+        _, hit = cache.get_or_execute(self.report, {}, self.execute)
+
+        self.assertFalse(hit)
+        self.assertEqual(self.execute.call_count, 2)
+
+    def test_unrelated_source_keeps_cache(self):
+        """Writes to tables the report does not read keep the cached result."""
+        from apps.reporting.cache import bump_data_version
+
+        cache = self._cache()
+        cache.get_or_execute(self.report, {}, self.execute)
+
+        bump_data_version(self.tenant.id, "repair.RepairOrder")
+        _, hit = cache.get_or_execute(self.report, {}, self.execute)
+
+        self.assertTrue(hit)
+
+    def test_oversized_result_is_streamed_uncached(self):
+        """Results above max_rows are returned in full but not cached."""
+        cache = self._cache(max_rows=2)
+        execute = MagicMock(side_effect=lambda: iter([{"n": i} for i in range(5)]))
+
+        rows, _ = cache.get_or_execute(self.report, {}, execute)
+        self.assertEqual([row["n"] for row in rows], [0, 1, 2, 3, 4])
+
+        _, hit = cache.get_or_execute(self.report, {}, execute)
+        self.assertFalse(hit)
+        self.assertEqual(execute.call_count, 2)
+
+    def test_concurrent_miss_waits_for_leader(self):
+        """A caller that loses the lock waits for the leader's result."""
+        import threading
+
+        from apps.core.cache_utils import cache_report_result, get_tenant_cache_key
+
+        cache = self._cache()
+        cache_params = cache.get_cache_params(self.report, {})
+        lock_key = get_tenant_cache_key(
+            self.tenant.id, f"report:{self.report.id}:lock", **cache_params
+        )
+        cache.lock_cache.add(lock_key, 1, 30)
+
+        timer = threading.Timer(
+            0.3,
+            cache_report_result,
+            args=(self.tenant.id, str(self.report.id), cache_params, self.rows),
+        )
+        timer.start()
+        try:
+            rows, hit = cache.get_or_execute(self.report, {}, self.execute)
+        finally:
+            timer.join()
+            cache.lock_cache.delete(lock_key)
+
+        self.assertTrue(hit)
+        self.assertEqual(rows, self.rows)
+        self.execute.assert_not_called()
+
+
 class ReportModelTests(TestCase):
     """Test report model functionality."""
 
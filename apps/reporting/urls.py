@@ -30,6 +30,11 @@ urlpatterns = [
         views.ReportDownloadView.as_view(),
         name="execution_download",
     ),
+    path(
+        "<uuid:pk>/export/<str:format_type>/",
+        views.ReportExportView.as_view(),
+        name="report_export",
+    ),
     # Pre-built reports
     path("prebuilt/", views.PrebuiltReportsView.as_view(), name="prebuilt_reports"),
     path("prebuilt/sales-summary/", views.SalesSummaryReportView.as_view(), name="sales_summary"),
@@ -12,10 +12,11 @@ from datetime import timedelta
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import FileResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import (
     CreateView,
     DeleteView,
@@ -27,9 +28,16 @@ from django.views.generic import (
 )
 
 from apps.core.mixins import TenantRequiredMixin
+from apps.reporting.cache import ReportResultCache
 from apps.reporting.forms import ReportForm
 from apps.reporting.models import Report, ReportExecution, ReportSchedule
-from apps.reporting.services import PrebuiltReportService, ReportExecutionService
+from apps.reporting.services import (
+    PrebuiltReportService,
+    ReportExecutionService,
+    ReportParameterProcessor,
+    ReportQueryEngine,
+)
+from apps.reporting.streaming import build_streaming_response, get_streaming_extension
 from apps.reporting.tasks import execute_report_async
 
 
@@ -210,31 +218,84 @@ class ReportDownloadView(LoginRequiredMixin, TenantRequiredMixin, View):
                 messages.error(request, "Report file not found on disk.")
                 return redirect("reporting:execution_detail", pk=pk)
 
-            with open(execution.result_file_path, "rb") as f:
-                response = HttpResponse(f.read())
-
             # Set content type based on format
             content_types = {
                 "PDF": "application/pdf",
                 "EXCEL": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 "CSV": "text/csv",
                 "JSON": "application/json",
+                "NDJSON": "application/x-ndjson",
             }
 
-            response["Content-Type"] = content_types.get(
-                execution.output_format, "application/octet-stream"
-            )
-            response["Content-Disposition"] = (
-                f'attachment; filename="{os.path.basename(execution.result_file_path)}"'
+            # FileResponse streams the file in blocks instead of reading it into memory
+            return FileResponse(
+                open(execution.result_file_path, "rb"),
+                as_attachment=True,
+                filename=os.path.basename(execution.result_file_path),
+                content_type=content_types.get(execution.output_format, "application/octet-stream"),
             )
 
-            return response
-
         except Exception as e:
             messages.error(request, f"Failed to download report: {str(e)}")
             return redirect("reporting:execution_detail", pk=pk)
 
 
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class ReportExportView(LoginRequiredMixin, TenantRequiredMixin, View):
+    """
+    Stream a report directly to the browser without storing a result file.
+
+    Rows are read from a server-side cursor while the response is being sent.
+    The view runs outside ATOMIC_REQUESTS so the cursor is not closed when the
+    request transaction commits before streaming starts.
+    """
+
+    def get(self, request, pk, format_type):
+        report = get_object_or_404(Report, pk=pk, tenant=request.user.tenant)
+        format_type = format_type.upper()
+
+        extension = get_streaming_extension(format_type)
+        if extension is None:
+            messages.error(request, f"Unsupported export format: {format_type}")
+            return redirect("reporting:report_detail", pk=pk)
+
+        parameters = {
+            key[6:]: value
+            for key, value in request.GET.items()
+            if key.startswith("param_") and value
+        }
+
+        processor = ReportParameterProcessor(report)
+        is_valid, errors = processor.validate_parameters(parameters)
+        if not is_valid:
+            messages.error(request, f"Parameter validation failed: {', '.join(errors)}")
+            return redirect("reporting:report_detail", pk=pk)
+
+        processed = processor.process_parameters(parameters)
+        engine = ReportQueryEngine(request.user.tenant, stream=True)
+        rows, _ = ReportResultCache(request.user.tenant).get_or_execute(
+            report, processed, lambda: engine.execute_query(report, processed)
+        )
+
+        timestamp = timezone.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{report.name.replace(' ', '_')}_{timestamp}{extension}"
+
+        try:
+            response = build_streaming_response(
+                rows,
+                format_type,
+                filename,
+                report_name=report.name,
+                tenant_name=request.user.tenant.company_name,
+            )
+        except ValueError as e:
+            messages.error(request, f"Failed to export report: {str(e)}")
+            return redirect("reporting:report_detail", pk=pk)
+
+        report.increment_run_count()
+        return response
+
+
 class PrebuiltReportsView(LoginRequiredMixin, TenantRequiredMixin, TemplateView):
     """Display available pre-built reports."""
 
@@ -14,5 +14,4 @@ class SalesConfig(AppConfig):
 
     def ready(self):
         """Import signals when app is ready."""
-        # Import signals here if needed
-        pass
+        import apps.sales.signals  # noqa: F401
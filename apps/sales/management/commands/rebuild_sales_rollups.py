@@ -0,0 +1,88 @@
+"""
+Management command to backfill and repair the sales rollups.
+
+Usage:
+    python manage.py rebuild_sales_rollups
+    python manage.py rebuild_sales_rollups --tenant <uuid> --start 2024-01-01 --end 2024-12-31
+    python manage.py rebuild_sales_rollups --verify
+    python manage.py rebuild_sales_rollups --verify --dry-run
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.core.models import Tenant
+from apps.core.tenant_context import bypass_rls
+from apps.sales.models import Sale
+from apps.sales.rollups import find_drifted_days, get_day_start, refresh_sales_rollups
+
+
+class Command(BaseCommand):
+    """Management command to rebuild sales rollups from the raw sales."""
+
+    help = "Backfill the sales rollups, or repair days that drifted from the raw sales"
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument("--tenant", type=str, help="Only process this tenant (UUID)")
+        parser.add_argument(
+            "--start", type=str, help="First day to process (YYYY-MM-DD, default: first sale)"
+        )
+        parser.add_argument(
+            "--end", type=str, help="Last day to process (YYYY-MM-DD, default: today)"
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only rebuild days whose rollups disagree with the raw sales",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="With --verify, report drifted days without rebuilding them",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        try:
+            start = date.fromisoformat(options["start"]) if options["start"] else None
+            end = date.fromisoformat(options["end"]) if options["end"] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        with bypass_rls():
+            tenants = Tenant.objects.all()
+            if options["tenant"]:
+                tenants = tenants.filter(id=options["tenant"])
+            tenant_ids = list(tenants.values_list("id", flat=True))
+
+            for tenant_id in tenant_ids:
+                self._process_tenant(tenant_id, start, end, options["verify"], options["dry_run"])
+
+    def _process_tenant(self, tenant_id, start, end, verify, dry_run):
+        """Rebuild or repair one tenant's rollups."""
+        if start is None:
+            first_sale = Sale.objects.filter(tenant_id=tenant_id).aggregate(first=Min("created_at"))
+            if first_sale["first"] is None:
+                return
+            start = timezone.localtime(first_sale["first"], timezone.get_default_timezone()).date()
+        end = end or timezone.localdate(timezone=timezone.get_default_timezone())
+
+        if verify:
+            days = find_drifted_days(tenant_id, start, end)
+            for day in days:
+                self.stdout.write(self.style.WARNING(f"Tenant {tenant_id}: {day} drifted"))
+            if dry_run:
+                return
+        else:
+            days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+        for day in days:
+            refresh_sales_rollups(
+                tenant_id, get_day_start(day), get_day_start(day + timedelta(days=1))
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Tenant {tenant_id}: rebuilt {len(days)} day(s)"))
@@ -0,0 +1,314 @@
+# Generated by Django 4.2.26 on 2026-10-18 21:52
+
+import uuid
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0027_add_secrets_key_rotation"),
+        ("inventory", "0005_add_performance_indexes"),
+        ("sales", "0006_add_performance_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSalesRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="Unique identifier for the rollup row",
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("HOUR", "Hourly"), ("DAY", "Daily")],
+                        help_text="Bucket size of this rollup row",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "bucket_start",
+                    models.DateTimeField(help_text="Start of the hour or day covered by this row"),
+                ),
+                ("bucket_date", models.DateField(help_text="Local date of the bucket")),
+                ("quantity_sold", models.IntegerField(default=0, help_text="Units sold")),
+                (
+                    "revenue",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of line subtotals",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "unit_price_total",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of line unit prices (divide by line_count for the average)",
+                        max_digits=14,
+                    ),
+                ),
+                ("line_count", models.IntegerField(default=0, help_text="Number of sale lines")),
+                (
+                    "sale_count",
+                    models.IntegerField(default=0, help_text="Number of sales containing the item"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, help_text="When the rollup row was last recomputed"
+                    ),
+                ),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        help_text="Branch the items were sold at",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="product_sales_rollups",
+                        to="core.branch",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Category of the item when the rollup was computed",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="sales_rollups",
+                        to="inventory.productcategory",
+                    ),
+                ),
+                (
+                    "inventory_item",
+                    models.ForeignKey(
+                        help_text="Inventory item that was sold",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="inventory.inventoryitem",
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        help_text="Tenant that owns this rollup",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="product_sales_rollups",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Product Sales Rollup",
+                "verbose_name_plural": "Product Sales Rollups",
+                "db_table": "sales_product_rollups",
+                "ordering": ["-bucket_start"],
+            },
+        ),
+        migrations.CreateModel(
+            name="SalesRollup",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="Unique identifier for the rollup row",
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("HOUR", "Hourly"), ("DAY", "Daily")],
+                        help_text="Bucket size of this rollup row",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "bucket_start",
+                    models.DateTimeField(help_text="Start of the hour or day covered by this row"),
+                ),
+                ("bucket_date", models.DateField(help_text="Local date of the bucket")),
+                (
+                    "sale_count",
+                    models.IntegerField(default=0, help_text="Number of completed sales"),
+                ),
+                (
+                    "subtotal",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of subtotals",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "tax",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of tax",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "discount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of discounts",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "total",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of totals",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "refund_count",
+                    models.IntegerField(default=0, help_text="Number of refunded sales"),
+                ),
+                (
+                    "refund_total",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of refunded sale totals",
+                        max_digits=14,
+                    ),
+                ),
+                ("void_count", models.IntegerField(default=0, help_text="Number of voided sales")),
+                (
+                    "void_total",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Sum of voided sale totals",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, help_text="When the rollup row was last recomputed"
+                    ),
+                ),
+                (
+                    "branch",
+                    models.ForeignKey(
+                        help_text="Branch the sales were made at",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="core.branch",
+                    ),
+                ),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        help_text="Employee who processed the sales",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "tenant",
+                    models.ForeignKey(
+                        help_text="Tenant that owns this rollup",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="core.tenant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Sales Rollup",
+                "verbose_name_plural": "Sales Rollups",
+                "db_table": "sales_rollups",
+                "ordering": ["-bucket_start"],
+            },
+        ),
+        migrations.DeleteModel(
+            name="Customer",
+        ),
+        migrations.AddIndex(
+            model_name="salesrollup",
+            index=models.Index(
+                fields=["tenant", "granularity", "bucket_date"], name="salesrollup_tenant_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="salesrollup",
+            index=models.Index(
+                fields=["tenant", "granularity", "branch", "bucket_date"],
+                name="salesrollup_branch_date_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="salesrollup",
+            unique_together={("tenant", "granularity", "bucket_start", "branch", "employee")},
+        ),
+        migrations.AddIndex(
+            model_name="productsalesrollup",
+            index=models.Index(
+                fields=["tenant", "granularity", "bucket_date"], name="prodrollup_tenant_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productsalesrollup",
+            index=models.Index(
+                fields=["tenant", "granularity", "category", "bucket_date"],
+                name="prodrollup_cat_date_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="productsalesrollup",
+            unique_together={("tenant", "granularity", "bucket_start", "branch", "inventory_item")},
+        ),
+        # Rollup rows are tenant-scoped like the sales they summarize
+        migrations.RunSQL(
+            sql="""
+            ALTER TABLE sales_rollups ENABLE ROW LEVEL SECURITY;
+            CREATE POLICY tenant_isolation_policy ON sales_rollups
+                USING (
+                    is_rls_bypassed() = true
+                    OR tenant_id = get_current_tenant()
+                );
+
+            ALTER TABLE sales_product_rollups ENABLE ROW LEVEL SECURITY;
+            CREATE POLICY tenant_isolation_policy ON sales_product_rollups
+                USING (
+                    is_rls_bypassed() = true
+                    OR tenant_id = get_current_tenant()
+                );
+            """,
+            reverse_sql="""
+            DROP POLICY IF EXISTS tenant_isolation_policy ON sales_rollups;
+            ALTER TABLE sales_rollups DISABLE ROW LEVEL SECURITY;
+            DROP POLICY IF EXISTS tenant_isolation_policy ON sales_product_rollups;
+            ALTER TABLE sales_product_rollups DISABLE ROW LEVEL SECURITY;
+            """,
+        ),
+    ]
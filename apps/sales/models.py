@@ -497,3 +497,222 @@ class SaleItem(models.Model):
     def calculate_subtotal(self):
         """Calculate and return the subtotal for this item."""
         return (self.unit_price * self.quantity) - self.discount
+
+
+class SalesRollup(models.Model):
+    """
+    Pre-aggregated sales totals per tenant, branch and employee.
+
+    One row per (granularity, bucket, branch, employee). Hourly rows are
+    recomputed from raw sales when a sale in that hour is committed,
+    refunded or voided; daily rows are summed from the hourly rows of the
+    day. Dashboards and sales reports read these rows instead of scanning
+    the sales table, so their cost grows with the number of days requested
+    rather than the number of sales.
+    """
+
+    HOUR = "HOUR"
+    DAY = "DAY"
+
+    GRANULARITY_CHOICES = [
+        (HOUR, "Hourly"),
+        (DAY, "Daily"),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text="Unique identifier for the rollup row",
+    )
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name="sales_rollups",
+        help_text="Tenant that owns this rollup",
+    )
+
+    granularity = models.CharField(
+        max_length=10,
+        choices=GRANULARITY_CHOICES,
+        help_text="Bucket size of this rollup row",
+    )
+
+    bucket_start = models.DateTimeField(
+        help_text="Start of the hour or day covered by this row",
+    )
+
+    bucket_date = models.DateField(
+        help_text="Local date of the bucket",
+    )
+
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.CASCADE,
+        related_name="sales_rollups",
+        help_text="Branch the sales were made at",
+    )
+
+    employee = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="sales_rollups",
+        help_text="Employee who processed the sales",
+    )
+
+    # Completed sales
+    sale_count = models.IntegerField(default=0, help_text="Number of completed sales")
+    subtotal = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"), help_text="Sum of subtotals"
+    )
+    tax = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"), help_text="Sum of tax"
+    )
+    discount = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"), help_text="Sum of discounts"
+    )
+    total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal("0.00"), help_text="Sum of totals"
+    )
+
+    # Refunded and voided sales
+    refund_count = models.IntegerField(default=0, help_text="Number of refunded sales")
+    refund_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Sum of refunded sale totals",
+    )
+    void_count = models.IntegerField(default=0, help_text="Number of voided sales")
+    void_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Sum of voided sale totals",
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the rollup row was last recomputed",
+    )
+
+    class Meta:
+        db_table = "sales_rollups"
+        ordering = ["-bucket_start"]
+        verbose_name = "Sales Rollup"
+        verbose_name_plural = "Sales Rollups"
+        unique_together = [["tenant", "granularity", "bucket_start", "branch", "employee"]]
+        indexes = [
+            models.Index(
+                fields=["tenant", "granularity", "bucket_date"], name="salesrollup_tenant_date_idx"
+            ),
+            models.Index(
+                fields=["tenant", "granularity", "branch", "bucket_date"],
+                name="salesrollup_branch_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.bucket_start} - {self.total}"
+
+
+class ProductSalesRollup(models.Model):
+    """
+    Pre-aggregated completed-sale line items per tenant, branch and product.
+
+    The product's category is stored with each row so category breakdowns
+    do not need to join the inventory table. Maintained alongside
+    SalesRollup.
+    """
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+        help_text="Unique identifier for the rollup row",
+    )
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name="product_sales_rollups",
+        help_text="Tenant that owns this rollup",
+    )
+
+    granularity = models.CharField(
+        max_length=10,
+        choices=SalesRollup.GRANULARITY_CHOICES,
+        help_text="Bucket size of this rollup row",
+    )
+
+    bucket_start = models.DateTimeField(
+        help_text="Start of the hour or day covered by this row",
+    )
+
+    bucket_date = models.DateField(
+        help_text="Local date of the bucket",
+    )
+
+    branch = models.ForeignKey(
+        Branch,
+        on_delete=models.CASCADE,
+        related_name="product_sales_rollups",
+        help_text="Branch the items were sold at",
+    )
+
+    inventory_item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="sales_rollups",
+        help_text="Inventory item that was sold",
+    )
+
+    category = models.ForeignKey(
+        "inventory.ProductCategory",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sales_rollups",
+        help_text="Category of the item when the rollup was computed",
+    )
+
+    quantity_sold = models.IntegerField(default=0, help_text="Units sold")
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Sum of line subtotals",
+    )
+    unit_price_total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Sum of line unit prices (divide by line_count for the average)",
+    )
+    line_count = models.IntegerField(default=0, help_text="Number of sale lines")
+    sale_count = models.IntegerField(default=0, help_text="Number of sales containing the item")
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When the rollup row was last recomputed",
+    )
+
+    class Meta:
+        db_table = "sales_product_rollups"
+        ordering = ["-bucket_start"]
+        verbose_name = "Product Sales Rollup"
+        verbose_name_plural = "Product Sales Rollups"
+        unique_together = [["tenant", "granularity", "bucket_start", "branch", "inventory_item"]]
+        indexes = [
+            models.Index(
+                fields=["tenant", "granularity", "bucket_date"], name="prodrollup_tenant_date_idx"
+            ),
+            models.Index(
+                fields=["tenant", "granularity", "category", "bucket_date"],
+                name="prodrollup_cat_date_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.bucket_start} - {self.inventory_item_id}"
@@ -0,0 +1,378 @@
+"""
+Sales rollup maintenance and queries.
+
+Implements Requirement 26: Performance Optimization and Scaling
+- Hourly and daily sales aggregates per tenant, branch, employee, product and category
+- Incremental maintenance when sales are committed, refunded or voided
+- Dashboard and report queries that cost O(days) instead of O(sales)
+
+Hourly rows are recomputed from the raw sales of the affected hour, and
+daily rows are re-summed from that day's hourly rows. Recomputing a whole
+bucket (rather than applying deltas) keeps the rollups idempotent: sale
+edits, late line items and retries all converge to the same result, and a
+missed refresh is repaired by the next one or by ``rebuild_sales_rollups``.
+"""
+
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Union
+from uuid import UUID
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncHour, TruncMonth
+from django.dispatch import Signal
+from django.utils import timezone
+
+from apps.core.tenant_context import tenant_context
+from apps.sales.models import ProductSalesRollup, Sale, SaleItem, SalesRollup
+
+logger = logging.getLogger(__name__)
+
+# Sent after rollups for a tenant were recomputed (kwargs: tenant_id, start, end)
+sales_rollups_refreshed = Signal()
+
+ZERO = Value(Decimal("0.00"), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+SALES_METRICS = (
+    "sale_count",
+    "subtotal",
+    "tax",
+    "discount",
+    "total",
+    "refund_count",
+    "refund_total",
+    "void_count",
+    "void_total",
+)
+PRODUCT_METRICS = ("quantity_sold", "revenue", "unit_price_total", "line_count", "sale_count")
+
+_pending = threading.local()
+
+
+def get_hour_bucket(value: datetime) -> datetime:
+    """Get the start of the local hour containing ``value``."""
+    local = timezone.localtime(value, timezone.get_default_timezone())
+    return local.replace(minute=0, second=0, microsecond=0)
+
+
+def get_day_start(day: date) -> datetime:
+    """Get the start of a local day as an aware datetime."""
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_default_timezone())
+
+
+def _local_date(value: datetime) -> date:
+    return timezone.localtime(value, timezone.get_default_timezone()).date()
+
+
+def _days_between(start: datetime, end: datetime) -> List[date]:
+    """Local dates covered by the half-open interval [start, end)."""
+    first = _local_date(start)
+    last = _local_date(end - timedelta(microseconds=1))
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+
+def _sum(field: str, status: str):
+    return Coalesce(Sum(field, filter=Q(status=status)), ZERO)
+
+
+def refresh_sales_rollups(
+    tenant_id: Union[str, UUID], start: datetime, end: Optional[datetime] = None
+) -> None:
+    """
+    Recompute the rollups for sales created in [start, end).
+
+    ``start`` is rounded down and ``end`` up to whole hours; ``end`` defaults
+    to one hour after ``start``. Daily rows of every day touched are rebuilt
+    from the refreshed hourly rows.
+
+    Args:
+        tenant_id: Tenant whose rollups to refresh
+        start: Start of the interval
+        end: End of the interval (exclusive)
+    """
+    start = get_hour_bucket(start)
+    end = get_hour_bucket(end - timedelta(microseconds=1)) if end else start
+    end += timedelta(hours=1)
+    days = _days_between(start, end)
+
+    with tenant_context(tenant_id), transaction.atomic():
+        # Serialize refreshes per tenant so concurrent commits cannot interleave
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(hashtext(%s))", [f"sales_rollup:{tenant_id}"]
+            )
+
+        _rebuild_hourly_sales(tenant_id, start, end)
+        _rebuild_hourly_products(tenant_id, start, end)
+        _rebuild_daily(SalesRollup, ("branch_id", "employee_id"), SALES_METRICS, tenant_id, days)
+        _rebuild_daily(
+            ProductSalesRollup,
+            ("branch_id", "inventory_item_id", "category_id"),
+            PRODUCT_METRICS,
+            tenant_id,
+            days,
+        )
+
+    sales_rollups_refreshed.send(sender=SalesRollup, tenant_id=tenant_id, start=start, end=end)
+
+
+def _rebuild_hourly_sales(tenant_id, start: datetime, end: datetime) -> None:
+    rows = (
+        Sale.objects.filter(tenant_id=tenant_id, created_at__gte=start, created_at__lt=end)
+        .annotate(bucket=TruncHour("created_at", tzinfo=timezone.get_default_timezone()))
+        .values("bucket", "branch_id", "employee_id")
+        .order_by()
+        .annotate(
+            # Aliased so they do not clash with the Sale fields of the same name
+            sum_sale_count=Count("id", filter=Q(status=Sale.COMPLETED)),
+            sum_subtotal=_sum("subtotal", Sale.COMPLETED),
+            sum_tax=_sum("tax", Sale.COMPLETED),
+            sum_discount=_sum("discount", Sale.COMPLETED),
+            sum_total=_sum("total", Sale.COMPLETED),
+            sum_refund_count=Count("id", filter=Q(status=Sale.REFUNDED)),
+            sum_refund_total=_sum("total", Sale.REFUNDED),
+            sum_void_count=Count("id", filter=Q(status=Sale.CANCELLED)),
+            sum_void_total=_sum("total", Sale.CANCELLED),
+        )
+    )
+
+    rollups = []
+    for row in rows:
+        metrics = {metric: row[f"sum_{metric}"] for metric in SALES_METRICS}
+        # Groups with only held sales carry no totals
+        if not (metrics["sale_count"] or metrics["refund_count"] or metrics["void_count"]):
+            continue
+        rollups.append(
+            SalesRollup(
+                tenant_id=tenant_id,
+                granularity=SalesRollup.HOUR,
+                bucket_start=row["bucket"],
+                bucket_date=_local_date(row["bucket"]),
+                branch_id=row["branch_id"],
+                employee_id=row["employee_id"],
+                **metrics,
+            )
+        )
+
+    SalesRollup.objects.filter(
+        tenant_id=tenant_id,
+        granularity=SalesRollup.HOUR,
+        bucket_start__gte=start,
+        bucket_start__lt=end,
+    ).delete()
+    SalesRollup.objects.bulk_create(rollups)
+
+
+def _rebuild_hourly_products(tenant_id, start: datetime, end: datetime) -> None:
+    rows = (
+        SaleItem.objects.filter(
+            sale__tenant_id=tenant_id,
+            sale__status=Sale.COMPLETED,
+            sale__created_at__gte=start,
+            sale__created_at__lt=end,
+        )
+        .annotate(bucket=TruncHour("sale__created_at", tzinfo=timezone.get_default_timezone()))
+        .values("bucket", "sale__branch_id", "inventory_item_id", "inventory_item__category_id")
+        .order_by()
+        .annotate(
+            sum_quantity_sold=Sum("quantity"),
+            sum_revenue=Sum("subtotal"),
+            sum_unit_price_total=Sum("unit_price"),
+            sum_line_count=Count("id"),
+            sum_sale_count=Count("sale_id", distinct=True),
+        )
+    )
+
+    rollups = [
+        ProductSalesRollup(
+            tenant_id=tenant_id,
+            granularity=SalesRollup.HOUR,
+            bucket_start=row["bucket"],
+            bucket_date=_local_date(row["bucket"]),
+            branch_id=row["sale__branch_id"],
+            inventory_item_id=row["inventory_item_id"],
+            category_id=row["inventory_item__category_id"],
+            **{metric: row[f"sum_{metric}"] for metric in PRODUCT_METRICS},
+        )
+        for row in rows
+    ]
+
+    ProductSalesRollup.objects.filter(
+        tenant_id=tenant_id,
+        granularity=SalesRollup.HOUR,
+        bucket_start__gte=start,
+        bucket_start__lt=end,
+    ).delete()
+    ProductSalesRollup.objects.bulk_create(rollups)
+
+
+def _rebuild_daily(model, dimensions, metrics, tenant_id, days: List[date]) -> None:
+    """Replace the daily rows of ``days`` with sums of their hourly rows."""
+    rows = (
+        model.objects.filter(
+            tenant_id=tenant_id, granularity=SalesRollup.HOUR, bucket_date__in=days
+        )
+        .values("bucket_date", *dimensions)
+        .order_by()
+        .annotate(**{f"sum_{metric}": Sum(metric) for metric in metrics})
+    )
+
+    rollups = [
+        model(
+            tenant_id=tenant_id,
+            granularity=SalesRollup.DAY,
+            bucket_start=get_day_start(row["bucket_date"]),
+            bucket_date=row["bucket_date"],
+            **{dimension: row[dimension] for dimension in dimensions},
+            **{metric: row[f"sum_{metric}"] for metric in metrics},
+        )
+        for row in rows
+    ]
+
+    model.objects.filter(
+        tenant_id=tenant_id, granularity=SalesRollup.DAY, bucket_date__in=days
+    ).delete()
+    model.objects.bulk_create(rollups)
+
+
+def schedule_rollup_refresh(tenant_id: Union[str, UUID], created_at: datetime) -> None:
+    """
+    Refresh the hour bucket of a sale once the current transaction commits.
+
+    Buckets are collected per thread so a sale saved together with its line
+    items is only recomputed once.
+    """
+    buckets = getattr(_pending, "buckets", None)
+    if buckets is None:
+        buckets = _pending.buckets = set()
+    buckets.add((str(tenant_id), get_hour_bucket(created_at)))
+    transaction.on_commit(flush_rollup_refreshes)
+
+
+def flush_rollup_refreshes() -> None:
+    """Refresh every pending bucket. Failures are logged; the repair command fixes drift."""
+    buckets = getattr(_pending, "buckets", None)
+    if not buckets:
+        return
+    _pending.buckets = set()
+
+    for tenant_id, bucket in sorted(buckets):
+        try:
+            refresh_sales_rollups(tenant_id, bucket)
+        except Exception as e:
+            logger.error(f"Failed to refresh sales rollups for tenant {tenant_id} at {bucket}: {e}")
+
+
+# Queries
+
+
+def _daily_rows(model, tenant_id, start_date: date, end_date: date, branch_id=None):
+    queryset = model.objects.filter(
+        tenant_id=tenant_id,
+        granularity=SalesRollup.DAY,
+        bucket_date__gte=start_date,
+        bucket_date__lte=end_date,
+    )
+    if branch_id:
+        queryset = queryset.filter(branch_id=branch_id)
+    return queryset
+
+
+def get_sales_totals(
+    tenant_id: Union[str, UUID], start_date: date, end_date: date, branch_id=None
+) -> Dict[str, Any]:
+    """
+    Get completed sales totals between two dates (inclusive).
+
+    Returns:
+        Dictionary with total_amount and total_count
+    """
+    totals = _daily_rows(SalesRollup, tenant_id, start_date, end_date, branch_id).aggregate(
+        total_amount=Sum("total"), total_count=Sum("sale_count")
+    )
+    return {
+        "total_amount": totals["total_amount"] or Decimal("0.00"),
+        "total_count": totals["total_count"] or 0,
+    }
+
+
+def get_daily_sales(
+    tenant_id: Union[str, UUID], start_date: date, end_date: date, branch_id=None
+) -> List[Dict[str, Any]]:
+    """Get completed sales per day as dictionaries with date, total_sales and total_count."""
+    rows = (
+        _daily_rows(SalesRollup, tenant_id, start_date, end_date, branch_id)
+        .values("bucket_date")
+        .order_by("bucket_date")
+        .annotate(total_sales=Sum("total"), total_count=Sum("sale_count"))
+    )
+    return [
+        {
+            "date": row["bucket_date"],
+            "total_sales": row["total_sales"],
+            "total_count": row["total_count"],
+        }
+        for row in rows
+        if row["total_count"]
+    ]
+
+
+def get_monthly_sales(
+    tenant_id: Union[str, UUID], start_date: date, end_date: date, branch_id=None
+) -> List[Dict[str, Any]]:
+    """Get completed sales per month as dictionaries with month, total_sales and total_count."""
+    rows = (
+        _daily_rows(SalesRollup, tenant_id, start_date, end_date, branch_id)
+        .annotate(month=TruncMonth("bucket_date"))
+        .values("month")
+        .order_by("month")
+        .annotate(total_sales=Sum("total"), total_count=Sum("sale_count"))
+    )
+    return [row for row in rows if row["total_count"]]
+
+
+# Repair
+
+
+def get_raw_daily_totals(
+    tenant_id: Union[str, UUID], start_date: date, end_date: date
+) -> Dict[date, tuple]:
+    """Aggregate completed sales per local day straight from the sales table."""
+    rows = (
+        Sale.objects.filter(
+            tenant_id=tenant_id,
+            status=Sale.COMPLETED,
+            created_at__gte=get_day_start(start_date),
+            created_at__lt=get_day_start(end_date + timedelta(days=1)),
+        )
+        .annotate(day=TruncDate("created_at", tzinfo=timezone.get_default_timezone()))
+        .values("day")
+        .order_by()
+        .annotate(day_count=Count("id"), day_total=Sum("total"))
+    )
+    return {row["day"]: (row["day_count"], row["day_total"]) for row in rows}
+
+
+def get_rollup_daily_totals(
+    tenant_id: Union[str, UUID], start_date: date, end_date: date
+) -> Dict[date, tuple]:
+    """Aggregate completed sales per day from the daily rollups."""
+    rows = (
+        _daily_rows(SalesRollup, tenant_id, start_date, end_date)
+        .values("bucket_date")
+        .order_by()
+        .annotate(day_count=Sum("sale_count"), day_total=Sum("total"))
+    )
+    return {
+        row["bucket_date"]: (row["day_count"], row["day_total"]) for row in rows if row["day_count"]
+    }
+
+
+def find_drifted_days(tenant_id: Union[str, UUID], start_date: date, end_date: date) -> List[date]:
+    """Get the days whose daily rollups disagree with the raw sales."""
+    raw = get_raw_daily_totals(tenant_id, start_date, end_date)
+    rollup = get_rollup_daily_totals(tenant_id, start_date, end_date)
+    return sorted(day for day in set(raw) | set(rollup) if raw.get(day) != rollup.get(day))
@@ -15,7 +15,8 @@ from django.db import transaction
 from rest_framework import serializers
 
 from apps.crm.models import Customer
-from apps.inventory.models import InventoryItem
+from apps.inventory.models import InventoryItem, StockMovement
+from apps.inventory.stock_movements import InsufficientStockError, apply_stock_changes
 
 from .models import Sale, SaleItem, Terminal
 
@@ -313,7 +314,7 @@ class SaleCreateSerializer(serializers.Serializer):
 
             for item_data in items_data:
                 try:
-                    inventory_item = InventoryItem.objects.select_for_update().get(
+                    inventory_item = InventoryItem.objects.get(
                         id=item_data["inventory_item_id"], tenant=tenant, is_active=True
                     )
                 except InventoryItem.DoesNotExist:
@@ -419,17 +420,21 @@ class SaleCreateSerializer(serializers.Serializer):
                 # Create sale item
                 SaleItem.objects.create(sale=sale, inventory_item=inventory_item, **item_data)
 
-            # Deduct inventory quantities
-            for update_data in inventory_updates:
-                item = update_data["item"]
-                quantity_to_deduct = update_data["quantity_to_deduct"]
-
-                item.quantity -= quantity_to_deduct
-                if item.quantity < 0:
-                    raise serializers.ValidationError(
-                        f"Inventory quantity would become negative for '{item.name}'."
-                    )
-                item.save(update_fields=["quantity", "updated_at"])
+            # Deduct inventory quantities in one guarded statement; the
+            # availability check above is advisory, this one is authoritative
+            try:
+                apply_stock_changes(
+                    [
+                        (update_data["item"], -update_data["quantity_to_deduct"])
+                        for update_data in inventory_updates
+                    ],
+                    StockMovement.SALE,
+                    reason=f"Sale {sale.sale_number}",
+                    source=sale,
+                    user=user,
+                )
+            except InsufficientStockError as e:
+                raise serializers.ValidationError(str(e))
 
             # Update terminal last used timestamp
             terminal.mark_as_used()
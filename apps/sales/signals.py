@@ -0,0 +1,28 @@
+"""
+Signal handlers for the sales app.
+
+Keeps the sales rollups in step with the sales they summarize.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.sales.models import Sale, SaleItem
+from apps.sales.rollups import schedule_rollup_refresh
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def refresh_rollups_on_sale_change(sender, instance, **kwargs):
+    """Refresh the sale's rollup bucket after commit (covers completion, refund and void)."""
+    if instance.created_at:
+        schedule_rollup_refresh(instance.tenant_id, instance.created_at)
+
+
+@receiver(post_save, sender=SaleItem)
+@receiver(post_delete, sender=SaleItem)
+def refresh_rollups_on_sale_item_change(sender, instance, **kwargs):
+    """Refresh the parent sale's rollup bucket after commit."""
+    sale = Sale.objects.filter(pk=instance.sale_id).values("tenant_id", "created_at").first()
+    if sale:
+        schedule_rollup_refresh(sale["tenant_id"], sale["created_at"])
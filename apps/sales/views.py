@@ -20,9 +20,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
 from apps.core.permissions import HasTenantAccess
-from apps.core.tenant_context import set_tenant_context
+from apps.core.tenant_resolver import ensure_tenant_context
 from apps.crm.models import Customer
-from apps.inventory.models import InventoryItem
+from apps.inventory.models import InventoryItem, StockMovement
+from apps.inventory.stock_movements import apply_stock_changes
 
 from .models import Sale, Terminal
 from .receipt_service import ReceiptService
@@ -43,8 +44,7 @@ class TenantContextMixin:
     def initial(self, request, *args, **kwargs):
         """Set tenant context after authentication."""
         super().initial(request, *args, **kwargs)
-        if hasattr(request, "user") and hasattr(request.user, "tenant") and request.user.tenant:
-            set_tenant_context(request.user.tenant.id)
+        ensure_tenant_context(request)
 
 
 # Sales Management Views (Frontend)
@@ -204,7 +204,7 @@ def sale_void(request, sale_id):
     try:
         sale = (
             Sale.objects.select_related("tenant")
-            .prefetch_related("items__inventory_item")
+            .prefetch_related("items")
             .get(id=sale_id, tenant=request.user.tenant)
         )
 
@@ -214,12 +214,13 @@ def sale_void(request, sale_id):
 
         with transaction.atomic():
             # Restore inventory
-            for item in sale.items.all():
-                inventory_item = InventoryItem.objects.select_for_update().get(
-                    id=item.inventory_item.id
-                )
-                inventory_item.quantity += item.quantity
-                inventory_item.save()
+            apply_stock_changes(
+                [(item.inventory_item_id, item.quantity) for item in sale.items.all()],
+                StockMovement.RETURN,
+                reason=f"Sale {sale.sale_number} voided",
+                source=sale,
+                user=request.user,
+            )
 
             # Mark sale as cancelled
             sale.mark_as_cancelled()
@@ -258,7 +259,7 @@ def sale_refund(request, sale_id):
     try:
         sale = (
             Sale.objects.select_related("tenant")
-            .prefetch_related("items__inventory_item")
+            .prefetch_related("items")
             .get(id=sale_id, tenant=request.user.tenant)
         )
 
@@ -268,12 +269,13 @@ def sale_refund(request, sale_id):
 
         with transaction.atomic():
             # Restore inventory
-            for item in sale.items.all():
-                inventory_item = InventoryItem.objects.select_for_update().get(
-                    id=item.inventory_item.id
-                )
-                inventory_item.quantity += item.quantity
-                inventory_item.save()
+            apply_stock_changes(
+                [(item.inventory_item_id, item.quantity) for item in sale.items.all()],
+                StockMovement.RETURN,
+                reason=f"Sale {sale.sale_number} refunded",
+                source=sale,
+                user=request.user,
+            )
 
             # Mark sale as refunded
             sale.mark_as_refunded()
@@ -519,7 +521,7 @@ def pos_create_sale(request):
     - Customer purchase tracking
     - Terminal usage tracking
     """
-    set_tenant_context(request.user.tenant.id)
+    ensure_tenant_context(request)
 
     serializer = SaleCreateSerializer(data=request.data, context={"request": request})
 
@@ -1229,7 +1231,7 @@ def generate_receipt_after_sale(request, sale_id):
 
     Implements Requirement 11.9: Receipt generation and printing
     """
-    set_tenant_context(request.user.tenant.id)
+    ensure_tenant_context(request)
 
     try:
         sale = Sale.objects.select_related(
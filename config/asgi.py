@@ -3,6 +3,10 @@ ASGI config for jewelry shop SaaS platform.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Notification streams (Server-Sent Events) are served directly by
+apps.notifications.stream, outside Django's middleware stack; every other
+request goes to Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -13,4 +17,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.notifications.push import STREAM_PATH  # noqa: E402 - needs Django set up
+from apps.notifications.stream import notification_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == STREAM_PATH:
+        await notification_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -116,6 +116,24 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=1, minute=0, day_of_month=1),
         "options": {"queue": "accounting", "priority": 8},
     },
+    # Post queued journal entries every 10 seconds
+    "post-pending-journal-entries": {
+        "task": "apps.accounting.tasks.post_pending_journal_entries",
+        "schedule": 10.0,  # Every 10 seconds
+        "options": {"queue": "accounting", "priority": 8},
+    },
+    # Expire old loyalty points daily at 1:30 AM
+    "expire-loyalty-points": {
+        "task": "apps.crm.tasks.expire_loyalty_points",
+        "schedule": crontab(hour=1, minute=30),
+        "options": {"queue": "celery", "priority": 5},
+    },
+    # Store cluster-wide system metrics every 30 seconds
+    "collect-cluster-metrics": {
+        "task": "collect_cluster_metrics",
+        "schedule": 30.0,  # Every 30 seconds
+        "options": {"queue": "monitoring", "priority": 9},
+    },
     # Check system metrics for alerts every 5 minutes
     "check-system-metrics": {
         "task": "check_system_metrics",
@@ -152,6 +170,12 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=4, minute=0, day_of_week=0),  # Sunday = 0
         "options": {"queue": "webhooks", "priority": 2},
     },
+    # Create upcoming audit log partitions daily at 0:30 AM
+    "ensure-audit-log-partitions": {
+        "task": "apps.core.audit_tasks.ensure_audit_log_partitions",
+        "schedule": crontab(hour=0, minute=30),
+        "options": {"queue": "monitoring", "priority": 6},
+    },
 }
 
 # Task routing configuration
@@ -163,6 +187,7 @@ app.conf.task_routes = {
     "apps.accounting.tasks.*": {"queue": "accounting", "priority": 8},
     "apps.core.alert_tasks.*": {"queue": "monitoring", "priority": 9},
     "apps.core.webhook_tasks.*": {"queue": "webhooks", "priority": 8},
+    "collect_cluster_metrics": {"queue": "monitoring", "priority": 9},
     "check_system_metrics": {"queue": "monitoring", "priority": 9},
     "check_service_health": {"queue": "monitoring", "priority": 9},
     "check_alert_escalations": {"queue": "monitoring", "priority": 8},
@@ -66,13 +66,14 @@ MIDDLEWARE = [
     "django_prometheus.middleware.PrometheusBeforeMiddleware",  # Must be first
     "django.middleware.security.SecurityMiddleware",
     "apps.core.security_headers_middleware.SecurityHeadersMiddleware",
-    "apps.core.rate_limit_middleware.APIRateLimitMiddleware",
     "django.middleware.gzip.GZipMiddleware",
     "apps.core.session_middleware.MultiPortalSessionMiddleware",
+    "apps.core.db_routing.ReadYourWritesMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.core.rate_limit_middleware.APIRateLimitMiddleware",  # Needs request.user
     "apps.core.language_middleware.UserLanguageMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -270,10 +271,22 @@ WAFFLE_SWITCH_MODEL = "waffle.Switch"
 WAFFLE_SAMPLE_MODEL = "waffle.Sample"
 WAFFLE_MAX_AGE = 2592000  # 30 days
 
+# Tenant feature flag snapshot (apps/core/feature_flag_evaluator.py)
+FEATURE_FLAG_LOCAL_TTL = 2  # Seconds between checks of the shared snapshot generation
+FEATURE_FLAG_CACHE_TTL = 3600  # Seconds a compiled snapshot is kept in Redis
+
+# In-app notification push (apps/notifications/push.py, apps/notifications/stream.py)
+NOTIFICATION_PUSH_CACHE = "default"  # Cache alias whose Redis holds counters and channels
+NOTIFICATION_UNREAD_COUNT_TTL = 900  # Seconds before a cached unread count is recounted
+NOTIFICATION_STREAM_TOKEN_TTL = 300  # Seconds a signed stream URL can be used to connect
+NOTIFICATION_STREAM_HEARTBEAT = 20  # Seconds between keepalive comments on open streams
+NOTIFICATION_STREAM_MAX_AGE = 3600  # Seconds before a stream ends and the page reconnects
+NOTIFICATION_STREAM_REDIS_URL = None  # Redis URL for streams, if not the cache's host/port/db
+
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.core.tenant_resolver.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -320,6 +333,13 @@ CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes
 CELERY_WORKER_PREFETCH_MULTIPLIER = 4
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
 
+# Cluster system metrics for alert rules and the monitoring dashboard (apps/core/system_metrics.py)
+SYSTEM_METRICS_CACHE = "default"  # Cache alias whose Redis stores the metric series
+SYSTEM_METRICS_SAMPLER_ENABLED = True  # Sample each Celery worker's host in a background thread
+SYSTEM_METRICS_SAMPLE_INTERVAL = 15  # Seconds between two samples of a host
+SYSTEM_METRICS_RETENTION = 3600  # Seconds of samples kept per host and metric
+SYSTEM_METRICS_HYSTERESIS = 0.1  # Share of the threshold an alerting metric must recover by
+
 # Prometheus Monitoring Configuration
 PROMETHEUS_EXPORT_MIGRATIONS = True
 PROMETHEUS_LATENCY_BUCKETS = (
@@ -350,6 +370,63 @@ BRUTE_FORCE_MAX_ATTEMPTS = 5
 BRUTE_FORCE_LOCKOUT_MINUTES = 15
 BRUTE_FORCE_WINDOW_MINUTES = 5
 
+# API rate limiter (token buckets in Redis); see apps/core/rate_limit_middleware.py
+# for the per-route-class budgets, which can be overridden with API_RATE_LIMITS
+API_RATE_LIMIT_CACHE = "api"
+
+# Tenant resolution cache (seconds); entries are dropped when a tenant is saved
+TENANT_LOCAL_CACHE_TTL = 5
+TENANT_CACHE_TTL = 300
+
+# Batched email delivery (apps/notifications/email_delivery.py)
+EMAIL_BATCH_CHUNK_SIZE = 500  # Recipients per chunk, sent over one connection
+EMAIL_BATCH_RETRIES = 1  # Individual retries for each failed address
+
+# Webhook dispatcher (apps/core/webhook_dispatcher.py)
+WEBHOOK_DISPATCH_CONCURRENCY = 20  # Concurrent requests per dispatch task
+WEBHOOK_LANES_PER_ENDPOINT = 4  # Most concurrent requests to any one endpoint
+WEBHOOK_BREAKER_THRESHOLD = 5  # Consecutive failures that open an endpoint's circuit
+WEBHOOK_BREAKER_COOLDOWN = 60  # Seconds a circuit stays open before a probe
+
+# Data import pipeline (apps/core/data_import_pipeline.py)
+DATA_IMPORT_CHUNK_SIZE = 2000  # Rows validated and committed together
+DATA_IMPORT_COPY_THRESHOLD = 5 * 1024 * 1024  # Files this large are written with COPY
+
+# Audit log partitions and explorer (apps/core/audit_partitions.py, audit_queries.py)
+AUDIT_LOG_PARTITION_MONTHS_AHEAD = 3  # Monthly partitions kept ready ahead of time
+AUDIT_EXACT_COUNT_THRESHOLD = 10000  # Larger explorer totals are estimated
+AUDIT_EXPORT_CHUNK_SIZE = 2000  # Rows fetched per round trip when exporting
+
+# Journal entry posting outbox (apps/accounting/posting_outbox.py)
+ACCOUNTING_POSTING_BATCH_SIZE = 500  # Postings claimed and written per transaction
+ACCOUNTING_POSTING_SYNC = False  # Post each entry as soon as it is queued (no worker)
+
+# Batched depreciation runs (apps/accounting/depreciation_engine.py)
+ACCOUNTING_DEPRECIATION_BATCH_SIZE = 2000  # Schedules / assets per INSERT or UPDATE
+
+# Loyalty points ledger (apps/crm/loyalty_ledger.py)
+LOYALTY_POINTS_EXPIRATION_MONTHS = 12  # Unspent points older than this expire nightly
+
+# Read replica routing (apps/core/db_routing.py); replica aliases are added to
+# DATABASES and listed in DATABASE_REPLICAS by the environment settings
+DATABASE_ROUTERS = ["apps.core.db_routing.ReplicaRouter"]
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_MAX_LAG = 30  # Default seconds of lag analytic reads accept
+DATABASE_REPLICA_LAG_CACHE_TTL = 5  # Seconds a replica's measured lag is reused
+DATABASE_PIN_WINDOW = 10  # Seconds a user's reads stay on the primary after a write
+
+# Read-through cache (apps/core/read_through_cache.py)
+CACHE_LOCK_TIMEOUT = 10  # Seconds one worker may hold a key's recompute lock
+CACHE_TTL_JITTER = 0.1  # TTLs are shortened by up to this fraction
+CACHE_XFETCH_BETA = 1.0  # Higher values refresh earlier ahead of expiry
+CACHE_LOCAL_TTL = 2  # Seconds values stay in the in-process L1 cache
+CACHE_LOCAL_SIZE = 1024  # Entries kept in the L1 cache per process
+
+# Report result cache settings
+REPORT_CACHE_TIMEOUT = 900  # 15 minutes
+REPORT_CACHE_MAX_ROWS = 10000  # Larger results are streamed without caching
+REPORT_REPLICA_MAX_LAG = 300  # Seconds of replica lag reports and exports accept
+
 # Create logs directory if it doesn't exist
 LOGS_DIR = BASE_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
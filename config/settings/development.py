@@ -38,6 +38,18 @@ DATABASES = {
     }
 }
 
+# Read replica (apps/core/db_routing.py). Points at the primary database unless
+# POSTGRES_REPLICA_HOST is set, and is only routed to when that is the case.
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "HOST": os.getenv("POSTGRES_REPLICA_HOST", DATABASES["default"]["HOST"]),
+    "PORT": os.getenv("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+    "ATOMIC_REQUESTS": False,
+    "OPTIONS": {"options": "-c statement_timeout=120000"},  # Reports may run for 2 minutes
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_REPLICAS = ["replica"] if os.getenv("POSTGRES_REPLICA_HOST") else []
+
 # Redis Cache Configuration - Development
 CACHES = {
     "default": {
@@ -80,6 +92,9 @@ CACHES = {
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
 
+# Post journal entries as soon as they are queued, without a Celery worker
+ACCOUNTING_POSTING_SYNC = os.getenv("ACCOUNTING_POSTING_SYNC", "True") == "True"
+
 # Email Configuration - Development (Console backend)
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@jewelryshop.local")
@@ -162,7 +177,8 @@ SILKY_AUTHORISATION = True
 SILKY_MAX_RECORDED_REQUESTS = 10000
 SILKY_INTERCEPT_PERCENT = 100  # Profile all requests
 SILKY_META = True
-SILKY_ANALYZE_QUERIES = True
+# EXPLAIN ANALYZE runs the statement again, which would apply every F() update twice
+SILKY_ANALYZE_QUERIES = False
 
 # Waffle - Create missing flags automatically in development
 WAFFLE_CREATE_MISSING_FLAGS = True
@@ -74,6 +74,31 @@ if USE_PGBOUNCER:
     DATABASES["default"]["CONN_MAX_AGE"] = 0
     DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
 
+# Read replicas for reports, dashboards, the audit explorer and data exports
+# (apps/core/db_routing.py): POSTGRES_REPLICA_HOSTS="replica1,replica2:5433"
+# Replicas are connected to directly and allow longer statements than the primary.
+DATABASE_REPLICAS = []
+replica_statement_timeout = os.getenv("DB_REPLICA_STATEMENT_TIMEOUT", "120000")  # 2 minutes
+if not COLLECTSTATIC_ONLY:
+    for index, replica in enumerate(
+        filter(None, os.getenv("POSTGRES_REPLICA_HOSTS", "").split(","))
+    ):
+        replica_host, _, replica_port = replica.strip().partition(":")
+        alias = f"replica_{index + 1}"
+        DATABASES[alias] = {
+            **DATABASES["default"],
+            "HOST": replica_host,
+            "PORT": replica_port or os.getenv("POSTGRES_PORT", "5432"),
+            "ATOMIC_REQUESTS": False,
+            "CONN_MAX_AGE": 600,
+            "DISABLE_SERVER_SIDE_CURSORS": False,
+            "OPTIONS": {
+                **DATABASES["default"]["OPTIONS"],
+                "options": f"-c statement_timeout={replica_statement_timeout}",
+            },
+        }
+        DATABASE_REPLICAS.append(alias)
+
 # Redis Cache Configuration - Production
 REDIS_USE_SENTINEL = os.getenv("REDIS_USE_SENTINEL", "True").lower() == "true"
 redis_host = os.getenv("REDIS_HOST")
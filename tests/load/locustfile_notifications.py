@@ -0,0 +1,95 @@
+"""
+Notification Updates Load Test - Polling vs Server-Sent Events
+
+Compares what idle browser tabs cost the platform:
+- PollingUser: the old behaviour, fetching the unread count and dropdown
+  every 30 seconds through the full Django middleware stack
+- PushUser: holds the notification stream open (config/asgi.py); the page
+  makes one stream-token request per reconnect and nothing else while idle
+
+Run each class on its own with 2,000 users and compare the request counts in
+the Locust report with the database statements in pg_stat_statements (or
+the django_db_* Prometheus metrics) over the same window. The stream needs
+the ASGI application, e.g. gunicorn with uvicorn workers.
+
+Usage:
+    # Polling (10 minutes)
+    locust -f tests/load/locustfile_notifications.py PollingUser \
+           --host=https://jewelry-shop.local:8443 --users=2000 --spawn-rate=50 \
+           --run-time=10m --html=reports/notifications_polling.html
+
+    # Push (10 minutes)
+    locust -f tests/load/locustfile_notifications.py PushUser \
+           --host=https://jewelry-shop.local:8443 --users=2000 --spawn-rate=50 \
+           --run-time=10m --html=reports/notifications_push.html
+"""
+
+import time
+
+from locust import HttpUser, constant, events, task
+
+
+class NotificationUser(HttpUser):
+    """Logged-in tenant user sitting on a page."""
+
+    abstract = True
+
+    def on_start(self):
+        """Login to tenant portal"""
+        self.client.verify = False
+
+        self.client.post(
+            "/accounts/login/",
+            data={
+                "username": "admin",
+                "password": "admin123",
+            },
+            name="Tenant Login",
+        )
+
+
+class PollingUser(NotificationUser):
+    """Idle tab polling every 30 seconds"""
+
+    wait_time = constant(30)
+
+    @task
+    def poll(self):
+        self.client.get("/notifications/count/", name="Notification Count (poll)")
+        self.client.get("/notifications/dropdown/", name="Notification Dropdown (poll)")
+
+
+class PushUser(NotificationUser):
+    """Idle tab holding the notification stream open"""
+
+    wait_time = constant(5)  # Reconnect delay (the stream's retry interval)
+
+    @task
+    def listen(self):
+        response = self.client.get("/notifications/stream-token/", name="Stream Token")
+        if response.status_code != 200:
+            return
+
+        start = time.perf_counter()
+        received = 0
+        with self.client.get(
+            response.json()["url"],
+            stream=True,
+            catch_response=True,
+            name="Notification Stream",
+            timeout=None,
+        ) as stream:
+            # Runs until the server ends the stream (NOTIFICATION_STREAM_MAX_AGE)
+            for line in stream.iter_lines():
+                if line.startswith(b"event:"):
+                    received += 1
+            stream.success()
+
+        events.request.fire(
+            request_type="SSE",
+            name="Stream Events",
+            response_time=(time.perf_counter() - start) * 1000,
+            response_length=received,
+            exception=None,
+            context={},
+        )
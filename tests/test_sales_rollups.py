@@ -0,0 +1,202 @@
+"""
+Tests for sales rollups.
+
+Tests that hourly and daily rollups match the raw sales, follow refunds and
+voids, are refreshed on commit, and can be repaired by the rebuild command.
+"""
+
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.utils import timezone
+
+import pytest
+
+from apps.core.tenant_context import tenant_context
+from apps.reporting.services import ReportQueryEngine
+from apps.sales.models import ProductSalesRollup, Sale, SaleItem, SalesRollup, Terminal
+from apps.sales.rollups import (
+    find_drifted_days,
+    get_daily_sales,
+    get_hour_bucket,
+    get_sales_totals,
+    refresh_sales_rollups,
+)
+
+
+@pytest.fixture
+def terminal(tenant, branch):
+    """Fixture for creating a POS terminal."""
+    with tenant_context(tenant.id):
+        return Terminal.objects.create(branch=branch, terminal_id="POS-01")
+
+
+@pytest.fixture
+def make_sale(tenant, branch, terminal, tenant_user, inventory_item):
+    """Fixture returning a factory for completed sales with one line item."""
+    counter = {"n": 0}
+
+    def _make_sale(total, quantity=1, status=Sale.COMPLETED):
+        counter["n"] += 1
+        with tenant_context(tenant.id):
+            sale = Sale.objects.create(
+                tenant=tenant,
+                sale_number=f"SALE-ROLLUP-{counter['n']:05d}",
+                branch=branch,
+                terminal=terminal,
+                employee=tenant_user,
+                subtotal=Decimal(total),
+                tax=Decimal("0.00"),
+                total=Decimal(total),
+                payment_method=Sale.CASH,
+                status=status,
+            )
+            SaleItem.objects.create(
+                sale=sale,
+                inventory_item=inventory_item,
+                quantity=quantity,
+                unit_price=Decimal(total) / quantity,
+                subtotal=Decimal(total),
+            )
+        return sale
+
+    return _make_sale
+
+
+def _refresh(tenant, sale):
+    refresh_sales_rollups(tenant.id, sale.created_at)
+
+
+@pytest.mark.django_db
+class TestSalesRollupRefresh:
+    """Test recomputing rollup buckets."""
+
+    def test_hourly_and_daily_rows_match_sales(self, tenant, make_sale):
+        """Hourly and daily rows both carry the completed sales totals."""
+        make_sale("100.00")
+        sale = make_sale("250.00", quantity=2)
+        _refresh(tenant, sale)
+
+        with tenant_context(tenant.id):
+            hourly = SalesRollup.objects.get(tenant=tenant, granularity=SalesRollup.HOUR)
+            daily = SalesRollup.objects.get(tenant=tenant, granularity=SalesRollup.DAY)
+            product = ProductSalesRollup.objects.get(tenant=tenant, granularity=SalesRollup.DAY)
+
+        assert hourly.bucket_start == get_hour_bucket(sale.created_at)
+        assert (hourly.sale_count, hourly.total) == (2, Decimal("350.00"))
+        assert (daily.sale_count, daily.total) == (2, Decimal("350.00"))
+        assert product.quantity_sold == 3
+        assert product.revenue == Decimal("350.00")
+        assert product.sale_count == 2
+        assert product.category_id == sale.items.get().inventory_item.category_id
+
+    def test_refund_and_void_move_totals(self, tenant, make_sale):
+        """Refunded and voided sales leave the completed totals."""
+        kept = make_sale("100.00")
+        refunded = make_sale("40.00")
+        voided = make_sale("25.00")
+
+        with tenant_context(tenant.id):
+            refunded.mark_as_refunded()
+            voided.mark_as_cancelled()
+        _refresh(tenant, kept)
+
+        with tenant_context(tenant.id):
+            daily = SalesRollup.objects.get(tenant=tenant, granularity=SalesRollup.DAY)
+            product = ProductSalesRollup.objects.get(tenant=tenant, granularity=SalesRollup.DAY)
+
+        assert (daily.sale_count, daily.total) == (1, Decimal("100.00"))
+        assert (daily.refund_count, daily.refund_total) == (1, Decimal("40.00"))
+        assert (daily.void_count, daily.void_total) == (1, Decimal("25.00"))
+        assert product.revenue == Decimal("100.00")
+
+    def test_refresh_is_idempotent(self, tenant, make_sale):
+        """Refreshing the same bucket twice does not double count."""
+        sale = make_sale("100.00")
+        _refresh(tenant, sale)
+        _refresh(tenant, sale)
+
+        with tenant_context(tenant.id):
+            assert SalesRollup.objects.filter(tenant=tenant).count() == 2
+
+        today = timezone.localdate()
+        assert get_sales_totals(tenant.id, today, today) == {
+            "total_amount": Decimal("100.00"),
+            "total_count": 1,
+        }
+
+    def test_refreshed_on_commit(self, tenant, make_sale, django_capture_on_commit_callbacks):
+        """Saving a sale schedules a refresh of its bucket after commit."""
+        with django_capture_on_commit_callbacks(execute=True):
+            make_sale("75.00")
+
+        today = timezone.localdate()
+        assert get_daily_sales(tenant.id, today, today) == [
+            {"date": today, "total_sales": Decimal("75.00"), "total_count": 1}
+        ]
+
+
+@pytest.mark.django_db
+class TestSalesRollupRepair:
+    """Test the rebuild command and drift detection."""
+
+    def test_verify_rebuilds_drifted_days(self, tenant, make_sale):
+        """Days missing from the rollups are detected and rebuilt."""
+        make_sale("100.00")
+        today = timezone.localdate()
+
+        assert find_drifted_days(tenant.id, today, today) == [today]
+
+        call_command("rebuild_sales_rollups", tenant=str(tenant.id), verify=True)
+
+        assert find_drifted_days(tenant.id, today, today) == []
+        assert get_sales_totals(tenant.id, today, today)["total_amount"] == Decimal("100.00")
+
+    def test_dry_run_does_not_write(self, tenant, make_sale):
+        """--dry-run only reports drift."""
+        make_sale("100.00")
+
+        call_command("rebuild_sales_rollups", tenant=str(tenant.id), verify=True, dry_run=True)
+
+        with tenant_context(tenant.id):
+            assert not SalesRollup.objects.filter(tenant=tenant).exists()
+
+
+@pytest.mark.django_db
+class TestSalesReportsFromRollups:
+    """Test that sales reports read the rollups."""
+
+    def test_sales_summary(self, tenant, branch, make_sale):
+        """The daily summary report aggregates the daily rollups."""
+        make_sale("100.00")
+        sale = make_sale("300.00")
+        _refresh(tenant, sale)
+
+        engine = ReportQueryEngine(tenant)
+        with tenant_context(tenant.id):
+            rows = engine._get_sales_summary({})
+
+        assert len(rows) == 1
+        assert rows[0]["branch_name"] == branch.name
+        assert rows[0]["total_sales"] == 2
+        assert rows[0]["total_amount"] == Decimal("400.00")
+        assert rows[0]["average_sale"] == Decimal("200.00")
+
+    def test_product_employee_and_branch_reports(self, tenant, tenant_user, make_sale):
+        """The other sales reports read the rollups too."""
+        sale = make_sale("300.00", quantity=3)
+        _refresh(tenant, sale)
+
+        engine = ReportQueryEngine(tenant)
+        with tenant_context(tenant.id):
+            products = engine._get_sales_by_product({})
+            employees = engine._get_sales_by_employee({})
+            branches = engine._get_sales_by_branch({})
+
+        assert products[0]["total_quantity_sold"] == 3
+        assert products[0]["average_price"] == Decimal("100.00")
+        assert employees[0]["email"] == tenant_user.email
+        assert employees[0]["first_sale_date"] == timezone.localdate()
+        assert branches[0]["total_revenue"] == Decimal("300.00")
+        assert branches[0]["active_employees"] == 1
+        assert branches[0]["unique_customers"] == 0
@@ -0,0 +1,293 @@
+"""
+Tests for cluster-wide system metrics collection and alert evaluation.
+
+Covers window aggregation, rule evaluation with hysteresis, broker queue
+depths and the non-blocking task path. Runs against the Redis server of the
+test settings under a key prefix of its own; samplers are replaced by fakes.
+
+Per Requirements 7 - System Monitoring and Health Dashboard
+"""
+
+import time
+import uuid
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from apps.core import alert_tasks, system_metrics
+from apps.core.alert_models import AlertRule, MonitoringAlert
+from apps.core.system_metrics import (
+    CLUSTER,
+    PRIORITY_SEPARATOR,
+    MetricsEvaluator,
+    MetricsSampler,
+    MetricStore,
+    aggregate,
+    clear_threshold,
+    collect_cluster_metrics,
+    percentile,
+    queue_depths,
+)
+
+
+class MetricStoreTestCase(TestCase):
+    """Gives each test a MetricStore under a prefix of its own."""
+
+    def setUp(self):
+        self.store = MetricStore(prefix=f"metrics-test-{uuid.uuid4().hex[:8]}")
+        self.now = time.time()
+
+    def tearDown(self):
+        keys = list(self.store.client.scan_iter(f"{self.store.prefix}:*"))
+        if keys:
+            self.store.client.delete(*keys)
+
+    def record_window(self, host, metric, values, minutes=5):
+        """Store values evenly spread over the last minutes."""
+        step = minutes * 60 / len(values)
+        for i, value in enumerate(values):
+            timestamp = self.now - minutes * 60 + (i + 0.5) * step
+            self.store.record(host, {metric: value}, timestamp=timestamp)
+
+
+class TestWindowAggregation:
+    """Aggregates of a window of samples."""
+
+    def test_percentile_interpolates_between_samples(self):
+        values = list(range(1, 101))
+        assert percentile(values, 95) == pytest.approx(95.05)
+        assert percentile(values, 50) == pytest.approx(50.5)
+        assert percentile(values, 100) == 100
+        assert percentile([42.0], 95) == 42.0
+        # Order of the samples does not matter
+        assert percentile([30, 10, 20], 50) == 20
+
+    def test_aggregations(self):
+        values = [10.0, 50.0, 20.0, 40.0]
+        assert aggregate(values, AlertRule.AVERAGE) == 30.0
+        assert aggregate(values, AlertRule.MAXIMUM) == 50.0
+        assert aggregate(values, AlertRule.LATEST) == 40.0
+        assert aggregate(values, AlertRule.P95) == pytest.approx(48.5)
+        assert aggregate([], AlertRule.AVERAGE) is None
+
+    def test_clear_threshold(self):
+        above = AlertRule(operator=AlertRule.GREATER_THAN, threshold=80.0)
+        below = AlertRule(operator=AlertRule.LESS_THAN, threshold=10.0)
+        assert clear_threshold(above) == pytest.approx(72.0)
+        assert clear_threshold(below) == pytest.approx(11.0)
+        above.clear_threshold = 60.0
+        assert clear_threshold(above) == 60.0
+
+
+class TestMetricStore(MetricStoreTestCase):
+    """Storage of the series."""
+
+    def test_windows_per_host(self):
+        self.record_window("web-1", "cpu_percent", [10, 20, 30])
+        self.record_window("web-2", "cpu_percent", [70, 80])
+        # Outside the window
+        self.store.record("web-1", {"cpu_percent": 99}, timestamp=self.now - 3600)
+
+        since = self.now - 300
+        assert self.store.hosts(since) == ["web-1", "web-2"]
+        windows = self.store.windows("cpu_percent", ["web-1", "web-2", "web-3"], since)
+        assert windows == {"web-1": [10.0, 20.0, 30.0], "web-2": [70.0, 80.0]}
+
+    def test_expired_samples_are_trimmed(self):
+        with self.settings(SYSTEM_METRICS_RETENTION=60):
+            self.store.record("web-1", {"cpu_percent": 10}, timestamp=self.now - 120)
+            self.store.record("web-1", {"cpu_percent": 20}, timestamp=self.now)
+        key = self.store.series_key("web-1", "cpu_percent")
+        assert self.store.client.zcard(key) == 1
+        assert 0 < self.store.client.ttl(key) <= 60
+
+    def test_fake_sampler(self):
+        sampler = MetricsSampler(
+            host="worker-1",
+            store=self.store,
+            sampler=lambda: ({"cpu_percent": 55.0}, {"cpu": {"usage_percent": 55.0}}),
+            extra=lambda: {"worker": {"name": "celery@worker-1", "active_tasks": 2}},
+        )
+        sampler.sample_once()
+
+        assert self.store.windows("cpu_percent", ["worker-1"], self.now - 1) == {"worker-1": [55.0]}
+        assert self.store.latest(["worker-1"]) == {
+            "worker-1": {
+                "cpu": {"usage_percent": 55.0},
+                "worker": {"name": "celery@worker-1", "active_tasks": 2},
+            }
+        }
+
+
+class TestQueueDepth(MetricStoreTestCase):
+    """Broker backlog read with LLEN."""
+
+    def test_counts_every_priority_list(self):
+        client = self.store.client
+        pricing = f"{self.store.prefix}:pricing"
+        reports = f"{self.store.prefix}:reports"
+        empty = f"{self.store.prefix}:empty"
+        client.rpush(pricing, *["message"] * 3)
+        client.rpush(f"{pricing}{PRIORITY_SEPARATOR}9", *["message"] * 2)
+        client.rpush(f"{reports}{PRIORITY_SEPARATOR}3", "message")
+
+        assert queue_depths(client, [pricing, reports, empty]) == {
+            pricing: 5,
+            reports: 1,
+            empty: 0,
+        }
+
+    def test_collected_with_cluster_metrics(self):
+        queue = f"{self.store.prefix}:monitoring"
+        self.store.client.rpush(queue, *["message"] * 4)
+
+        values = collect_cluster_metrics(self.store, broker=self.store.client, queues=[queue])
+
+        assert values["queue_depth"] == 4
+        assert 0 < values["db_connections_percent"] <= 100
+        details = self.store.latest([CLUSTER])[CLUSTER]
+        assert details["queues"] == {queue: 4}
+        assert details["database"]["max_connections"] > 0
+
+
+class TestMetricsEvaluator(MetricStoreTestCase):
+    """Alert rules evaluated over the stored windows."""
+
+    def setUp(self):
+        super().setUp()
+        AlertRule.objects.all().delete()
+        MonitoringAlert.objects.all().delete()
+
+    def create_rule(self, metric_type=AlertRule.CPU_USAGE, **kwargs):
+        defaults = {
+            "name": f"{metric_type} rule",
+            "operator": AlertRule.GREATER_THAN,
+            "threshold": 80.0,
+            "cooldown_minutes": 0,
+            "send_email": False,
+        }
+        defaults.update(kwargs)
+        return AlertRule.objects.create(metric_type=metric_type, **defaults)
+
+    def evaluate(self, trigger=True):
+        evaluator = MetricsEvaluator(store=self.store, now=self.now)
+        return evaluator.run(trigger=trigger), evaluator.resolved
+
+    def tick(self, values, host="worker-1"):
+        """Move a minute ahead with one sample of the CPU."""
+        self.now += 60
+        for value in values:
+            self.store.record(host, {"cpu_percent": value}, timestamp=self.now)
+
+    def test_worst_host_triggers(self):
+        rule = self.create_rule(aggregation=AlertRule.AVERAGE)
+        self.record_window("worker-1", "cpu_percent", [10, 20, 15])
+        self.record_window("worker-2", "cpu_percent", [85, 95, 90])
+
+        created, _ = self.evaluate()
+
+        assert len(created) == 1
+        alert = MonitoringAlert.objects.get()
+        assert alert.alert_rule == rule
+        assert alert.current_value == 90.0
+        assert alert.message.endswith("on worker-2")
+
+    def test_p95_catches_spikes_the_average_hides(self):
+        self.create_rule(name="Average", aggregation=AlertRule.AVERAGE)
+        p95 = self.create_rule(name="P95", aggregation=AlertRule.P95)
+        self.record_window("worker-1", "cpu_percent", [20] * 18 + [99, 99])
+
+        created, _ = self.evaluate()
+
+        assert [alert.alert_rule for alert in created] == [p95]
+
+    def test_hysteresis(self):
+        rule = self.create_rule(aggregation=AlertRule.LATEST, window_minutes=1)
+        states = []
+        for value in [79, 85, 79, 75, 73, 72, 79, 81]:
+            self.tick([value])
+            self.evaluate()
+            states.append(
+                MonitoringAlert.objects.filter(alert_rule=rule)
+                .exclude(status=MonitoringAlert.RESOLVED)
+                .exists()
+            )
+
+        # Fires above 80 and keeps firing until back to 72 (80 less 10%)
+        assert states == [False, True, True, True, True, False, False, True]
+        assert MonitoringAlert.objects.filter(alert_rule=rule).count() == 2
+        resolved = MonitoringAlert.objects.filter(status=MonitoringAlert.RESOLVED).get()
+        assert resolved.resolution_notes == "Auto-resolved: CPU Usage back to 72.00"
+
+    def test_cooldown_after_resolution(self):
+        rule = self.create_rule(aggregation=AlertRule.LATEST, window_minutes=1, cooldown_minutes=30)
+        for value in [90, 50, 90]:
+            self.tick([value])
+            self.evaluate()
+        # Created just now, so the second breach is within the cooldown
+        assert MonitoringAlert.objects.filter(alert_rule=rule).count() == 1
+
+    def test_resolve_only(self):
+        self.create_rule(aggregation=AlertRule.LATEST, window_minutes=1)
+        self.tick([90])
+        created, resolved = self.evaluate(trigger=False)
+        assert (created, resolved) == ([], 0)
+
+        self.evaluate()
+        self.tick([10])
+        assert self.evaluate(trigger=False) == ([], 1)
+
+    def test_cluster_metrics_and_rules_without_samples(self):
+        queue_rule = self.create_rule(AlertRule.CELERY_QUEUE_LENGTH, threshold=100)
+        self.create_rule(AlertRule.DISK_USAGE)
+        self.record_window(CLUSTER, "queue_depth", [150, 250])
+        # The cluster is not a host
+        self.record_window(CLUSTER, "cpu_percent", [99])
+
+        created, _ = self.evaluate()
+
+        assert [alert.alert_rule for alert in created] == [queue_rule]
+        assert created[0].current_value == 200.0
+        assert "on " not in created[0].message
+
+    def test_query_count_independent_of_rule_count(self):
+        def queries_for(rule_count):
+            AlertRule.objects.all().delete()
+            for i in range(rule_count):
+                self.create_rule(name=f"CPU {i}", threshold=50 + i)
+                self.create_rule(AlertRule.MEMORY_USAGE, name=f"Memory {i}", threshold=50 + i)
+            with CaptureQueriesContext(connection) as queries:
+                created, _ = self.evaluate()
+            assert len(created) == 2 * rule_count
+            return len(queries)
+
+        self.record_window("worker-1", "cpu_percent", [95])
+        self.record_window("worker-1", "memory_percent", [95])
+        assert queries_for(2) == queries_for(10)
+
+
+class TestNonBlockingTasks(MetricStoreTestCase):
+    """The periodic tasks never sleep or wait for a CPU reading."""
+
+    def test_task_path_does_not_block(self):
+        AlertRule.objects.create(
+            name="CPU", metric_type=AlertRule.CPU_USAGE, threshold=80.0, send_email=False
+        )
+        self.record_window("worker-1", "cpu_percent", [95])
+
+        with (
+            mock.patch.object(system_metrics, "MetricStore", return_value=self.store),
+            mock.patch("time.sleep", side_effect=AssertionError("sleep in task path")),
+            mock.patch("psutil.cpu_percent", side_effect=AssertionError("CPU sampled in task")),
+        ):
+            start = time.perf_counter()
+            alert_tasks.collect_cluster_metrics()
+            assert alert_tasks.check_system_metrics() == 1
+            elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.5
+        assert self.store.latest([CLUSTER])
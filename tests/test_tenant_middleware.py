@@ -514,3 +514,95 @@ class TestTenantContextMiddlewareEdgeCases(TestCase):
         assert self.middleware._is_platform_admin(user_with_role) is True
 
         clear_tenant_context()
+
+
+@pytest.mark.django_db
+class TestTenantResolutionCache(TestCase):
+    """Test the cached, single-statement tenant resolution."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        enable_rls_bypass()
+
+        self.factory = RequestFactory()
+        self.middleware = TenantContextMiddleware(get_response=lambda r: Mock())
+
+        self.tenant = Tenant.objects.create(
+            company_name="Cached Shop", slug="cached-shop", status=Tenant.ACTIVE
+        )
+        self.user = User.objects.create_user(
+            username="cacheduser",
+            password="testpass123",
+            tenant=self.tenant,
+            role=User.TENANT_OWNER,
+        )
+
+        clear_tenant_context()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        try:
+            clear_tenant_context()
+        except Exception:
+            pass
+
+    def _request(self):
+        request = self.factory.get("/dashboard/")
+        request.user = self.user
+        request.session = {}
+        return request
+
+    def _statement_count(self):
+        from django_prometheus.db.metrics import execute_total
+
+        return execute_total.labels("default", "postgresql")._value.get()
+
+    def test_cached_request_costs_one_statement(self):
+        """Once the tenant is cached, setting up a request is a single statement."""
+        self.middleware.process_request(self._request())
+
+        before = self._statement_count()
+        request = self._request()
+        response = self.middleware.process_request(request)
+
+        assert self._statement_count() - before == 1
+        assert response is None
+        assert request.tenant.id == self.tenant.id
+        assert get_current_tenant() == self.tenant.id
+
+    def test_tenant_save_invalidates_cache(self):
+        """Suspending a tenant takes effect on the next request."""
+        self.middleware.process_request(self._request())
+
+        enable_rls_bypass()
+        self.tenant.status = Tenant.SUSPENDED
+        self.tenant.save()
+
+        response = self.middleware.process_request(self._request())
+
+        assert response.status_code == 403
+
+    def test_jwt_decoded_once_per_request(self):
+        """The validated token is shared by middleware and DRF authentication."""
+        from rest_framework.request import Request
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from apps.core.tenant_resolver import CachedJWTAuthentication, get_validated_token
+
+        token = AccessToken.for_user(self.user)
+        token["tenant_id"] = str(self.tenant.id)
+        request = self.factory.get("/api/dashboard/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        request.user = AnonymousUser()
+        request.session = {}
+
+        assert self.middleware.process_request(request) is None
+        assert request.tenant_id == self.tenant.id
+
+        with patch(
+            "apps.core.tenant_resolver.JWTAuthentication.get_validated_token"
+        ) as mock_validate:
+            user, validated = CachedJWTAuthentication().authenticate(Request(request))
+
+        mock_validate.assert_not_called()
+        assert user == self.user
+        assert validated is get_validated_token(request)